@@ -39,6 +39,12 @@ from configuration_modules.config_check_ins import CreateCheckinConfiguration
 from configuration_modules.config_live_graphs import CreateLiveGraphsConfiguration
 from configuration_modules.config_database_graphs import CreateDatabaseGraphsConfiguration
 from configuration_modules.config_sensor_insights import CreateSensorInsightsConfiguration
+from configuration_modules.config_database_retention import CreateDatabaseRetentionConfiguration
+from configuration_modules.config_database_backup import CreateDatabaseBackupConfiguration
+from configuration_modules.config_graph_workers import CreateGraphWorkersConfiguration
+from configuration_modules.config_sensor_snapshots import CreateSensorSnapshotsConfiguration
+from configuration_modules.config_recent_readings import CreateRecentReadingsConfiguration
+from configuration_modules.config_imu_capture import CreateIMUCaptureConfiguration
 
 logger.primary_logger.info(" -- Loading Configurations")
 # Make sure all hardware based sensors are marked as not installed if lacking root permissions
@@ -65,4 +71,10 @@ checkin_config = CreateCheckinConfiguration()
 live_graphs_config = CreateLiveGraphsConfiguration()
 db_graphs_config = CreateDatabaseGraphsConfiguration()
 sensor_insights = CreateSensorInsightsConfiguration()
+database_retention_config = CreateDatabaseRetentionConfiguration()
+database_backup_config = CreateDatabaseBackupConfiguration()
+graph_workers_config = CreateGraphWorkersConfiguration()
+sensor_snapshots_config = CreateSensorSnapshotsConfiguration()
+recent_readings_config = CreateRecentReadingsConfiguration()
+imu_capture_config = CreateIMUCaptureConfiguration()
 logger.primary_logger.info(" -- Configurations Loaded")
@@ -0,0 +1,77 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateDatabaseBackupConfiguration(CreateGeneralConfiguration):
+    """ Creates the Database Backup Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.database_backup_config, load_from_file=load_from_file)
+        self.config_file_header = "Database Backup Configuration. Enable = 1 and Disable = 0. Backups to keep 0 = All"
+        self.valid_setting_count = 3
+        self.config_settings_names = [
+            "Enable scheduled database backups", "Hours between scheduled backups", "Scheduled backups to keep"
+        ]
+
+        self.enable_scheduled_backups = 0
+        self.backup_run_hours = 24.0
+        self.backups_to_keep = 7
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def update_with_html_request(self, html_request):
+        """ Updates the Database Backup configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML Database Backup Configuration Update Check")
+        self.enable_scheduled_backups = 0
+        if html_request.form.get("enable_scheduled_backups") is not None:
+            self.enable_scheduled_backups = 1
+        if html_request.form.get("backup_run_hours") is not None:
+            self.backup_run_hours = float(html_request.form.get("backup_run_hours"))
+        if html_request.form.get("backups_to_keep") is not None:
+            self.backups_to_keep = int(html_request.form.get("backups_to_keep"))
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [
+            str(self.enable_scheduled_backups), str(self.backup_run_hours), str(self.backups_to_keep)
+        ]
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.enable_scheduled_backups = int(self.config_settings[0].strip())
+            self.backup_run_hours = float(self.config_settings[1].strip())
+            self.backups_to_keep = int(self.config_settings[2].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("Database Backup Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving Database Backup Configuration.")
+                self.save_config_to_file()
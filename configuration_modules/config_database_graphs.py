@@ -20,6 +20,7 @@ from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules.app_generic_classes import CreateGeneralConfiguration
 from operations_modules import app_cached_variables
+from operations_modules.graph_downsampling import downsample_modes_list, downsample_mode_lttb
 
 
 class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
@@ -30,7 +31,7 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
             config_file_location = file_locations.db_graphs_config
         CreateGeneralConfiguration.__init__(self, config_file_location, load_from_file=load_from_file)
         self.config_file_header = "Database Graphs Configuration. Enable = 1 and Disable = 0"
-        self.valid_setting_count = 32
+        self.valid_setting_count = 34
         self.config_settings_names = [
             "SQL Recording Type", "Render Engine", "Maximum Data Points per Graph", "Skip Data Points between Plots",
             "DateTime Offset in Hours", "Start Date", "End Date", "SQL Database Selection", "MQTT Database Checked",
@@ -39,7 +40,7 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
             "Enable Dew Point", "Enable Distance", "Enable GAS", "Enable Particulate Matter", "Enable Lumen",
             "Enable Colours", "Enable Ultra Violet", "Enable Accelerometer", "Enable Magnetometer", "Enable Gyroscope",
             "Database Location", "Graph Database Table Name", "Graph using Date Range", "Graph Past Hours",
-            "Graph Past Hours Multiplier"
+            "Graph Past Hours Multiplier", "Graph Downsampling Mode", "Graph Width in Pixels"
         ]
 
         self.sql_recording_type = app_cached_variables.database_variables.table_interval
@@ -47,6 +48,9 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
         self.max_graph_data_points = 100000
         self.skip_data_between_plots = 3
         self.date_time_hours_offset = 0.0
+        # Graph lines are downsampled to about one point per pixel. Options: None, LTTB, MinMax
+        self.downsample_mode = downsample_mode_lttb
+        self.graph_width_pixels = 1920
 
         self.graph_past_hours = 168.0
         self.hours_multiplier = 24.0
@@ -199,6 +203,10 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
             self.max_graph_data_points = int(html_request.form.get("graph_max_data_points"))
         if html_request.form.get("graph_skip_data_points") is not None:
             self.skip_data_between_plots = int(html_request.form.get("graph_skip_data_points"))
+        if html_request.form.get("graph_downsample_mode") in downsample_modes_list:
+            self.downsample_mode = str(html_request.form.get("graph_downsample_mode"))
+        if html_request.form.get("graph_width_pixels") is not None:
+            self.graph_width_pixels = int(html_request.form.get("graph_width_pixels"))
 
         if html_request.form.get("utc_hour_offset") is not None:
             self.date_time_hours_offset = float(html_request.form.get("utc_hour_offset"))
@@ -276,7 +284,7 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
             str(self.db_graph_lumen), str(self.db_graph_colours), str(self.db_graph_ultra_violet),
             str(self.db_graph_acc), str(self.db_graph_mag), str(self.db_graph_gyro), str(self.database_location),
             str(self.graph_db_table), str(self.graph_using_date_range), str(self.graph_past_hours),
-            str(self.hours_multiplier)
+            str(self.hours_multiplier), str(self.downsample_mode), str(self.graph_width_pixels)
         ]
 
     def update_variables_from_settings_list(self):
@@ -313,6 +321,8 @@ class CreateDatabaseGraphsConfiguration(CreateGeneralConfiguration):
             self.graph_using_date_range = int(self.config_settings[29].strip())
             self.graph_past_hours = float(self.config_settings[30].strip())
             self.hours_multiplier = float(self.config_settings[31].strip())
+            self.downsample_mode = self.config_settings[32].strip()
+            self.graph_width_pixels = int(self.config_settings[33].strip())
         except Exception as error:
             if self.load_from_file:
                 logger.primary_logger.debug("Database Graphs Config: " + str(error))
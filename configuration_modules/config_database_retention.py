@@ -0,0 +1,107 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateDatabaseRetentionConfiguration(CreateGeneralConfiguration):
+    """ Creates the Database Retention Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.database_retention_config,
+                                            load_from_file=load_from_file)
+        self.config_file_header = "Database Retention Configuration. Enable = 1 and Disable = 0. Days 0 = Forever"
+        self.valid_setting_count = 9
+        self.config_settings_names = [
+            "Enable automatic database retention", "Hours between retention runs", "Interval data days to keep",
+            "Trigger data days to keep", "Minute rollup days to keep", "Hour rollup days to keep",
+            "Day rollup days to keep", "MQTT Subscriber data days to keep", "Sensor Checkin data days to keep"
+        ]
+
+        self.enable_database_retention = 0
+        self.retention_run_hours = 6.0
+
+        self.interval_days = 90.0
+        self.trigger_days = 90.0
+        self.rollup_minute_days = 30.0
+        self.rollup_hour_days = 0.0
+        self.rollup_day_days = 0.0
+        self.mqtt_subscriber_days = 90.0
+        self.checkin_days = 0.0
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def update_with_html_request(self, html_request):
+        """ Updates the Database Retention configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML Database Retention Configuration Update Check")
+        self.enable_database_retention = 0
+        if html_request.form.get("enable_database_retention") is not None:
+            self.enable_database_retention = 1
+        if html_request.form.get("retention_run_hours") is not None:
+            self.retention_run_hours = float(html_request.form.get("retention_run_hours"))
+        if html_request.form.get("interval_days") is not None:
+            self.interval_days = float(html_request.form.get("interval_days"))
+        if html_request.form.get("trigger_days") is not None:
+            self.trigger_days = float(html_request.form.get("trigger_days"))
+        if html_request.form.get("rollup_minute_days") is not None:
+            self.rollup_minute_days = float(html_request.form.get("rollup_minute_days"))
+        if html_request.form.get("rollup_hour_days") is not None:
+            self.rollup_hour_days = float(html_request.form.get("rollup_hour_days"))
+        if html_request.form.get("rollup_day_days") is not None:
+            self.rollup_day_days = float(html_request.form.get("rollup_day_days"))
+        if html_request.form.get("mqtt_subscriber_days") is not None:
+            self.mqtt_subscriber_days = float(html_request.form.get("mqtt_subscriber_days"))
+        if html_request.form.get("checkin_days") is not None:
+            self.checkin_days = float(html_request.form.get("checkin_days"))
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [
+            str(self.enable_database_retention), str(self.retention_run_hours), str(self.interval_days),
+            str(self.trigger_days), str(self.rollup_minute_days), str(self.rollup_hour_days),
+            str(self.rollup_day_days), str(self.mqtt_subscriber_days), str(self.checkin_days)
+        ]
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.enable_database_retention = int(self.config_settings[0].strip())
+            self.retention_run_hours = float(self.config_settings[1].strip())
+            self.interval_days = float(self.config_settings[2].strip())
+            self.trigger_days = float(self.config_settings[3].strip())
+            self.rollup_minute_days = float(self.config_settings[4].strip())
+            self.rollup_hour_days = float(self.config_settings[5].strip())
+            self.rollup_day_days = float(self.config_settings[6].strip())
+            self.mqtt_subscriber_days = float(self.config_settings[7].strip())
+            self.checkin_days = float(self.config_settings[8].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("Database Retention Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving Database Retention Configuration.")
+                self.save_config_to_file()
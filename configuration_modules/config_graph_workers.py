@@ -0,0 +1,81 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateGraphWorkersConfiguration(CreateGeneralConfiguration):
+    """ Creates the Graph Workers Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.graph_workers_config, load_from_file=load_from_file)
+        self.config_file_header = "Graph Workers Configuration. Worker count changes are applied after a restart"
+        self.valid_setting_count = 3
+        self.config_settings_names = [
+            "Number of graph workers", "Worker memory limit in MB (0 = No limit)",
+            "Graph cache size in MB (0 = Disabled)"
+        ]
+
+        self.graph_worker_count = 2
+        # Workers are replaced after a graph if their memory use grew by more than this since they started
+        self.worker_memory_limit_mb = 256
+        # Created graphs are kept to be reused until the database changes, oldest used are removed first
+        self.graph_cache_size_mb = 100
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def update_with_html_request(self, html_request):
+        """ Updates the Graph Workers configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML Graph Workers Configuration Update Check")
+        if html_request.form.get("graph_worker_count") is not None:
+            self.graph_worker_count = int(html_request.form.get("graph_worker_count"))
+            if self.graph_worker_count < 1:
+                self.graph_worker_count = 1
+        if html_request.form.get("worker_memory_limit_mb") is not None:
+            self.worker_memory_limit_mb = int(html_request.form.get("worker_memory_limit_mb"))
+        if html_request.form.get("graph_cache_size_mb") is not None:
+            self.graph_cache_size_mb = int(html_request.form.get("graph_cache_size_mb"))
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [
+            str(self.graph_worker_count), str(self.worker_memory_limit_mb), str(self.graph_cache_size_mb)
+        ]
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.graph_worker_count = int(self.config_settings[0].strip())
+            self.worker_memory_limit_mb = int(self.config_settings[1].strip())
+            self.graph_cache_size_mb = int(self.config_settings[2].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("Graph Workers Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving Graph Workers Configuration.")
+                self.save_config_to_file()
@@ -0,0 +1,91 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateIMUCaptureConfiguration(CreateGeneralConfiguration):
+    """ Creates the IMU Capture Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.imu_capture_config, load_from_file=load_from_file)
+        self.config_file_header = "IMU (Accelerometer, Magnetometer & Gyroscope) Capture Configuration. " + \
+                                  "Enable = 1 and Disable = 0"
+        self.valid_setting_count = 5
+        self.config_settings_names = [
+            "Enable high rate IMU capture", "Samples per second", "Seconds per recorded summary",
+            "FFT frequency bands per summary", "Seconds of samples kept in memory"
+        ]
+
+        self.enable_imu_capture = 0
+        # Actual sample rate is limited by how long the IMU sensors take to read
+        self.sample_rate_hz = 100.0
+        self.summary_window_seconds = 10.0
+        self.fft_band_count = 8
+        # Each sample uses 16 bytes per reading (9 readings per sample with all IMU sensors)
+        self.ring_buffer_seconds = 60.0
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def update_with_html_request(self, html_request):
+        """ Updates the IMU Capture configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML IMU Capture Configuration Update Check")
+
+        self.enable_imu_capture = 0
+        if html_request.form.get("enable_imu_capture") is not None:
+            self.enable_imu_capture = 1
+        if html_request.form.get("imu_sample_rate_hz") is not None:
+            self.sample_rate_hz = min(max(float(html_request.form.get("imu_sample_rate_hz")), 1.0), 1000.0)
+        if html_request.form.get("imu_summary_window_seconds") is not None:
+            self.summary_window_seconds = max(float(html_request.form.get("imu_summary_window_seconds")), 1.0)
+        if html_request.form.get("imu_fft_band_count") is not None:
+            self.fft_band_count = max(int(html_request.form.get("imu_fft_band_count")), 1)
+        if html_request.form.get("imu_ring_buffer_seconds") is not None:
+            self.ring_buffer_seconds = max(float(html_request.form.get("imu_ring_buffer_seconds")), 1.0)
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [
+            str(self.enable_imu_capture), str(self.sample_rate_hz), str(self.summary_window_seconds),
+            str(self.fft_band_count), str(self.ring_buffer_seconds)
+        ]
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.enable_imu_capture = int(self.config_settings[0].strip())
+            self.sample_rate_hz = float(self.config_settings[1].strip())
+            self.summary_window_seconds = float(self.config_settings[2].strip())
+            self.fft_band_count = int(self.config_settings[3].strip())
+            self.ring_buffer_seconds = float(self.config_settings[4].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("IMU Capture Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving IMU Capture Configuration.")
+                self.save_config_to_file()
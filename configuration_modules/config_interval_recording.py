@@ -27,13 +27,14 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
     def __init__(self, load_from_file=True):
         CreateGeneralConfiguration.__init__(self, file_locations.interval_config, load_from_file=load_from_file)
         self.config_file_header = "Enable = 1 and Disable = 0"
-        self.valid_setting_count = 19
+        self.valid_setting_count = 21
         self.config_settings_names = [
             "Enable interval recording", "Recording interval in seconds * Caution *", "Enable sensor uptime",
             "Enable CPU temperature", "Enable environmental temperature", "Enable pressure", "Enable humidity",
             "Enable altitude", "Enable distance", "Enable lumen", "Enable color", "Enable ultra violet", "Enable GAS",
             "Enable particulate matter", "Enable accelerometer", "Enable magnetometer", "Enable gyroscope",
-            "Enable Dew Point", "Enable GPS"
+            "Enable Dew Point", "Enable GPS", "Storage format 0 = Text, 1 = Typed, 2 = Narrow",
+            "Enable monthly database shards"
         ]
 
         self.enable_interval_recording = 1
@@ -59,6 +60,12 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
 
         self.gps_enabled = 1
 
+        self.storage_format_text = 0
+        self.storage_format_typed = 1
+        self.storage_format_narrow = 2
+        self.storage_format = self.storage_format_text
+        self.enable_database_shards = 0
+
         self.update_configuration_settings_list()
         if load_from_file:
             self._init_config_variables()
@@ -90,6 +97,7 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
         self.magnetometer_enabled = 0
         self.gyroscope_enabled = 0
         self.gps_enabled = 0
+        self.enable_database_shards = 0
 
         if html_request.form.get("enable_interval_recording") is not None:
             self.enable_interval_recording = 1
@@ -131,6 +139,10 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
             self.gyroscope_enabled = 1
         if html_request.form.get("gps") is not None:
             self.gps_enabled = 1
+        if html_request.form.get("storage_format") is not None:
+            self.storage_format = int(html_request.form.get("storage_format"))
+        if html_request.form.get("enable_database_shards") is not None:
+            self.enable_database_shards = 1
         self.update_configuration_settings_list()
 
     def update_configuration_settings_list(self):
@@ -142,7 +154,8 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
             str(self.humidity_enabled), str(self.altitude_enabled), str(self.distance_enabled), str(self.lumen_enabled),
             str(self.colour_enabled), str(self.ultra_violet_enabled), str(self.gas_enabled),
             str(self.particulate_matter_enabled), str(self.accelerometer_enabled), str(self.magnetometer_enabled),
-            str(self.gyroscope_enabled), str(self.dew_point_enabled), str(self.gps_enabled)
+            str(self.gyroscope_enabled), str(self.dew_point_enabled), str(self.gps_enabled),
+            str(self.storage_format), str(self.enable_database_shards)
         ]
 
     def _update_variables_from_settings_list(self):
@@ -166,6 +179,8 @@ class CreateIntervalRecordingConfiguration(CreateGeneralConfiguration):
             self.gyroscope_enabled = int(self.config_settings[16])
             self.dew_point_enabled = int(self.config_settings[17])
             self.gps_enabled = int(self.config_settings[18])
+            self.storage_format = int(self.config_settings[19])
+            self.enable_database_shards = int(self.config_settings[20])
         except Exception as error:
             if self.load_from_file:
                 logger.primary_logger.debug("Interval Config: " + str(error))
@@ -19,6 +19,7 @@
 from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules.app_generic_classes import CreateGeneralConfiguration
+from operations_modules.graph_downsampling import downsample_modes_list, downsample_mode_min_max
 
 
 class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
@@ -27,14 +28,15 @@ class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
     def __init__(self, load_from_file=True):
         CreateGeneralConfiguration.__init__(self, file_locations.live_graphs_config, load_from_file=load_from_file)
         self.config_file_header = "Live Graphs Configuration. Enable = 1 and Disable = 0"
-        self.valid_setting_count = 22
+        self.valid_setting_count = 23
         self.config_settings_names = [
             "Sensor Address", "Graph Update Interval in seconds", "Enable Uptime", "Enable CPU Temperature",
             "Enable Environmental Temperature", "Enable Pressure", "Enable Altitude", "Enable Humidity",
             "Enable Dew Point", "Enable Distance", "Enable GAS", "Enable Particulate Matter", "Enable Lumen",
             "Enable Colours", "Enable Ultra Violet", "Enable Accelerometer", "Enable Magnetometer", "Enable Gyroscope",
             "Graphs Per Row - Enter 12 for 1 sensor per row, 6 for 2, 4 for 3 and 3 for 4", "Enable SSL Verification",
-            "Max Data Points per Graph", "Enable Performance Mode (Renders graphs faster)"
+            "Max Data Points per Graph", "Enable Performance Mode (Renders graphs faster)",
+            "Graph Downsampling Mode"
         ]
 
         self.graph_sensor_address = None
@@ -43,6 +45,8 @@ class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
         self.max_graph_data_points = 720  # 1 hour long graphs, assuming 5 seconds for the update interval
         self.enable_ssl_verification = 1
         self.enable_performance_mode = 1
+        # Done in the browser by Chart.js to the graph's width in pixels. Options: None, LTTB, MinMax
+        self.downsample_mode = downsample_mode_min_max
 
         self.live_graph_uptime = 1
         self.live_graph_cpu_temp = 1
@@ -135,6 +139,8 @@ class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
 
         if html_request.form.get("graph_max_data_points") is not None:
             self.max_graph_data_points = int(html_request.form.get("graph_max_data_points"))
+        if html_request.form.get("graph_downsample_mode") in downsample_modes_list:
+            self.downsample_mode = str(html_request.form.get("graph_downsample_mode"))
 
         if html_request.form.get("sensor_uptime") is not None:
             self.live_graph_uptime = 1
@@ -182,7 +188,8 @@ class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
             str(self.live_graph_distance), str(self.live_graph_gas), str(self.live_graph_particulate_matter),
             str(self.live_graph_lumen), str(self.live_graph_colours), str(self.live_graph_ultra_violet),
             str(self.live_graph_acc), str(self.live_graph_mag), str(self.live_graph_gyro), str(self.graphs_per_row),
-            str(self.enable_ssl_verification), str(self.max_graph_data_points), str(self.enable_performance_mode)
+            str(self.enable_ssl_verification), str(self.max_graph_data_points), str(self.enable_performance_mode),
+            str(self.downsample_mode)
         ]
 
     def _update_variables_from_settings_list(self):
@@ -211,6 +218,7 @@ class CreateLiveGraphsConfiguration(CreateGeneralConfiguration):
             self.enable_ssl_verification = int(self.config_settings[19].strip())
             self.max_graph_data_points = int(self.config_settings[20].strip())
             self.enable_performance_mode = int(self.config_settings[21].strip())
+            self.downsample_mode = self.config_settings[22].strip()
         except Exception as error:
             if self.load_from_file:
                 logger.primary_logger.debug("Live Graphs Config: " + str(error))
@@ -0,0 +1,81 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateRecentReadingsConfiguration(CreateGeneralConfiguration):
+    """ Creates the Recent Readings Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.recent_readings_config, load_from_file=load_from_file)
+        self.config_file_header = "Recent Readings (In memory) Configuration. Enable = 1 and Disable = 0"
+        self.valid_setting_count = 3
+        self.config_settings_names = [
+            "Enable keeping recent readings in memory", "Hours of recent readings to keep",
+            "Max readings kept per sensor reading type"
+        ]
+
+        # Filled by sensor reads done for other services (Interval recording, triggers, etc.)
+        self.enable_recent_readings = 0
+        self.recent_readings_hours = 1.0
+        # Limits memory use of fast sensors, each reading uses 16 bytes
+        self.max_readings_per_metric = 36000
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def update_with_html_request(self, html_request):
+        """ Updates the Recent Readings configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML Recent Readings Configuration Update Check")
+
+        self.enable_recent_readings = 0
+        if html_request.form.get("enable_recent_readings") is not None:
+            self.enable_recent_readings = 1
+        if html_request.form.get("recent_readings_hours") is not None:
+            self.recent_readings_hours = max(float(html_request.form.get("recent_readings_hours")), 0.0)
+        if html_request.form.get("max_readings_per_metric") is not None:
+            self.max_readings_per_metric = max(int(html_request.form.get("max_readings_per_metric")), 1)
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [
+            str(self.enable_recent_readings), str(self.recent_readings_hours), str(self.max_readings_per_metric)
+        ]
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.enable_recent_readings = int(self.config_settings[0].strip())
+            self.recent_readings_hours = float(self.config_settings[1].strip())
+            self.max_readings_per_metric = int(self.config_settings[2].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("Recent Readings Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving Recent Readings Configuration.")
+                self.save_config_to_file()
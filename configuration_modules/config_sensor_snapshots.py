@@ -0,0 +1,106 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.app_cached_variables import latency_variables
+from operations_modules.app_generic_classes import CreateGeneralConfiguration
+
+
+class CreateSensorSnapshotsConfiguration(CreateGeneralConfiguration):
+    """ Creates the Sensor Snapshots Configuration object and loads settings from file (by default). """
+
+    def __init__(self, load_from_file=True):
+        CreateGeneralConfiguration.__init__(self, file_locations.sensor_snapshots_config,
+                                            load_from_file=load_from_file)
+        self.config_file_header = "Sensor Reading Snapshots Configuration. Enable = 1 and Disable = 0"
+        self.valid_setting_count = 16
+        self.config_settings_names = ["Enable Sensor Reading Snapshots"]
+        for sensor_name in latency_variables.get_all_latency_as_list():
+            self.config_settings_names.append(sensor_name + " snapshot seconds (0 = Always read sensor)")
+
+        self.enable_snapshots = 1
+        # A sensor's reading is shared with everything that asks for it within this many seconds
+        self.snapshot_seconds = {
+            latency_variables.cpu_temperature: 5.0,
+            latency_variables.environment_temperature: 2.0,
+            latency_variables.pressure: 2.0,
+            latency_variables.altitude: 2.0,
+            latency_variables.humidity: 2.0,
+            latency_variables.distance: 0.5,
+            latency_variables.gas: 5.0,
+            latency_variables.particulate_matter: 5.0,
+            latency_variables.lumen: 0.5,
+            latency_variables.colours: 0.5,
+            latency_variables.ultra_violet: 0.5,
+            latency_variables.accelerometer_xyz: 0.1,
+            latency_variables.magnetometer_xyz: 0.1,
+            latency_variables.gyroscope_xyz: 0.1,
+            latency_variables.gps: 1.0
+        }
+
+        self.update_configuration_settings_list()
+        if load_from_file:
+            self._init_config_variables()
+            self._update_variables_from_settings_list()
+
+    def set_config_with_str(self, config_file_text):
+        super().set_config_with_str(config_file_text)
+        self._update_variables_from_settings_list()
+
+    def get_snapshot_seconds(self, sensor_name):
+        """ Returns the snapshot seconds of the provided sensor (Latency name), 0 if snapshots are disabled. """
+        if self.enable_snapshots:
+            return self.snapshot_seconds.get(sensor_name, 0.0)
+        return 0.0
+
+    @staticmethod
+    def get_html_form_name(sensor_name):
+        return "snapshot_seconds_" + sensor_name.lower().replace(" ", "_")
+
+    def update_with_html_request(self, html_request):
+        """ Updates the Sensor Snapshots configuration based on provided HTML configuration data. """
+        logger.network_logger.debug("Starting HTML Sensor Snapshots Configuration Update Check")
+
+        self.enable_snapshots = 0
+        if html_request.form.get("enable_sensor_snapshots") is not None:
+            self.enable_snapshots = 1
+        for sensor_name in self.snapshot_seconds:
+            html_form_name = self.get_html_form_name(sensor_name)
+            if html_request.form.get(html_form_name) is not None:
+                self.snapshot_seconds[sensor_name] = max(float(html_request.form.get(html_form_name)), 0.0)
+        self.update_configuration_settings_list()
+
+    def update_configuration_settings_list(self):
+        """ Set's config_settings variable list based on current settings. """
+        self.config_settings = [str(self.enable_snapshots)]
+        for snapshot_seconds in self.snapshot_seconds.values():
+            self.config_settings.append(str(snapshot_seconds))
+
+    def _update_variables_from_settings_list(self):
+        try:
+            self.enable_snapshots = int(self.config_settings[0].strip())
+            for index, sensor_name in enumerate(self.snapshot_seconds):
+                self.snapshot_seconds[sensor_name] = float(self.config_settings[index + 1].strip())
+        except Exception as error:
+            if self.load_from_file:
+                logger.primary_logger.debug("Sensor Snapshots Config: " + str(error))
+            self.update_configuration_settings_list()
+            if self.load_from_file:
+                logger.primary_logger.info("Saving Sensor Snapshots Configuration.")
+                self.save_config_to_file()
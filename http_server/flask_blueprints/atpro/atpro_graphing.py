@@ -22,11 +22,12 @@ from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules import app_cached_variables
 from operations_modules.app_generic_classes import CreateLiveGraphWrapperNetworkGetCommands
-from operations_modules.app_generic_functions import thread_function
+from operations_modules.graph_downsampling import downsample_mode_none, downsample_mode_lttb, downsample_mode_min_max
 from configuration_modules import app_config_access
-from http_server import server_plotly_graph
 from http_server import server_plotly_graph_variables
+from http_server.server_plotly_graph_workers import graph_worker_pool
 from http_server.server_http_generic_functions import get_html_checkbox_state
+from http_server.flask_blueprints.graph_data_api import get_graph_viewer_url
 from http_server.flask_blueprints.atpro.atpro_generic import get_html_atpro_index, get_file_creation_date
 from http_server.server_http_auth import auth
 
@@ -59,15 +60,35 @@ let {{ ChartName }} = new Chart({{ ChartName }}ctx,
 """
 chart_options_standard = """
         options: {
-            plugins: {}
+            parsing: false,
+            scales: {{ ChartScales }},
+            plugins: {{ ChartPlugins }}
         }
 """
 chart_options_performance = """
         options: {
             animation: false,
-            plugins: {}
+            parsing: false,
+            scales: {{ ChartScales }},
+            plugins: {{ ChartPlugins }}
         }
 """
+# Readings are {x: epoch milliseconds, y: reading} points on a linear axis, required by Chart.js decimation
+chart_options_scales = """{
+                x: {
+                    type: 'linear',
+                    ticks: {callback: function (value) {return new Date(value).toLocaleTimeString();}}
+                }
+            }"""
+chart_options_plugins = """{
+                decimation: {{ ChartDecimation }},
+                tooltip: {
+                    callbacks: {title: function (items) {return new Date(items[0].parsed.x).toLocaleTimeString();}}
+                }
+            }"""
+chart_decimation_disabled = "{enabled: false}"
+chart_decimation_lttb = "{enabled: true, algorithm: 'lttb'}"
+chart_decimation_min_max = "{enabled: true, algorithm: 'min-max'}"
 live_chart_data_entry = """
 {data: [],
 label: "{{ ChartNameLabel }}",
@@ -80,15 +101,15 @@ fill: false}
 
 live_chart_js_add_graph_data = """
 let {{ ChartName }}set_timeout_timer = 15000;
+// Decimation replaces each dataset's data with the downsampled points, so all readings are kept here
+let {{ ChartName }}readings = {{ ChartName }}.data.datasets.map(() => []);
 async function {{ ChartName }}AddDataToGraph() {
     let {{ ChartName }}update_okay = false;
+    let {{ ChartName }}update_time = Date.now();
     {{ AllFetchCommands }}
     if ({{ ChartName }}update_okay) {
         document.getElementById('{{ ChartName }}container').hidden = false;
-        if ({{ ChartName }}.data.labels.length > {{ GraphMaxDataPoints }}) {
-            {{ ChartName }}.data.labels.shift();
-        }
-        {{ ChartName }}.data.labels.push(new Date().toLocaleTimeString());
+        {{ ChartName }}.data.datasets.forEach((dataset, index) => {dataset.data = {{ ChartName }}readings[index];});
         {{ ChartName }}.update();
         setTimeout({{ ChartName }}AddDataToGraph, {{ ChartUpdateInterval }});
     } else {
@@ -115,10 +136,10 @@ await fetch("{{ SensorDataURL }}")
     .then(data => {
         if (data !== "NoSensor") {
             {{ ChartName }}update_okay = true;
-            if ({{ ChartName }}.data.datasets[{{ DataSetNumber }}].data.length > {{ GraphMaxDataPoints }}) {
-                {{ ChartName }}.data.datasets[{{ DataSetNumber }}].data.shift();
+            if ({{ ChartName }}readings[{{ DataSetNumber }}].length > {{ GraphMaxDataPoints }}) {
+                {{ ChartName }}readings[{{ DataSetNumber }}].shift();
             }
-            {{ ChartName }}.data.datasets[{{ DataSetNumber }}].data.push(data);
+            {{ ChartName }}readings[{{ DataSetNumber }}].push({x: {{ ChartName }}update_time, y: parseFloat(data)});
         }
     })
     .catch(error => {});
@@ -160,7 +181,15 @@ class CreateLiveGraphGenerator:
             return_chart_functions = return_chart_functions.replace("{{ ChartOptions }}", chart_options_performance)
         else:
             return_chart_functions = return_chart_functions.replace("{{ ChartOptions }}", chart_options_standard)
-        return return_chart_functions
+        return_chart_functions = return_chart_functions.replace("{{ ChartScales }}", chart_options_scales)
+        return_chart_functions = return_chart_functions.replace("{{ ChartPlugins }}", chart_options_plugins)
+
+        chart_decimation = chart_decimation_disabled
+        if lgc.downsample_mode == downsample_mode_lttb:
+            chart_decimation = chart_decimation_lttb
+        elif lgc.downsample_mode == downsample_mode_min_max:
+            chart_decimation = chart_decimation_min_max
+        return return_chart_functions.replace("{{ ChartDecimation }}", chart_decimation)
 
     def _get_chart_js_functions(self):
         chart_interval = str(lgc.live_graph_update_interval * 1000)
@@ -201,6 +230,9 @@ def html_atpro_sensor_graphing_live():
         CheckedGPL3=lgc.get_checked_graph_per_line_state(3),
         CheckedGPL4=lgc.get_checked_graph_per_line_state(4),
         GraphMaxDataPoints=lgc.max_graph_data_points,
+        LiveDownsampleNoneSelected=_get_live_downsample_mode_selected(downsample_mode_none),
+        LiveDownsampleLTTBSelected=_get_live_downsample_mode_selected(downsample_mode_lttb),
+        LiveDownsampleMinMaxSelected=_get_live_downsample_mode_selected(downsample_mode_min_max),
         GraphIntervalValue=lgc.live_graph_update_interval,
         CheckedSensorUptime=get_html_checkbox_state(lgc.live_graph_uptime),
         CheckedCPUTemperature=get_html_checkbox_state(lgc.live_graph_cpu_temp),
@@ -346,8 +378,11 @@ def html_atpro_sensor_graphing_database():
         database_dropdown_selection_html += custom_db_option_html_text.replace("{{ DBNameChangeMe }}", db_name) + "\n"
 
     run_script = ""
-    if server_plotly_graph.server_plotly_graph_variables.graph_creation_in_progress:
-        run_script = "CreatingGraph();"
+    web_portal_graph_jobs = graph_worker_pool.get_unfinished_jobs(requested_by="Web Portal")
+    if len(web_portal_graph_jobs) > 0:
+        newest_graph_job = web_portal_graph_jobs[-1]
+        status_text = newest_graph_job.get_status_text().replace("'", "")
+        run_script = "CreatingGraph('" + status_text + "', " + str(newest_graph_job.job_id) + ");"
 
     open_gl_selected = True
     cpu_selected = False
@@ -372,6 +407,7 @@ def html_atpro_sensor_graphing_database():
         TriggerPlotlyDate=get_file_creation_date(file_locations.plotly_graph_triggers),
         MQTTPlotlyDate=get_file_creation_date(file_locations.plotly_graph_mqtt),
         CustomPlotlyDate=get_file_creation_date(file_locations.plotly_graph_custom),
+        GraphViewerURL=get_graph_viewer_url(app_config_access.db_graphs_config),
         CheckedManualDateRange=get_html_checkbox_state(app_config_access.db_graphs_config.graph_using_date_range),
         HoursSelected=_check_hour_multiplier(1.0),
         DaysSelected=_check_hour_multiplier(24.0),
@@ -382,6 +418,13 @@ def html_atpro_sensor_graphing_database():
         CheckedCPU=get_html_checkbox_state(cpu_selected),
         MaxDataPoints=app_config_access.db_graphs_config.max_graph_data_points,
         SkipDataPoints=app_config_access.db_graphs_config.skip_data_between_plots,
+        DownsampleNoneSelected=_get_downsample_mode_selected(downsample_mode_none),
+        DownsampleLTTBSelected=_get_downsample_mode_selected(downsample_mode_lttb),
+        DownsampleMinMaxSelected=_get_downsample_mode_selected(downsample_mode_min_max),
+        GraphWidthPixels=app_config_access.db_graphs_config.graph_width_pixels,
+        GraphWorkerCount=app_config_access.graph_workers_config.graph_worker_count,
+        GraphWorkerMemoryLimit=app_config_access.graph_workers_config.worker_memory_limit_mb,
+        GraphCacheSize=app_config_access.graph_workers_config.graph_cache_size_mb,
         GraphPastHours=p_hours,
         DateTimeStart=app_config_access.db_graphs_config.graph_start_date.replace(" ", "T")[:-3],
         DateTimeEnd=app_config_access.db_graphs_config.graph_end_date.replace(" ", "T")[:-3],
@@ -411,6 +454,18 @@ def _check_hour_multiplier(multiplier):
     return ""
 
 
+def _get_downsample_mode_selected(downsample_mode):
+    if downsample_mode == app_config_access.db_graphs_config.downsample_mode:
+        return "selected"
+    return ""
+
+
+def _get_live_downsample_mode_selected(downsample_mode):
+    if downsample_mode == lgc.downsample_mode:
+        return "selected"
+    return ""
+
+
 @html_atpro_graphing_routes.route("/atpro/graphing-create-plotly", methods=["POST"])
 @auth.login_required
 def html_create_plotly_graph():
@@ -418,7 +473,11 @@ def html_create_plotly_graph():
     return get_html_atpro_index(run_script="SelectNav('sensor-graphing-db');")
 
 
-def generate_plotly_graph(graph_request, graph_config=None):
+def generate_plotly_graph(graph_request, graph_config=None, requested_by="Web Portal"):
+    """
+    Queues a Plotly graph on the graph worker pool using the provided configuration or HTML request.
+    Returns the graph's CreateGraphJob or None if no graph was queued.
+    """
     if graph_config is None:
         if graph_request.form.get("button_function") == "create":
             logger.network_logger.debug("* Plotly Graph Create Initiated by " + str(request.remote_addr))
@@ -428,13 +487,27 @@ def generate_plotly_graph(graph_request, graph_config=None):
             logger.network_logger.debug("* Plotly Graph Config Update Initiated by " + str(request.remote_addr))
             app_config_access.db_graphs_config.update_with_html_request(graph_request)
             app_config_access.db_graphs_config.save_config_to_file()
+            app_config_access.graph_workers_config.update_with_html_request(graph_request)
+            app_config_access.graph_workers_config.save_config_to_file()
+        elif graph_request.form.get("button_function") == "cancel":
+            logger.network_logger.debug("* Plotly Graph Cancel Initiated by " + str(request.remote_addr))
+            graph_job_id = graph_request.form.get("graph_job_id")
+            if graph_job_id is not None and str(graph_job_id).isdigit():
+                graph_worker_pool.cancel_graph(int(graph_job_id))
         elif graph_request.form.get("button_function") == "email":
             logger.network_logger.debug("* Plotly Graph Email Config Update Initiated by " + str(request.remote_addr))
             app_config_access.email_db_graph_config.update_with_html_request(graph_request)
             app_config_access.email_db_graph_config.save_config_to_file()
-    if graph_config is not None and not server_plotly_graph_variables.graph_creation_in_progress:
+    if graph_config is not None:
         new_graph_data = server_plotly_graph_variables.CreateGraphData(graph_config)
-        thread_function(server_plotly_graph.create_plotly_graph, args=new_graph_data)
+        return graph_worker_pool.submit_graph(new_graph_data, requested_by=requested_by)
+    return None
+
+
+@html_atpro_graphing_routes.route("/atpro/graphing-jobs-status")
+@auth.login_required
+def html_graph_jobs_status():
+    return graph_worker_pool.get_status_text()
 
 
 @html_atpro_graphing_routes.route("/ViewIntervalPlotlyGraph")
@@ -27,6 +27,7 @@ from operations_modules.software_automatic_upgrades import get_automatic_upgrade
 from configuration_modules import app_config_access
 from sensor_modules import system_access
 from sensor_modules import sensor_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
 from http_server.flask_blueprints.atpro.atpro_notifications import atpro_notifications
 from http_server.flask_blueprints.atpro.atpro_generic import get_html_atpro_index, get_html_enabled_disabled_text, \
     get_uptime_str, get_html_checked_text
@@ -81,6 +82,7 @@ def html_atpro_dashboard():
         IntervalRecording=app_cached_variables.interval_recording_thread.current_state,
         TriggerHighLowRecording=g_t_c_e(app_config_access.trigger_high_low.enable_high_low_trigger_recording),
         TriggerVarianceRecording=g_t_c_e(app_config_access.trigger_variances.enable_trigger_variance),
+        SensorSampling=sampling_scheduler.get_status_text(),
         MQTTBroker=app_cached_variables.mqtt_broker_dummy_thread.current_state,
         MQTTPublishing=app_cached_variables.mqtt_publisher_thread.current_state,
         MQTTSubscriber=app_cached_variables.mqtt_subscriber_thread.current_state,
@@ -121,11 +123,11 @@ def html_atpro_sensor_readings():
 
 @html_atpro_main_routes.route("/atpro/sensor-latency")
 def html_atpro_sensors_latency():
-    sensors_latency = sensor_access.get_sensors_latency()
+    sensors_latency = sensor_access.get_sensors_latency_summary()
     html_final_code = ""
     for index, reading in sensors_latency.items():
         new_reading = html_sensor_readings_row.replace("{{ SensorName }}", index)
-        new_reading = new_reading.replace("{{ SensorReading }}", str(reading) + " Seconds")
+        new_reading = new_reading.replace("{{ SensorReading }}", str(reading))
         html_final_code += new_reading + "\n"
     return html_final_code
 
@@ -17,8 +17,6 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import os
-import sqlite3
-from time import sleep
 from datetime import datetime, timedelta
 from flask import Blueprint, render_template, request
 from operations_modules import logger
@@ -27,7 +25,8 @@ from operations_modules import app_cached_variables
 from operations_modules.app_generic_functions import get_file_size, adjust_datetime, thread_function
 from operations_modules.app_generic_disk import get_file_content
 from operations_modules.sqlite_database import sql_execute_get_data, write_to_sql_database, get_clean_sql_table_name, \
-    get_sql_element, get_sqlite_tables_in_list, get_one_db_entry
+    get_sql_element, get_sqlite_tables_in_list, get_one_db_entry, get_database_connection
+from operations_modules.sqlite_retention import reclaim_database_space
 from configuration_modules import app_config_access
 from http_server.server_http_auth import auth
 from http_server.flask_blueprints.atpro.atpro_generic import get_message_page
@@ -171,7 +170,7 @@ def _thread_clear_check_ins_counts():
 
     for sensor_id in get_sqlite_tables_in_list(db_loc):
         _clear_old_sensor_checkin_data(sensor_id)
-    write_to_sql_database("VACUUM;", None, sql_database_location=db_loc)
+    reclaim_database_space(db_loc)
     if len(checkin_lookup_entry_dates) > 0:
         _update_checkin_lookup_variables()
     logger.network_logger.info("Checkin Database 'Clear Old Checkin Data' Finished")
@@ -235,7 +234,7 @@ def _thread_delete_sensors_older_then(delete_sensors_older_days):
             clean_last_checkin_date = date_and_sensor_id[1]
             if (current_date_time - clean_last_checkin_date).days >= delete_sensors_older_days:
                 _delete_sensor_id(date_and_sensor_id[0])
-        write_to_sql_database("VACUUM;", None, sql_database_location=db_loc)
+        reclaim_database_space(db_loc)
         logger.network_logger.info("Checkin Database Clean-up Finished")
     except Exception as error:
         logger.primary_logger.warning("Error trying to delete old sensors from the Check-Ins database: " + str(error))
@@ -526,16 +525,9 @@ def _delete_sensor_id(sensor_id):
 def _check_sensor_id_exists(sensor_id):
     sql_query = "SELECT count(name) FROM sqlite_master WHERE type='table' AND name='" + sensor_id + "'"
     try:
-        while app_cached_variables.sql_db_locked:
-            sleep(1)
-        database_connection = sqlite3.connect(db_loc, isolation_level=None)
-        sqlite_database = database_connection.cursor()
-        sqlite_database.execute(sql_query)
-        if sqlite_database.fetchone()[0]:
-            database_connection.close()
-            return True
-        else:
-            database_connection.close()
+        with get_database_connection(db_loc) as database_connection:
+            if database_connection.execute(sql_query).fetchone()[0]:
+                return True
             return False
     except Exception as error:
         logger.primary_logger.error("Unable to access CheckIns Database: " + str(error))
@@ -22,6 +22,10 @@ from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules import app_cached_variables
 from operations_modules.sqlite_database import sql_execute_get_data
+from operations_modules.sqlite_typed_storage import get_typed_min_max_entries
+from operations_modules.sqlite_narrow_storage import get_narrow_min_max_entries
+from operations_modules.sqlite_rollups import get_rollup_min_max_entries
+from operations_modules.sqlite_database_shards import shard_query_router
 from operations_modules.app_generic_functions import thread_function
 from configuration_modules import app_config_access
 from http_server.flask_blueprints.atpro.atpro_generic import get_html_atpro_index
@@ -141,11 +145,16 @@ def _generate_sensor_insights():
         ]
         sensor_count = 0
         html_final_code = "<script>document.getElementById('insights-refresh-btn').disabled = false;</script>"
-        for column_name, s_unit in zip(db_columns, special_reading_units):
-            new_sensor_html_code = _create_sensor_insights_html(column_name, s_unit)
-            html_final_code += new_sensor_html_code + "\n"
-            if new_sensor_html_code.strip() != "":
-                sensor_count += 1
+        start_date_range, end_date_range = None, None
+        if not app_config_access.sensor_insights.use_all_recorded_data:
+            start_date_range = app_config_access.sensor_insights.start_date_range
+            end_date_range = app_config_access.sensor_insights.end_date_range
+        with shard_query_router(start_date_range, end_date_range):
+            for column_name, s_unit in zip(db_columns, special_reading_units):
+                new_sensor_html_code = _create_sensor_insights_html(column_name, s_unit)
+                html_final_code += new_sensor_html_code + "\n"
+                if new_sensor_html_code.strip() != "":
+                    sensor_count += 1
         if sensor_count < 4:
             new_code = "<div class='col-" + str(int(12 / sensor_count)) + " col-m-" + str(
                 sensor_count * 2) + " col-sm-12'>"
@@ -220,8 +229,38 @@ def _get_min_max_sql_entries(column_name, order="DESC", return_limit=None):
                             app_config_access.sensor_insights.start_date_range + "') AND date('" + \
                             app_config_access.sensor_insights.end_date_range + "')"
 
+    start_date_range, end_date_range = None, None
+    if not app_config_access.sensor_insights.use_all_recorded_data:
+        start_date_range = app_config_access.sensor_insights.start_date_range
+        end_date_range = app_config_access.sensor_insights.end_date_range
+    rollup_entries = get_rollup_min_max_entries(
+        column_name, order=order, return_limit=return_limit, start_datetime=start_date_range,
+        end_datetime=end_date_range, ignore_null_types=app_config_access.sensor_insights.ignore_null_types
+    )
+    if rollup_entries is not None:
+        return rollup_entries
+
     query_multi = "SELECT " + db_v.all_tables_datetime + ", " + column_name + \
                   " FROM " + db_v.table_interval + where_query_text + \
                   " ORDER BY CAST(" + column_name + " AS REAL) " + order + \
                   " LIMIT " + str(return_limit) + ";"
-    return sql_execute_get_data(query_multi, file_locations.sensor_database)
+    sql_entries = list(sql_execute_get_data(query_multi, file_locations.sensor_database))
+
+    storage_entries = []
+    for get_storage_min_max_entries in [get_typed_min_max_entries, get_narrow_min_max_entries]:
+        storage_entries += get_storage_min_max_entries(
+            column_name, order=order, return_limit=return_limit, start_datetime=start_date_range,
+            end_datetime=end_date_range, ignore_null_types=app_config_access.sensor_insights.ignore_null_types
+        )
+    if len(storage_entries) > 0:
+        sql_entries += storage_entries
+        sql_entries.sort(key=_get_entry_reading_as_float, reverse=(order == "DESC"))
+        sql_entries = sql_entries[:int(return_limit)]
+    return sql_entries
+
+
+def _get_entry_reading_as_float(date_value_pair):
+    try:
+        return float(date_value_pair[1])
+    except (TypeError, ValueError):
+        return 0.0
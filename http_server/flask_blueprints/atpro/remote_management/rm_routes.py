@@ -41,7 +41,7 @@ from configuration_modules.config_display import CreateDisplayConfiguration
 from configuration_modules.config_email import CreateEmailConfiguration
 from configuration_modules.config_sensor_control import CreateIPList
 from sensor_modules.system_access import get_ram_space, get_disk_space
-from sensor_modules.sensor_access import get_cpu_temperature, get_reading_unit, get_sensors_latency, \
+from sensor_modules.sensor_access import get_cpu_temperature, get_reading_unit, get_sensors_latency_summary, \
     get_all_available_sensor_readings
 from operations_modules import network_wifi
 from http_server.server_http_auth import auth
@@ -228,7 +228,7 @@ def get_readings_report_entry():
 
 @html_atpro_remote_management_routes.route("/atpro/rm-get-latency-entry")
 def get_latency_report_entry():
-    latency_dic = get_sensors_latency()
+    latency_dic = get_sensors_latency_summary()
     sensor_names = []
     sensor_latency = []
     for name, entry in latency_dic.items():
@@ -253,7 +253,8 @@ def _convert_lists_to_html_thread(list_names, list_data, latency=False):
         sensor_reading = str(sensor_reading)
         if sensor_type != "SensorName" and sensor_type != "IP":
             if latency:
-                reading_unit = "Sec"
+                # Latency summaries include their unit
+                reading_unit = ""
             else:
                 reading_unit = get_reading_unit(sensor_type)
             return_labels += "<td><span class='sensor-info'>" + sensor_type.replace("_", " ") + "</span></td>"
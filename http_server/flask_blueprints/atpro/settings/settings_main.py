@@ -16,11 +16,13 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from datetime import datetime, timedelta
 from flask import Blueprint, render_template, request
 from operations_modules import logger
 from operations_modules.app_generic_functions import thread_function
 from operations_modules import app_cached_variables
 from operations_modules.software_automatic_upgrades import update_checks_interface
+from operations_modules.sqlite_derived_metrics_backfill import start_derived_metrics_backfill
 from operations_modules.app_validation_checks import validate_smb_username, validate_smb_password
 from configuration_modules import app_config_access
 from sensor_modules import sensor_access
@@ -183,9 +185,70 @@ def html_atpro_sensor_settings_offsets():
         temperature_offset=app_config_access.sensor_offsets.temperature_offset,
         CheckedCustomTempComp=get_html_checkbox_state(app_config_access.sensor_offsets.enable_temperature_comp_factor),
         CustomTempComp=app_config_access.sensor_offsets.temperature_comp_factor,
+        CheckedSensorSnapshots=get_html_checkbox_state(app_config_access.sensor_snapshots_config.enable_snapshots),
+        SensorSnapshotInputs=_get_sensor_snapshot_inputs_html(),
+        CheckedRecentReadings=get_html_checkbox_state(app_config_access.recent_readings_config.enable_recent_readings),
+        RecentReadingsHours=app_config_access.recent_readings_config.recent_readings_hours,
+        RecentReadingsMax=app_config_access.recent_readings_config.max_readings_per_metric,
+        CheckedIMUCapture=get_html_checkbox_state(app_config_access.imu_capture_config.enable_imu_capture),
+        IMUSampleRate=app_config_access.imu_capture_config.sample_rate_hz,
+        IMUSummaryWindow=app_config_access.imu_capture_config.summary_window_seconds,
+        IMUFFTBands=app_config_access.imu_capture_config.fft_band_count,
+        IMURingBufferSeconds=app_config_access.imu_capture_config.ring_buffer_seconds,
+        RecalculateDateTimeStart=(datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M"),
+        RecalculateDateTimeEnd=datetime.utcnow().strftime("%Y-%m-%dT%H:%M")
     )
 
 
+@html_atpro_settings_routes.route("/atpro/settings-recalculate-recorded-readings", methods=["POST"])
+@auth.login_required
+def html_atpro_sensor_settings_recalculate_recorded_readings():
+    start_datetime = str(request.form.get("recalculate_datetime_start")).replace("T", " ") + ":00"
+    end_datetime = str(request.form.get("recalculate_datetime_end")).replace("T", " ") + ":00"
+    if start_derived_metrics_backfill(start_datetime, end_datetime):
+        msg = "Recorded readings from " + start_datetime + " to " + end_datetime + " are being recalculated"
+        return get_message_page("Recalculating Recorded Readings", msg, page_url="sensor-settings")
+    msg = "Invalid DateTime range or recorded readings are already being recalculated"
+    return get_message_page("Unable to Recalculate Readings", msg, page_url="sensor-settings")
+
+
+@html_atpro_settings_routes.route("/atpro/settings-sensor-snapshots", methods=["POST"])
+@auth.login_required
+def html_atpro_sensor_settings_snapshots():
+    app_config_access.sensor_snapshots_config.update_with_html_request(request)
+    app_config_access.sensor_snapshots_config.save_config_to_file()
+    return get_message_page("Sensor Snapshot Settings Updated", page_url="sensor-settings")
+
+
+@html_atpro_settings_routes.route("/atpro/settings-recent-readings", methods=["POST"])
+@auth.login_required
+def html_atpro_sensor_settings_recent_readings():
+    app_config_access.recent_readings_config.update_with_html_request(request)
+    app_config_access.recent_readings_config.save_config_to_file()
+    atpro_notifications.manage_service_restart()
+    return get_message_page("Recent Readings Settings Updated", page_url="sensor-settings")
+
+
+@html_atpro_settings_routes.route("/atpro/settings-imu-capture", methods=["POST"])
+@auth.login_required
+def html_atpro_sensor_settings_imu_capture():
+    app_config_access.imu_capture_config.update_with_html_request(request)
+    app_config_access.imu_capture_config.save_config_to_file()
+    app_cached_variables.restart_imu_capture_thread = True
+    return get_message_page("IMU Capture Settings Updated", page_url="sensor-settings")
+
+
+def _get_sensor_snapshot_inputs_html():
+    snapshot_input_html_text = "<tr><td>{{ SensorName }}</td><td><input type='number' style='width: 75px;' " + \
+                               "step='0.01' min='0' name='{{ FormName }}' value='{{ Seconds }}'></td></tr>"
+    snapshot_inputs_html = ""
+    for sensor_name, snapshot_seconds in app_config_access.sensor_snapshots_config.snapshot_seconds.items():
+        form_name = app_config_access.sensor_snapshots_config.get_html_form_name(sensor_name)
+        snapshot_inputs_html += snapshot_input_html_text.replace("{{ SensorName }}", sensor_name) \
+            .replace("{{ FormName }}", form_name).replace("{{ Seconds }}", str(snapshot_seconds)) + "\n"
+    return snapshot_inputs_html
+
+
 @html_atpro_settings_routes.route("/atpro/supported-sensors-info")
 def html_atpro_sensor_settings_hw_sensor_info():
     return render_template("ATPro_admin/page_templates/settings/settings-hw-sensor-information.html")
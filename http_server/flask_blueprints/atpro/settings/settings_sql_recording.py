@@ -20,7 +20,7 @@ from flask import Blueprint, render_template, request
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
 from sensor_recording_modules.triggers_auto_set import auto_set_triggers_wait_time
-from http_server.server_http_generic_functions import get_html_checkbox_state
+from http_server.server_http_generic_functions import get_html_checkbox_state, get_html_selected_state
 from http_server.server_http_auth import auth
 from http_server.flask_blueprints.atpro.atpro_generic import get_message_page
 from http_server.flask_blueprints.atpro.atpro_notifications import atpro_notifications
@@ -38,6 +38,7 @@ def html_atpro_sensor_settings_interval():
         return get_message_page("Interval Settings Updated", page_url="sensor-settings")
 
     interval_config = app_config_access.interval_recording_config
+    storage_format = interval_config.storage_format
     return render_template(
         "ATPro_admin/page_templates/settings/settings-recording-interval.html",
         CheckedInterval=get_html_checkbox_state(interval_config.enable_interval_recording),
@@ -58,10 +59,51 @@ def html_atpro_sensor_settings_interval():
         CheckedAccelerometer=get_html_checkbox_state(interval_config.accelerometer_enabled),
         CheckedMagnetometer=get_html_checkbox_state(interval_config.magnetometer_enabled),
         CheckedGyroscope=get_html_checkbox_state(interval_config.gyroscope_enabled),
-        CheckedGPS=get_html_checkbox_state(interval_config.gps_enabled)
+        CheckedGPS=get_html_checkbox_state(interval_config.gps_enabled),
+        StorageFormatText=get_html_selected_state(storage_format == interval_config.storage_format_text),
+        StorageFormatTyped=get_html_selected_state(storage_format == interval_config.storage_format_typed),
+        StorageFormatNarrow=get_html_selected_state(storage_format == interval_config.storage_format_narrow),
+        CheckedDatabaseShards=get_html_checkbox_state(interval_config.enable_database_shards)
     )
 
 
+@html_atpro_settings_sql_recording_routes.route("/atpro/settings-retention", methods=["GET", "POST"])
+@auth.login_required
+def html_atpro_sensor_settings_database_retention():
+    if request.method == "POST":
+        app_config_access.database_retention_config.update_with_html_request(request)
+        app_config_access.database_retention_config.save_config_to_file()
+        app_cached_variables.restart_database_retention_thread = True
+        return get_message_page("Database Retention Settings Updated", page_url="sensor-settings")
+
+    retention_config = app_config_access.database_retention_config
+    backup_config = app_config_access.database_backup_config
+    return render_template(
+        "ATPro_admin/page_templates/settings/settings-recording-retention.html",
+        CheckedScheduledBackups=get_html_checkbox_state(backup_config.enable_scheduled_backups),
+        BackupRunHours=backup_config.backup_run_hours,
+        BackupsToKeep=backup_config.backups_to_keep,
+        CheckedRetention=get_html_checkbox_state(retention_config.enable_database_retention),
+        RetentionRunHours=retention_config.retention_run_hours,
+        IntervalDays=retention_config.interval_days,
+        TriggerDays=retention_config.trigger_days,
+        RollupMinuteDays=retention_config.rollup_minute_days,
+        RollupHourDays=retention_config.rollup_hour_days,
+        RollupDayDays=retention_config.rollup_day_days,
+        MQTTSubscriberDays=retention_config.mqtt_subscriber_days,
+        CheckinDays=retention_config.checkin_days
+    )
+
+
+@html_atpro_settings_sql_recording_routes.route("/atpro/settings-backups", methods=["POST"])
+@auth.login_required
+def html_atpro_sensor_settings_database_backups():
+    app_config_access.database_backup_config.update_with_html_request(request)
+    app_config_access.database_backup_config.save_config_to_file()
+    app_cached_variables.restart_database_backup_thread = True
+    return get_message_page("Database Backup Settings Updated", page_url="sensor-settings")
+
+
 @html_atpro_settings_sql_recording_routes.route("/atpro/settings-hl", methods=["GET", "POST"])
 @auth.login_required
 def html_atpro_sensor_settings_high_low():
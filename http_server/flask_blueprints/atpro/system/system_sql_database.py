@@ -26,11 +26,11 @@ from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
-from operations_modules.app_generic_functions import get_list_of_filenames_in_dir, zip_files, get_file_size, \
-    adjust_datetime
-from operations_modules.app_generic_disk import get_file_content
-from operations_modules.sqlite_database import get_sqlite_tables_in_list, write_to_sql_database, \
-    get_main_db_first_last_date, universal_database_structure_check
+from operations_modules.app_generic_functions import get_list_of_filenames_in_dir, get_file_size, adjust_datetime
+from operations_modules.sqlite_database import get_sqlite_tables_in_list, shrink_database, \
+    get_main_db_first_last_date, universal_database_structure_check, sql_connection_manager, sql_access_coordinator
+from operations_modules.sqlite_database_shards import shard_query_router, get_first_last_shard_locations
+from operations_modules.sqlite_backup import get_zip_stream, save_zip_stream
 from http_server.server_http_auth import auth
 from http_server.flask_blueprints.atpro.atpro_generic import get_message_page, get_clean_db_name, \
     get_html_atpro_index, sanitize_text
@@ -53,12 +53,16 @@ def html_atpro_settings_db_information():
                   app_cached_variables.creating_zip_checkin_db]:
         if check:
             run_script = "CreatingDownload();"
+
+    # Only the oldest and newest shards can hold the first and last recorded dates
+    with shard_query_router(shard_locations=get_first_last_shard_locations()):
+        db_date_range = get_main_db_first_last_date(app_config_access.primary_config.utc0_hour_offset)
     return render_template(
         "ATPro_admin/page_templates/system/system-db-local.html",
         HourOffset=app_config_access.primary_config.utc0_hour_offset,
         SQLDatabaseLocation=_remove_filename_from_location(file_locations.sensor_database),
         SQLDatabaseName=file_locations.sensor_database.split("/")[-1],
-        SQLDatabaseDateRange=get_main_db_first_last_date(app_config_access.primary_config.utc0_hour_offset),
+        SQLDatabaseDateRange=db_date_range,
         SQLDatabaseSize=get_file_size(file_locations.sensor_database),
         ZipMainDBCreated=_get_file_creation_date(file_locations.database_zipped),
         ZipMainDBFileSize=get_file_size(file_locations.database_zipped),
@@ -204,7 +208,6 @@ def html_atpro_sensor_settings_database_uploads():
                 save_db_to = file_locations.sensor_checkin_database
 
             if uploaded_file is not None:
-                app_cached_variables.sql_db_locked = True
                 if uploaded_file.filename.split(".")[-1] == "zip":
                     uploaded_file.save(zip_location)
                     system_thread = Thread(target=_unzip_and_replace_database,
@@ -219,7 +222,6 @@ def html_atpro_sensor_settings_database_uploads():
                     system_thread.start()
                 else:
                     logger.network_logger.error("Upload Database: Invalid extension on uploaded file")
-                    app_cached_variables.sql_db_locked = False
             else:
                 logger.network_logger.error("Database Upload: No File Uploaded")
         return_msg = "Database(s) Uploaded"
@@ -297,10 +299,11 @@ def _unzip_and_replace_database(zip_location, db_location, backup_file_name):
                 zip_info.filename = tmp_db_name
                 temp_zip.extract(zip_info, path=uploaded_databases_folder)
                 if universal_database_structure_check(tmp_db_full_path_name, expected_database_type):
-                    _zip_and_delete_database(db_location, backup_file_name)
-                    zip_info.filename = db_location.split("/")[-1]
-                    temp_zip.extract(zip_info, path=file_locations.sensor_data_dir)
-                    _set_file_permissions(db_location)
+                    with sql_access_coordinator.exclusive_access(db_location):
+                        _zip_and_delete_database(db_location, backup_file_name)
+                        zip_info.filename = db_location.split("/")[-1]
+                        temp_zip.extract(zip_info, path=file_locations.sensor_data_dir)
+                        _set_file_permissions(db_location)
                 else:
                     logger.network_logger.error("Database Replacement - Invalid Database in Zip")
                     return_database_locations_list = []
@@ -312,7 +315,6 @@ def _unzip_and_replace_database(zip_location, db_location, backup_file_name):
         return_database_locations_list = []
     if os.path.isfile(zip_location):
         os.remove(zip_location)
-    app_cached_variables.sql_db_locked = False
     app_cached_variables.uploaded_databases_list = get_list_of_filenames_in_dir(uploaded_databases_folder)
     logger.network_logger.info("Database Replacement Complete")
     return return_database_locations_list
@@ -346,20 +348,20 @@ def _db_replacement_raw_worker(temp_db_location, save_db_to, backup_file_name):
             expected_database_type = app_cached_variables.database_variables.db_info_database_type_mqtt
 
         if universal_database_structure_check(temp_db_location, expected_database_type):
-            if _zip_and_delete_database(save_db_to, backup_file_name):
-                os.rename(temp_db_location, save_db_to)
-                _set_file_permissions(save_db_to)
-                logger.network_logger.info("Database Replaced " + save_db_to)
-            else:
-                logger.network_logger.error("Database Backup Failed: Database Replacement Cancelled")
-                os.remove(temp_db_location)
+            with sql_access_coordinator.exclusive_access(save_db_to):
+                if _zip_and_delete_database(save_db_to, backup_file_name):
+                    os.rename(temp_db_location, save_db_to)
+                    _set_file_permissions(save_db_to)
+                    logger.network_logger.info("Database Replaced " + save_db_to)
+                else:
+                    logger.network_logger.error("Database Backup Failed: Database Replacement Cancelled")
+                    os.remove(temp_db_location)
         else:
             logger.network_logger.error("Database Upload: Invalid Database")
             os.remove(temp_db_location)
         logger.network_logger.info("Database Replacement Complete")
     except Exception as error:
         logger.network_logger.error("Database Replacement Error:  " + str(error))
-    app_cached_variables.sql_db_locked = False
 
 
 def _set_file_permissions(file_location, file_permissions=0o666):
@@ -387,7 +389,7 @@ def _vacuum_database(selected_database):
     else:
         db_location = file_locations.uploaded_databases_folder + "/" + selected_database
     if os.path.isfile(db_location):
-        write_to_sql_database("VACUUM;", None, sql_database_location=db_location)
+        shrink_database(db_location)
         msg = selected_database + " Database has been Shrunk"
         return get_message_page("Database Vacuum Successful", msg, page_url="sensor-system", skip_menu_select=True)
     msg = selected_database + " Database not found"
@@ -401,8 +403,10 @@ def _zip_and_delete_database(database_location, db_save_name):
     zip_filename = filename_start + str(datetime.utcnow().strftime("%Y-%m-%d_%H_%M_%S")) + db_save_name + ".zip"
     zip_full_path = file_locations.database_backup_folder + "/" + zip_filename
     try:
-        zip_content = get_file_content(database_location, open_type="rb")
-        zip_files([sql_filename], [zip_content], save_type="save_to_disk", file_location=zip_full_path)
+        if not save_zip_stream(get_zip_stream([[sql_filename, database_location]]), zip_full_path):
+            return False
+        # Closing all open connections check-points and removes the WAL before the database is deleted
+        sql_connection_manager.close_database_connections(database_location)
         os.remove(database_location)
         backup_db_zip_filenames = get_list_of_filenames_in_dir(file_locations.database_backup_folder)
         app_cached_variables.zipped_db_backup_list = backup_db_zip_filenames
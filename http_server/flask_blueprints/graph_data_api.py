@@ -0,0 +1,184 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Graph data API for graphs drawn by the browser.
+/GraphData returns downsampled database readings one page (DateTime range) at a time as compact JSON or binary,
+/GraphViewer is a static page that loads plotly.js once and draws the pages as they arrive.
+"""
+import json
+import struct
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+from flask import Blueprint, Response, request, render_template, make_response
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.sqlite_database import get_clean_sql_table_name
+from operations_modules.graph_downsampling import downsample_modes_list, downsample_mode_lttb
+from configuration_modules import app_config_access
+from http_server.server_http_auth import auth
+from http_server.server_plotly_graph_data import get_graph_page_data
+from http_server.server_plotly_graph_variables import graph_column_details
+
+html_graph_data_routes = Blueprint("html_graph_data_routes", __name__)
+db_v = app_cached_variables.database_variables
+
+graph_data_datetime_format = "%Y-%m-%d %H:%M:%S"
+graph_data_max_points = 20000
+# Binary responses start with the header length as a 32 bit unsigned int, then the JSON header (padded to
+# a multiple of 8 bytes) followed by each column's DateTimes and Readings as little endian 64 bit floats
+graph_data_binary_alignment = 8
+
+
+def get_graph_viewer_url(graph_config):
+    """ Returns the browser rendered Graph Viewer URL for the provided Database Graphs configuration. """
+    url_arguments = {
+        "db": graph_config.sql_database_selection,
+        "table": graph_config.graph_db_table,
+        "columns": ",".join(graph_config.get_enabled_graph_sensors_list()[2:]),
+        "offset": graph_config.date_time_hours_offset,
+        "points": graph_config.graph_width_pixels,
+        "mode": graph_config.downsample_mode
+    }
+    if graph_config.graph_using_date_range:
+        url_arguments["start"] = graph_config.graph_start_date
+        url_arguments["end"] = graph_config.graph_end_date
+    else:
+        url_arguments["hours"] = graph_config.graph_past_hours
+    return "/GraphViewer?" + urlencode(url_arguments)
+
+
+@html_graph_data_routes.route("/GraphViewer")
+@auth.login_required
+def html_graph_viewer():
+    """ Static page that draws graphs in the browser with data from /GraphData (Settings are URL arguments). """
+    return_response = make_response(render_template("ATPro_admin/page_templates/graphing-database-viewer.html"))
+    return_response.headers["Cache-Control"] = "private, max-age=432000"
+    return return_response
+
+
+@html_graph_data_routes.route("/GraphData")
+@auth.login_required
+def html_get_graph_data():
+    """
+    Returns downsampled graph data for one page of a DateTime range as compact JSON or binary.
+    URL arguments: db, table, columns (Comma separated), start and end or hours (Past hours ending now),
+    offset (DateTime hour offset), page_start and page_hours (0 = whole range), points, mode and format.
+    Pages hold readings from their start up to, but not including, their end. The next page starts at that end.
+    """
+    logger.network_logger.debug("* Graph Data sent to " + str(request.remote_addr))
+    try:
+        database_location = _get_database_location(request.args.get("db", "MainDatabase"))
+        table_name = get_clean_sql_table_name(request.args.get("table", db_v.table_interval))
+        columns_list = []
+        for column_name in request.args.get("columns", "").split(","):
+            if column_name.strip() != "":
+                columns_list.append(get_clean_sql_table_name(column_name))
+        hour_offset = float(request.args.get("offset", 0))
+        target_points = min(int(request.args.get("points", 1920)), graph_data_max_points)
+        downsample_mode = request.args.get("mode", downsample_mode_lttb)
+        response_format = request.args.get("format", "json")
+        if database_location is None or downsample_mode not in downsample_modes_list or target_points < 3 or \
+                response_format not in ["json", "binary"]:
+            raise ValueError("Unknown database, mode or format")
+
+        range_start, range_end = _get_datetime_range(request.args, hour_offset)
+        page_start = max(_get_datetime(request.args.get("page_start", range_start)), range_start)
+        page_end = range_end
+        next_page_start = None
+        page_hours = float(request.args.get("page_hours", 0))
+        if page_hours > 0 and page_start + timedelta(hours=page_hours) < range_end:
+            page_end = page_start + timedelta(hours=page_hours)
+            next_page_start = page_end.strftime(graph_data_datetime_format)
+    except (ValueError, TypeError) as error:
+        return "Invalid Graph Data Request: " + str(error), 400
+
+    page_columns_data, rows_left_out = get_graph_page_data(
+        database_location, table_name, columns_list, page_start.strftime(graph_data_datetime_format),
+        page_end.strftime(graph_data_datetime_format), hour_offset=hour_offset, target_points=target_points,
+        downsample_mode=downsample_mode, max_rows=app_config_access.db_graphs_config.max_graph_data_points,
+        page_end_included=next_page_start is None
+    )
+    response_header = {
+        "RangeStart": range_start.strftime(graph_data_datetime_format),
+        "RangeEnd": range_end.strftime(graph_data_datetime_format),
+        "PageStart": page_start.strftime(graph_data_datetime_format),
+        "PageEnd": page_end.strftime(graph_data_datetime_format),
+        "NextPageStart": next_page_start,
+        "RowsLeftOut": rows_left_out,
+        "Columns": {}
+    }
+    if response_format == "binary":
+        return _get_binary_response(response_header, page_columns_data)
+    return _get_json_response(response_header, page_columns_data)
+
+
+def _get_json_response(response_header, page_columns_data):
+    for column_name, (readings_array, epoch_ms_array) in page_columns_data.items():
+        response_header["Columns"][column_name] = _get_column_header(column_name, len(readings_array))
+        response_header["Columns"][column_name]["DateTimes"] = epoch_ms_array.tolist()
+        response_header["Columns"][column_name]["Readings"] = readings_array.tolist()
+    return Response(json.dumps(response_header, separators=(",", ":")), mimetype="application/json")
+
+
+def _get_binary_response(response_header, page_columns_data):
+    """ Returns number columns in the binary format, text columns (Sensor Name, IP) are left out. """
+    binary_columns = []
+    for column_name, (readings_array, epoch_ms_array) in page_columns_data.items():
+        if readings_array.dtype.kind == "f":
+            response_header["Columns"][column_name] = _get_column_header(column_name, len(readings_array))
+            binary_columns.append(epoch_ms_array.astype("<f8").tobytes() + readings_array.astype("<f8").tobytes())
+
+    header_bytes = json.dumps(response_header, separators=(",", ":")).encode()
+    padding_length = -(4 + len(header_bytes)) % graph_data_binary_alignment
+    header_bytes += b" " * padding_length
+    response_data = struct.pack("<I", len(header_bytes)) + header_bytes + b"".join(binary_columns)
+    return Response(response_data, mimetype="application/octet-stream")
+
+
+def _get_column_header(column_name, entry_count):
+    column_header = {"Title": column_name, "Name": column_name, "Count": entry_count}
+    if column_name in graph_column_details:
+        column_header["Title"], column_header["Name"] = graph_column_details[column_name][:2]
+    return column_header
+
+
+def _get_database_location(database_selection):
+    """ Returns the database location for a database selection or None if not found. """
+    if database_selection == "MainDatabase":
+        return file_locations.sensor_database
+    elif database_selection == "MQTTSubscriberDatabase":
+        return file_locations.mqtt_subscriber_database
+    elif database_selection in app_cached_variables.uploaded_databases_list:
+        return file_locations.uploaded_databases_folder + "/" + database_selection
+    return None
+
+
+def _get_datetime_range(url_arguments, hour_offset):
+    """ Returns the start and end DateTimes of the requested range, adjusted by the hour offset. """
+    if url_arguments.get("hours") is not None:
+        range_end = datetime.utcnow() + timedelta(hours=hour_offset)
+        return range_end - timedelta(hours=float(url_arguments.get("hours"))), range_end
+    return _get_datetime(url_arguments.get("start")), _get_datetime(url_arguments.get("end"))
+
+
+def _get_datetime(datetime_text):
+    if isinstance(datetime_text, datetime):
+        return datetime_text
+    return datetime.strptime(str(datetime_text).strip().replace("T", " ")[:19], graph_data_datetime_format)
@@ -38,6 +38,12 @@ fav_icon_file_content = None
 help_index_page = None
 charts_min_js = None
 jquery_min_js = None
+plotly_min_js = None
+try:
+    from plotly.offline import get_plotlyjs
+except ImportError as import_error:
+    logger.primary_logger.error("Unable to import plotly.js for browser drawn graphs: " + str(import_error))
+    get_plotlyjs = None
 
 
 @html_functional_routes.route("/robots.txt")
@@ -68,6 +74,19 @@ def charts_min_js_fun():
     return return_response
 
 
+@html_functional_routes.route("/plotly.min.js")
+def plotly_min_js_fun():
+    global plotly_min_js
+    if plotly_min_js is None:
+        if get_plotlyjs is None:
+            return "Plotly not installed", 404
+        plotly_min_js = get_plotlyjs()
+    return_response = make_response(plotly_min_js)
+    return_response.headers["Content-Type"] = "application/javascript"
+    return_response.headers["Cache-Control"] = "public, max-age=432000"
+    return return_response
+
+
 @html_functional_routes.route("/jquery.min.js")
 def jquery_min_js_fun():
     global jquery_min_js
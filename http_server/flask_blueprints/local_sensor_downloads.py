@@ -18,12 +18,14 @@
 """
 import os
 import time
-from flask import Blueprint, send_file, request
+from flask import Blueprint, send_file, request, Response, stream_with_context
 from operations_modules import logger
 from operations_modules import file_locations
 from operations_modules import app_cached_variables
 from operations_modules.app_generic_functions import get_file_size, get_zip_size, zip_files, thread_function
 from operations_modules.app_generic_disk import get_file_content
+from operations_modules.sqlite_backup import get_zip_stream, get_database_snapshot_stream, save_zip_stream, \
+    get_all_databases_zip_entries, get_shard_zip_entries
 from http_server.server_http_auth import auth
 from http_server.flask_blueprints.atpro.atpro_generic import get_html_atpro_index
 
@@ -37,14 +39,8 @@ def download_all_sql_databases_zipped():
     zip_name = _get_net_and_host_name_str("All_Databases", ".zip")
 
     try:
-        return_names = [app_cached_variables.hostname + "_Main_Database.sqlite",
-                        app_cached_variables.hostname + "_Checkin_Database.sqlite",
-                        app_cached_variables.hostname + "_MQTT_Sub_Database.sqlite"]
-        return_files = [get_file_content(file_locations.sensor_database, open_type="rb"),
-                        get_file_content(file_locations.sensor_checkin_database, open_type="rb"),
-                        get_file_content(file_locations.mqtt_subscriber_database, open_type="rb")]
-        return_zip = zip_files(return_names, return_files)
-        return send_file(return_zip, attachment_filename=zip_name, as_attachment=True)
+        zip_entries = get_all_databases_zip_entries(app_cached_variables.hostname + "_")
+        return _get_zip_stream_response(zip_entries, zip_name)
     except Exception as error:
         logger.primary_logger.error("* Download All Databases Zip: " + str(error))
         return_zip = "Error Creating Zip on " + app_cached_variables.ip + " - " + app_cached_variables.hostname
@@ -59,11 +55,11 @@ def download_sensors_sql_database_zipped():
         time.sleep(1)
     return _button_functions("download-main-db-zip")
 
-# Removed due to DB corruption on downloaded file
-# @html_local_download_routes.route("/DownloadSQLDatabaseRAW")
-# @auth.login_required
-# def download_sensors_sql_database_raw():
-#     return _button_functions("download-main-db-raw")
+
+@html_local_download_routes.route("/DownloadSQLDatabaseRAW")
+@auth.login_required
+def download_sensors_sql_database_raw():
+    return _button_functions("download-main-db-raw", str(request.remote_addr))
 
 
 @html_local_download_routes.route("/DownloadSQLDatabaseMQTT")
@@ -74,11 +70,11 @@ def download_mqtt_sql_database_zipped():
         time.sleep(1)
     return _button_functions("download-mqtt-sub-db-zip")
 
-# Removed due to DB corruption on downloaded file
-# @html_local_download_routes.route("/DownloadSQLDatabaseRAWMQTT")
-# @auth.login_required
-# def download_mqtt_sql_database_raw():
-#     return _button_functions("download-mqtt-sub-db-raw")
+
+@html_local_download_routes.route("/DownloadSQLDatabaseRAWMQTT")
+@auth.login_required
+def download_mqtt_sql_database_raw():
+    return _button_functions("download-mqtt-sub-db-raw", str(request.remote_addr))
 
 
 @html_local_download_routes.route("/DownloadSQLDatabaseCheckin")
@@ -89,11 +85,11 @@ def download_checkin_sql_database_zipped():
         time.sleep(1)
     return _button_functions("download-checkin-db-zip")
 
-# Removed due to DB corruption on downloaded file
-# @html_local_download_routes.route("/DownloadSQLDatabaseRAWCheckin")
-# @auth.login_required
-# def download_checkin_sql_database_raw():
-#     return _button_functions("download-checkin-db-raw")
+
+@html_local_download_routes.route("/DownloadSQLDatabaseRAWCheckin")
+@auth.login_required
+def download_checkin_sql_database_raw():
+    return _button_functions("download-checkin-db-raw", str(request.remote_addr))
 
 
 @html_local_download_routes.route("/DatabaseDownloads", methods=["GET", "POST"])
@@ -108,32 +104,32 @@ def html_atpro_db_downloads():
 
 def _button_functions(button_pressed, request_ip="N/A"):
     try:
-        # Removed due to DB corruption on downloaded file
-        # if button_pressed == "download-main-db-raw":
-        #     logger.network_logger.debug("* Download RAW Main SQL Database Accessed by " + request_ip)
-        #     sensor_database = file_locations.sensor_database
-        #     if os.path.isfile(sensor_database):
-        #         sql_filename = _add_host_and_ip_to_filename("Sensor_Database", "sqlite")
-        #         return send_file(sensor_database, as_attachment=True, attachment_filename=sql_filename)
-        #     return "Kootnet Sensors main database not found"
-        #
-        # elif button_pressed == "download-mqtt-sub-db-raw":
-        #     logger.network_logger.debug("* Download RAW MQTT SQL Database Accessed by " + str(request.remote_addr))
-        #     mqtt_subscriber_database = file_locations.mqtt_subscriber_database
-        #     if os.path.isfile(mqtt_subscriber_database):
-        #         sql_filename = _add_host_and_ip_to_filename("MQTT_Database", "sqlite")
-        #         return send_file(mqtt_subscriber_database, as_attachment=True, attachment_filename=sql_filename)
-        #     return "Kootnet Sensors MQTT Subscriber database not found"
-        #
-        # elif button_pressed == "download-checkin-db-raw":
-        #     logger.network_logger.debug("* Download RAW Checkin SQL Database Accessed by " + str(request_ip))
-        #     sensor_checkin_database = file_locations.sensor_checkin_database
-        #     if os.path.isfile(sensor_checkin_database):
-        #         sql_filename = _add_host_and_ip_to_filename("Sensors_Checkin_Database", "sqlite")
-        #         return send_file(sensor_checkin_database, as_attachment=True, attachment_filename=sql_filename)
-        #     return "Kootnet Sensors Checkin database not found"
-
-        if button_pressed == "download-main-db-zip":
+        # RAW downloads are backup API snapshots, copying the live database file could return a corrupt database
+        if button_pressed == "download-main-db-raw":
+            logger.network_logger.debug("* Download RAW Main SQL Database Accessed by " + request_ip)
+            sensor_database = file_locations.sensor_database
+            if os.path.isfile(sensor_database):
+                sql_filename = _add_host_and_ip_to_filename("Sensor_Database", "sqlite")
+                return _get_database_snapshot_response(sensor_database, sql_filename)
+            return "Kootnet Sensors main database not found"
+
+        elif button_pressed == "download-mqtt-sub-db-raw":
+            logger.network_logger.debug("* Download RAW MQTT SQL Database Accessed by " + request_ip)
+            mqtt_subscriber_database = file_locations.mqtt_subscriber_database
+            if os.path.isfile(mqtt_subscriber_database):
+                sql_filename = _add_host_and_ip_to_filename("MQTT_Database", "sqlite")
+                return _get_database_snapshot_response(mqtt_subscriber_database, sql_filename)
+            return "Kootnet Sensors MQTT Subscriber database not found"
+
+        elif button_pressed == "download-checkin-db-raw":
+            logger.network_logger.debug("* Download RAW Checkin SQL Database Accessed by " + request_ip)
+            sensor_checkin_database = file_locations.sensor_checkin_database
+            if os.path.isfile(sensor_checkin_database):
+                sql_filename = _add_host_and_ip_to_filename("Sensors_Checkin_Database", "sqlite")
+                return _get_database_snapshot_response(sensor_checkin_database, sql_filename)
+            return "Kootnet Sensors Checkin database not found"
+
+        elif button_pressed == "download-main-db-zip":
             if not app_cached_variables.creating_zip_main_db:
                 database_zipped = file_locations.database_zipped
                 if os.path.isfile(database_zipped):
@@ -193,36 +189,46 @@ def _add_host_and_ip_to_filename(filename, file_extension):
     return return_filename
 
 
+def _get_zip_stream_response(zip_entries, zip_name):
+    """ Returns a HTTP response streaming a zip of the provided entries while it's being created. """
+    return_headers = {"Content-Disposition": "attachment; filename=" + zip_name}
+    return Response(stream_with_context(get_zip_stream(zip_entries)), mimetype="application/zip",
+                    headers=return_headers)
+
+
+def _get_database_snapshot_response(database_location, sql_filename):
+    """ Returns a HTTP response streaming a backup API snapshot of the provided database. """
+    return_headers = {"Content-Disposition": "attachment; filename=" + sql_filename}
+    return Response(stream_with_context(get_database_snapshot_stream(database_location)),
+                    mimetype="application/octet-stream", headers=return_headers)
+
+
 def _zip_main_db_worker():
     sql_filename = _add_host_and_ip_to_filename("Main_Database", "sqlite")
-    zip_content = get_file_content(file_locations.sensor_database, open_type="rb")
-    _zip_db(file_locations.database_zipped, sql_filename, zip_content)
+    zip_entries = [[sql_filename, file_locations.sensor_database]]
+    zip_entries += get_shard_zip_entries(sql_filename[:-len(".sqlite")] + "_")
+    _zip_db(file_locations.database_zipped, zip_entries)
     app_cached_variables.creating_zip_main_db = False
 
 
 def _zip_mqtt_sub_db_worker():
     sql_filename = _add_host_and_ip_to_filename("MQTT_Subscriber_Database", "sqlite")
-    zip_content = get_file_content(file_locations.mqtt_subscriber_database, open_type="rb")
-    _zip_db(file_locations.mqtt_database_zipped, sql_filename, zip_content)
+    _zip_db(file_locations.mqtt_database_zipped, [[sql_filename, file_locations.mqtt_subscriber_database]])
     app_cached_variables.creating_zip_mqtt_sub_db = False
 
 
 def _zip_checkin_db_worker():
     sql_filename = _add_host_and_ip_to_filename("Checkin_Database", "sqlite")
-    zip_content = get_file_content(file_locations.sensor_checkin_database, open_type="rb")
-    _zip_db(file_locations.checkin_database_zipped, sql_filename, zip_content)
+    _zip_db(file_locations.checkin_database_zipped, [[sql_filename, file_locations.sensor_checkin_database]])
     app_cached_variables.creating_zip_checkin_db = False
 
 
-def _zip_db(zip_location, sql_filename, zip_content):
-    try:
-        start_time = time.time()
-        zip_files([sql_filename], [zip_content], save_type="save_to_disk", file_location=zip_location)
-        end_time = time.time()
-        total_zip_time = str(round(end_time - start_time, 2))
-        logger.network_logger.info("Zipping " + sql_filename + " took " + total_zip_time + " seconds")
-    except Exception as error:
-        logger.primary_logger.error("* Unable to create Database zip of " + sql_filename + ": " + str(error))
+def _zip_db(zip_location, zip_entries):
+    sql_filenames = [zip_entry[0] for zip_entry in zip_entries]
+    start_time = time.time()
+    if save_zip_stream(get_zip_stream(zip_entries), zip_location):
+        total_zip_time = str(round(time.time() - start_time, 2))
+        logger.network_logger.info("Zipping " + ", ".join(sql_filenames) + " took " + total_zip_time + " seconds")
 
 
 @html_local_download_routes.route("/DownloadZippedEverything")
@@ -233,15 +239,9 @@ def download_zipped_everything():
 
     try:
         zipped_logs = _get_zipped_logs()
-        return_names = [app_cached_variables.hostname + "_Main_Database.sqlite",
-                        app_cached_variables.hostname + "_Checkin_Database.sqlite",
-                        app_cached_variables.hostname + "_MQTT_Sub_Database.sqlite",
-                        app_cached_variables.hostname + "_Logs.zip"]
-        return_files = [get_file_content(file_locations.sensor_database, open_type="rb"),
-                        get_file_content(file_locations.sensor_checkin_database, open_type="rb"),
-                        get_file_content(file_locations.mqtt_subscriber_database, open_type="rb"),
-                        zipped_logs.read()]
-        return send_file(zip_files(return_names, return_files), attachment_filename=zip_name, as_attachment=True)
+        zip_entries = get_all_databases_zip_entries(app_cached_variables.hostname + "_")
+        zip_entries.insert(3, [app_cached_variables.hostname + "_Logs.zip", zipped_logs.read()])
+        return _get_zip_stream_response(zip_entries, zip_name)
     except Exception as error:
         logger.primary_logger.error("* Download Everything Zip: " + str(error))
         return_zip = "Error Creating Zip on " + app_cached_variables.ip + " - " + app_cached_variables.hostname
@@ -16,8 +16,6 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-import sqlite3
-from time import sleep
 from datetime import datetime
 from flask import Blueprint, request
 from operations_modules import logger
@@ -25,7 +23,7 @@ from operations_modules import file_locations
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
 from operations_modules.sqlite_database import create_table_and_datetime, check_sql_table_and_column, \
-    write_to_sql_database, get_clean_sql_table_name
+    write_to_sql_database, get_clean_sql_table_name, get_database_connection
 
 html_sensor_check_ins_routes = Blueprint("html_sensor_check_ins_routes", __name__)
 db_v = app_cached_variables.database_variables
@@ -73,24 +71,18 @@ def remote_sensor_check_ins():
 
 
 def check_sensor_checkin_columns(checkin_id):
-    while app_cached_variables.sql_db_locked:
-        sleep(1)
-    db_connection = sqlite3.connect(sc_database_location, isolation_level=None)
-    db_cursor = db_connection.cursor()
+    with get_database_connection(sc_database_location) as db_connection:
+        db_cursor = db_connection.cursor()
 
-    create_table_and_datetime(checkin_id, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_name, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.ip, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.kootnet_sensors_version, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_check_in_installed_sensors, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_uptime, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_check_in_primary_log, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_check_in_network_log, db_cursor)
-    check_sql_table_and_column(checkin_id, db_v.sensor_check_in_sensors_log, db_cursor)
-
-    db_connection.commit()
-    db_connection.execute("PRAGMA optimize;")
-    db_connection.close()
+        create_table_and_datetime(checkin_id, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_name, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.ip, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.kootnet_sensors_version, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_check_in_installed_sensors, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_uptime, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_check_in_primary_log, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_check_in_network_log, db_cursor)
+        check_sql_table_and_column(checkin_id, db_v.sensor_check_in_sensors_log, db_cursor)
 
 
 def _get_cleaned_data(data):
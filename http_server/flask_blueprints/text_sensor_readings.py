@@ -21,10 +21,15 @@ from operations_modules import logger
 from operations_modules import app_cached_variables as acv
 from operations_modules.app_cached_variables import command_data_separator, database_variables
 from operations_modules import software_version
+from operations_modules.sqlite_write_queue import get_write_queues_statistics_text
+from operations_modules.sqlite_database import sql_access_coordinator
 from configuration_modules import app_config_access
 from http_server.flask_blueprints.atpro.atpro_generic import get_uptime_str
 from sensor_modules import system_access
 from sensor_modules import sensor_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration
+from sensor_modules.sensor_recent_readings import recent_readings
+from sensor_modules.sensor_imu_capture import imu_capture
 
 html_sensor_readings_routes = Blueprint("html_sensor_readings_routes", __name__)
 db_v = database_variables
@@ -54,7 +59,8 @@ def get_all_sensor_readings():
 @html_sensor_readings_routes.route("/GetSensorsLatency")
 def get_sensors_latency():
     logger.network_logger.debug("* Sensor Latency sent to " + str(request.remote_addr))
-    latency_dic = sensor_access.get_sensors_latency()
+    percentile = request.args.get("percentile", default=None, type=float)
+    latency_dic = sensor_access.get_sensors_latency(percentile=percentile)
     try:
         text_part1 = ""
         text_part2 = ""
@@ -75,6 +81,43 @@ def get_sensors_latency():
     return text_part1 + command_data_separator + text_part2
 
 
+@html_sensor_readings_routes.route("/GetSQLWriteQueueStatistics")
+def get_sql_write_queue_statistics():
+    logger.network_logger.debug("* SQL Write Queue Statistics sent to " + str(request.remote_addr))
+    return get_write_queues_statistics_text()
+
+
+@html_sensor_readings_routes.route("/GetSQLAccessLockStatistics")
+def get_sql_access_lock_statistics():
+    logger.network_logger.debug("* SQL Access Lock Statistics sent to " + str(request.remote_addr))
+    return sql_access_coordinator.get_statistics_text()
+
+
+@html_sensor_readings_routes.route("/GetSensorBusStatistics")
+def get_sensor_bus_statistics():
+    logger.network_logger.debug("* Sensor Bus Statistics sent to " + str(request.remote_addr))
+    return bus_arbitration.get_status_text()
+
+
+@html_sensor_readings_routes.route("/GetRecentReadingsSummary")
+def get_recent_readings_summary():
+    logger.network_logger.debug("* Recent Readings Summary sent to " + str(request.remote_addr))
+    seconds = request.args.get("seconds", default=None, type=float)
+    return recent_readings.get_summary_text(seconds=seconds)
+
+
+@html_sensor_readings_routes.route("/GetSensorInitializationTimes")
+def get_sensor_initialization_times():
+    logger.network_logger.debug("* Sensor Initialization Times sent to " + str(request.remote_addr))
+    return sensor_access.sensors_direct.get_initialization_report_text()
+
+
+@html_sensor_readings_routes.route("/GetIMUCaptureSummary")
+def get_imu_capture_summary():
+    logger.network_logger.debug("* IMU Capture Summary sent to " + str(request.remote_addr))
+    return imu_capture.get_summary_text()
+
+
 @html_sensor_readings_routes.route("/GetSensorID")
 def get_sensor_id():
     logger.network_logger.debug("* Sensor's ID sent to " + str(request.remote_addr))
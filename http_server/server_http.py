@@ -53,6 +53,7 @@ from http_server.flask_blueprints.atpro.system.system_networking import html_atp
 from http_server.flask_blueprints.atpro.system.system_commands import html_atpro_system_commands_routes
 
 from http_server.flask_blueprints.text_sensor_readings import html_sensor_readings_routes
+from http_server.flask_blueprints.graph_data_api import html_graph_data_routes
 from http_server.flask_blueprints.local_sensor_downloads import html_local_download_routes
 from http_server.flask_blueprints.get_set_raw_configurations import html_get_set_config_routes
 from http_server.flask_blueprints.system_commands import html_system_commands_routes
@@ -105,6 +106,7 @@ class CreateSensorHTTP:
         app.register_blueprint(html_atpro_system_commands_routes)
 
         app.register_blueprint(html_sensor_readings_routes)
+        app.register_blueprint(html_graph_data_routes)
         app.register_blueprint(html_local_download_routes)
         app.register_blueprint(html_get_set_config_routes)
         app.register_blueprint(html_system_commands_routes)
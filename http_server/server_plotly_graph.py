@@ -16,12 +16,20 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from multiprocessing import Process
+import os
 from operations_modules import app_cached_variables
 from operations_modules import logger
 from operations_modules.app_generic_functions import adjust_datetime
-from operations_modules.sqlite_database import sql_execute_get_data, get_one_db_entry
+from operations_modules.sqlite_database import get_one_db_entry
+from operations_modules.sqlite_typed_storage import get_typed_latest_entry
+from operations_modules.sqlite_narrow_storage import get_narrow_latest_entry
+from operations_modules.sqlite_rollups import get_graph_rollup_table, get_rollup_graph_data
+from operations_modules.sqlite_database_shards import shard_query_router
+from operations_modules.graph_downsampling import downsample_graph_data, downsample_mode_min_max
 from http_server import server_plotly_graph_variables
+from http_server.server_plotly_graph_data import get_graph_columns_data, get_rolling_graph_columns_data
+from http_server.server_plotly_graph_cache import get_rolling_graph_data_key, load_rolling_graph_data, \
+    save_rolling_graph_data
 
 try:
     from plotly import subplots, offline, io as plotly_io, graph_objs as go
@@ -48,18 +56,24 @@ class CreateGraphScatterData:
             self.set_marker["size"] = 5
 
 
-def create_plotly_graph(new_graph_data):
-    """ Create Plotly offline HTML Graph, based on user selections in the Web Portal Graphing section. """
+def create_plotly_graph(graph_data, progress_function=None):
+    """
+    Create Plotly offline HTML Graph, based on user selections in the Web Portal Graphing section.
+    Run by the graph worker processes. Progress is sent to progress_function(percent, text) if provided.
+    Returns True if a graph was created.
+    """
     logger.primary_logger.info("Plotly Graph Generation Started")
-    server_plotly_graph_variables.graph_creation_in_progress = True
-    graph_multiprocess = Process(target=_start_plotly_graph, args=(new_graph_data,))
-    graph_multiprocess.start()
-    graph_multiprocess.join()
+    graph_created = _start_plotly_graph(graph_data, progress_function)
     logger.primary_logger.info("Plotly Graph Generation Complete")
-    server_plotly_graph_variables.graph_creation_in_progress = False
+    return graph_created
+
+
+def _report_progress(progress_function, progress_percent, progress_text):
+    if progress_function is not None:
+        progress_function(progress_percent, progress_text)
 
 
-def _start_plotly_graph(graph_data):
+def _start_plotly_graph(graph_data, progress_function=None):
     """ Creates a Offline Plotly graph from a SQL database. """
     logger.primary_logger.debug("SQL Columns: " + str(graph_data.selected_sensors_list))
     logger.primary_logger.debug("SQL Table(s): " + graph_data.graph_db_table)
@@ -71,49 +85,103 @@ def _start_plotly_graph(graph_data):
         new_time_offset = graph_data.datetime_offset * -1
         get_sql_graph_start = adjust_datetime(graph_data.graph_datetime_start, new_time_offset)
         get_sql_graph_end = adjust_datetime(graph_data.graph_datetime_end, new_time_offset)
-        graph_data.sql_ip = get_one_db_entry(graph_data.graph_db_table, db_v.ip, database=graph_data.db_location)
-
-        for var_column in graph_data.selected_sensors_list:
-            var_sql_query = "SELECT " + var_column + \
-                            " FROM " + graph_data.graph_db_table + \
-                            " WHERE " + var_column + \
-                            " IS NOT NULL AND DateTime BETWEEN date('" + get_sql_graph_start + \
-                            "') AND date('" + get_sql_graph_end + \
-                            "') AND ROWID % " + str(graph_data.sql_queries_skip + 1) + " = 0" + \
-                            " ORDER BY " + db_v.all_tables_datetime + " DESC" + \
-                            " LIMIT " + str(graph_data.max_sql_queries)
-
-            var_time_sql_query = "SELECT " + db_v.all_tables_datetime + \
-                                 " FROM " + graph_data.graph_db_table + \
-                                 " WHERE " + var_column + \
-                                 " IS NOT NULL AND DateTime BETWEEN date('" + get_sql_graph_start + \
-                                 "') AND date('" + get_sql_graph_end + \
-                                 "') AND ROWID % " + str(graph_data.sql_queries_skip + 1) + " = 0" + \
-                                 " ORDER BY " + db_v.all_tables_datetime + " DESC" + \
-                                 " LIMIT " + str(graph_data.max_sql_queries)
-
-            original_sql_column_date_time = sql_execute_get_data(var_time_sql_query, graph_data.db_location)
-            sql_column_date_time = []
-            for var_d_time in original_sql_column_date_time:
-                sql_column_date_time.append(adjust_datetime(var_d_time[0], graph_data.datetime_offset))
-
-            if var_column == db_v.all_tables_datetime:
-                graph_data.datetime_entries_in_db = len(sql_column_date_time)
-            elif var_column == db_v.sensor_name or var_column == db_v.ip:
-                graph_data.graph_data_dic[var_column][0] = _get_clean_sql_data(
-                    var_sql_query, graph_data.db_location, data_to_float=False
+        # Monthly database shards in the graph's range are read along with the main database
+        _report_progress(progress_function, 5, "Reading Database")
+        with shard_query_router(get_sql_graph_start, get_sql_graph_end, graph_data.db_location):
+            graph_data.sql_ip = get_one_db_entry(graph_data.graph_db_table, db_v.ip, database=graph_data.db_location)
+            if graph_data.graph_db_table == db_v.table_interval:
+                for get_storage_latest_entry in [get_typed_latest_entry, get_narrow_latest_entry]:
+                    if graph_data.sql_ip == "":
+                        graph_data.sql_ip = get_storage_latest_entry(db_v.ip, database_location=graph_data.db_location)
+
+            rollup_table = None
+            if graph_data.graph_db_table == db_v.table_interval:
+                rollup_table = get_graph_rollup_table(graph_data.db_location, get_sql_graph_start, get_sql_graph_end,
+                                                      graph_data.max_sql_queries)
+                if rollup_table is not None:
+                    logger.primary_logger.debug("SQL Rollup Table: " + rollup_table)
+
+            graph_columns = []
+            for var_column in graph_data.selected_sensors_list:
+                if rollup_table is not None and var_column not in [db_v.all_tables_datetime, db_v.sensor_name, db_v.ip]:
+                    rollup_data = get_rollup_graph_data(
+                        graph_data.db_location, rollup_table, var_column, get_sql_graph_start, get_sql_graph_end,
+                        max_rows=graph_data.max_sql_queries, hour_offset=graph_data.datetime_offset
+                    )
+                    if graph_data.downsample_mode == downsample_mode_min_max:
+                        rollup_data = _get_rollup_min_max_data(rollup_data)
+                    graph_data.graph_data_dic[var_column][0], graph_data.graph_data_dic[var_column][1] = \
+                        rollup_data[0], rollup_data[1]
+                    rollup_entries = len(graph_data.graph_data_dic[var_column][1])
+                    graph_data.datetime_entries_in_db = max(graph_data.datetime_entries_in_db, rollup_entries)
+                else:
+                    graph_columns.append(var_column)
+
+            rolling_data_key = get_rolling_graph_data_key(graph_data)
+            if rolling_data_key is not None:
+                graph_columns_data, datetime_entries = _get_rolling_graph_columns_data(
+                    graph_data, graph_columns, rolling_data_key
                 )
-                graph_data.graph_data_dic[var_column][1] = sql_column_date_time
             else:
-                graph_data.graph_data_dic[var_column][0] = _get_clean_sql_data(var_sql_query, graph_data.db_location)
-                graph_data.graph_data_dic[var_column][1] = sql_column_date_time
-        _plotly_graph(graph_data)
+                graph_columns_data, datetime_entries = get_graph_columns_data(
+                    graph_data.db_location, graph_data.graph_db_table, graph_columns, get_sql_graph_start,
+                    get_sql_graph_end, rows_skip=graph_data.sql_queries_skip, max_rows=graph_data.max_sql_queries,
+                    hour_offset=graph_data.datetime_offset, fit_rows_to_range=not graph_data.do_not_skip_data_points
+                )
+            if db_v.all_tables_datetime in graph_columns:
+                graph_data.datetime_entries_in_db = max(graph_data.datetime_entries_in_db, datetime_entries)
+            for var_column, column_data in graph_columns_data.items():
+                if var_column in graph_data.graph_data_dic:
+                    graph_data.graph_data_dic[var_column][0], graph_data.graph_data_dic[var_column][1] = column_data
+        _report_progress(progress_function, 50, "Downsampling")
+        _downsample_graph_data(graph_data)
+        _report_progress(progress_function, 60, "Creating Graph")
+        return _plotly_graph(graph_data, progress_function)
     except Exception as error:
         logger.primary_logger.warning("Plotly Graph Generation Failed: " + str(error))
+    return False
+
+
+def _get_rolling_graph_columns_data(graph_data, graph_columns, rolling_data_key):
+    """ Returns graph columns data for a graph ending now, only reading rows added since its last refresh. """
+    rolling_graph_data = load_rolling_graph_data(rolling_data_key, graph_data.db_location)
+    graph_columns_data, datetime_entries, rolling_graph_data = get_rolling_graph_columns_data(
+        graph_data.db_location, graph_data.graph_db_table, graph_columns, graph_data.graph_datetime_start,
+        graph_data.graph_datetime_end, rolling_graph_data=rolling_graph_data, max_rows=graph_data.max_sql_queries,
+        hour_offset=graph_data.datetime_offset, fit_rows_to_range=not graph_data.do_not_skip_data_points
+    )
+    if rolling_graph_data is not None:
+        save_rolling_graph_data(rolling_data_key, graph_data.db_location, rolling_graph_data)
+    return graph_columns_data, datetime_entries
 
 
-def _plotly_graph(graph_data):
-    """ Create a HTML offline Plotly graph with the data provided. """
+def _get_rollup_min_max_data(rollup_data):
+    """
+    Returns [readings_list, datetime_list] with the lowest and highest reading of each rollup bucket
+    instead of its average, so MinMax graphs keep every excursion.
+    """
+    readings_list = []
+    datetime_list = []
+    for bucket_datetime, min_reading, max_reading in zip(rollup_data[1], rollup_data[2], rollup_data[3]):
+        readings_list += [max_reading, min_reading]
+        datetime_list += [bucket_datetime, bucket_datetime]
+    return [readings_list, datetime_list]
+
+
+def _downsample_graph_data(graph_data):
+    """ Reduces every graph line to about the configured graph width in points, keeping peaks and dips. """
+    for var_column, sensor_graph_data in graph_data.graph_data_dic.items():
+        try:
+            sensor_graph_data[0], sensor_graph_data[1] = downsample_graph_data(
+                sensor_graph_data[1], sensor_graph_data[0], graph_data.downsample_target_points,
+                mode=graph_data.downsample_mode
+            )
+        except Exception as error:
+            logger.primary_logger.warning("Plotly Graph - Downsampling " + var_column + " Failed: " + str(error))
+
+
+def _plotly_graph(graph_data, progress_function=None):
+    """ Create a HTML offline Plotly graph with the data provided. Returns True if the graph was saved. """
     graph_data.sub_plots = []
     graph_data.row_count = 0
     graph_data.graph_collection = []
@@ -136,25 +204,16 @@ def _plotly_graph(graph_data):
             height=graph_height
         )
 
-        offline.plot(fig, filename=graph_data.save_plotly_graph_to, auto_open=False)
-    else:
-        msg = "Plotly Graph Creation - Failed: No SQL data found in the database within the selected time frame"
-        msg += " || DB: " + graph_data.db_location + " || Table: " + graph_data.graph_db_table
-        logger.primary_logger.info(msg)
-
-
-def _get_clean_sql_data(var_sql_query, db_location, data_to_float=True):
-    sql_data_tuple = sql_execute_get_data(var_sql_query, db_location)
-    cleaned_list = []
-    for data in sql_data_tuple:
-        if data_to_float:
-            try:
-                cleaned_list.append(float(data[0]))
-            except Exception as error:
-                logger.primary_logger.debug("Plotly Graph data to Float Failed: " + str(error))
-        else:
-            cleaned_list.append(data[0])
-    return cleaned_list
+        _report_progress(progress_function, 80, "Saving Graph")
+        # Saved to a temporary file first, other workers may be saving a graph to the same location
+        save_location_tmp = graph_data.save_plotly_graph_to + "." + str(os.getpid()) + ".tmp.html"
+        offline.plot(fig, filename=save_location_tmp, auto_open=False)
+        os.replace(save_location_tmp, graph_data.save_plotly_graph_to)
+        return True
+    msg = "Plotly Graph Creation - Failed: No SQL data found in the database within the selected time frame"
+    msg += " || DB: " + graph_data.db_location + " || Table: " + graph_data.graph_db_table
+    logger.primary_logger.info(msg)
+    return False
 
 
 def add_plots(graph_data):
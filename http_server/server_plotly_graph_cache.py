@@ -0,0 +1,232 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+--------------------------------------------------------------------------
+Plotly graph cache.
+Created graphs are saved in the graph cache folder, named by a hash of everything that changes the graph:
+database, table, sensors, DateTime range, graph settings and a watermark of the database tables used
+(first and last ROWID of each). Graphs are reused until new data is recorded or the graph settings change.
+The least recently used graphs are removed when the cache is over its size limit.
+Graphs ending now (Past hours) also save their graph data, so the next refresh only reads newer rows.
+Rolling graph data shares the cache folder and size limit with cached graphs.
+"""
+import os
+import shutil
+import pickle
+from time import time
+from hashlib import sha256
+from threading import Lock, get_ident
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_functions import adjust_datetime
+from operations_modules.sqlite_database import sql_execute_get_data, get_file_inode, get_clean_sql_table_name
+from operations_modules.sqlite_database_shards import get_shard_locations
+from configuration_modules import app_config_access
+
+db_v = app_cached_variables.database_variables
+
+cached_graph_file_end = ".html"
+rolling_graph_data_file_end = ".graphdata"
+
+_graph_cache_lock = Lock()
+
+
+def get_graph_cache_key(graph_data):
+    """ Returns the graph cache key for the provided CreateGraphData or None if the graph cache is disabled. """
+    if app_config_access.graph_workers_config.graph_cache_size_mb <= 0:
+        return None
+
+    key_items = [
+        graph_data.db_location, graph_data.graph_db_table, graph_data.selected_sensors_list,
+        graph_data.datetime_offset, graph_data.enable_plotly_webgl, graph_data.sql_queries_skip,
+        graph_data.max_sql_queries, graph_data.downsample_mode, graph_data.downsample_target_points
+    ]
+    if graph_data.graph_using_date_range:
+        key_items += [graph_data.graph_datetime_start, graph_data.graph_datetime_end]
+    else:
+        # Past hours graphs end now, they are reused while the range has moved less than one pixel of graph width
+        pixel_seconds = max((graph_data.graph_past_hours * 3600) / max(graph_data.downsample_target_points, 1), 1)
+        key_items += [graph_data.graph_past_hours, int(time() // pixel_seconds)]
+    key_items += get_graph_data_watermark(graph_data)
+    return sha256(repr(key_items).encode()).hexdigest()
+
+
+def get_graph_data_watermark(graph_data):
+    """
+    Returns a list that changes when rows are added to or removed from the tables used by the graph.
+    The first and last ROWID are used as they are found without reading the table. Rollup tables are
+    WITHOUT ROWID tables, their newest bucket and row count are used instead.
+    """
+    new_time_offset = graph_data.datetime_offset * -1
+    sql_graph_start = adjust_datetime(graph_data.graph_datetime_start, new_time_offset)
+    sql_graph_end = adjust_datetime(graph_data.graph_datetime_end, new_time_offset)
+
+    database_locations = [graph_data.db_location]
+    watermark_queries = ["SELECT MIN(ROWID), MAX(ROWID) FROM " + get_clean_sql_table_name(graph_data.graph_db_table)]
+    if graph_data.graph_db_table == db_v.table_interval:
+        for table_name in [db_v.table_interval_typed, db_v.table_interval_narrow]:
+            watermark_queries.append("SELECT MIN(ROWID), MAX(ROWID) FROM " + table_name)
+        # Back fill progress is updated in place
+        watermark_queries.append("SELECT " + db_v.rollup_state_name + ", " + db_v.rollup_state_value +
+                                 " FROM " + db_v.table_interval_rollup_state)
+        for table_name, bucket_ms in db_v.get_interval_rollup_tables_list():
+            watermark_queries.append("SELECT MAX(" + db_v.rollup_bucket + "), COUNT(*) FROM " + table_name)
+        if graph_data.db_location == file_locations.sensor_database:
+            database_locations += get_shard_locations(sql_graph_start, sql_graph_end)
+
+    watermark = []
+    for database_location in database_locations:
+        # Replacing a database (restoring a backup) changes the file's inode
+        watermark.append([database_location, get_file_inode(database_location)])
+        for sql_query in watermark_queries:
+            watermark.append(sql_execute_get_data(sql_query, database_location))
+    return watermark
+
+
+def get_rolling_graph_data_key(graph_data):
+    """
+    Returns the rolling graph data key for the provided CreateGraphData or None if the graph can't be
+    refreshed incrementally (Graph cache disabled, DateTime range graphs, Trigger graphs or skipped rows).
+    """
+    if app_config_access.graph_workers_config.graph_cache_size_mb <= 0 or graph_data.graph_using_date_range or \
+            graph_data.graph_db_table == db_v.table_trigger or graph_data.sql_queries_skip > 0:
+        return None
+
+    key_items = [
+        rolling_graph_data_file_end, graph_data.db_location, graph_data.graph_db_table,
+        graph_data.selected_sensors_list, graph_data.datetime_offset, graph_data.graph_past_hours,
+        graph_data.max_sql_queries, graph_data.do_not_skip_data_points
+    ]
+    return sha256(repr(key_items).encode()).hexdigest()
+
+
+def load_rolling_graph_data(rolling_data_key, database_location):
+    """ Returns the rolling graph data saved for the provided key or None if not found or the database changed. """
+    try:
+        with open(_get_rolling_graph_data_location(rolling_data_key), "rb") as rolling_data_file:
+            rolling_graph_data = pickle.load(rolling_data_file)
+        os.utime(_get_rolling_graph_data_location(rolling_data_key))
+        # Replacing a database (restoring a backup) changes the file's inode
+        if rolling_graph_data["DatabaseInode"] == get_file_inode(database_location):
+            return rolling_graph_data
+    except FileNotFoundError:
+        pass
+    except Exception as error:
+        logger.primary_logger.warning("Graph Cache - Unable to load Rolling Graph Data: " + str(error))
+    return None
+
+
+def save_rolling_graph_data(rolling_data_key, database_location, rolling_graph_data):
+    """ Saves rolling graph data for the next refresh and removes the least recently used cache files if needed. """
+    rolling_data_location = _get_rolling_graph_data_location(rolling_data_key)
+    rolling_graph_data["DatabaseInode"] = get_file_inode(database_location)
+    try:
+        with _graph_cache_lock:
+            if not os.path.isdir(file_locations.plotly_graph_cache_folder):
+                os.makedirs(file_locations.plotly_graph_cache_folder)
+            # Graph worker processes may save the same graph data, each writes its own temporary file
+            rolling_data_location_tmp = rolling_data_location + "." + str(os.getpid()) + ".tmp"
+            with open(rolling_data_location_tmp, "wb") as rolling_data_file:
+                pickle.dump(rolling_graph_data, rolling_data_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(rolling_data_location_tmp, rolling_data_location)
+            _trim_graph_cache(app_config_access.graph_workers_config.graph_cache_size_mb * 1024 * 1024)
+    except Exception as error:
+        logger.primary_logger.warning("Graph Cache - Unable to save Rolling Graph Data: " + str(error))
+
+
+def load_cached_graph(cache_key, save_graph_to):
+    """ Copies the cached graph to save_graph_to. Returns True if the graph was in the cache. """
+    cached_graph_location = _get_cached_graph_location(cache_key)
+    try:
+        save_location_tmp = save_graph_to + "." + str(get_ident()) + ".cache.tmp.html"
+        shutil.copyfile(cached_graph_location, save_location_tmp)
+        os.replace(save_location_tmp, save_graph_to)
+        # The modified time is used as the last used time
+        os.utime(cached_graph_location)
+        return True
+    except FileNotFoundError:
+        return False
+    except Exception as error:
+        logger.primary_logger.warning("Graph Cache - Unable to load cached Graph: " + str(error))
+    return False
+
+
+def save_graph_to_cache(cache_key, graph_location):
+    """ Adds the graph at graph_location to the cache and removes the least recently used graphs if needed. """
+    cached_graph_location = _get_cached_graph_location(cache_key)
+    try:
+        with _graph_cache_lock:
+            if not os.path.isdir(file_locations.plotly_graph_cache_folder):
+                os.makedirs(file_locations.plotly_graph_cache_folder)
+            shutil.copyfile(graph_location, cached_graph_location + ".tmp")
+            os.replace(cached_graph_location + ".tmp", cached_graph_location)
+            _trim_graph_cache(app_config_access.graph_workers_config.graph_cache_size_mb * 1024 * 1024)
+    except Exception as error:
+        logger.primary_logger.warning("Graph Cache - Unable to save Graph: " + str(error))
+
+
+def clear_graph_cache():
+    """
+    Removes all cached graphs and rolling graph data. Used when recorded readings are changed,
+    which doesn't change the database watermarks used to find outdated graphs.
+    """
+    with _graph_cache_lock:
+        if not os.path.isdir(file_locations.plotly_graph_cache_folder):
+            return
+        for file_name in os.listdir(file_locations.plotly_graph_cache_folder):
+            if file_name.endswith(cached_graph_file_end) or file_name.endswith(rolling_graph_data_file_end):
+                try:
+                    os.remove(file_locations.plotly_graph_cache_folder + "/" + file_name)
+                except FileNotFoundError:
+                    # Already removed by another graph worker process
+                    pass
+    logger.primary_logger.debug("Graph Cache - Cleared")
+
+
+def _get_cached_graph_location(cache_key):
+    return file_locations.plotly_graph_cache_folder + "/" + cache_key + cached_graph_file_end
+
+
+def _get_rolling_graph_data_location(rolling_data_key):
+    return file_locations.plotly_graph_cache_folder + "/" + rolling_data_key + rolling_graph_data_file_end
+
+
+def _trim_graph_cache(max_cache_bytes):
+    """ Removes the least recently used cached graphs and graph data until the cache is under max_cache_bytes. """
+    cached_graphs = []
+    cache_bytes = 0
+    for file_name in os.listdir(file_locations.plotly_graph_cache_folder):
+        if file_name.endswith(cached_graph_file_end) or file_name.endswith(rolling_graph_data_file_end):
+            try:
+                file_stat = os.stat(file_locations.plotly_graph_cache_folder + "/" + file_name)
+            except FileNotFoundError:
+                # Removed by another graph worker process after the folder was listed
+                continue
+            cached_graphs.append([file_stat.st_mtime, file_stat.st_size, file_name])
+            cache_bytes += file_stat.st_size
+
+    for last_used_time, file_size, file_name in sorted(cached_graphs):
+        if cache_bytes <= max_cache_bytes:
+            break
+        try:
+            os.remove(file_locations.plotly_graph_cache_folder + "/" + file_name)
+        except FileNotFoundError:
+            # Already removed by another graph worker process
+            pass
+        cache_bytes -= file_size
+        logger.primary_logger.debug("Graph Cache - Removed " + file_name)
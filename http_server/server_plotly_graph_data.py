@@ -0,0 +1,549 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+--------------------------------------------------------------------------
+Columnar data loader for Plotly database graphs.
+All selected columns and their DateTimes are read with a single range query per storage format
+(text formatted, typed and narrow) and returned as NumPy arrays.
+DateTimes are parsed and adjusted by the hour offset in vectorized form, instead of one row at a time.
+Graphs ending now can be refreshed incrementally, reading only rows newer than the last refresh.
+Ranges holding more rows than the graph's maximum are split into time buckets in SQL and only the rows holding
+the lowest and highest readings of every bucket are read, so the rows cover the whole range and keep its peaks.
+"""
+from math import ceil
+from operations_modules import logger
+from operations_modules import app_cached_variables
+from operations_modules.sqlite_database import sql_execute_get_data
+from operations_modules.sqlite_typed_storage import get_epoch_ms_date_range
+from operations_modules.sqlite_narrow_storage import get_narrow_metric_id
+from operations_modules.sqlite_database_shards import shard_query_router
+from operations_modules.app_generic_functions import adjust_datetime
+from operations_modules.graph_downsampling import downsample_graph_data, downsample_mode_lttb
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy Graph Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+db_v = app_cached_variables.database_variables
+
+
+def get_graph_columns_data(database_location, table_name, columns_list, start_datetime, end_datetime,
+                           rows_skip=0, max_rows=1000000, hour_offset=0, after_datetime64=None,
+                           fit_rows_to_range=False):
+    """
+    Returns a dictionary of {column_name: [readings_array, datetimes_array]} and the number of DateTimes found.
+    Text column readings are object arrays, all others are float64 arrays. DateTimes are datetime64 arrays
+    adjusted by the provided hour offset. Arrays are ordered newest first and hold up to max_rows entries.
+    Typed and narrow Interval data is merged in when the Interval table is used.
+    If after_datetime64 (UTC0) is provided, only rows newer than it are returned.
+    If fit_rows_to_range is True and the range holds more than max_rows entries, the range is split into time
+    buckets and only the rows holding each column's lowest and highest reading of every bucket are read,
+    so the rows cover the whole range without losing peaks. Otherwise the newest max_rows entries are returned.
+    """
+    graph_columns_data, datetime_entries, _ = _get_graph_columns_data(
+        database_location, table_name, columns_list, start_datetime, end_datetime, rows_skip, max_rows,
+        hour_offset, after_datetime64, fit_rows_to_range
+    )
+    return graph_columns_data, datetime_entries
+
+
+def _get_graph_columns_data(database_location, table_name, columns_list, start_datetime, end_datetime, rows_skip,
+                            max_rows, hour_offset, after_datetime64, fit_rows_to_range, bucket_ms=None):
+    """
+    Returns the same as get_graph_columns_data, plus the width in milliseconds of the time buckets the rows
+    were read in (None if they were not). If bucket_ms is provided, rows are read in buckets of that width.
+    """
+    reading_columns = [column for column in columns_list if column != db_v.all_tables_datetime]
+    if fit_rows_to_range and bucket_ms is None:
+        storage_ranges = [
+            _get_text_table_range(database_location, table_name, reading_columns, start_datetime, end_datetime,
+                                  rows_skip, after_datetime64)
+        ]
+        if table_name == db_v.table_interval:
+            for get_storage_range in [_get_typed_table_range, _get_narrow_table_range]:
+                storage_ranges.append(get_storage_range(database_location, reading_columns, start_datetime,
+                                                        end_datetime, rows_skip, after_datetime64))
+        bucket_ms = _get_fit_bucket_ms(storage_ranges, max_rows)
+
+    storage_results = [
+        _get_text_table_data(database_location, table_name, reading_columns, start_datetime, end_datetime,
+                             rows_skip, max_rows, after_datetime64, bucket_ms)
+    ]
+    if table_name == db_v.table_interval:
+        for get_storage_data in [_get_typed_table_data, _get_narrow_table_data]:
+            storage_results.append(get_storage_data(database_location, reading_columns, start_datetime,
+                                                    end_datetime, rows_skip, max_rows, after_datetime64,
+                                                    bucket_ms))
+
+    datetime_entries = 0
+    for storage_datetime_entries, _ in storage_results:
+        datetime_entries += storage_datetime_entries
+
+    hour_offset_delta = np.timedelta64(int(round(hour_offset * 3600)), "s")
+    graph_columns_data = {}
+    for column_name in reading_columns:
+        readings_arrays = []
+        datetimes_arrays = []
+        for _, storage_columns_data in storage_results:
+            if column_name in storage_columns_data:
+                readings_arrays.append(storage_columns_data[column_name][0])
+                datetimes_arrays.append(storage_columns_data[column_name][1])
+
+        if len(readings_arrays) == 0:
+            continue
+        readings_array = np.concatenate(readings_arrays)
+        datetimes_array = np.concatenate(datetimes_arrays)
+        if len(readings_arrays) > 1:
+            newest_first_order = np.argsort(datetimes_array, kind="stable")[::-1][:max_rows]
+            readings_array = readings_array[newest_first_order]
+            datetimes_array = datetimes_array[newest_first_order]
+        graph_columns_data[column_name] = [readings_array, datetimes_array + hour_offset_delta]
+    return graph_columns_data, datetime_entries, bucket_ms
+
+
+def get_graph_page_data(database_location, table_name, columns_list, page_start, page_end, hour_offset=0,
+                        target_points=1920, downsample_mode=downsample_mode_lttb, max_rows=1000000,
+                        page_end_included=True):
+    """
+    Returns a dictionary of {column_name: [readings_array, epoch_ms_array]} and True if rows were left out
+    because of max_rows, for graphs drawn by the browser.
+    Page start and end are DateTime strings adjusted by the hour offset, the same as the returned DateTimes.
+    Readings at the page end are only included if page_end_included is True (Last page of a range),
+    so readings between pages are not lost or repeated when the next page starts at this page's end.
+    Arrays are oldest first and downsampled to about target_points entries.
+    """
+    new_time_offset = hour_offset * -1
+    sql_start = adjust_datetime(page_start, new_time_offset)
+    # Database range queries are by date, the end date is included by asking for the next day
+    sql_end = adjust_datetime(page_end, new_time_offset + 24)
+    page_start_datetime64 = np.datetime64(str(page_start).strip()[:19], "ms")
+    page_end_datetime64 = np.datetime64(str(page_end).strip()[:19], "ms")
+
+    with shard_query_router(sql_start, sql_end, database_location):
+        graph_columns_data, _ = get_graph_columns_data(
+            database_location, table_name, columns_list, sql_start, sql_end, max_rows=max_rows,
+            hour_offset=hour_offset
+        )
+
+    page_columns_data = {}
+    rows_left_out = False
+    for column_name, (readings_array, datetimes_array) in graph_columns_data.items():
+        if len(datetimes_array) >= max_rows:
+            rows_left_out = True
+        if page_end_included:
+            in_page = (datetimes_array >= page_start_datetime64) & (datetimes_array <= page_end_datetime64)
+        else:
+            in_page = (datetimes_array >= page_start_datetime64) & (datetimes_array < page_end_datetime64)
+        readings_array, datetimes_array = downsample_graph_data(
+            datetimes_array[in_page][::-1], readings_array[in_page][::-1], target_points, mode=downsample_mode
+        )
+        page_columns_data[column_name] = [readings_array, datetimes_array.astype(np.int64)]
+    return page_columns_data, rows_left_out
+
+
+def get_rolling_graph_columns_data(database_location, table_name, columns_list, window_start, window_end,
+                                   rolling_graph_data=None, max_rows=1000000, hour_offset=0, fit_rows_to_range=True):
+    """
+    Returns the same as get_graph_columns_data for a graph window ending now, plus the rolling graph data
+    to provide on the next refresh of the same graph.
+    When rolling_graph_data from a previous refresh is provided, only rows newer than its watermark (newest
+    DateTime) are read and merged in front of its arrays. Points older than the window are trimmed.
+    Rows are read in the same time buckets as the previous refresh, the newest bucket is read again in full.
+    If the window no longer fits in max_rows, it's read again in full with new buckets (fit_rows_to_range)
+    or the oldest rows are left out.
+    Window start and end are DateTime strings adjusted by the hour offset, the returned data is limited to them.
+    """
+    new_time_offset = hour_offset * -1
+    hour_offset_delta = np.timedelta64(int(round(hour_offset * 3600)), "s")
+    window_start_datetime64 = np.datetime64(str(window_start).strip()[:19], "ms")
+    window_end_datetime64 = np.datetime64(str(window_end).strip()[:19], "ms")
+    # Database range queries are by date, the end date is included by asking for the next day
+    sql_end = adjust_datetime(window_end, new_time_offset + 24)
+
+    cached_columns_data = {}
+    if rolling_graph_data is not None and rolling_graph_data["Watermark"] >= window_start_datetime64:
+        bucket_ms = rolling_graph_data.get("BucketMs")
+        after_datetime64 = rolling_graph_data["Watermark"] - hour_offset_delta
+        if bucket_ms is not None:
+            # The watermark's bucket may be missing newer rows, it's read again in place of its cached rows
+            after_epoch_ms = int(after_datetime64.astype("datetime64[ms]").astype(np.int64))
+            after_datetime64 = np.datetime64(after_epoch_ms - (after_epoch_ms % bucket_ms) - 1, "ms")
+        for column_name, (readings_array, datetimes_array) in rolling_graph_data["ColumnsData"].items():
+            cached_rows = datetimes_array <= after_datetime64 + hour_offset_delta
+            cached_columns_data[column_name] = [readings_array[cached_rows], datetimes_array[cached_rows]]
+        sql_start = str(after_datetime64.astype("datetime64[s]")).replace("T", " ")
+        new_columns_data, _, _ = _get_graph_columns_data(
+            database_location, table_name, columns_list, sql_start, sql_end, 0, max_rows, hour_offset,
+            after_datetime64, False, bucket_ms=bucket_ms
+        )
+    else:
+        sql_start = adjust_datetime(window_start, new_time_offset)
+        new_columns_data, _, bucket_ms = _get_graph_columns_data(
+            database_location, table_name, columns_list, sql_start, sql_end, 0, max_rows, hour_offset, None,
+            fit_rows_to_range
+        )
+
+    graph_columns_data = {}
+    watermark = None
+    for column_name in columns_list:
+        readings_arrays = []
+        datetimes_arrays = []
+        # Both are newest first and new rows are all newer than the cached rows
+        for columns_data in [new_columns_data, cached_columns_data]:
+            if column_name in columns_data:
+                readings_arrays.append(columns_data[column_name][0])
+                datetimes_arrays.append(columns_data[column_name][1])
+        if len(readings_arrays) == 0:
+            continue
+        readings_array = np.concatenate(readings_arrays)
+        datetimes_array = np.concatenate(datetimes_arrays)
+        in_window = (datetimes_array >= window_start_datetime64) & (datetimes_array <= window_end_datetime64)
+        if len(cached_columns_data) > 0 and fit_rows_to_range and np.count_nonzero(in_window) > max_rows:
+            return get_rolling_graph_columns_data(database_location, table_name, columns_list, window_start,
+                                                  window_end, max_rows=max_rows, hour_offset=hour_offset,
+                                                  fit_rows_to_range=fit_rows_to_range)
+        readings_array = readings_array[in_window][:max_rows]
+        datetimes_array = datetimes_array[in_window][:max_rows]
+        graph_columns_data[column_name] = [readings_array, datetimes_array]
+        if len(datetimes_array) > 0 and (watermark is None or datetimes_array[0] > watermark):
+            watermark = datetimes_array[0]
+
+    datetime_entries = 0
+    for readings_array, _ in graph_columns_data.values():
+        datetime_entries = max(datetime_entries, len(readings_array))
+    new_rolling_graph_data = None
+    if watermark is not None:
+        new_rolling_graph_data = {"Watermark": watermark, "BucketMs": bucket_ms, "ColumnsData": graph_columns_data}
+    return graph_columns_data, datetime_entries, new_rolling_graph_data
+
+
+def _get_fit_bucket_ms(storage_ranges, max_rows):
+    """
+    Returns the width in milliseconds of the time buckets a range is read in for it to fit in max_rows entries,
+    or None if it already fits. Storage ranges are [rows, first_epoch_ms, last_epoch_ms, rows_per_bucket].
+    """
+    storage_ranges = [storage_range for storage_range in storage_ranges if storage_range[0] > 0]
+    if sum([storage_range[0] for storage_range in storage_ranges]) <= max_rows:
+        return None
+    # Buckets are aligned to the Unix epoch, so a range can touch one bucket more than it's split in
+    bucket_count = max(max_rows // sum([storage_range[3] for storage_range in storage_ranges]) - 1, 1)
+    range_ms = max([storage_range[2] for storage_range in storage_ranges]) - \
+        min([storage_range[1] for storage_range in storage_ranges]) + 1
+    return max(ceil(range_ms / bucket_count), 1)
+
+
+def _get_range_rows(sql_query, database_location, rows_per_bucket):
+    """ Returns [rows, first_epoch_ms, last_epoch_ms, rows_per_bucket] from a rows, first & last epoch ms query. """
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) == 0 or None in sql_data[0][:3]:
+        return [0, None, None, rows_per_bucket]
+    return [int(sql_data[0][0]), int(sql_data[0][1]), int(sql_data[0][2]), rows_per_bucket]
+
+
+def _get_rank_columns(columns_list):
+    """ Returns the columns of columns_list holding numbers, which bucketed rows are picked by. """
+    text_columns = db_v.get_sensor_text_columns_list()
+    return [column_name for column_name in columns_list if column_name not in text_columns]
+
+
+def _get_bucket_extremes_query(select_columns, from_query_text, epoch_ms_query, rank_columns, bucket_ms,
+                               partition_columns=None):
+    """
+    Returns a query selecting the rows holding the lowest and highest reading of each rank column in every
+    bucket_ms wide time bucket (Aligned to the Unix epoch) of the rows selected by from_query_text.
+    Empty readings are only picked if a bucket has no other readings.
+    """
+    partition_text = "(" + epoch_ms_query + ") / " + str(int(bucket_ms))
+    if partition_columns is not None:
+        partition_text = ", ".join(partition_columns + [partition_text])
+    rank_queries = []
+    for rank_column in rank_columns:
+        order_text = "NULLIF(" + rank_column + ", '') IS NULL, CAST(" + rank_column + " AS REAL)"
+        for order_direction in ["", " DESC"]:
+            rank_queries.append("ROW_NUMBER() OVER (PARTITION BY " + partition_text + " ORDER BY " + order_text +
+                                order_direction + ") AS BucketRank" + str(len(rank_queries)))
+    keep_rows_query = " OR ".join(["BucketRank" + str(index) + " = 1" for index in range(len(rank_queries))])
+    return "SELECT " + ", ".join(select_columns) + \
+           " FROM (SELECT " + ", ".join(select_columns + rank_queries) + from_query_text + ")" + \
+           " WHERE " + keep_rows_query
+
+
+def _get_after_epoch_ms_query(epoch_column, after_datetime64):
+    if after_datetime64 is None:
+        return ""
+    return " AND " + epoch_column + " > " + str(int(after_datetime64.astype("datetime64[ms]").astype(np.int64)))
+
+
+def _get_text_epoch_ms_query(datetime_query=db_v.all_tables_datetime):
+    """ Returns SQL converting a text formatted DateTime to milliseconds since the Unix epoch. """
+    return "CAST(strftime('%s', " + datetime_query + ") AS INTEGER) * 1000"
+
+
+def _get_text_table_query(database_location, table_name, columns_list, start_datetime, end_datetime, rows_skip,
+                          after_datetime64):
+    """ Returns the columns of columns_list in the table and its range FROM query text, None if it has no DateTime. """
+    table_columns = _get_table_columns(database_location, table_name)
+    if db_v.all_tables_datetime not in table_columns:
+        return None
+    columns_list = [column for column in columns_list if column in table_columns]
+
+    after_query_text = ""
+    if after_datetime64 is not None:
+        # Text DateTimes are read to the second, rows in the watermark's second are already in the graph
+        after_datetime_text = str(after_datetime64.astype("datetime64[s]")).replace("T", " ") + ".999"
+        after_query_text = " AND " + db_v.all_tables_datetime + " > '" + after_datetime_text + "'"
+    from_query_text = " FROM " + table_name + \
+                      " WHERE " + db_v.all_tables_datetime + " BETWEEN date('" + str(start_datetime) + \
+                      "') AND date('" + str(end_datetime) + "')" + after_query_text + \
+                      " AND ROWID % " + str(rows_skip + 1) + " = 0"
+    return columns_list, from_query_text
+
+
+def _get_text_table_range(database_location, table_name, columns_list, start_datetime, end_datetime, rows_skip,
+                          after_datetime64):
+    text_table_query = _get_text_table_query(database_location, table_name, columns_list, start_datetime,
+                                             end_datetime, rows_skip, after_datetime64)
+    if text_table_query is None:
+        return [0, None, None, 0]
+    columns_list, from_query_text = text_table_query
+    sql_query = "SELECT COUNT(*), " + _get_text_epoch_ms_query("MIN(" + db_v.all_tables_datetime + ")") + ", " + \
+                _get_text_epoch_ms_query("MAX(" + db_v.all_tables_datetime + ")") + from_query_text
+    return _get_range_rows(sql_query, database_location, 2 * max(len(_get_rank_columns(columns_list)), 1))
+
+
+def _get_text_table_data(database_location, table_name, columns_list, start_datetime, end_datetime,
+                         rows_skip, max_rows, after_datetime64=None, bucket_ms=None):
+    text_table_query = _get_text_table_query(database_location, table_name, columns_list, start_datetime,
+                                             end_datetime, rows_skip, after_datetime64)
+    if text_table_query is None:
+        return 0, {}
+    columns_list, from_query_text = text_table_query
+
+    select_columns = [db_v.all_tables_datetime] + columns_list
+    if bucket_ms is None:
+        sql_query = "SELECT " + ", ".join(select_columns) + from_query_text
+    else:
+        rank_columns = _get_rank_columns(columns_list) or [_get_text_epoch_ms_query()]
+        sql_query = _get_bucket_extremes_query(select_columns, from_query_text, _get_text_epoch_ms_query(),
+                                               rank_columns, bucket_ms)
+    sql_query += " ORDER BY " + db_v.all_tables_datetime + " DESC LIMIT " + str(max_rows)
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) == 0:
+        return 0, {}
+
+    sql_data_array = np.array(sql_data, dtype=object)
+    datetimes_array = _get_datetime64_array(sql_data_array[:, 0])
+    return len(sql_data), _get_columns_data(sql_data_array, datetimes_array, columns_list)
+
+
+def _get_typed_table_query(database_location, columns_list, start_datetime, end_datetime, rows_skip,
+                           after_datetime64):
+    """ Returns the columns of columns_list in the typed table and its range FROM query text. """
+    table_columns = _get_table_columns(database_location, db_v.table_interval_typed)
+    columns_list = [column for column in columns_list if column in table_columns]
+
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+    from_query_text = " FROM " + db_v.table_interval_typed + \
+                      " WHERE " + epoch_column + " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms) + \
+                      _get_after_epoch_ms_query(epoch_column, after_datetime64) + \
+                      " AND ROWID % " + str(rows_skip + 1) + " = 0"
+    return columns_list, from_query_text
+
+
+def _get_typed_table_range(database_location, columns_list, start_datetime, end_datetime, rows_skip,
+                           after_datetime64):
+    columns_list, from_query_text = _get_typed_table_query(database_location, columns_list, start_datetime,
+                                                           end_datetime, rows_skip, after_datetime64)
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    sql_query = "SELECT COUNT(*), MIN(" + epoch_column + "), MAX(" + epoch_column + ")" + from_query_text
+    return _get_range_rows(sql_query, database_location, 2 * max(len(_get_rank_columns(columns_list)), 1))
+
+
+def _get_typed_table_data(database_location, columns_list, start_datetime, end_datetime, rows_skip, max_rows,
+                          after_datetime64=None, bucket_ms=None):
+    columns_list, from_query_text = _get_typed_table_query(database_location, columns_list, start_datetime,
+                                                           end_datetime, rows_skip, after_datetime64)
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    select_columns = [epoch_column] + columns_list
+    if bucket_ms is None:
+        sql_query = "SELECT " + ", ".join(select_columns) + from_query_text
+    else:
+        rank_columns = _get_rank_columns(columns_list) or [epoch_column]
+        sql_query = _get_bucket_extremes_query(select_columns, from_query_text, epoch_column, rank_columns,
+                                               bucket_ms)
+    sql_query += " ORDER BY " + epoch_column + " DESC LIMIT " + str(max_rows)
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) == 0:
+        return 0, {}
+
+    sql_data_array = np.array(sql_data, dtype=object)
+    datetimes_array = sql_data_array[:, 0].astype(np.int64).astype("datetime64[ms]")
+    return len(sql_data), _get_columns_data(sql_data_array, datetimes_array, columns_list)
+
+
+def _get_narrow_table_query(database_location, columns_list, start_datetime, end_datetime, after_datetime64):
+    """ Returns {column_name: metric_id} of columns_list and the narrow table's range WHERE query text. """
+    # Sensor Name is recorded with every Interval entry, it's used for the count of DateTimes
+    metric_ids = {}
+    for column_name in [db_v.sensor_name] + columns_list:
+        metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+        if metric_id is not None:
+            metric_ids[column_name] = metric_id
+    if len(metric_ids) == 0:
+        return None
+
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+    metric_ids_text = ", ".join([str(metric_id) for metric_id in set(metric_ids.values())])
+    where_query_text = " WHERE " + db_v.narrow_metric_id + " IN (" + metric_ids_text + ")" + \
+                       " AND " + epoch_column + " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms) + \
+                       _get_after_epoch_ms_query(epoch_column, after_datetime64)
+    return metric_ids, where_query_text
+
+
+def _get_narrow_from_query(where_query_text, rows_skip):
+    """ Returns the narrow table's FROM query text, skipping rows by each metric's own row numbers. """
+    if rows_skip == 0:
+        return " FROM " + db_v.table_interval_narrow + where_query_text
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    return " FROM (SELECT " + epoch_column + ", " + db_v.narrow_metric_id + ", " + db_v.narrow_reading + ", " + \
+           "ROW_NUMBER() OVER (PARTITION BY " + db_v.narrow_metric_id + " ORDER BY " + epoch_column + \
+           ") AS MetricRowNumber FROM " + db_v.table_interval_narrow + where_query_text + ")" + \
+           " WHERE MetricRowNumber % " + str(rows_skip + 1) + " = 0"
+
+
+def _get_narrow_table_range(database_location, columns_list, start_datetime, end_datetime, rows_skip,
+                            after_datetime64):
+    narrow_table_query = _get_narrow_table_query(database_location, columns_list, start_datetime, end_datetime,
+                                                 after_datetime64)
+    if narrow_table_query is None:
+        return [0, None, None, 0]
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    sql_query = "SELECT MAX(MetricRows), MIN(FirstEpochMS), MAX(LastEpochMS) FROM " + \
+                "(SELECT COUNT(*) AS MetricRows, MIN(" + epoch_column + ") AS FirstEpochMS, MAX(" + epoch_column + \
+                ") AS LastEpochMS" + _get_narrow_from_query(narrow_table_query[1], rows_skip) + \
+                " GROUP BY " + db_v.narrow_metric_id + ")"
+    # Each metric is bucketed on its own, so a bucket holds up to two rows of every metric
+    return _get_range_rows(sql_query, database_location, 2)
+
+
+def _get_narrow_table_data(database_location, columns_list, start_datetime, end_datetime, rows_skip, max_rows,
+                           after_datetime64=None, bucket_ms=None):
+    narrow_table_query = _get_narrow_table_query(database_location, columns_list, start_datetime, end_datetime,
+                                                 after_datetime64)
+    if narrow_table_query is None:
+        return 0, {}
+    metric_ids, where_query_text = narrow_table_query
+
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    select_columns = [epoch_column, db_v.narrow_metric_id, db_v.narrow_reading]
+    if bucket_ms is None:
+        # ROWIDs are shared by all metrics, so skipping and limits are done on each metric's own row numbers
+        # Of every metric's kept rows (Row number / step), only the newest max_rows are returned, the same as LIMIT
+        rows_step = str(rows_skip + 1)
+        sql_query = "SELECT " + ", ".join(select_columns) + " FROM " + \
+                    "(SELECT " + ", ".join(select_columns) + ", " + \
+                    "ROW_NUMBER() OVER (PARTITION BY " + db_v.narrow_metric_id + " ORDER BY " + epoch_column + \
+                    ") AS MetricRowNumber, " + \
+                    "COUNT(*) OVER (PARTITION BY " + db_v.narrow_metric_id + ") AS MetricRowCount" + \
+                    " FROM " + db_v.table_interval_narrow + where_query_text + ")" + \
+                    " WHERE MetricRowNumber % " + rows_step + " = 0" + \
+                    " AND MetricRowNumber / " + rows_step + " > MetricRowCount / " + rows_step + " - " + \
+                    str(max_rows)
+    else:
+        sql_query = _get_bucket_extremes_query(select_columns, _get_narrow_from_query(where_query_text, rows_skip),
+                                               epoch_column, [db_v.narrow_reading], bucket_ms,
+                                               partition_columns=[db_v.narrow_metric_id])
+    sql_query += " ORDER BY " + epoch_column + " DESC"
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) == 0:
+        return 0, {}
+
+    sql_data_array = np.array(sql_data, dtype=object)
+    datetimes_array = sql_data_array[:, 0].astype(np.int64).astype("datetime64[ms]")
+    metric_ids_array = sql_data_array[:, 1].astype(np.int64)
+
+    datetime_entries = 0
+    if db_v.sensor_name in metric_ids:
+        datetime_entries = min(int(np.count_nonzero(metric_ids_array == metric_ids[db_v.sensor_name])), max_rows)
+    columns_data = {}
+    text_columns = db_v.get_sensor_text_columns_list()
+    for column_name in columns_list:
+        if column_name in metric_ids:
+            metric_rows = metric_ids_array == metric_ids[column_name]
+            readings_array, readings_valid = _get_readings_array(sql_data_array[metric_rows, 2],
+                                                                 column_name in text_columns)
+            columns_data[column_name] = [readings_array[readings_valid][:max_rows],
+                                         datetimes_array[metric_rows][readings_valid][:max_rows]]
+    return datetime_entries, columns_data
+
+
+def _get_columns_data(sql_data_array, datetimes_array, columns_list):
+    """ Returns a dictionary of {column_name: [readings_array, datetimes_array]} without empty readings. """
+    text_columns = db_v.get_sensor_text_columns_list()
+    valid_datetimes = np.logical_not(np.isnat(datetimes_array))
+    columns_data = {}
+    for index, column_name in enumerate(columns_list):
+        readings_array, readings_valid = _get_readings_array(sql_data_array[:, index + 1],
+                                                             column_name in text_columns)
+        readings_valid = np.logical_and(readings_valid, valid_datetimes)
+        columns_data[column_name] = [readings_array[readings_valid], datetimes_array[readings_valid]]
+    return columns_data
+
+
+def _get_readings_array(readings, text_column):
+    """ Returns readings as an array and a boolean array marking usable readings (Not empty or invalid). """
+    if text_column:
+        return readings, np.not_equal(readings, None)
+    try:
+        # None becomes NaN
+        readings_array = readings.astype(np.float64)
+    except (TypeError, ValueError):
+        readings_array = np.array([_get_float(reading) for reading in readings], dtype=np.float64)
+    return readings_array, np.logical_not(np.isnan(readings_array))
+
+
+def _get_float(reading):
+    try:
+        return float(reading)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _get_datetime64_array(datetime_strings):
+    """ Returns UTC0 DateTime strings as a datetime64 (milliseconds) array. Invalid DateTimes are returned as NaT. """
+    try:
+        # Only the first 19 characters are used (YYYY-MM-DD HH:MM:SS), the same as adjust_datetime
+        datetime_text_array = np.char.strip(datetime_strings.astype("U32")).astype("U19")
+        return datetime_text_array.astype("datetime64[s]").astype("datetime64[ms]")
+    except ValueError:
+        datetimes_list = []
+        for datetime_string in datetime_strings:
+            try:
+                datetimes_list.append(np.datetime64(str(datetime_string).strip()[:19], "s"))
+            except ValueError:
+                datetimes_list.append(np.datetime64("NaT"))
+        return np.array(datetimes_list, dtype="datetime64[s]").astype("datetime64[ms]")
+
+
+def _get_table_columns(database_location, table_name):
+    return [column_info[1] for column_info in sql_execute_get_data("PRAGMA table_info(" + table_name + ")",
+                                                                    database_location)]
@@ -0,0 +1,302 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+--------------------------------------------------------------------------
+Plotly graph worker pool.
+Graphs are created by long lived worker processes, so a process is started once per worker instead of once per
+graph. Graph jobs wait in a shared queue (Web Portal and Email graphs), report progress and can be cancelled.
+Workers are started from a forkserver, so they don't inherit the locks, threads and pooled database connections
+of the multithreaded program. The forkserver imports the graph modules once for all workers.
+A worker is replaced after a graph if its memory use grew by more than the configured limit since it started.
+Graphs found in the graph cache are copied into place without using a worker.
+"""
+import os
+from time import time
+from threading import Thread, Lock, Condition, Event
+from multiprocessing import get_context, Pipe
+from operations_modules import logger
+from configuration_modules import app_config_access
+from http_server import server_plotly_graph
+from http_server.server_plotly_graph_cache import get_graph_cache_key, load_cached_graph, save_graph_to_cache
+
+job_state_queued = "Queued"
+job_state_running = "Running"
+job_state_complete = "Complete"
+job_state_failed = "Failed"
+job_state_cancelled = "Cancelled"
+job_finished_states = [job_state_complete, job_state_failed, job_state_cancelled]
+
+finished_jobs_to_keep = 25
+worker_poll_seconds = 0.5
+worker_stop_timeout_seconds = 5
+
+graph_worker_context = get_context("forkserver")
+graph_worker_context.set_forkserver_preload(["http_server.server_plotly_graph_workers"])
+
+
+class CreateGraphJob:
+    """ Creates a Graph Job, used to follow a graph from the queue to completion. """
+
+    def __init__(self, job_id, graph_data, requested_by):
+        self.job_id = job_id
+        self.graph_data = graph_data
+        self.requested_by = requested_by
+
+        self.state = job_state_queued
+        self.progress_percent = 0
+        self.progress_text = "Waiting for a Graph Worker"
+        self.created_time = time()
+        self.finished_time = None
+        self.cancel_requested = False
+        self._finished_event = Event()
+
+    def is_finished(self):
+        return self.state in job_finished_states
+
+    def wait(self, timeout=None):
+        """ Waits for the job to finish. Returns True if finished, False on timeout. """
+        return self._finished_event.wait(timeout)
+
+    def get_status_text(self):
+        status_text = "Graph " + str(self.job_id) + " (" + self.requested_by + "): " + self.state
+        if not self.is_finished():
+            status_text += " " + str(self.progress_percent) + "% - " + self.progress_text
+        return status_text
+
+    def set_finished(self, state, progress_text):
+        self.state = state
+        self.progress_text = progress_text
+        if state == job_state_complete:
+            self.progress_percent = 100
+        self.finished_time = time()
+        self._finished_event.set()
+
+
+class CreateGraphWorkerPool:
+    """
+    Creates a pool of Plotly graph worker processes with a job queue.
+    Workers are started with the first graph and stay running for the next ones.
+    """
+
+    def __init__(self):
+        self._jobs_condition = Condition(Lock())
+        self._queued_jobs = []
+        self._jobs = {}
+        self._finished_job_ids = []
+        self._last_job_id = 0
+        self._workers_started = False
+
+    def submit_graph(self, graph_data, requested_by="Web Portal"):
+        """ Adds a graph to the queue and returns its CreateGraphJob. """
+        with self._jobs_condition:
+            self._last_job_id += 1
+            graph_job = CreateGraphJob(self._last_job_id, graph_data, requested_by)
+            self._jobs[graph_job.job_id] = graph_job
+            self._queued_jobs.append(graph_job)
+            if not self._workers_started:
+                self._start_workers()
+            self._jobs_condition.notify()
+        logger.primary_logger.info("Plotly Graph " + str(graph_job.job_id) + " Queued by " + requested_by)
+        return graph_job
+
+    def cancel_graph(self, job_id):
+        """ Cancels a queued or running graph. Returns True if the graph was not already finished. """
+        with self._jobs_condition:
+            graph_job = self._jobs.get(job_id)
+            if graph_job is None or graph_job.is_finished():
+                return False
+            if graph_job in self._queued_jobs:
+                self._queued_jobs.remove(graph_job)
+                graph_job.set_finished(job_state_cancelled, "Cancelled while Queued")
+                self._add_finished_job(graph_job)
+            else:
+                # The worker thread stops the worker process running the graph
+                graph_job.cancel_requested = True
+        logger.primary_logger.info("Plotly Graph " + str(job_id) + " Cancelled")
+        return True
+
+    def get_job(self, job_id):
+        with self._jobs_condition:
+            return self._jobs.get(job_id)
+
+    def get_unfinished_jobs(self, requested_by=None):
+        """ Returns a list of queued and running graph jobs (Oldest first). """
+        with self._jobs_condition:
+            unfinished_jobs = []
+            for graph_job in self._jobs.values():
+                if not graph_job.is_finished():
+                    if requested_by is None or graph_job.requested_by == requested_by:
+                        unfinished_jobs.append(graph_job)
+            return unfinished_jobs
+
+    def get_status_text(self):
+        """ Returns the state of every graph job still in the pool as text, one per line (Newest first). """
+        with self._jobs_condition:
+            graph_jobs = list(self._jobs.values())
+        return_text = "Graph Workers: " + str(app_config_access.graph_workers_config.graph_worker_count) + "\n"
+        for graph_job in reversed(graph_jobs):
+            return_text += graph_job.get_status_text() + "\n"
+        return return_text
+
+    def _start_workers(self):
+        worker_count = max(app_config_access.graph_workers_config.graph_worker_count, 1)
+        for worker_number in range(1, worker_count + 1):
+            worker_thread = Thread(target=self._graph_worker, args=[worker_number])
+            worker_thread.daemon = True
+            worker_thread.start()
+        self._workers_started = True
+        logger.primary_logger.info(" -- Plotly Graph Workers Started: " + str(worker_count))
+
+    def _get_next_job(self):
+        with self._jobs_condition:
+            while len(self._queued_jobs) == 0:
+                self._jobs_condition.wait()
+            graph_job = self._queued_jobs.pop(0)
+            graph_job.state = job_state_running
+            return graph_job
+
+    def _add_finished_job(self, graph_job):
+        """ Keeps the newest finished jobs for status checks. Call with _jobs_condition held. """
+        self._finished_job_ids.append(graph_job.job_id)
+        while len(self._finished_job_ids) > finished_jobs_to_keep:
+            self._jobs.pop(self._finished_job_ids.pop(0), None)
+
+    def _graph_worker(self, worker_number):
+        """ Runs graph jobs from the queue on this thread's worker process, replacing it as needed. """
+        worker_process = None
+        worker_connection = None
+        while True:
+            graph_job = self._get_next_job()
+            replace_worker = False
+            try:
+                save_graph_to = graph_job.graph_data.save_plotly_graph_to
+                graph_job.progress_text = "Checking Graph Cache"
+                cache_key = get_graph_cache_key(graph_job.graph_data)
+                if cache_key is not None and load_cached_graph(cache_key, save_graph_to):
+                    graph_job.set_finished(job_state_complete, "Graph Loaded from Cache")
+                else:
+                    worker_process, worker_connection, graph_created, replace_worker = \
+                        self._run_graph_job(graph_job, worker_number, worker_process, worker_connection)
+                    if graph_created:
+                        if cache_key is not None:
+                            save_graph_to_cache(cache_key, save_graph_to)
+                        graph_job.set_finished(job_state_complete, "Graph Created")
+            except Exception as error:
+                logger.primary_logger.error("Plotly Graph Worker " + str(worker_number) + ": " + str(error))
+                graph_job.set_finished(job_state_failed, "Graph Worker Error")
+                replace_worker = True
+
+            if replace_worker and worker_process is not None:
+                _stop_worker_process(worker_process, worker_connection)
+                worker_process = None
+                logger.primary_logger.debug("Plotly Graph Worker " + str(worker_number) + " Process Stopped")
+            with self._jobs_condition:
+                self._add_finished_job(graph_job)
+            log_msg = "Plotly Graph " + str(graph_job.job_id) + " " + graph_job.state + " in "
+            logger.primary_logger.info(log_msg + str(round(graph_job.finished_time - graph_job.created_time, 1)) + "s")
+
+    @staticmethod
+    def _run_graph_job(graph_job, worker_number, worker_process, worker_connection):
+        """
+        Runs the graph job on the worker process, starting one if needed. Failed graphs are marked finished.
+        Returns the worker process, its connection, True if the graph was created and True to replace the worker.
+        """
+        graph_created = False
+        try:
+            if worker_process is None:
+                worker_connection, child_connection = Pipe()
+                worker_process = graph_worker_context.Process(target=_graph_worker_process, args=(child_connection,))
+                worker_process.daemon = True
+                worker_process.start()
+                child_connection.close()
+                logger.primary_logger.debug("Plotly Graph Worker " + str(worker_number) + " Process Started")
+            graph_job.progress_text = "Starting"
+            memory_limit_mb = app_config_access.graph_workers_config.worker_memory_limit_mb
+            worker_connection.send([graph_job.graph_data, memory_limit_mb])
+            graph_created, replace_worker = _follow_graph_job(graph_job, worker_process, worker_connection)
+        except Exception as error:
+            logger.primary_logger.error("Plotly Graph Worker " + str(worker_number) + ": " + str(error))
+            graph_job.set_finished(job_state_failed, "Graph Worker Error")
+            replace_worker = True
+        return worker_process, worker_connection, graph_created, replace_worker
+
+
+def _follow_graph_job(graph_job, worker_process, worker_connection):
+    """
+    Updates the graph job with the worker process messages until it's done. Failed graphs are marked finished.
+    Returns True if the graph was created and True to replace the worker.
+    """
+    while True:
+        if graph_job.cancel_requested:
+            graph_job.set_finished(job_state_cancelled, "Cancelled while Running")
+            return False, True
+        if worker_connection.poll(worker_poll_seconds):
+            message = worker_connection.recv()
+            if message[0] == "progress":
+                graph_job.progress_percent, graph_job.progress_text = message[1], message[2]
+            else:
+                graph_created, over_memory_limit = message[1], message[2]
+                if not graph_created:
+                    graph_job.set_finished(job_state_failed, "No Graph Created, see the Primary Log")
+                return graph_created, over_memory_limit
+        elif not worker_process.is_alive():
+            graph_job.set_finished(job_state_failed, "Graph Worker Stopped Unexpectedly")
+            return False, True
+
+
+def _stop_worker_process(worker_process, worker_connection):
+    worker_connection.close()
+    if worker_process.is_alive():
+        worker_process.terminate()
+    worker_process.join(worker_stop_timeout_seconds)
+
+
+def _get_current_memory_mb():
+    """ Returns the current memory use (Resident Set Size) of this process in MB or 0 if it's not available. """
+    try:
+        with open("/proc/self/statm", "r") as statm_file:
+            resident_pages = int(statm_file.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _graph_worker_process(child_connection):
+    """ Worker process main loop. Creates graphs sent by the pool until told to stop or over the memory limit. """
+    # Memory use is compared to what the worker used when started, the same for every graph
+    baseline_memory_mb = _get_current_memory_mb()
+    while True:
+        try:
+            graph_data, memory_limit_mb = child_connection.recv()
+        except (EOFError, OSError):
+            return
+
+        def _send_progress(progress_percent, progress_text):
+            child_connection.send(["progress", progress_percent, progress_text])
+
+        graph_created = server_plotly_graph.create_plotly_graph(graph_data, progress_function=_send_progress)
+        added_memory_mb = _get_current_memory_mb() - baseline_memory_mb
+        over_memory_limit = 0 < memory_limit_mb < added_memory_mb
+        if over_memory_limit:
+            log_msg = "Plotly Graph Worker over the Memory Limit (+" + str(int(added_memory_mb)) + " MB), Replacing"
+            logger.primary_logger.info(log_msg)
+        child_connection.send(["done", graph_created, over_memory_limit])
+        if over_memory_limit:
+            return
+
+
+graph_worker_pool = CreateGraphWorkerPool()
@@ -18,13 +18,13 @@
 """
 from datetime import datetime
 from paho.mqtt import subscribe
-import sqlite3
-from time import sleep
 from operations_modules import logger
 from operations_modules.app_generic_functions import thread_function
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
-from operations_modules.sqlite_database import write_to_sql_database, get_clean_sql_table_name
+from operations_modules.sqlite_database import get_clean_sql_table_name, get_database_connection, \
+    create_datetime_index
+from operations_modules.sqlite_write_queue import queue_sql_write
 from operations_modules.file_locations import mqtt_subscriber_database as mqtt_sub_db_location
 
 
@@ -120,33 +120,29 @@ def _write_mqtt_message_to_sql_database(mqtt_message):
                     data_sql_value_place_marks = data_sql_value_place_marks[:-1]
                     sql_string = "INSERT OR IGNORE INTO " + sensor_id_str + \
                                  " (" + columns_sql_str + ") VALUES (" + data_sql_value_place_marks + ")"
-                    write_to_sql_database(sql_string, data_list, sql_database_location=mqtt_sub_db_location)
+                    queue_sql_write(sql_string, data_list, sql_database_location=mqtt_sub_db_location)
     except Exception as error:
         logger.primary_logger.error("MQTT Subscriber Recording Failure: " + str(error))
 
 
 def _check_sql_table_column_exists(table_name, column_text):
-    while app_cached_variables.sql_db_locked:
-        sleep(1)
-    db_connection = sqlite3.connect(mqtt_sub_db_location, isolation_level=None)
-    db_cursor = db_connection.cursor()
-    sql_query = "SELECT name FROM sqlite_master WHERE type='table' AND name='" + table_name + "';"
-    db_cursor.execute(sql_query)
-
-    if len(db_cursor.fetchall()) == 0:
-        db_cursor.execute("CREATE TABLE {tn} ({nf} {ft})".format(tn=table_name, nf="DateTime", ft="TEXT"))
-        for column in app_cached_variables.database_variables.get_sensor_columns_list():
-            try:
-                db_cursor.execute("ALTER TABLE '" + table_name + "' ADD COLUMN " + column + " TEXT")
-            except Exception as error:
-                if str(error)[:21] != "duplicate column name":
-                    logger.primary_logger.error("MQTT Subscriber SQL Database Error: " + str(error))
+    with get_database_connection(mqtt_sub_db_location) as db_connection:
+        db_cursor = db_connection.cursor()
+        sql_query = "SELECT name FROM sqlite_master WHERE type='table' AND name='" + table_name + "';"
+        db_cursor.execute(sql_query)
+
+        if len(db_cursor.fetchall()) == 0:
+            db_cursor.execute("CREATE TABLE {tn} ({nf} {ft})".format(tn=table_name, nf="DateTime", ft="TEXT"))
+            create_datetime_index(table_name, db_cursor)
+            for column in app_cached_variables.database_variables.get_sensor_columns_list():
+                try:
+                    db_cursor.execute("ALTER TABLE '" + table_name + "' ADD COLUMN " + column + " TEXT")
+                except Exception as error:
+                    if str(error)[:21] != "duplicate column name":
+                        logger.primary_logger.error("MQTT Subscriber SQL Database Error: " + str(error))
 
-    try:
-        db_cursor.execute("ALTER TABLE '" + table_name + "' ADD COLUMN " + column_text + " TEXT")
-    except Exception as error:
-        if str(error)[:21] != "duplicate column name":
-            logger.primary_logger.error("MQTT Subscriber SQL Database Error: " + str(error))
-    db_connection.commit()
-    db_connection.execute("PRAGMA optimize;")
-    db_connection.close()
+        try:
+            db_cursor.execute("ALTER TABLE '" + table_name + "' ADD COLUMN " + column_text + " TEXT")
+        except Exception as error:
+            if str(error)[:21] != "duplicate column name":
+                logger.primary_logger.error("MQTT Subscriber SQL Database Error: " + str(error))
@@ -21,7 +21,6 @@ from os import geteuid, path
 from operations_modules.app_generic_classes import CreateDatabaseVariables, CreateNetworkSystemCommands, \
     CreateNetworkGetCommands, CreateLatencyVariables, CreateEmptyThreadClass
 
-sql_db_locked = False
 database_variables = CreateDatabaseVariables()
 network_system_commands = CreateNetworkSystemCommands()
 network_get_commands = CreateNetworkGetCommands()
@@ -114,8 +113,11 @@ mqtt_subscriber_thread = CreateEmptyThreadClass()
 weather_underground_thread = CreateEmptyThreadClass()
 luftdaten_thread = CreateEmptyThreadClass()
 open_sense_map_thread = CreateEmptyThreadClass()
+database_retention_thread = CreateEmptyThreadClass()
+database_backup_thread = CreateEmptyThreadClass()
+imu_capture_thread = CreateEmptyThreadClass()
 
-# Running High/Low Trigger Recording Threads
+# Running High/Low Trigger Recording sampling jobs
 trigger_high_low_cpu_temp = CreateEmptyThreadClass()
 trigger_high_low_env_temp = CreateEmptyThreadClass()
 trigger_high_low_pressure = CreateEmptyThreadClass()
@@ -131,7 +133,7 @@ trigger_high_low_accelerometer = CreateEmptyThreadClass()
 trigger_high_low_magnetometer = CreateEmptyThreadClass()
 trigger_high_low_gyroscope = CreateEmptyThreadClass()
 
-# Trigger Variance threads. Re-Work? at least re-name.
+# Running Trigger Variance Recording sampling jobs
 trigger_variance_thread_cpu_temp = CreateEmptyThreadClass()
 trigger_variance_thread_env_temp = CreateEmptyThreadClass()
 trigger_variance_thread_pressure = CreateEmptyThreadClass()
@@ -152,7 +154,6 @@ trigger_variance_thread_gyroscope = CreateEmptyThreadClass()
 restart_sensor_checkin_thread = False
 restart_automatic_upgrades_thread = False
 restart_interval_recording_thread = False
-restart_all_trigger_threads = False
 restart_report_email_thread = False
 restart_graph_email_thread = False
 restart_mini_display_thread = False
@@ -160,6 +161,9 @@ restart_mqtt_publisher_thread = False
 restart_weather_underground_thread = False
 restart_luftdaten_thread = False
 restart_open_sense_map_thread = False
+restart_database_retention_thread = False
+restart_database_backup_thread = False
+restart_imu_capture_thread = False
 
 # Checked before running Kootnet Sensors, OS or pip3 upgrades (Kootnet Sensors and OS use sensor_ready_for_upgrade)
 # Set to False when stating an upgrade, returns to True after program restarts or upgrade fails
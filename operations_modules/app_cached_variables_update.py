@@ -19,7 +19,6 @@
 import os
 import psutil
 import socket
-import sqlite3
 from datetime import datetime, timedelta
 from time import sleep
 from operations_modules import logger
@@ -29,7 +28,7 @@ from operations_modules.app_generic_functions import thread_function, zip_files,
     verify_password_to_hash, get_list_of_filenames_in_dir as get_names_list_from_dir
 from operations_modules.app_generic_disk import get_file_content, write_file_to_disk
 from operations_modules.sqlite_database import sql_execute_get_data, create_table_and_datetime, \
-    check_sql_table_and_column, get_one_db_entry
+    check_sql_table_and_column, get_one_db_entry, get_database_connection
 from operations_modules import software_version
 from configuration_modules import app_config_access
 from http_server.flask_blueprints.atpro.atpro_notifications import atpro_notifications
@@ -106,43 +105,40 @@ def _update_ks_info_table_data():
     sleep(30)
     logger.primary_logger.debug("Updating Kootnet Sensors Database Information Table")
     try:
-        while app_cached_variables.sql_db_locked:
-            sleep(1)
-        db_connection = sqlite3.connect(file_locations.sensor_database, isolation_level=None)
-        db_cursor = db_connection.cursor()
-        create_table_and_datetime(db_v.table_ks_info, db_cursor)
-
-        for column in [db_v.sensor_name, db_v.ip, db_v.kootnet_sensors_version, db_v.ks_info_configuration_backups_md5]:
-            check_sql_table_and_column(db_v.table_ks_info, column, db_cursor)
-        check_sql_table_and_column(db_v.table_ks_info, db_v.ks_info_logs, db_cursor, column_type="BLOB")
-        check_sql_table_and_column(db_v.table_ks_info, db_v.ks_info_configuration_backups, db_cursor, column_type="BLOB")
-
-        sql_query = "INSERT OR IGNORE INTO '" + db_v.table_ks_info + "' (" + \
-                    db_v.all_tables_datetime + "," + \
-                    db_v.sensor_name + "," + \
-                    db_v.ip + "," + \
-                    db_v.kootnet_sensors_version + "," + \
-                    db_v.ks_info_configuration_backups_md5 + "," + \
-                    db_v.ks_info_logs + "," + \
-                    db_v.ks_info_configuration_backups + ")" + \
-                    " VALUES (?,?,?,?,?,?,?);"
-
-        configs_zipped = _get_zipped_configurations()
-        configs_zip_md5 = get_md5_hash_of_file(configs_zipped)
-        if _md5_matches_previous_configs_zip_md5(configs_zip_md5):
-            log_msg = "Not saving configurations backup to Database - "
-            logger.primary_logger.debug(log_msg + "Configurations have not changed since the last backup")
-            configs_zipped = None
-            configs_zip_md5 = None
-        data_entries = [
-            datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f"), app_cached_variables.hostname,
-            app_cached_variables.ip, software_version.version, configs_zip_md5, _get_zipped_logs(), configs_zipped
-        ]
-        data_entries = _check_for_changes_in_sensor_info_data(data_entries)
-        db_cursor.execute(sql_query, data_entries)
-        db_connection.commit()
-        db_connection.execute("PRAGMA optimize;")
-        db_connection.close()
+        with get_database_connection(file_locations.sensor_database) as db_connection:
+            db_cursor = db_connection.cursor()
+            create_table_and_datetime(db_v.table_ks_info, db_cursor)
+
+            text_columns = [db_v.sensor_name, db_v.ip, db_v.kootnet_sensors_version,
+                            db_v.ks_info_configuration_backups_md5]
+            for column in text_columns:
+                check_sql_table_and_column(db_v.table_ks_info, column, db_cursor)
+            for column in [db_v.ks_info_logs, db_v.ks_info_configuration_backups]:
+                check_sql_table_and_column(db_v.table_ks_info, column, db_cursor, column_type="BLOB")
+
+            sql_query = "INSERT OR IGNORE INTO '" + db_v.table_ks_info + "' (" + \
+                        db_v.all_tables_datetime + "," + \
+                        db_v.sensor_name + "," + \
+                        db_v.ip + "," + \
+                        db_v.kootnet_sensors_version + "," + \
+                        db_v.ks_info_configuration_backups_md5 + "," + \
+                        db_v.ks_info_logs + "," + \
+                        db_v.ks_info_configuration_backups + ")" + \
+                        " VALUES (?,?,?,?,?,?,?);"
+
+            configs_zipped = _get_zipped_configurations()
+            configs_zip_md5 = get_md5_hash_of_file(configs_zipped)
+            if _md5_matches_previous_configs_zip_md5(configs_zip_md5):
+                log_msg = "Not saving configurations backup to Database - "
+                logger.primary_logger.debug(log_msg + "Configurations have not changed since the last backup")
+                configs_zipped = None
+                configs_zip_md5 = None
+            data_entries = [
+                datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f"), app_cached_variables.hostname,
+                app_cached_variables.ip, software_version.version, configs_zip_md5, _get_zipped_logs(), configs_zipped
+            ]
+            data_entries = _check_for_changes_in_sensor_info_data(data_entries)
+            db_cursor.execute(sql_query, data_entries)
         logger.primary_logger.debug("Kootnet Sensors Database Information Updated OK")
     except Exception as error:
         logger.primary_logger.error("Kootnet Sensors Database Information Update Failed: " + str(error))
@@ -210,6 +206,12 @@ def _get_zipped_configurations():
     luftdaten_config = app_config_access.luftdaten_config.get_config_as_str()
     sensor_control_config = app_config_access.sensor_control_config.get_config_as_str()
     sensor_insights_config = app_config_access.sensor_insights.get_config_as_str()
+    database_retention_config = app_config_access.database_retention_config.get_config_as_str()
+    database_backup_config = app_config_access.database_backup_config.get_config_as_str()
+    graph_workers_config = app_config_access.graph_workers_config.get_config_as_str()
+    sensor_snapshots_config = app_config_access.sensor_snapshots_config.get_config_as_str()
+    recent_readings_config = app_config_access.recent_readings_config.get_config_as_str()
+    imu_capture_config = app_config_access.imu_capture_config.get_config_as_str()
 
     try:
         return_names = [
@@ -233,7 +235,13 @@ def _get_zipped_configurations():
             os.path.basename(file_locations.weather_underground_config),
             os.path.basename(file_locations.luftdaten_config),
             os.path.basename(file_locations.html_sensor_control_config),
-            os.path.basename(file_locations.sensor_insights_config)
+            os.path.basename(file_locations.sensor_insights_config),
+            os.path.basename(file_locations.database_retention_config),
+            os.path.basename(file_locations.database_backup_config),
+            os.path.basename(file_locations.graph_workers_config),
+            os.path.basename(file_locations.sensor_snapshots_config),
+            os.path.basename(file_locations.recent_readings_config),
+            os.path.basename(file_locations.imu_capture_config)
         ]
 
         return_files = [
@@ -241,7 +249,8 @@ def _get_zipped_configurations():
             display_config, checkin_config, interval_recording_config, trigger_high_low, trigger_variances,
             email_config, email_reports_config, email_db_graph_config, mqtt_broker_config, mqtt_pub_config,
             mqtt_sub_config, open_sense_map_config, wu_config, luftdaten_config, sensor_control_config,
-            sensor_insights_config
+            sensor_insights_config, database_retention_config, database_backup_config, graph_workers_config,
+            sensor_snapshots_config, recent_readings_config, imu_capture_config
         ]
 
         blob_data = zip_files(return_names, return_files, skip_datetime=True).read()
@@ -348,7 +357,17 @@ def _update_cached_sensor_reboot_count():
     """
     sql_query = "SELECT " + db_v.sensor_uptime + " FROM " + db_v.table_interval + \
                 " WHERE length(" + db_v.sensor_uptime + ") < 2"
-    sql_column_data = sql_execute_get_data(sql_query)
+    typed_sql_query = "SELECT " + db_v.sensor_uptime + " FROM " + db_v.table_interval_typed + \
+                      " WHERE " + db_v.sensor_uptime + " < 10" + \
+                      " ORDER BY " + db_v.all_tables_datetime_epoch_ms
+    narrow_sql_query = "SELECT " + db_v.narrow_reading + " FROM " + db_v.table_interval_narrow + \
+                       " WHERE " + db_v.narrow_metric_id + " = (SELECT " + db_v.narrow_metric_id + \
+                       " FROM " + db_v.table_interval_narrow_metrics + \
+                       " WHERE " + db_v.narrow_metric_name + " = '" + db_v.sensor_uptime + "')" + \
+                       " AND " + db_v.narrow_reading + " < 10" + \
+                       " ORDER BY " + db_v.all_tables_datetime_epoch_ms
+    sql_column_data = list(sql_execute_get_data(sql_query)) + list(sql_execute_get_data(typed_sql_query)) + \
+        list(sql_execute_get_data(narrow_sql_query))
 
     reboot_count = 0
     previous_entry = 0
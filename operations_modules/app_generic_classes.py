@@ -256,6 +256,8 @@ class CreateNetworkGetCommands:
         self.sensor_sql_database_raw = "DownloadSQLDatabaseRAW"
         self.sensor_sql_database_size = "GetSQLDBSize"
         self.sensor_zipped_sql_database_size = "GetZippedSQLDatabaseSize"
+        self.sql_write_queue_statistics = "GetSQLWriteQueueStatistics"
+        self.sql_access_lock_statistics = "GetSQLAccessLockStatistics"
 
         self.primary_configuration_file = "GetPrimaryConfiguration"
         self.installed_sensors_file = "GetInstalledSensors"
@@ -436,16 +438,26 @@ class CreateDatabaseVariables:
 
     def __init__(self):
         self.table_interval = "IntervalData"
+        self.table_interval_typed = "IntervalDataTyped"
+        self.table_interval_narrow = "IntervalDataNarrow"
+        self.table_interval_narrow_metrics = "IntervalDataMetrics"
+        self.table_interval_rollup_minute = "IntervalRollupMinute"
+        self.table_interval_rollup_hour = "IntervalRollupHour"
+        self.table_interval_rollup_day = "IntervalRollupDay"
+        self.table_interval_rollup_state = "IntervalRollupState"
+        self.table_imu_summaries = "IMUCaptureSummaries"
         self.table_trigger = "TriggerData"
         self.table_other = "OtherData"
         self.table_ks_info = "SensorInformation"
         self.table_db_info = "KootnetSensorsDatabaseInfo"
+        self.table_schema_version = "KootnetSensorsSchemaVersion"
 
         self.db_info_database_type_main = "Main"
         self.db_info_database_type_mqtt = "MQTT"
         self.db_info_database_type_sensor_checkins = "SensorCheckins"
 
         self.db_info_database_type_column = "DatabaseType"
+        self.schema_version_column = "SchemaVersion"
 
         self.other_table_column_user_date_time = "UserDateTime"
         self.other_table_column_notes = "Notes"
@@ -462,6 +474,27 @@ class CreateDatabaseVariables:
         self.trigger_state = "TriggerState"
 
         self.all_tables_datetime = "DateTime"
+        self.all_tables_datetime_epoch_ms = "DateTimeEpochMS"
+        self.narrow_metric_id = "MetricID"
+        self.narrow_metric_name = "MetricName"
+        self.narrow_reading = "Reading"
+
+        self.rollup_bucket = "BucketEpochMS"
+        self.rollup_min = "MinReading"
+        self.rollup_max = "MaxReading"
+        self.rollup_sum = "SumReading"
+        self.rollup_count = "ReadingCount"
+        self.rollup_state_name = "StateName"
+        self.rollup_state_value = "StateValue"
+        self.rollup_state_live_start = "LiveStartEpochMS"
+        self.rollup_state_backfill = "BackfillEpochMS"
+        self.imu_sample_count = "SampleCount"
+        self.imu_sample_rate = "SampleRateHz"
+        self.imu_mean = "MeanReading"
+        self.imu_rms = "RMSReading"
+        self.imu_peak = "PeakReading"
+        self.imu_fft_band_width = "FFTBandWidthHz"
+        self.imu_fft_band_energies = "FFTBandEnergies"
         self.kootnet_sensors_version = "KootnetVersion"
         self.sensor_name = "SensorName"
         self.ip = "IP"
@@ -584,6 +617,16 @@ class CreateDatabaseVariables:
                               self.gps_vdop]
         return sensor_sql_columns
 
+    def get_interval_rollup_tables_list(self):
+        """ Returns Interval rollup SQL Tables and their bucket size in milliseconds, finest first. """
+        return [[self.table_interval_rollup_minute, 60000],
+                [self.table_interval_rollup_hour, 3600000],
+                [self.table_interval_rollup_day, 86400000]]
+
+    def get_sensor_text_columns_list(self):
+        """ Returns Interval recording SQL Table columns that hold text instead of numbers as a list. """
+        return [self.all_tables_datetime, self.sensor_name, self.ip, self.gps_timestamp]
+
     def get_other_columns_list(self):
         """ Returns "Other" SQL Table columns as a list. """
         other_sql_columns = [self.other_table_column_user_date_time,
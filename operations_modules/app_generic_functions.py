@@ -27,6 +27,8 @@ from operations_modules import logger
 from operations_modules import app_cached_variables
 from operations_modules.app_generic_classes import CreateRefinedVersion
 
+epoch_datetime = datetime(1970, 1, 1)
+
 
 def thread_function(function, args=None):
     """ Starts provided function as a thread with optional arguments. """
@@ -161,6 +163,34 @@ def adjust_datetime(var_datetime, hour_offset, return_datetime_obj=False):
         return var_datetime
 
 
+def datetime_to_epoch_ms(var_datetime):
+    """
+    Returns the provided UTC0 datetime string as an integer of milliseconds since the Unix epoch.
+    Accepts 'YYYY-MM-DD', 'YYYY-MM-DD HH:MM:SS' and 'YYYY-MM-DD HH:MM:SS.fff'. Returns None if invalid.
+    """
+    try:
+        cleaned_datetime = str(var_datetime).strip()
+        datetime_format = "%Y-%m-%d"
+        if len(cleaned_datetime) > 19:
+            datetime_format = "%Y-%m-%d %H:%M:%S.%f"
+        elif len(cleaned_datetime) > 10:
+            datetime_format = "%Y-%m-%d %H:%M:%S"
+        datetime_delta = datetime.strptime(cleaned_datetime, datetime_format) - epoch_datetime
+        return (datetime_delta.days * 86400000) + (datetime_delta.seconds * 1000) + \
+               (datetime_delta.microseconds // 1000)
+    except Exception as error:
+        logger.primary_logger.debug("DateTime to Epoch Milliseconds input is invalid: " + str(error))
+    return None
+
+
+def epoch_ms_to_datetime(epoch_ms, hour_offset=0, include_milliseconds=False):
+    """ Returns the provided epoch milliseconds as a datetime string adjusted by the provided hour offset. """
+    adjusted_date = epoch_datetime + timedelta(milliseconds=int(epoch_ms), hours=hour_offset)
+    if include_milliseconds:
+        return adjusted_date.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    return adjusted_date.strftime("%Y-%m-%d %H:%M:%S")
+
+
 def create_password_hash(password, salt=None):
     """
     Creates and returns a [password_hash, password_salt] based on provided password.
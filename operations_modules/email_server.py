@@ -35,7 +35,6 @@ from configuration_modules import app_config_access
 from http_server.flask_blueprints.atpro.remote_management import rm_cached_variables
 from http_server.flask_blueprints.atpro.remote_management.rm_reports import generate_html_reports_combo
 from http_server.flask_blueprints.atpro.atpro_graphing import generate_plotly_graph
-from http_server import server_plotly_graph_variables
 
 
 def send_test_email(to_email):
@@ -70,10 +69,9 @@ def send_report_emails(email_address_list):
 
 
 def send_db_graph_emails(email_address_list):
-    generate_plotly_graph(None, graph_config=app_config_access.email_db_graph_config)
-    sleep(5)
-    while server_plotly_graph_variables.graph_creation_in_progress:
-        sleep(5)
+    graph_job = generate_plotly_graph(None, graph_config=app_config_access.email_db_graph_config,
+                                      requested_by="Email Server")
+    graph_job.wait()
 
     date_time = datetime.utcnow().strftime("Y%Y-M%m-D%d-h%H-m%M")
     filename = app_cached_variables.hostname + "_" + date_time + "_KS_Graph"
@@ -47,7 +47,8 @@ def get_user():
 def _check_directories():
     create_directories = [
         sensor_data_dir, sensor_config_dir, custom_ip_lists_folder, ks_generated_folder, uploaded_databases_folder,
-        log_directory, database_backup_folder, upgrade_scripts_folder, http_ssl_folder, downloads_folder
+        log_directory, database_backup_folder, upgrade_scripts_folder, http_ssl_folder, downloads_folder,
+        database_shards_folder, database_snapshots_folder, plotly_graph_cache_folder
     ]
 
     if running_with_root:
@@ -89,6 +90,9 @@ upgrade_scripts_folder = sensor_data_dir + "/scripts"
 ks_generated_folder = sensor_data_dir + "/ks_generated"
 uploaded_databases_folder = sensor_data_dir + "/uploaded_databases"
 database_backup_folder = sensor_data_dir + "/database_backups"
+database_shards_folder = sensor_data_dir + "/database_shards"
+database_snapshots_folder = sensor_data_dir + "/database_snapshots"
+plotly_graph_cache_folder = ks_generated_folder + "/graph_cache"
 custom_ip_lists_folder = sensor_config_dir + "/ip_lists"
 
 upgrade_running_file_location = upgrade_scripts_folder + "/upgrade_running.conf"
@@ -145,6 +149,12 @@ weather_underground_config = sensor_config_dir + "/online_services_weather_under
 luftdaten_config = sensor_config_dir + "/online_services_luftdaten.conf"
 osm_config = sensor_config_dir + "/online_services_open_sense_map.conf"
 sensor_insights_config = sensor_config_dir + "/sensor_insights.conf"
+database_retention_config = sensor_config_dir + "/database_retention.conf"
+database_backup_config = sensor_config_dir + "/database_backup.conf"
+graph_workers_config = sensor_config_dir + "/graph_workers.conf"
+sensor_snapshots_config = sensor_config_dir + "/sensor_snapshots.conf"
+recent_readings_config = sensor_config_dir + "/recent_readings.conf"
+imu_capture_config = sensor_config_dir + "/imu_capture.conf"
 
 live_graphs_config = sensor_config_dir + "/live_graphs.conf"
 db_graphs_config = sensor_config_dir + "/database_graphs.conf"
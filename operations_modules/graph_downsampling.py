@@ -0,0 +1,133 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+--------------------------------------------------------------------------
+Shape preserving downsampling for graphs.
+Reduces a graph line to about the number of points that can be drawn in the requested pixel width,
+so graph sizes stay the same no matter the time range, while peaks and dips are kept.
+LTTB (Largest-Triangle-Three-Buckets) keeps the visual shape, MinMax keeps the lowest and highest reading
+of every bucket, so every excursion is drawn.
+"""
+from operations_modules import logger
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy Downsampling Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+downsample_mode_none = "None"
+downsample_mode_lttb = "LTTB"
+downsample_mode_min_max = "MinMax"
+downsample_modes_list = [downsample_mode_none, downsample_mode_lttb, downsample_mode_min_max]
+
+
+def downsample_graph_data(datetimes, readings, target_points, mode=downsample_mode_lttb):
+    """
+    Returns [readings, datetimes] reduced to about target_points entries, in the same order as provided.
+    DateTimes may be datetime64 values, epoch numbers or DateTime strings. Readings that are not numbers
+    (Sensor Names etc.) are reduced to evenly spaced entries. Data is returned unchanged if it's already small
+    enough or mode is downsample_mode_none.
+    """
+    target_points = int(target_points)
+    if mode not in [downsample_mode_lttb, downsample_mode_min_max] or target_points < 3 or \
+            len(readings) <= target_points or len(readings) != len(datetimes):
+        return [readings, datetimes]
+
+    readings_array = np.asarray(readings)
+    datetimes_array = np.asarray(datetimes)
+    x_values = _get_x_values(datetimes_array)
+    # Buckets are made from oldest to newest, newest first data (Database graphs) is reversed and put back after
+    newest_first = x_values[0] > x_values[-1]
+    if newest_first:
+        readings_array = readings_array[::-1]
+        datetimes_array = datetimes_array[::-1]
+        x_values = x_values[::-1]
+
+    if not np.issubdtype(readings_array.dtype, np.number):
+        keep_indexes = np.unique(np.linspace(0, len(readings_array) - 1, target_points).astype(np.int64))
+    elif mode == downsample_mode_min_max:
+        keep_indexes = _get_min_max_indexes(readings_array.astype(np.float64), target_points)
+    else:
+        keep_indexes = _get_lttb_indexes(x_values, readings_array.astype(np.float64), target_points)
+
+    readings_array = readings_array[keep_indexes]
+    datetimes_array = datetimes_array[keep_indexes]
+    if newest_first:
+        readings_array = readings_array[::-1]
+        datetimes_array = datetimes_array[::-1]
+    return [readings_array, datetimes_array]
+
+
+def _get_x_values(datetimes_array):
+    """ Returns the provided DateTimes as a float64 array for distance calculations. """
+    if np.issubdtype(datetimes_array.dtype, np.datetime64):
+        return datetimes_array.astype("datetime64[ms]").astype(np.int64).astype(np.float64)
+    if np.issubdtype(datetimes_array.dtype, np.number):
+        return datetimes_array.astype(np.float64)
+    datetime_text_array = np.char.strip(datetimes_array.astype("U32")).astype("U19")
+    return datetime_text_array.astype("datetime64[ms]").astype(np.int64).astype(np.float64)
+
+
+def _get_bucket_edges(data_length, bucket_count):
+    return np.linspace(0, data_length, bucket_count + 1).astype(np.int64)
+
+
+def _get_min_max_indexes(y_values, target_points):
+    """ Returns the indexes of the lowest and highest reading of each bucket, in their original order. """
+    bucket_edges = _get_bucket_edges(len(y_values), max(target_points // 2, 1))
+    keep_indexes = []
+    for bucket_start, bucket_end in zip(bucket_edges[:-1], bucket_edges[1:]):
+        if bucket_end <= bucket_start:
+            continue
+        bucket_values = y_values[bucket_start:bucket_end]
+        min_index = bucket_start + int(np.argmin(bucket_values))
+        max_index = bucket_start + int(np.argmax(bucket_values))
+        keep_indexes += sorted({min_index, max_index})
+    return np.array(keep_indexes, dtype=np.int64)
+
+
+def _get_lttb_indexes(x_values, y_values, target_points):
+    """
+    Returns the indexes picked by Largest-Triangle-Three-Buckets.
+    The first and last points are always kept, every bucket in between keeps the point making the largest
+    triangle with the previously kept point and the average point of the next bucket.
+    """
+    data_length = len(y_values)
+    bucket_edges = _get_bucket_edges(data_length - 2, target_points - 2) + 1
+    keep_indexes = np.zeros(target_points, dtype=np.int64)
+    keep_indexes[-1] = data_length - 1
+
+    previous_index = 0
+    for bucket_number in range(target_points - 2):
+        bucket_start, bucket_end = bucket_edges[bucket_number], bucket_edges[bucket_number + 1]
+        if bucket_number + 2 < len(bucket_edges):
+            next_start, next_end = bucket_edges[bucket_number + 1], bucket_edges[bucket_number + 2]
+        else:
+            # The last bucket's "next bucket" is the last point
+            next_start, next_end = data_length - 1, data_length
+        average_x = x_values[next_start:next_end].mean()
+        average_y = y_values[next_start:next_end].mean()
+
+        bucket_x = x_values[bucket_start:bucket_end]
+        bucket_y = y_values[bucket_start:bucket_end]
+        triangle_areas = np.abs((x_values[previous_index] - average_x) * (bucket_y - y_values[previous_index]) -
+                                (x_values[previous_index] - bucket_x) * (average_y - y_values[previous_index]))
+        previous_index = bucket_start + int(np.argmax(triangle_areas))
+        keep_indexes[bucket_number + 1] = previous_index
+    return keep_indexes
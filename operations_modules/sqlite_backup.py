@@ -0,0 +1,271 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Online database backups.
+Consistent snapshots are taken with the SQLite backup API a few pages at a time while the database stays in use,
+then compressed into zip files while streaming, to disk or straight to a HTTP response,
+so databases larger than the available RAM can be backed up or downloaded.
+Scheduled backups are saved to the database backups folder.
+Monthly database shards are saved to their own zip files by scheduled backups, only when changed since their
+last backup, so months no longer recorded to are not zipped again every backup.
+"""
+import os
+import sqlite3
+from time import sleep, localtime, time
+from random import randint
+from datetime import datetime
+from zipfile import ZipFile, ZipInfo, ZIP_DEFLATED
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_classes import CreateMonitoredThread
+from operations_modules.app_generic_functions import get_list_of_filenames_in_dir
+from operations_modules.sqlite_database import sql_access_coordinator
+from operations_modules.sqlite_database_shards import get_shard_locations, get_shard_month
+from configuration_modules import app_config_access
+
+backup_pages_per_step = 256
+backup_step_sleep_seconds = 0.01
+stream_chunk_bytes = 1048576
+scheduled_backup_file_name_end = "_Scheduled_Backup.zip"
+shard_backup_file_name_end = "_Shard_Backup.zip"
+
+
+class CreateZipStreamBuffer:
+    """ Creates a write only file like object, holding written zip data until it's taken with get_chunk. """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def get_chunk(self):
+        """ Returns and removes all data written since the last call. """
+        chunk = b"".join(self._chunks)
+        self._chunks = []
+        return chunk
+
+
+def start_database_backup_server():
+    text_name = "Database Backups"
+    function = _database_backup_server
+    app_cached_variables.database_backup_thread = CreateMonitoredThread(function, thread_name=text_name)
+
+
+def _database_backup_server():
+    """ Saves a backup of all databases every X hours (set in config) while enabled. """
+    # Sleep to allow program start-up database checks to finish first
+    sleep(120)
+    app_cached_variables.restart_database_backup_thread = False
+    while not app_cached_variables.restart_database_backup_thread:
+        backup_config = app_config_access.database_backup_config
+        if backup_config.enable_scheduled_backups:
+            app_cached_variables.database_backup_thread.current_state = "Running"
+            run_scheduled_backup()
+        else:
+            app_cached_variables.database_backup_thread.current_state = "Disabled"
+
+        sleep_total = 0
+        while sleep_total < backup_config.backup_run_hours * 3600 and \
+                not app_cached_variables.restart_database_backup_thread:
+            sleep(5)
+            sleep_total += 5
+
+
+def run_scheduled_backup():
+    """
+    Saves a zip of all databases to the database backups folder and removes the oldest scheduled backups.
+    Database shards changed since their last backup are saved to their own zip files.
+    """
+    filename_start = app_cached_variables.ip.split(".")[-1] + app_cached_variables.hostname + "_"
+    zip_filename = filename_start + datetime.utcnow().strftime("%Y-%m-%d_%H_%M_%S") + scheduled_backup_file_name_end
+    logger.primary_logger.info(" -- Scheduled Database Backup Started")
+    if save_zip_stream(get_zip_stream(get_main_databases_zip_entries(filename_start)),
+                       file_locations.database_backup_folder + "/" + zip_filename):
+        logger.primary_logger.info(" -- Scheduled Database Backup Saved: " + zip_filename)
+    backup_changed_shards(filename_start)
+
+    backups_to_keep = app_config_access.database_backup_config.backups_to_keep
+    scheduled_backups = []
+    for file_name in get_list_of_filenames_in_dir(file_locations.database_backup_folder):
+        if file_name.endswith(scheduled_backup_file_name_end):
+            scheduled_backups.append(file_name)
+    if backups_to_keep > 0:
+        # File names start with the same IP and hostname, so sorting by name sorts by date
+        for file_name in sorted(scheduled_backups)[:-backups_to_keep]:
+            os.remove(file_locations.database_backup_folder + "/" + file_name)
+            logger.primary_logger.info(" -- Scheduled Database Backup Removed: " + file_name)
+    app_cached_variables.zipped_db_backup_list = get_list_of_filenames_in_dir(file_locations.database_backup_folder)
+
+
+def backup_changed_shards(filename_start):
+    """
+    Saves a zip of each database shard changed since its last backup to the database backups folder.
+    Backups of shards removed by database retention are removed.
+    """
+    shard_backup_names = []
+    for zip_entry_name, shard_location in get_shard_zip_entries(filename_start + "Main_Database_"):
+        shard_backup_name = zip_entry_name[:-len(".sqlite")] + shard_backup_file_name_end
+        shard_backup_location = file_locations.database_backup_folder + "/" + shard_backup_name
+        shard_backup_names.append(shard_backup_name)
+        if os.path.isfile(shard_backup_location) and \
+                _get_database_modified_time(shard_location) <= os.path.getmtime(shard_backup_location):
+            continue
+        backup_start_time = time()
+        if save_zip_stream(get_zip_stream([[zip_entry_name, shard_location]]), shard_backup_location):
+            # Changes written while the shard was being saved are newer than the backup
+            os.utime(shard_backup_location, (backup_start_time, backup_start_time))
+            logger.primary_logger.info(" -- Database Shard Backup Saved: " + shard_backup_name)
+
+    for file_name in get_list_of_filenames_in_dir(file_locations.database_backup_folder):
+        if file_name.endswith(shard_backup_file_name_end) and file_name not in shard_backup_names:
+            os.remove(file_locations.database_backup_folder + "/" + file_name)
+            logger.primary_logger.info(" -- Database Shard Backup Removed: " + file_name)
+
+
+def get_all_databases_zip_entries(filename_start):
+    """ Returns a list of [zip file name, database location] for all sensor databases and database shards. """
+    return get_main_databases_zip_entries(filename_start) + get_shard_zip_entries(filename_start + "Main_Database_")
+
+
+def get_main_databases_zip_entries(filename_start):
+    """ Returns a list of [zip file name, database location] for all sensor databases without database shards. """
+    return [[filename_start + "Main_Database.sqlite", file_locations.sensor_database],
+            [filename_start + "Checkin_Database.sqlite", file_locations.sensor_checkin_database],
+            [filename_start + "MQTT_Sub_Database.sqlite", file_locations.mqtt_subscriber_database]]
+
+
+def get_shard_zip_entries(filename_start):
+    """ Returns a list of [zip file name, database location] for all monthly database shards. """
+    zip_entries = []
+    for shard_location in get_shard_locations():
+        zip_entries.append([filename_start + get_shard_month(shard_location) + ".sqlite", shard_location])
+    return zip_entries
+
+
+def create_database_snapshot(database_location, snapshot_location):
+    """
+    Copies a consistent snapshot of the provided database to snapshot_location with the SQLite backup API.
+    The copy is done backup_pages_per_step pages at a time, so other connections can keep reading and writing.
+    """
+    if os.path.isfile(snapshot_location):
+        os.remove(snapshot_location)
+
+    with sql_access_coordinator.shared_access(database_location):
+        source_connection = sqlite3.connect(database_location, isolation_level=None)
+        snapshot_connection = sqlite3.connect(snapshot_location, isolation_level=None)
+        try:
+            # An open read transaction holds the source at one point in time (WAL)
+            # Without it, writes from other connections restart the backup and a busy database never finishes
+            source_connection.execute("BEGIN")
+            source_connection.execute("SELECT count(*) FROM sqlite_master").fetchall()
+            source_connection.backup(snapshot_connection, pages=backup_pages_per_step,
+                                     progress=lambda status, remaining, total: sleep(backup_step_sleep_seconds))
+            source_connection.execute("COMMIT")
+            # Snapshots are single files, so they can be copied or opened without their WAL
+            snapshot_connection.execute("PRAGMA journal_mode=DELETE;")
+        finally:
+            source_connection.close()
+            snapshot_connection.close()
+
+
+def get_zip_stream(zip_entries):
+    """
+    Generator returning the data of a zip file in chunks, for streaming to disk or a HTTP response.
+    zip_entries is a list of [zip file name, content], where content is a database location or bytes.
+    Databases are added as backup API snapshots, which are deleted once added.
+    """
+    stream_buffer = CreateZipStreamBuffer()
+    date_time = localtime()[:6]
+    with ZipFile(stream_buffer, "w", compression=ZIP_DEFLATED) as zip_file:
+        for file_name, file_content in zip_entries:
+            zip_info = ZipInfo(file_name, date_time=date_time)
+            zip_info.compress_type = ZIP_DEFLATED
+            if type(file_content) is bytes:
+                zip_file.writestr(zip_info, file_content)
+                yield stream_buffer.get_chunk()
+            elif os.path.isfile(file_content):
+                snapshot_location = _get_snapshot_location()
+                try:
+                    create_database_snapshot(file_content, snapshot_location)
+                    with open(snapshot_location, "rb") as snapshot_file, \
+                            zip_file.open(zip_info, "w", force_zip64=True) as zip_entry_file:
+                        for file_chunk in iter(lambda: snapshot_file.read(stream_chunk_bytes), b""):
+                            zip_entry_file.write(file_chunk)
+                            yield stream_buffer.get_chunk()
+                finally:
+                    _remove_snapshot(snapshot_location)
+            else:
+                logger.primary_logger.debug("Database Backup: " + file_content + " not found, skipping")
+    yield stream_buffer.get_chunk()
+
+
+def get_database_snapshot_stream(database_location):
+    """ Generator returning a backup API snapshot of the provided database in chunks. """
+    snapshot_location = _get_snapshot_location()
+    try:
+        create_database_snapshot(database_location, snapshot_location)
+        with open(snapshot_location, "rb") as snapshot_file:
+            for file_chunk in iter(lambda: snapshot_file.read(stream_chunk_bytes), b""):
+                yield file_chunk
+    finally:
+        _remove_snapshot(snapshot_location)
+
+
+def save_zip_stream(zip_stream, zip_location):
+    """ Writes the provided zip stream to zip_location. Returns True if successful. """
+    temp_zip_location = zip_location + ".partial"
+    try:
+        with open(temp_zip_location, "wb") as zip_file:
+            for zip_chunk in zip_stream:
+                zip_file.write(zip_chunk)
+        # The previous zip stays available until the new one is complete
+        os.replace(temp_zip_location, zip_location)
+        return True
+    except Exception as error:
+        logger.primary_logger.error("Database Backup " + zip_location + " Failed: " + str(error))
+        if os.path.isfile(temp_zip_location):
+            os.remove(temp_zip_location)
+    return False
+
+
+def _get_database_modified_time(database_location):
+    """ Returns the newest modified time of the database and its WAL, where recent writes are kept. """
+    modified_time = os.path.getmtime(database_location)
+    if os.path.isfile(database_location + "-wal"):
+        modified_time = max(modified_time, os.path.getmtime(database_location + "-wal"))
+    return modified_time
+
+
+def _get_snapshot_location():
+    if not os.path.isdir(file_locations.database_snapshots_folder):
+        os.makedirs(file_locations.database_snapshots_folder)
+    snapshot_name = "snapshot_" + str(os.getpid()) + "_" + str(randint(100000, 999999)) + ".sqlite"
+    return file_locations.database_snapshots_folder + "/" + snapshot_name
+
+
+def _remove_snapshot(snapshot_location):
+    for file_location in [snapshot_location, snapshot_location + "-journal"]:
+        if os.path.isfile(file_location):
+            os.remove(file_location)
@@ -16,16 +16,23 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import os
 import sqlite3
-from time import sleep
+from time import time
 from datetime import datetime
+from threading import Lock, Condition, local, current_thread, get_ident
+from contextlib import contextmanager
 from operations_modules import file_locations
 from operations_modules import logger
 from operations_modules import app_cached_variables
-from operations_modules.app_generic_functions import adjust_datetime
+from operations_modules.app_generic_functions import adjust_datetime, epoch_ms_to_datetime
 
 db_v = app_cached_variables.database_variables
 
+# SQLite3 errors that indicate the connection itself is no longer usable and should be re-opened
+_reconnect_error_messages = ["disk I/O error", "unable to open database file", "file is not a database",
+                             "attempt to write a readonly database", "database disk image is malformed"]
+
 
 class CreateOtherDataEntry:
     """ Creates a object, holding required data for making a 'OtherData' SQL execute string. """
@@ -43,20 +50,328 @@ class CreateOtherDataEntry:
                self.sensor_readings + self.sql_query_values_end
 
 
+class CreatePooledConnection:
+    """ Creates a object instance holding a single long-lived SQLite3 connection and its state. """
+
+    def __init__(self, database_location, cached_statements):
+        self.database_location = database_location
+        self.process_id = os.getpid()
+        self.owner_thread = current_thread()
+        self.closed = False
+
+        self.connection = sqlite3.connect(database_location, isolation_level=None, check_same_thread=False,
+                                          cached_statements=cached_statements)
+        # New databases only take the auto vacuum mode if it's set before WAL mode
+        set_incremental_auto_vacuum(self.connection)
+        self.connection.execute("PRAGMA journal_mode=WAL;")
+        # In WAL mode, NORMAL only syncs on checkpoints, which greatly lowers SD card writes
+        self.connection.execute("PRAGMA synchronous=NORMAL;")
+        self.file_inode = get_file_inode(database_location)
+        self.last_optimize_time = time()
+
+
+class CreateDatabaseConnectionManager:
+    """
+    Creates a object instance holding long-lived, per-thread SQLite3 connections to the sensor databases.
+    Connections are re-opened if the database file is replaced or removed, or if the process has been forked.
+    Databases not in managed_databases (uploaded or temporary databases) get short-lived connections.
+    """
+
+    def __init__(self, cached_statements=256, optimize_interval_seconds=3600):
+        self.managed_databases = [file_locations.sensor_database,
+                                  file_locations.sensor_checkin_database,
+                                  file_locations.mqtt_subscriber_database]
+        self.cached_statements = cached_statements
+        self.optimize_interval_seconds = optimize_interval_seconds
+
+        self._thread_connections = local()
+        self._all_connections = []
+        self._all_connections_lock = Lock()
+        # Connections inherited from a parent process are kept referenced, closing them could remove the parent's WAL
+        self._inherited_connections = []
+
+    def get_connection(self, database_location):
+        """ Returns the calling thread's open connection to the provided managed database, opening it if needed. """
+        thread_connections = self._get_thread_connections()
+        pooled_connection = thread_connections.get(database_location)
+        if pooled_connection is not None and not self._connection_valid(pooled_connection):
+            self._close_pooled_connection(pooled_connection)
+            pooled_connection = None
+
+        if pooled_connection is None:
+            pooled_connection = CreatePooledConnection(database_location, self.cached_statements)
+            thread_connections[database_location] = pooled_connection
+            with self._all_connections_lock:
+                self._close_finished_thread_connections()
+                self._all_connections.append(pooled_connection)
+            logger.primary_logger.debug("SQL Connection opened to " + database_location)
+        elif time() - pooled_connection.last_optimize_time > self.optimize_interval_seconds:
+            pooled_connection.connection.execute("PRAGMA optimize;")
+            pooled_connection.last_optimize_time = time()
+        return pooled_connection.connection
+
+    def reset_connection(self, database_location):
+        """ Closes the calling thread's connection to the provided database. Next use re-opens it. """
+        pooled_connection = self._get_thread_connections().pop(database_location, None)
+        if pooled_connection is not None:
+            self._close_pooled_connection(pooled_connection)
+
+    def close_database_connections(self, database_location=None):
+        """
+        Closes every thread's connection to the provided database, or all databases if None.
+        Used before a database file is replaced or deleted, so its WAL is check-pointed and removed.
+        """
+        with self._all_connections_lock:
+            for pooled_connection in list(self._all_connections):
+                if database_location is None or pooled_connection.database_location == database_location:
+                    self._close_pooled_connection(pooled_connection, lock_held=True)
+
+    def _close_finished_thread_connections(self):
+        """ Closes connections left open by threads that have finished. Lock must be held by caller. """
+        for pooled_connection in list(self._all_connections):
+            if not pooled_connection.owner_thread.is_alive():
+                self._close_pooled_connection(pooled_connection, lock_held=True)
+
+    def _get_thread_connections(self):
+        if not hasattr(self._thread_connections, "connections"):
+            self._thread_connections.connections = {}
+        return self._thread_connections.connections
+
+    @staticmethod
+    def _connection_valid(pooled_connection):
+        if pooled_connection.closed or pooled_connection.process_id != os.getpid():
+            return False
+        if get_file_inode(pooled_connection.database_location) != pooled_connection.file_inode:
+            return False
+        return True
+
+    def _close_pooled_connection(self, pooled_connection, lock_held=False):
+        if lock_held:
+            self._remove_from_all_connections(pooled_connection)
+        else:
+            with self._all_connections_lock:
+                self._remove_from_all_connections(pooled_connection)
+
+        if pooled_connection.process_id != os.getpid():
+            self._inherited_connections.append(pooled_connection)
+        elif not pooled_connection.closed:
+            pooled_connection.closed = True
+            try:
+                if get_file_inode(pooled_connection.database_location) == pooled_connection.file_inode:
+                    pooled_connection.connection.execute("PRAGMA optimize;")
+                pooled_connection.connection.close()
+            except Exception as error:
+                logger.primary_logger.debug("SQL Connection close: " + str(error))
+
+    def _remove_from_all_connections(self, pooled_connection):
+        if pooled_connection in self._all_connections:
+            self._all_connections.remove(pooled_connection)
+
+
+def get_file_inode(file_location):
+    try:
+        return os.stat(file_location).st_ino
+    except FileNotFoundError:
+        return None
+
+
+class CreateDatabaseAccessCoordinator:
+    """
+    Creates a object instance coordinating access to each database file with a reader/writer lock.
+    Normal SQL use is shared, replacing or deleting a database file is exclusive.
+    Waiting threads are woken as soon as access is released. Shared access is re-entrant and
+    the thread holding exclusive access may also use the database (shared access passes through).
+    """
+
+    def __init__(self, default_timeout_seconds=300):
+        self.default_timeout_seconds = default_timeout_seconds
+
+        self._condition = Condition(Lock())
+        self._shared_counts = {}
+        self._exclusive_owners = {}
+        self._exclusive_waiting = {}
+        self._thread_access = local()
+
+        self.wait_count = {}
+        self.wait_total_ms = {}
+        self.wait_max_ms = {}
+        self.timeout_count = {}
+
+    @contextmanager
+    def shared_access(self, database_location, timeout=None):
+        """ Holds shared access to the provided database while in the with block. Raises TimeoutError. """
+        thread_counts = self._get_thread_counts()
+        if thread_counts.get(database_location, 0) > 0:
+            # Already holding shared or exclusive access on this thread
+            thread_counts[database_location] += 1
+            try:
+                yield
+            finally:
+                thread_counts[database_location] -= 1
+            return
+
+        with self._condition:
+            self._wait_for(database_location, timeout, lambda: self._exclusive_owners.get(database_location) is None
+                           and self._exclusive_waiting.get(database_location, 0) == 0)
+            self._shared_counts[database_location] = self._shared_counts.get(database_location, 0) + 1
+        thread_counts[database_location] = 1
+        try:
+            yield
+        finally:
+            thread_counts[database_location] = 0
+            with self._condition:
+                self._shared_counts[database_location] -= 1
+                if self._shared_counts[database_location] == 0:
+                    self._condition.notify_all()
+
+    @contextmanager
+    def exclusive_access(self, database_location, timeout=None):
+        """ Holds exclusive access to the provided database while in the with block. Raises TimeoutError. """
+        thread_counts = self._get_thread_counts()
+        if self._exclusive_owners.get(database_location) == get_ident():
+            yield
+            return
+        if thread_counts.get(database_location, 0) > 0:
+            raise RuntimeError("Exclusive access requested while holding shared access to " + database_location)
+
+        with self._condition:
+            # Waiting exclusive requests block new shared requests, so a busy database can't starve them
+            self._exclusive_waiting[database_location] = self._exclusive_waiting.get(database_location, 0) + 1
+            try:
+                self._wait_for(database_location, timeout,
+                               lambda: self._exclusive_owners.get(database_location) is None
+                               and self._shared_counts.get(database_location, 0) == 0)
+            finally:
+                self._exclusive_waiting[database_location] -= 1
+                if self._exclusive_waiting[database_location] == 0:
+                    self._condition.notify_all()
+            self._exclusive_owners[database_location] = get_ident()
+        thread_counts[database_location] = 1
+        try:
+            yield
+        finally:
+            thread_counts[database_location] = 0
+            with self._condition:
+                self._exclusive_owners[database_location] = None
+                self._condition.notify_all()
+
+    def is_exclusive(self, database_location):
+        """ Returns True if the provided database is held or waited on for exclusive access. """
+        with self._condition:
+            if self._exclusive_owners.get(database_location) is not None:
+                return True
+            return self._exclusive_waiting.get(database_location, 0) > 0
+
+    def get_statistics_text(self):
+        """ Returns the wait count, wait times and timeouts of every database as a string. """
+        with self._condition:
+            return_text = ""
+            for database_location in sorted(self.wait_count.keys()):
+                wait_count = self.wait_count[database_location]
+                average_wait_ms = 0.0
+                if wait_count > 0:
+                    average_wait_ms = round(self.wait_total_ms[database_location] / wait_count, 3)
+                return_text += database_location + \
+                               " - Exclusive: " + str(self._exclusive_owners.get(database_location) is not None) + \
+                               " | Shared Users: " + str(self._shared_counts.get(database_location, 0)) + \
+                               " | Waits: " + str(wait_count) + \
+                               " | Average Wait: " + str(average_wait_ms) + " ms" + \
+                               " | Max Wait: " + str(self.wait_max_ms[database_location]) + " ms" + \
+                               " | Timeouts: " + str(self.timeout_count[database_location]) + "\n"
+        return return_text.strip()
+
+    def _wait_for(self, database_location, timeout, access_available):
+        """ Waits until access_available returns True. Condition lock must be held by caller. """
+        if access_available():
+            return
+        if timeout is None:
+            timeout = self.default_timeout_seconds
+
+        start_time = time()
+        access_granted = self._condition.wait_for(access_available, timeout=timeout)
+        wait_ms = round((time() - start_time) * 1000, 3)
+        self.wait_count[database_location] = self.wait_count.get(database_location, 0) + 1
+        self.wait_total_ms[database_location] = self.wait_total_ms.get(database_location, 0) + wait_ms
+        self.wait_max_ms[database_location] = max(self.wait_max_ms.get(database_location, 0), wait_ms)
+        self.timeout_count.setdefault(database_location, 0)
+        if not access_granted:
+            self.timeout_count[database_location] += 1
+            raise TimeoutError("Database access timed out after " + str(timeout) + " seconds: " + database_location)
+
+    def _get_thread_counts(self):
+        if not hasattr(self._thread_access, "counts"):
+            self._thread_access.counts = {}
+        return self._thread_access.counts
+
+
+sql_connection_manager = CreateDatabaseConnectionManager()
+sql_access_coordinator = CreateDatabaseAccessCoordinator()
+# Connections set with route_database_connection, used in place of the normal connection for the calling thread
+_routed_connections = local()
+
+
+@contextmanager
+def route_database_connection(database_location, db_connection):
+    """ Makes get_database_connection yield the provided connection for database_location in the calling thread. """
+    if not hasattr(_routed_connections, "connections"):
+        _routed_connections.connections = {}
+    previous_connection = _routed_connections.connections.get(database_location)
+    _routed_connections.connections[database_location] = db_connection
+    try:
+        yield db_connection
+    finally:
+        if previous_connection is None:
+            _routed_connections.connections.pop(database_location, None)
+        else:
+            _routed_connections.connections[database_location] = previous_connection
+
+
+@contextmanager
+def get_database_connection(database_location):
+    """
+    Yields a SQLite3 connection to the provided database.
+    Managed sensor databases use the thread's pooled connection, all others are opened and closed on exit.
+    Shared access to the database is held while the connection is in use, see CreateDatabaseAccessCoordinator.
+    """
+    with sql_access_coordinator.shared_access(database_location):
+        routed_connection = getattr(_routed_connections, "connections", {}).get(database_location)
+        if routed_connection is not None:
+            yield routed_connection
+        elif database_location in sql_connection_manager.managed_databases:
+            yield sql_connection_manager.get_connection(database_location)
+        else:
+            db_connection = sqlite3.connect(database_location, isolation_level=None)
+            try:
+                yield db_connection
+            finally:
+                db_connection.close()
+
+
+def run_sql_function(database_location, sql_function):
+    """ Runs sql_function with a connection to the provided database, re-opening the connection once on failure. """
+    try:
+        with get_database_connection(database_location) as db_connection:
+            return sql_function(db_connection)
+    except sqlite3.DatabaseError as error:
+        if str(error) not in _reconnect_error_messages or \
+                database_location not in sql_connection_manager.managed_databases:
+            raise
+        logger.primary_logger.debug("SQL Connection to " + database_location + " re-opened: " + str(error))
+        sql_connection_manager.reset_connection(database_location)
+        with get_database_connection(database_location) as db_connection:
+            return sql_function(db_connection)
+
+
 def write_to_sql_database(sql_query, data_entries, sql_database_location=file_locations.sensor_database):
     """ Executes provided string with SQLite3.  Used to write sensor readings to the SQL Database. """
     try:
-        while app_cached_variables.sql_db_locked:
-            sleep(1)
-        db_connection = sqlite3.connect(sql_database_location, isolation_level=None)
-        db_cursor = db_connection.cursor()
-        if data_entries is None:
-            db_cursor.execute(sql_query)
-        else:
-            db_cursor.execute(sql_query, data_entries)
-        db_connection.commit()
-        db_connection.execute("PRAGMA optimize;")
-        db_connection.close()
+        def _sql_write(db_connection):
+            if data_entries is None:
+                db_connection.execute(sql_query)
+            else:
+                db_connection.execute(sql_query, data_entries)
+
+        run_sql_function(sql_database_location, _sql_write)
         # Only enable this when needed during troubleshooting
         # logger.primary_logger.debug("SQL Write to DataBase OK - " + sql_database_location)
     except Exception as error:
@@ -67,13 +382,8 @@ def write_to_sql_database(sql_query, data_entries, sql_database_location=file_lo
 def sql_execute_get_data(sql_query, sql_database_location=file_locations.sensor_database):
     """ Returns SQL data based on provided sql_query. """
     try:
-        while app_cached_variables.sql_db_locked:
-            sleep(1)
-        database_connection = sqlite3.connect(sql_database_location, isolation_level=None)
-        sqlite_database = database_connection.cursor()
-        sqlite_database.execute(sql_query)
-        sql_column_data = sqlite_database.fetchall()
-        database_connection.close()
+        sql_column_data = run_sql_function(sql_database_location,
+                                              lambda db_connection: db_connection.execute(sql_query).fetchall())
     except Exception as error:
         if str(error)[:13] == "no such table":
             logger.primary_logger.debug("SQL Table name was not found in the Database: " + str(error))
@@ -96,11 +406,8 @@ def universal_database_structure_check(database_location, expected_database_type
         sql_query = "SELECT " + db_v.db_info_database_type_column + " FROM '" + db_v.table_db_info + "' WHERE " \
                     + db_v.db_info_database_type_column + " != ''"
 
-        database_connection = sqlite3.connect(database_location, isolation_level=None)
-        sqlite_database = database_connection.cursor()
-        sqlite_database.execute(sql_query)
-        database_type = get_sql_element(sqlite_database.fetchall())
-        database_connection.close()
+        with get_database_connection(database_location) as database_connection:
+            database_type = get_sql_element(database_connection.execute(sql_query).fetchall())
 
         if expected_database_type is None:
             expected_database_type = database_type
@@ -133,36 +440,40 @@ def check_main_database_structure(database_location=file_locations.sensor_databa
     columns_created = 0
     columns_already_made = 0
     try:
-        db_connection = sqlite3.connect(database_location, isolation_level=None)
-        db_connection.execute('pragma journal_mode=wal')
-        db_cursor = db_connection.cursor()
+        with get_database_connection(database_location) as db_connection:
+            set_incremental_auto_vacuum(db_connection)
+            db_connection.execute('pragma journal_mode=wal')
+            db_cursor = db_connection.cursor()
+
+            create_ks_db_info_table(db_v.db_info_database_type_main, db_cursor)
+            create_table_and_datetime(db_v.table_interval, db_cursor)
+            create_table_and_datetime(db_v.table_trigger, db_cursor)
+            for column in db_v.get_sensor_columns_list():
+                interval_response = check_sql_table_and_column(db_v.table_interval, column, db_cursor)
+                trigger_response = check_sql_table_and_column(db_v.table_trigger, column, db_cursor)
+                for response in [interval_response, trigger_response]:
+                    if response:
+                        columns_created += 1
+                    else:
+                        columns_already_made += 1
+            if check_sql_table_and_column(db_v.table_trigger, db_v.trigger_state, db_cursor):
+                columns_created += 1
+            else:
+                columns_already_made += 1
 
-        create_ks_db_info_table(db_v.db_info_database_type_main, db_cursor)
-        create_table_and_datetime(db_v.table_interval, db_cursor)
-        create_table_and_datetime(db_v.table_trigger, db_cursor)
-        for column in db_v.get_sensor_columns_list():
-            interval_response = check_sql_table_and_column(db_v.table_interval, column, db_cursor)
-            trigger_response = check_sql_table_and_column(db_v.table_trigger, column, db_cursor)
-            for response in [interval_response, trigger_response]:
-                if response:
+            create_table_and_datetime(db_v.table_other, db_cursor)
+            for column_other in db_v.get_other_columns_list():
+                other_response = check_sql_table_and_column(db_v.table_other, column_other, db_cursor)
+                if other_response:
                     columns_created += 1
                 else:
                     columns_already_made += 1
-        if check_sql_table_and_column(db_v.table_trigger, db_v.trigger_state, db_cursor):
-            columns_created += 1
-        else:
-            columns_already_made += 1
+            columns_created += check_typed_interval_table(db_cursor)
+            check_narrow_interval_tables(db_cursor)
+            check_interval_rollup_tables(db_cursor)
+            check_imu_summaries_table(db_cursor)
+            run_database_migrations(db_v.db_info_database_type_main, db_cursor)
 
-        create_table_and_datetime(db_v.table_other, db_cursor)
-        for column_other in db_v.get_other_columns_list():
-            other_response = check_sql_table_and_column(db_v.table_other, column_other, db_cursor)
-            if other_response:
-                columns_created += 1
-            else:
-                columns_already_made += 1
-
-        db_connection.commit()
-        db_connection.close()
         debug_log_message = str(columns_already_made) + " Columns found in 3 SQL Tables, "
         logger.primary_logger.debug(debug_log_message + str(columns_created) + " Created")
         logger.primary_logger.debug("Checks on Main Database Complete")
@@ -175,32 +486,32 @@ def check_main_database_structure(database_location=file_locations.sensor_databa
 def check_checkin_database_structure(database_location=file_locations.sensor_checkin_database):
     logger.primary_logger.debug("Running Check on 'Checkin' Database")
     try:
-        db_connection = sqlite3.connect(database_location, isolation_level=None)
-        db_connection.execute('pragma journal_mode=wal')
-        db_cursor = db_connection.cursor()
-
-        create_ks_db_info_table(db_v.db_info_database_type_sensor_checkins, db_cursor)
-        get_sensor_checkin_ids_sql = "SELECT name FROM sqlite_master WHERE type='table';"
-        db_cursor.execute(get_sensor_checkin_ids_sql)
-        sensor_ids = db_cursor.fetchall()
-
-        columns = [db_v.kootnet_sensors_version,
-                   db_v.sensor_uptime,
-                   db_v.sensor_check_in_installed_sensors,
-                   db_v.sensor_check_in_primary_log,
-                   db_v.sensor_check_in_sensors_log]
-        for sensor_id in sensor_ids:
-            cleaned_id = str(sensor_id[0]).strip()
-            if not _ks_system_table(cleaned_id):
-                for column in columns:
-                    try:
-                        add_columns_sql = "ALTER TABLE '" + cleaned_id + "' ADD COLUMN " + column + " TEXT"
-                        db_cursor.execute(add_columns_sql)
-                    except Exception as error:
-                        if str(error)[:21] != "duplicate column name":
-                            logger.primary_logger.error("Checkin Database Error: " + str(error))
-        db_connection.commit()
-        db_connection.close()
+        with get_database_connection(database_location) as db_connection:
+            set_incremental_auto_vacuum(db_connection)
+            db_connection.execute('pragma journal_mode=wal')
+            db_cursor = db_connection.cursor()
+
+            create_ks_db_info_table(db_v.db_info_database_type_sensor_checkins, db_cursor)
+            get_sensor_checkin_ids_sql = "SELECT name FROM sqlite_master WHERE type='table';"
+            db_cursor.execute(get_sensor_checkin_ids_sql)
+            sensor_ids = db_cursor.fetchall()
+
+            columns = [db_v.kootnet_sensors_version,
+                       db_v.sensor_uptime,
+                       db_v.sensor_check_in_installed_sensors,
+                       db_v.sensor_check_in_primary_log,
+                       db_v.sensor_check_in_sensors_log]
+            for sensor_id in sensor_ids:
+                cleaned_id = str(sensor_id[0]).strip()
+                if not _ks_system_table(cleaned_id):
+                    for column in columns:
+                        try:
+                            add_columns_sql = "ALTER TABLE '" + cleaned_id + "' ADD COLUMN " + column + " TEXT"
+                            db_cursor.execute(add_columns_sql)
+                        except Exception as error:
+                            if str(error)[:21] != "duplicate column name":
+                                logger.primary_logger.error("Checkin Database Error: " + str(error))
+            run_database_migrations(db_v.db_info_database_type_sensor_checkins, db_cursor)
         logger.primary_logger.debug("Check on 'Checkin' Database Complete")
         return True
     except Exception as error:
@@ -211,27 +522,27 @@ def check_checkin_database_structure(database_location=file_locations.sensor_che
 def check_mqtt_subscriber_database_structure(database_location=file_locations.mqtt_subscriber_database):
     logger.primary_logger.debug("Running Check on 'MQTT Subscriber' Database")
     try:
-        db_connection = sqlite3.connect(database_location, isolation_level=None)
-        db_connection.execute('pragma journal_mode=wal')
-        db_cursor = db_connection.cursor()
-
-        create_ks_db_info_table(db_v.db_info_database_type_mqtt, db_cursor)
-        get_sensor_checkin_ids_sql = "SELECT name FROM sqlite_master WHERE type='table';"
-        db_cursor.execute(get_sensor_checkin_ids_sql)
-        mqtt_sensor_strings = db_cursor.fetchall()
-
-        for sensor_string in mqtt_sensor_strings:
-            cleaned_id = str(sensor_string[0]).strip()
-            if not _ks_system_table(cleaned_id):
-                for column in db_v.get_sensor_columns_list():
-                    try:
-                        add_columns_sql = "ALTER TABLE '" + cleaned_id + "' ADD COLUMN " + column + " TEXT"
-                        db_cursor.execute(add_columns_sql)
-                    except Exception as error:
-                        if str(error)[:21] != "duplicate column name":
-                            logger.primary_logger.error("Checkin Database Error: " + str(error))
-        db_connection.commit()
-        db_connection.close()
+        with get_database_connection(database_location) as db_connection:
+            set_incremental_auto_vacuum(db_connection)
+            db_connection.execute('pragma journal_mode=wal')
+            db_cursor = db_connection.cursor()
+
+            create_ks_db_info_table(db_v.db_info_database_type_mqtt, db_cursor)
+            get_sensor_checkin_ids_sql = "SELECT name FROM sqlite_master WHERE type='table';"
+            db_cursor.execute(get_sensor_checkin_ids_sql)
+            mqtt_sensor_strings = db_cursor.fetchall()
+
+            for sensor_string in mqtt_sensor_strings:
+                cleaned_id = str(sensor_string[0]).strip()
+                if not _ks_system_table(cleaned_id):
+                    for column in db_v.get_sensor_columns_list():
+                        try:
+                            add_columns_sql = "ALTER TABLE '" + cleaned_id + "' ADD COLUMN " + column + " TEXT"
+                            db_cursor.execute(add_columns_sql)
+                        except Exception as error:
+                            if str(error)[:21] != "duplicate column name":
+                                logger.primary_logger.error("Checkin Database Error: " + str(error))
+            run_database_migrations(db_v.db_info_database_type_mqtt, db_cursor)
         logger.primary_logger.debug("Check on 'Checkin' Database Complete")
         return True
     except Exception as error:
@@ -246,10 +557,193 @@ def create_table_and_datetime(table_name, db_cursor):
         # Create or update table
         db_cursor.execute("CREATE TABLE {tn} ({nf} {ft})".format(tn=table_name, nf=db_v.all_tables_datetime, ft="TEXT"))
         logger.primary_logger.debug("Table '" + table_name + "' - Created")
+        create_datetime_index(table_name, db_cursor)
     except Exception as error:
         logger.primary_logger.debug("SQLite3 Table Check/Creation: " + str(error))
 
 
+def create_datetime_index(table_name, db_cursor, column_name=db_v.all_tables_datetime):
+    """ Adds or verifies the DateTime index on the provided table. Used for all DateTime range and order queries. """
+    try:
+        sql_query = "CREATE INDEX IF NOT EXISTS '{ix}' ON '{tn}' ({cn})"
+        index_name = "idx_" + table_name + "_" + column_name
+        db_cursor.execute(sql_query.format(ix=index_name, tn=table_name, cn=column_name))
+    except Exception as error:
+        logger.primary_logger.warning("SQLite3 DateTime Index Creation on " + table_name + ": " + str(error))
+
+
+def set_incremental_auto_vacuum(db_connection):
+    """
+    Sets the database to incremental auto vacuum, so freed space can be returned to the file system in small steps.
+    New databases use it right away if it's set before WAL mode. Existing databases keep re-using freed pages until they are shrunk (VACUUM),
+    which blocks all other access to the database, so it's only done when requested.
+    """
+    try:
+        db_connection.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+    except Exception as error:
+        logger.primary_logger.warning("Set Incremental Auto Vacuum Failed: " + str(error))
+
+
+def shrink_database(database_location):
+    """ Shrinks the database with a full VACUUM, converting it to incremental auto vacuum if it's not already. """
+    def _vacuum_database(db_connection):
+        set_incremental_auto_vacuum(db_connection)
+        db_connection.execute("VACUUM;")
+
+    logger.primary_logger.info("Shrinking " + database_location + " (This may take a while on large databases)")
+    run_sql_function(database_location, _vacuum_database)
+
+
+def get_database_schema_version(db_cursor):
+    """ Returns the highest applied schema version of the database or 0 if no migrations have been applied. """
+    try:
+        sql_query = "SELECT MAX(" + db_v.schema_version_column + ") FROM " + db_v.table_schema_version
+        schema_version = db_cursor.execute(sql_query).fetchone()[0]
+        if schema_version is not None:
+            return int(schema_version)
+    except Exception as error:
+        logger.primary_logger.debug("SQLite3 Get Schema Version: " + str(error))
+    return 0
+
+
+def run_database_migrations(database_type, db_cursor):
+    """
+    Applies any schema migrations for the provided database type that are newer than the database's schema version.
+    Each migration runs in its own transaction and is recorded in the schema version table.
+    """
+    sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({vc} INTEGER, {dc} TEXT)"
+    db_cursor.execute(sql_query.format(tn=db_v.table_schema_version, vc=db_v.schema_version_column,
+                                       dc=db_v.all_tables_datetime))
+    current_schema_version = get_database_schema_version(db_cursor)
+
+    for version, description, migration_function in _get_database_migrations(database_type):
+        if version > current_schema_version:
+            logger.primary_logger.info("Applying " + database_type + " Database Migration " + str(version) +
+                                       " - " + description + " (This may take a while on large databases)")
+            try:
+                db_cursor.execute("BEGIN;")
+                migration_function(db_cursor)
+                sql_query = "INSERT INTO " + db_v.table_schema_version + " (" + db_v.schema_version_column + \
+                            "," + db_v.all_tables_datetime + ") VALUES (?,?)"
+                db_cursor.execute(sql_query, [version, datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")])
+                db_cursor.execute("COMMIT;")
+            except Exception as error:
+                db_cursor.execute("ROLLBACK;")
+                log_msg = database_type + " Database Migration " + str(version) + " Failed: "
+                logger.primary_logger.error(log_msg + str(error))
+                break
+
+
+def _get_database_migrations(database_type):
+    """ Returns a list of [version, description, migration_function] for the provided database type. """
+    if database_type == db_v.db_info_database_type_main:
+        return [[1, "Add DateTime Indexes", _migration_add_datetime_indexes]]
+    elif database_type == db_v.db_info_database_type_sensor_checkins:
+        return [[1, "Add DateTime Indexes", _migration_add_datetime_indexes]]
+    elif database_type == db_v.db_info_database_type_mqtt:
+        return [[1, "Add DateTime Indexes", _migration_add_datetime_indexes]]
+    return []
+
+
+def _migration_add_datetime_indexes(db_cursor):
+    """ Adds DateTime indexes to all data tables, including per sensor tables in Checkin & MQTT databases. """
+    db_cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    for table_name in db_cursor.fetchall():
+        table_name = str(table_name[0])
+        db_cursor.execute("PRAGMA table_info('" + table_name + "')")
+        table_columns = [column_info[1] for column_info in db_cursor.fetchall()]
+        if db_v.all_tables_datetime in table_columns:
+            create_datetime_index(table_name, db_cursor)
+
+
+def check_typed_interval_table(db_cursor):
+    """
+    Adds or verifies the typed Interval table and columns in the SQLite Database.
+    Readings are stored as REAL and the DateTime as INTEGER milliseconds since the Unix epoch (UTC0).
+    Returns the number of columns created.
+    """
+    columns_created = 0
+    try:
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({cn} INTEGER)"
+        db_cursor.execute(sql_query.format(tn=db_v.table_interval_typed, cn=db_v.all_tables_datetime_epoch_ms))
+        create_datetime_index(db_v.table_interval_typed, db_cursor, column_name=db_v.all_tables_datetime_epoch_ms)
+        text_columns = db_v.get_sensor_text_columns_list()
+        for column in db_v.get_sensor_columns_list():
+            if column != db_v.all_tables_datetime:
+                column_type = "REAL"
+                if column in text_columns:
+                    column_type = "TEXT"
+                if check_sql_table_and_column(db_v.table_interval_typed, column, db_cursor, column_type=column_type):
+                    columns_created += 1
+    except Exception as error:
+        logger.primary_logger.error("SQLite3 Typed Interval Table Check/Creation: " + str(error))
+    return columns_created
+
+
+def check_narrow_interval_tables(db_cursor):
+    """
+    Adds or verifies the narrow Interval tables in the SQLite Database.
+    Each reading is stored as its own (DateTimeEpochMS, MetricID, Reading) row with sensor names held in the
+    metric dictionary table. The covering index allows single metric range scans without reading the table.
+    """
+    try:
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({id} INTEGER PRIMARY KEY, {name} TEXT UNIQUE NOT NULL)"
+        db_cursor.execute(sql_query.format(tn=db_v.table_interval_narrow_metrics,
+                                           id=db_v.narrow_metric_id, name=db_v.narrow_metric_name))
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({dt} INTEGER NOT NULL, {id} INTEGER NOT NULL, {rd})"
+        db_cursor.execute(sql_query.format(tn=db_v.table_interval_narrow, dt=db_v.all_tables_datetime_epoch_ms,
+                                           id=db_v.narrow_metric_id, rd=db_v.narrow_reading))
+        sql_query = "CREATE INDEX IF NOT EXISTS '{ix}' ON '{tn}' ({id}, {dt}, {rd})"
+        index_name = "idx_" + db_v.table_interval_narrow + "_" + db_v.narrow_metric_id
+        db_cursor.execute(sql_query.format(ix=index_name, tn=db_v.table_interval_narrow, id=db_v.narrow_metric_id,
+                                           dt=db_v.all_tables_datetime_epoch_ms, rd=db_v.narrow_reading))
+    except Exception as error:
+        logger.primary_logger.error("SQLite3 Narrow Interval Tables Check/Creation: " + str(error))
+
+
+def check_interval_rollup_tables(db_cursor):
+    """
+    Adds or verifies the Interval rollup (minute, hour & day) tables in the SQLite Database.
+    Each row holds the min, max, sum & count of one sensor (metric dictionary ID) for one time bucket.
+    """
+    try:
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({id} INTEGER NOT NULL, {bk} INTEGER NOT NULL, " + \
+                    "{min} REAL, {max} REAL, {sum} REAL, {count} INTEGER, PRIMARY KEY ({id}, {bk})) WITHOUT ROWID"
+        for table_name, bucket_ms in db_v.get_interval_rollup_tables_list():
+            db_cursor.execute(sql_query.format(
+                tn=table_name, id=db_v.narrow_metric_id, bk=db_v.rollup_bucket, min=db_v.rollup_min,
+                max=db_v.rollup_max, sum=db_v.rollup_sum, count=db_v.rollup_count
+            ))
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({name} TEXT PRIMARY KEY, {value} INTEGER)"
+        db_cursor.execute(sql_query.format(tn=db_v.table_interval_rollup_state, name=db_v.rollup_state_name,
+                                           value=db_v.rollup_state_value))
+    except Exception as error:
+        logger.primary_logger.error("SQLite3 Interval Rollup Tables Check/Creation: " + str(error))
+
+
+def check_imu_summaries_table(db_cursor):
+    """
+    Adds or verifies the IMU Capture summaries table in the SQLite Database.
+    Each row holds the summary of one IMU reading (Database column name) for one capture window.
+    FFT band energies are stored as comma separated text, lowest frequency band first.
+    """
+    try:
+        sql_query = "CREATE TABLE IF NOT EXISTS {tn} ({dt} INTEGER NOT NULL, {name} TEXT NOT NULL, " + \
+                    "{count} INTEGER, {rate} REAL, {mean} REAL, {rms} REAL, {peak} REAL, {bw} REAL, {bands} TEXT)"
+        db_cursor.execute(sql_query.format(
+            tn=db_v.table_imu_summaries, dt=db_v.all_tables_datetime_epoch_ms, name=db_v.narrow_metric_name,
+            count=db_v.imu_sample_count, rate=db_v.imu_sample_rate, mean=db_v.imu_mean, rms=db_v.imu_rms,
+            peak=db_v.imu_peak, bw=db_v.imu_fft_band_width, bands=db_v.imu_fft_band_energies
+        ))
+        sql_query = "CREATE INDEX IF NOT EXISTS '{ix}' ON '{tn}' ({name}, {dt})"
+        index_name = "idx_" + db_v.table_imu_summaries + "_" + db_v.narrow_metric_name
+        db_cursor.execute(sql_query.format(ix=index_name, tn=db_v.table_imu_summaries, name=db_v.narrow_metric_name,
+                                           dt=db_v.all_tables_datetime_epoch_ms))
+        create_datetime_index(db_v.table_imu_summaries, db_cursor, column_name=db_v.all_tables_datetime_epoch_ms)
+    except Exception as error:
+        logger.primary_logger.error("SQLite3 IMU Summaries Table Check/Creation: " + str(error))
+
+
 def create_ks_db_info_table(db_type, db_cursor):
     try:
         db_cursor.execute("CREATE TABLE {tn} ({cn} {ct})".format(
@@ -287,11 +781,10 @@ def validate_sqlite_database(database_location, check_for_table=None):
         if check_for_table is not None:
             get_sql_tables = get_sql_tables[:-1] + " AND name='" + check_for_table + "';"
 
-        database_connection = sqlite3.connect(database_location, isolation_level=None)
-        sqlite_database = database_connection.cursor()
-        sqlite_database.execute(get_sql_tables)
-        sql_db_tables = sqlite_database.fetchall()
-        database_connection.close()
+        with get_database_connection(database_location) as database_connection:
+            sqlite_database = database_connection.cursor()
+            sqlite_database.execute(get_sql_tables)
+            sql_db_tables = sqlite_database.fetchall()
 
         if len(sql_db_tables) > 0:
             return True
@@ -304,14 +797,12 @@ def run_database_integrity_check(sqlite_database_location, quick=True):
     try:
         start_time = datetime.utcnow()
 
-        db_connection = sqlite3.connect(sqlite_database_location, isolation_level=None)
-        db_cursor = db_connection.cursor()
-        if quick:
-            integrity_check_fetch = db_cursor.execute("PRAGMA quick_check;").fetchall()
-        else:
-            integrity_check_fetch = db_cursor.execute("PRAGMA integrity_check;").fetchall()
-        db_connection.commit()
-        db_connection.close()
+        with get_database_connection(sqlite_database_location) as db_connection:
+            db_cursor = db_connection.cursor()
+            if quick:
+                integrity_check_fetch = db_cursor.execute("PRAGMA quick_check;").fetchall()
+            else:
+                integrity_check_fetch = db_cursor.execute("PRAGMA integrity_check;").fetchall()
 
         integrity_msg = sql_fetch_items_to_text(integrity_check_fetch)
         total_time_taken = str(round((datetime.utcnow() - start_time).total_seconds(), 4))
@@ -353,9 +844,33 @@ def get_main_db_first_last_date(utc0_hour_offset=0):
                 "Max(" + str(db_v.all_tables_datetime) + ") AS Last " + \
                 "FROM " + str(db_v.table_interval)
 
+    typed_sql_query = "SELECT Min(" + str(db_v.all_tables_datetime_epoch_ms) + ") AS First, " + \
+                      "Max(" + str(db_v.all_tables_datetime_epoch_ms) + ") AS Last " + \
+                      "FROM " + str(db_v.table_interval_typed)
+
+    # Sensor Name is recorded with every narrow Interval entry, its MetricID index avoids scanning every reading
+    narrow_metric_query = "(SELECT " + str(db_v.narrow_metric_id) + " FROM " + \
+                          str(db_v.table_interval_narrow_metrics) + \
+                          " WHERE " + str(db_v.narrow_metric_name) + " = '" + str(db_v.sensor_name) + "')"
+    narrow_sql_query = "SELECT (SELECT Min(" + str(db_v.all_tables_datetime_epoch_ms) + ") FROM " + \
+                       str(db_v.table_interval_narrow) + " WHERE " + str(db_v.narrow_metric_id) + " = " + \
+                       narrow_metric_query + ") AS First, " + \
+                       "(SELECT Max(" + str(db_v.all_tables_datetime_epoch_ms) + ") FROM " + \
+                       str(db_v.table_interval_narrow) + " WHERE " + str(db_v.narrow_metric_id) + " = " + \
+                       narrow_metric_query + ") AS Last"
+
     textbox_db_dates = "Database Access Error: "
     try:
         first_date, last_date = sql_execute_get_data(sql_query)[0]
+        for epoch_sql_query in [typed_sql_query, narrow_sql_query]:
+            epoch_dates = sql_execute_get_data(epoch_sql_query)
+            if len(epoch_dates) > 0 and epoch_dates[0][0] is not None:
+                epoch_first_date = epoch_ms_to_datetime(epoch_dates[0][0], include_milliseconds=True)
+                epoch_last_date = epoch_ms_to_datetime(epoch_dates[0][1], include_milliseconds=True)
+                if first_date is None or epoch_first_date < first_date:
+                    first_date = epoch_first_date
+                if last_date is None or epoch_last_date > last_date:
+                    last_date = epoch_last_date
         first_date = adjust_datetime(first_date, utc0_hour_offset)
         last_date = adjust_datetime(last_date, utc0_hour_offset)
         textbox_db_dates = str(first_date) + " < -- > " + str(last_date)
@@ -403,6 +918,7 @@ def get_clean_sql_table_name(sql_table):
 
 
 def _ks_system_table(table_name):
-    if table_name == db_v.table_db_info or table_name == db_v.table_ks_info:
+    if table_name == db_v.table_db_info or table_name == db_v.table_ks_info or \
+            table_name == db_v.table_schema_version:
         return True
     return False
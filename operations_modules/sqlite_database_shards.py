@@ -0,0 +1,232 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Monthly Interval database shards.
+When enabled, Interval recordings are written to one SQLite database file per month (UTC0) in the shards folder.
+The shard query router ATTACHes the shards overlapping a requested DateTime range to a main database connection
+and shadows the Interval tables with TEMP views, so existing queries read main database and shard data together.
+When more shards are in range than SQLite can attach, the oldest are copied into TEMP tables in batches.
+Metric IDs, rollups, triggers and other data stay in the main database.
+"""
+import os
+import sqlite3
+from threading import Lock
+from contextlib import contextmanager, ExitStack
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.sqlite_database import sql_connection_manager, sql_access_coordinator, \
+    check_main_database_structure, route_database_connection
+
+db_v = app_cached_variables.database_variables
+
+shard_file_name_start = "SensorRecordingDatabase_"
+shard_file_name_end = ".sqlite"
+# SQLite's default limit on attached databases
+max_attached_shards = 10
+shard_table_names = [db_v.table_interval, db_v.table_interval_typed, db_v.table_interval_narrow]
+
+_checked_shards_lock = Lock()
+_checked_shards = []
+
+
+def get_shard_location(utc_datetime):
+    """ Returns the shard database location for the provided UTC0 DateTime (datetime or string). """
+    shard_month = str(utc_datetime).strip()[:7].replace("-", "_")
+    return file_locations.database_shards_folder + "/" + shard_file_name_start + shard_month + shard_file_name_end
+
+
+def get_write_shard_location(utc_datetime):
+    """ Returns the shard database location for the provided UTC0 DateTime, creating the shard if needed. """
+    shard_location = get_shard_location(utc_datetime)
+    with _checked_shards_lock:
+        if shard_location not in _checked_shards:
+            if not os.path.isdir(file_locations.database_shards_folder):
+                os.makedirs(file_locations.database_shards_folder)
+            if not os.path.isfile(shard_location):
+                logger.primary_logger.info(" -- Creating Database Shard " + shard_location)
+            # Shards use pooled connections, the structure check sets new shards to incremental auto vacuum
+            if shard_location not in sql_connection_manager.managed_databases:
+                sql_connection_manager.managed_databases.append(shard_location)
+            check_main_database_structure(shard_location)
+            _checked_shards.append(shard_location)
+    return shard_location
+
+
+def delete_shard(shard_location):
+    """ Closes all connections to the provided shard database and deletes it. """
+    with sql_access_coordinator.exclusive_access(shard_location), _checked_shards_lock:
+        sql_connection_manager.close_database_connections(shard_location)
+        if shard_location in sql_connection_manager.managed_databases:
+            sql_connection_manager.managed_databases.remove(shard_location)
+        if shard_location in _checked_shards:
+            _checked_shards.remove(shard_location)
+        for file_location in [shard_location, shard_location + "-wal", shard_location + "-shm"]:
+            if os.path.isfile(file_location):
+                os.remove(file_location)
+    logger.primary_logger.info(" -- Deleted Database Shard " + shard_location)
+
+
+def get_shard_month(shard_location):
+    """ Returns the month of the provided shard database location as a string in the format YYYY_MM. """
+    return os.path.basename(shard_location)[len(shard_file_name_start):-len(shard_file_name_end)]
+
+
+def get_first_last_shard_locations():
+    """ Returns a list of the oldest and newest shard database locations, empty if there are no shards. """
+    shard_locations = get_shard_locations()
+    if len(shard_locations) < 2:
+        return shard_locations
+    return [shard_locations[0], shard_locations[-1]]
+
+
+def get_shard_locations(start_datetime=None, end_datetime=None):
+    """
+    Returns a sorted list of shard database locations (Oldest first).
+    If start and end UTC0 DateTimes are provided, only shards with months in that range are returned.
+    """
+    start_month = None
+    end_month = None
+    if start_datetime is not None and end_datetime is not None:
+        start_month = str(start_datetime).strip()[:7].replace("-", "_")
+        end_month = str(end_datetime).strip()[:7].replace("-", "_")
+
+    shard_locations = []
+    if os.path.isdir(file_locations.database_shards_folder):
+        for file_name in sorted(os.listdir(file_locations.database_shards_folder)):
+            if file_name.startswith(shard_file_name_start) and file_name.endswith(shard_file_name_end):
+                shard_month = get_shard_month(file_name)
+                if start_month is None or start_month <= shard_month <= end_month:
+                    shard_locations.append(file_locations.database_shards_folder + "/" + file_name)
+    return shard_locations
+
+
+@contextmanager
+def shard_query_router(start_datetime=None, end_datetime=None, database_location=file_locations.sensor_database,
+                       shard_locations=None):
+    """
+    Routes the calling thread's queries on the main database through a connection with the shards
+    overlapping the provided UTC0 DateTime range attached. Yields the list of attached shard locations.
+    All shards are used if no range is provided, so queries should provide a range.
+    If shard_locations is provided, only those shards are used. Other databases are not routed.
+    """
+    if database_location != file_locations.sensor_database:
+        shard_locations = []
+    elif shard_locations is None:
+        shard_locations = get_shard_locations(start_datetime, end_datetime)
+    if len(shard_locations) == 0:
+        yield shard_locations
+        return
+
+    with ExitStack() as shard_access_stack:
+        # Attached shards can't be deleted by the retention engine until the router is done with them
+        for shard_location in shard_locations:
+            shard_access_stack.enter_context(sql_access_coordinator.shared_access(shard_location))
+        with _routed_main_connection(database_location, shard_locations):
+            yield shard_locations
+
+
+@contextmanager
+def _routed_main_connection(database_location, shard_locations):
+    db_connection = sqlite3.connect(database_location, isolation_level=None)
+    try:
+        # The newest shards are attached, one attach slot is kept for copying the others in batches
+        copied_shards_count = 0
+        if len(shard_locations) > max_attached_shards:
+            copied_shards_count = len(shard_locations) - (max_attached_shards - 1)
+        copied_tables = _copy_shard_tables(db_connection, shard_locations[:copied_shards_count])
+
+        shard_schemas = []
+        for index, shard_location in enumerate(shard_locations[copied_shards_count:]):
+            schema_name = "shard_" + str(index)
+            db_connection.execute("ATTACH DATABASE ? AS " + schema_name, (shard_location,))
+            shard_schemas.append(schema_name)
+        for table_name in shard_table_names:
+            _create_shard_view(db_connection, table_name, shard_schemas, copied_tables)
+        with route_database_connection(database_location, db_connection):
+            yield
+    finally:
+        db_connection.close()
+
+
+def _copy_shard_tables(db_connection, shard_locations):
+    """
+    Copies the Interval tables of the provided shards into TEMP tables, attaching one shard at a time.
+    Returns a list of the Interval table names copied.
+    """
+    copied_tables = []
+    for shard_location in shard_locations:
+        db_connection.execute("ATTACH DATABASE ? AS shard_copy", (shard_location,))
+        try:
+            db_connection.execute("BEGIN")
+            for table_name in shard_table_names:
+                select_query = _get_shard_select_query(db_connection, "shard_copy", table_name)
+                if select_query is None:
+                    continue
+                if table_name in copied_tables:
+                    db_connection.execute("INSERT INTO temp." + _get_copy_table_name(table_name) + " " + select_query)
+                else:
+                    db_connection.execute("CREATE TEMP TABLE " + _get_copy_table_name(table_name) + " AS " +
+                                          select_query)
+                    copied_tables.append(table_name)
+            db_connection.execute("COMMIT")
+        finally:
+            if db_connection.in_transaction:
+                db_connection.execute("ROLLBACK")
+            db_connection.execute("DETACH DATABASE shard_copy")
+    return copied_tables
+
+
+def _create_shard_view(db_connection, table_name, shard_schemas, copied_tables):
+    """ Creates a TEMP view named table_name that combines the main database, shard and copied shard tables. """
+    if len(_get_table_columns(db_connection, "main", table_name)) == 0:
+        return
+
+    select_queries = []
+    for schema_name in ["main"] + shard_schemas:
+        select_query = _get_shard_select_query(db_connection, schema_name, table_name)
+        if select_query is not None:
+            select_queries.append(select_query)
+    if table_name in copied_tables:
+        select_queries.append("SELECT * FROM temp." + _get_copy_table_name(table_name))
+    db_connection.execute("CREATE TEMP VIEW " + table_name + " AS " + " UNION ALL ".join(select_queries))
+
+
+def _get_shard_select_query(db_connection, schema_name, table_name):
+    """ Returns a query selecting the schema's table with the main database table's columns, None if not found. """
+    table_columns = _get_table_columns(db_connection, "main", table_name)
+    schema_columns = _get_table_columns(db_connection, schema_name, table_name)
+    if len(table_columns) == 0 or len(schema_columns) == 0:
+        return None
+    select_columns = ["rowid AS ROWID"]
+    for column_name in table_columns:
+        if column_name in schema_columns:
+            select_columns.append(column_name)
+        else:
+            select_columns.append("NULL AS " + column_name)
+    return "SELECT " + ", ".join(select_columns) + " FROM " + schema_name + "." + table_name
+
+
+def _get_copy_table_name(table_name):
+    return "ShardCopy" + table_name
+
+
+def _get_table_columns(db_connection, schema_name, table_name):
+    table_info = db_connection.execute("PRAGMA " + schema_name + ".table_info(" + table_name + ")").fetchall()
+    return [column_info[1] for column_info in table_info]
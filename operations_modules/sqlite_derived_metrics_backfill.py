@@ -0,0 +1,251 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Derived metrics back fill.
+Recalculates recorded Environment Temperatures, their offsets and Dew Points with the current sensor offsets,
+using the derived metric formulas on NumPy arrays of recorded readings. The raw temperature is recovered from the
+recorded temperature and offset. Only readings that were recorded are replaced, in all Interval storage formats
+of the main database and its shards. Afterwards, the changed rollup buckets are rebuilt and the graph cache
+(Cached graphs and rolling graph data) is cleared, so graphs show the recalculated readings.
+"""
+import os
+from time import sleep
+from threading import Lock
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_functions import thread_function, datetime_to_epoch_ms, epoch_ms_to_datetime
+from operations_modules.sqlite_database import run_sql_function, sql_access_coordinator
+from operations_modules.sqlite_database_shards import get_shard_locations
+from operations_modules.sqlite_rollups import rebuild_rollup_buckets
+from operations_modules.sqlite_typed_storage import get_typed_reading
+from sensor_modules.sensor_derived_metrics import raw_env_temperature, get_derived_arrays
+from http_server.server_plotly_graph_cache import clear_graph_cache
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy Derived Metrics Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+db_v = app_cached_variables.database_variables
+
+backfill_chunk_ms = 21600000
+backfill_chunk_sleep_seconds = 0.2
+backfill_columns = [db_v.env_temperature, db_v.env_temperature_offset, db_v.dew_point]
+_recorded_input_columns = [db_v.env_temperature, db_v.env_temperature_offset, db_v.system_temperature,
+                           db_v.humidity, db_v.dew_point]
+
+_backfill_lock = Lock()
+_backfills_running = []
+
+
+def start_derived_metrics_backfill(start_datetime, end_datetime, database_location=file_locations.sensor_database):
+    """
+    Starts recalculating recorded derived metrics between the provided UTC0 DateTimes in the background.
+    Returns True if started, False if the DateTimes are invalid, a back fill is already running on the database
+    or NumPy is missing.
+    """
+    if np is None:
+        logger.primary_logger.warning("Derived Metrics Back Fill requires NumPy, it's not installed")
+        return False
+
+    start_epoch_ms = datetime_to_epoch_ms(start_datetime)
+    end_epoch_ms = datetime_to_epoch_ms(end_datetime)
+    if start_epoch_ms is None or end_epoch_ms is None or start_epoch_ms >= end_epoch_ms:
+        log_msg = "Derived Metrics Back Fill - Invalid DateTime range: "
+        logger.primary_logger.warning(log_msg + str(start_datetime) + " to " + str(end_datetime))
+        return False
+
+    with _backfill_lock:
+        if database_location in _backfills_running:
+            logger.primary_logger.warning("Derived Metrics Back Fill already running on " + database_location)
+            return False
+        _backfills_running.append(database_location)
+    thread_function(_derived_metrics_backfill, args=[database_location, start_epoch_ms, end_epoch_ms])
+    return True
+
+
+def _derived_metrics_backfill(backfill_settings):
+    database_location, start_epoch_ms, end_epoch_ms = backfill_settings
+    start_datetime = epoch_ms_to_datetime(start_epoch_ms)
+    end_datetime = epoch_ms_to_datetime(end_epoch_ms)
+    log_msg = " -- Derived Metrics Back Fill from " + start_datetime + " to " + end_datetime
+    logger.primary_logger.info(log_msg + " Started on " + database_location)
+
+    rows_updated = 0
+    try:
+        backfill_databases = [database_location]
+        if database_location == file_locations.sensor_database:
+            backfill_databases += get_shard_locations(start_datetime, end_datetime)
+        for backfill_database in backfill_databases:
+            if backfill_database == database_location:
+                rows_updated += _backfill_database(backfill_database, start_epoch_ms, end_epoch_ms)
+                continue
+            # Shards can't be deleted by the retention engine while they are being updated
+            with sql_access_coordinator.shared_access(backfill_database):
+                if os.path.isfile(backfill_database):
+                    rows_updated += _backfill_database(backfill_database, start_epoch_ms, end_epoch_ms)
+        if rows_updated:
+            rebuild_rollup_buckets(database_location, start_epoch_ms, end_epoch_ms, backfill_columns)
+        logger.primary_logger.info(" -- Derived Metrics Back Fill Complete: " + str(rows_updated) + " Rows Updated")
+    except Exception as error:
+        log_msg = "Derived Metrics Back Fill Stopped after " + str(rows_updated) + " Rows: "
+        logger.primary_logger.error(log_msg + str(error))
+    if rows_updated:
+        clear_graph_cache()
+    with _backfill_lock:
+        _backfills_running.remove(database_location)
+
+
+def _backfill_database(database_location, start_epoch_ms, end_epoch_ms):
+    rows_updated = 0
+    chunk_start_epoch_ms = start_epoch_ms
+    while chunk_start_epoch_ms < end_epoch_ms:
+        chunk_end_epoch_ms = min(chunk_start_epoch_ms + backfill_chunk_ms, end_epoch_ms)
+        rows_updated += run_sql_function(
+            database_location,
+            lambda db_connection: _backfill_chunk(db_connection, chunk_start_epoch_ms, chunk_end_epoch_ms)
+        )
+        chunk_start_epoch_ms = chunk_end_epoch_ms
+        sleep(backfill_chunk_sleep_seconds)
+    return rows_updated
+
+
+def _backfill_chunk(db_connection, start_epoch_ms, end_epoch_ms):
+    """ Recalculates derived metrics recorded between start (inclusive) & end (exclusive). Returns rows updated. """
+    sql_query = "SELECT name FROM sqlite_master WHERE type='table'"
+    database_tables = [sql_row[0] for sql_row in db_connection.execute(sql_query).fetchall()]
+
+    rows_updated = 0
+    db_connection.execute("BEGIN IMMEDIATE")
+    try:
+        if db_v.table_interval in database_tables:
+            rows_updated += _backfill_wide_table(
+                db_connection, db_v.table_interval, db_v.all_tables_datetime,
+                epoch_ms_to_datetime(start_epoch_ms, include_milliseconds=True),
+                epoch_ms_to_datetime(end_epoch_ms, include_milliseconds=True)
+            )
+        if db_v.table_interval_typed in database_tables:
+            rows_updated += _backfill_wide_table(
+                db_connection, db_v.table_interval_typed, db_v.all_tables_datetime_epoch_ms,
+                start_epoch_ms, end_epoch_ms
+            )
+        if db_v.table_interval_narrow in database_tables:
+            rows_updated += _backfill_narrow_table(db_connection, start_epoch_ms, end_epoch_ms)
+        db_connection.execute("COMMIT")
+    except Exception:
+        db_connection.execute("ROLLBACK")
+        raise
+    return rows_updated
+
+
+def _backfill_wide_table(db_connection, table_name, datetime_column, chunk_start, chunk_end):
+    table_info = db_connection.execute("PRAGMA table_info(" + table_name + ")").fetchall()
+    table_columns = [column_info[1] for column_info in table_info]
+    if db_v.env_temperature not in table_columns:
+        return 0
+
+    input_columns = [column for column in _recorded_input_columns if column in table_columns]
+    sql_query = "SELECT ROWID, " + ", ".join(input_columns) + " FROM " + table_name + \
+                " WHERE " + datetime_column + " >= ? AND " + datetime_column + " < ?"
+    sql_rows = db_connection.execute(sql_query, [chunk_start, chunk_end]).fetchall()
+    if len(sql_rows) == 0:
+        return 0
+
+    row_ids = [sql_row[0] for sql_row in sql_rows]
+    column_updates = _get_column_updates(input_columns, [sql_row[1:] for sql_row in sql_rows])
+    rows_updated = set()
+    for column_name, updates in column_updates.items():
+        if column_name in table_columns:
+            sql_query = "UPDATE " + table_name + " SET " + column_name + " = ? WHERE ROWID = ?"
+            db_connection.executemany(sql_query, [[reading, row_ids[index]] for index, reading in updates])
+            rows_updated.update(index for index, reading in updates)
+    return len(rows_updated)
+
+
+def _backfill_narrow_table(db_connection, start_epoch_ms, end_epoch_ms):
+    sql_query = "SELECT " + db_v.narrow_metric_name + ", " + db_v.narrow_metric_id + \
+                " FROM " + db_v.table_interval_narrow_metrics
+    metric_ids = {}
+    for metric_name, metric_id in db_connection.execute(sql_query).fetchall():
+        if metric_name in _recorded_input_columns:
+            metric_ids[metric_name] = metric_id
+    if db_v.env_temperature not in metric_ids:
+        return 0
+
+    # One row per recording with a column per metric
+    input_columns = [column for column in _recorded_input_columns if column in metric_ids]
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    select_columns = []
+    for column_name in input_columns:
+        select_columns.append("MAX(CASE WHEN " + db_v.narrow_metric_id + " = " + str(metric_ids[column_name]) +
+                              " THEN " + db_v.narrow_reading + " END)")
+    metric_ids_text = ", ".join([str(metric_ids[column_name]) for column_name in input_columns])
+    sql_query = "SELECT " + epoch_column + ", " + ", ".join(select_columns) + \
+                " FROM " + db_v.table_interval_narrow + \
+                " WHERE " + db_v.narrow_metric_id + " IN (" + metric_ids_text + ")" + \
+                " AND " + epoch_column + " >= ? AND " + epoch_column + " < ?" + \
+                " GROUP BY " + epoch_column
+    sql_rows = db_connection.execute(sql_query, [start_epoch_ms, end_epoch_ms]).fetchall()
+    if len(sql_rows) == 0:
+        return 0
+
+    epochs_ms = [sql_row[0] for sql_row in sql_rows]
+    column_updates = _get_column_updates(input_columns, [sql_row[1:] for sql_row in sql_rows])
+    rows_updated = set()
+    sql_query = "UPDATE " + db_v.table_interval_narrow + " SET " + db_v.narrow_reading + " = ?" + \
+                " WHERE " + epoch_column + " = ? AND " + db_v.narrow_metric_id + " = ?"
+    for column_name, updates in column_updates.items():
+        if column_name in metric_ids:
+            sql_data = [[reading, epochs_ms[index], metric_ids[column_name]] for index, reading in updates]
+            db_connection.executemany(sql_query, sql_data)
+            rows_updated.update(index for index, reading in updates)
+    return len(rows_updated)
+
+
+def _get_column_updates(input_columns, sql_rows):
+    """
+    Returns a dictionary of column name to a list of (row index, new reading) for recorded readings that changed.
+    sql_rows hold the readings of input_columns.
+    """
+    readings_arrays = {}
+    for index, column_name in enumerate(input_columns):
+        column_readings = []
+        for sql_row in sql_rows:
+            reading = get_typed_reading(sql_row[index])
+            column_readings.append(np.nan if reading is None else reading)
+        readings_arrays[column_name] = np.asarray(column_readings, dtype=np.float64)
+
+    recorded_offsets = readings_arrays.get(db_v.env_temperature_offset)
+    if recorded_offsets is None:
+        recorded_offsets = np.zeros(len(sql_rows))
+    readings_arrays[raw_env_temperature] = readings_arrays[db_v.env_temperature] - np.nan_to_num(recorded_offsets)
+    derived_arrays = get_derived_arrays(readings_arrays)
+
+    column_updates = {}
+    for column_name in backfill_columns:
+        if column_name in derived_arrays and column_name in readings_arrays:
+            new_readings = np.broadcast_to(derived_arrays[column_name], (len(sql_rows),))
+            recorded_readings = readings_arrays[column_name]
+            update_indexes = np.flatnonzero(np.isfinite(recorded_readings) & np.isfinite(new_readings) &
+                                            (recorded_readings != new_readings))
+            column_updates[column_name] = [(int(index), float(new_readings[index])) for index in update_indexes]
+    return column_updates
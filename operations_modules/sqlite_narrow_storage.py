@@ -0,0 +1,145 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Narrow (long format) Interval storage format.
+Every reading is stored as a (DateTimeEpochMS, MetricID, Reading) row and MetricIDs are looked up in the
+metric dictionary table, so single sensor range queries only touch that sensor's rows.
+Read functions match the typed storage functions so both can be merged with text formatted Interval data.
+"""
+from threading import Lock
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_functions import datetime_to_epoch_ms, epoch_ms_to_datetime
+from operations_modules.sqlite_database import sql_execute_get_data, run_sql_function, get_file_inode
+from operations_modules.sqlite_typed_storage import get_typed_reading, get_epoch_ms_date_range
+
+db_v = app_cached_variables.database_variables
+
+_metric_ids_lock = Lock()
+_cached_metric_ids = {}
+
+
+def get_narrow_metric_id(metric_name, database_location=file_locations.sensor_database, create=False):
+    """ Returns the metric dictionary ID of the provided sensor column name or None if it's not found. """
+    with _metric_ids_lock:
+        # Cached IDs are dropped if the database file is replaced, such as restoring a backup
+        database_inode = get_file_inode(database_location)
+        if database_location not in _cached_metric_ids or _cached_metric_ids[database_location][0] != database_inode:
+            _cached_metric_ids[database_location] = [database_inode, {}]
+        database_metric_ids = _cached_metric_ids[database_location][1]
+        if metric_name in database_metric_ids:
+            return database_metric_ids[metric_name]
+
+        try:
+            metric_id = run_sql_function(
+                database_location, lambda db_connection: _get_metric_id(db_connection, metric_name, create)
+            )
+        except Exception as error:
+            log_msg = "Narrow Storage Metric ID lookup for " + metric_name + ": " + str(error)
+            if create:
+                logger.primary_logger.warning(log_msg)
+            else:
+                logger.primary_logger.debug(log_msg)
+            return None
+        if metric_id is not None:
+            database_metric_ids[metric_name] = metric_id
+        return metric_id
+
+
+def _get_metric_id(db_connection, metric_name, create):
+    select_query = "SELECT " + db_v.narrow_metric_id + " FROM " + db_v.table_interval_narrow_metrics + \
+                   " WHERE " + db_v.narrow_metric_name + " = ?"
+    sql_data = db_connection.execute(select_query, (metric_name,)).fetchall()
+    if len(sql_data) == 0 and create:
+        insert_query = "INSERT OR IGNORE INTO " + db_v.table_interval_narrow_metrics + \
+                       " (" + db_v.narrow_metric_name + ") VALUES (?)"
+        db_connection.execute(insert_query, (metric_name,))
+        sql_data = db_connection.execute(select_query, (metric_name,)).fetchall()
+    if len(sql_data) > 0:
+        return sql_data[0][0]
+    return None
+
+
+def get_narrow_insert_rows(readings_dictionary, database_location=file_locations.sensor_database):
+    """ Returns a SQL insert query and a list of (DateTimeEpochMS, MetricID, Reading) rows for provided readings. """
+    text_columns = db_v.get_sensor_text_columns_list()
+    epoch_ms = datetime_to_epoch_ms(readings_dictionary[db_v.all_tables_datetime])
+
+    sql_rows = []
+    for column_name, reading in readings_dictionary.items():
+        if column_name == db_v.all_tables_datetime:
+            continue
+        if column_name in text_columns:
+            reading = str(reading)
+        else:
+            reading = get_typed_reading(reading)
+        if reading is not None:
+            metric_id = get_narrow_metric_id(column_name, database_location=database_location, create=True)
+            if metric_id is not None:
+                sql_rows.append([epoch_ms, metric_id, reading])
+    sql_query = "INSERT INTO " + db_v.table_interval_narrow + " (" + db_v.all_tables_datetime_epoch_ms + ", " + \
+                db_v.narrow_metric_id + ", " + db_v.narrow_reading + ") VALUES (?, ?, ?)"
+    return sql_query, sql_rows
+
+
+def get_narrow_min_max_entries(column_name, order="DESC", return_limit=10, start_datetime=None,
+                               end_datetime=None, ignore_null_types=False,
+                               database_location=file_locations.sensor_database):
+    """
+    Returns a list of (DateTime, Reading) ordered by the reading from the narrow Interval table.
+    DateTimes are returned as UTC0 strings to match the text formatted Interval table.
+    """
+    metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+    if metric_id is None:
+        return []
+
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    where_query_text = " WHERE " + db_v.narrow_metric_id + " = " + str(metric_id)
+    if ignore_null_types:
+        where_query_text += " AND " + db_v.narrow_reading + " != 0"
+    if start_datetime is not None and end_datetime is not None:
+        start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+        where_query_text += " AND " + epoch_column + " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms)
+
+    sql_query = "SELECT " + epoch_column + ", " + db_v.narrow_reading + \
+                " FROM " + db_v.table_interval_narrow + where_query_text + \
+                " ORDER BY " + db_v.narrow_reading + " " + order + \
+                " LIMIT " + str(return_limit) + ";"
+
+    return_entries = []
+    for epoch_ms, reading in sql_execute_get_data(sql_query, database_location):
+        return_entries.append((epoch_ms_to_datetime(epoch_ms, include_milliseconds=True), reading))
+    return return_entries
+
+
+def get_narrow_latest_entry(column_name, database_location=file_locations.sensor_database):
+    """ Returns the newest non blank entry of the provided column from the narrow Interval table as a string. """
+    metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+    if metric_id is None:
+        return ""
+
+    sql_query = "SELECT " + db_v.narrow_reading + " FROM " + db_v.table_interval_narrow + \
+                " WHERE " + db_v.narrow_metric_id + " = " + str(metric_id) + \
+                " AND " + db_v.narrow_reading + " != ''" + \
+                " ORDER BY " + db_v.all_tables_datetime_epoch_ms + " DESC LIMIT 1;"
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) > 0:
+        return str(sql_data[0][0])
+    return ""
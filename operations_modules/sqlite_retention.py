@@ -0,0 +1,211 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Database retention engine.
+Deletes data older than the configured number of days per table in small batches, deletes old monthly
+database shards as whole files, then returns freed pages to the file system in bounded incremental vacuum steps.
+Databases created before incremental auto vacuum was enabled re-use freed pages until they are shrunk from the
+Database Management page, which also converts them to incremental auto vacuum.
+"""
+from time import sleep
+from datetime import datetime, timedelta
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_classes import CreateMonitoredThread
+from operations_modules.app_generic_functions import datetime_to_epoch_ms
+from operations_modules.sqlite_database import run_sql_function, sql_execute_get_data, get_sqlite_tables_in_list
+from operations_modules.sqlite_database_shards import get_shard_locations, get_shard_month, delete_shard
+from configuration_modules import app_config_access
+
+db_v = app_cached_variables.database_variables
+
+delete_batch_row_count = 1000
+delete_batch_sleep_seconds = 0.1
+incremental_vacuum_pages = 256
+incremental_vacuum_sleep_seconds = 0.1
+
+
+def start_database_retention_server():
+    text_name = "Database Retention"
+    function = _database_retention_server
+    app_cached_variables.database_retention_thread = CreateMonitoredThread(function, thread_name=text_name)
+
+
+def _database_retention_server():
+    """ Runs the database retention every X hours (set in config) while enabled. """
+    # Sleep to allow program start-up database checks to finish first
+    sleep(60)
+    app_cached_variables.restart_database_retention_thread = False
+    while not app_cached_variables.restart_database_retention_thread:
+        retention_config = app_config_access.database_retention_config
+        if retention_config.enable_database_retention:
+            app_cached_variables.database_retention_thread.current_state = "Running"
+            run_database_retention()
+        else:
+            app_cached_variables.database_retention_thread.current_state = "Disabled"
+
+        sleep_total = 0
+        while sleep_total < retention_config.retention_run_hours * 3600 and \
+                not app_cached_variables.restart_database_retention_thread:
+            sleep(5)
+            sleep_total += 5
+
+
+def run_database_retention():
+    """ Deletes data older than the configured retention days from all sensor databases. """
+    retention_config = app_config_access.database_retention_config
+    logger.primary_logger.info(" -- Database Retention Started")
+    rows_deleted = 0
+    try:
+        main_database_tables = [
+            [db_v.table_interval, db_v.all_tables_datetime, retention_config.interval_days],
+            [db_v.table_interval_typed, db_v.all_tables_datetime_epoch_ms, retention_config.interval_days],
+            [db_v.table_interval_narrow, db_v.all_tables_datetime_epoch_ms, retention_config.interval_days],
+            [db_v.table_imu_summaries, db_v.all_tables_datetime_epoch_ms, retention_config.interval_days],
+            [db_v.table_trigger, db_v.all_tables_datetime, retention_config.trigger_days]
+        ]
+        rollup_days_list = [
+            retention_config.rollup_minute_days, retention_config.rollup_hour_days, retention_config.rollup_day_days
+        ]
+        for rollup_table_info, rollup_days in zip(db_v.get_interval_rollup_tables_list(), rollup_days_list):
+            main_database_tables.append([rollup_table_info[0], db_v.rollup_bucket, rollup_days])
+
+        for table_name, datetime_column, days_to_keep in main_database_tables:
+            rows_deleted += prune_table(file_locations.sensor_database, table_name, datetime_column, days_to_keep)
+        reclaim_database_space(file_locations.sensor_database)
+
+        rows_deleted += _prune_database_shards(retention_config.interval_days)
+
+        for table_name in get_sqlite_tables_in_list(file_locations.mqtt_subscriber_database):
+            rows_deleted += prune_table(file_locations.mqtt_subscriber_database, table_name,
+                                        db_v.all_tables_datetime, retention_config.mqtt_subscriber_days)
+        reclaim_database_space(file_locations.mqtt_subscriber_database)
+
+        # The last checkin of each sensor is kept, so old sensors are still listed until deleted
+        for table_name in get_sqlite_tables_in_list(file_locations.sensor_checkin_database):
+            rows_deleted += prune_table(file_locations.sensor_checkin_database, table_name,
+                                        db_v.all_tables_datetime, retention_config.checkin_days, keep_last_row=True)
+        reclaim_database_space(file_locations.sensor_checkin_database)
+        logger.primary_logger.info(" -- Database Retention Finished: " + str(rows_deleted) + " Rows Deleted")
+    except Exception as error:
+        logger.primary_logger.error("Database Retention: " + str(error))
+
+
+def _prune_database_shards(days_to_keep):
+    """ Deletes shards with all data older than days_to_keep and prunes the shard holding the cut-off date. """
+    rows_deleted = 0
+    if days_to_keep <= 0:
+        return rows_deleted
+
+    cutoff_month = _get_cutoff_datetime(days_to_keep).strftime("%Y_%m")
+    for shard_location in get_shard_locations():
+        if get_shard_month(shard_location) < cutoff_month:
+            delete_shard(shard_location)
+        elif get_shard_month(shard_location) == cutoff_month:
+            for table_name, datetime_column in [[db_v.table_interval, db_v.all_tables_datetime],
+                                                [db_v.table_interval_typed, db_v.all_tables_datetime_epoch_ms],
+                                                [db_v.table_interval_narrow, db_v.all_tables_datetime_epoch_ms]]:
+                rows_deleted += prune_table(shard_location, table_name, datetime_column, days_to_keep)
+            reclaim_database_space(shard_location)
+    return rows_deleted
+
+
+def prune_table(database_location, table_name, datetime_column, days_to_keep, keep_last_row=False):
+    """
+    Deletes rows older than days_to_keep in batches of delete_batch_row_count rows, each in its own transaction.
+    Nothing is deleted if days_to_keep is 0 or less. Returns the number of rows deleted.
+    """
+    if days_to_keep <= 0:
+        return 0
+
+    cutoff = _get_cutoff_datetime(days_to_keep).strftime("%Y-%m-%d %H:%M:%S")
+    if datetime_column in [db_v.all_tables_datetime_epoch_ms, db_v.rollup_bucket]:
+        cutoff = datetime_to_epoch_ms(cutoff)
+
+    # Rollup tables are WITHOUT ROWID tables, their primary key is used to select rows instead
+    row_keys = "ROWID"
+    if table_name in [rollup_table_info[0] for rollup_table_info in db_v.get_interval_rollup_tables_list()]:
+        row_keys = db_v.narrow_metric_id + ", " + db_v.rollup_bucket
+
+    where_query_text = " WHERE " + datetime_column + " < ?"
+    if keep_last_row:
+        where_query_text += " AND ROWID != (SELECT MAX(ROWID) FROM '" + table_name + "')"
+    sql_query = "DELETE FROM '" + table_name + "' WHERE (" + row_keys + ") IN " + \
+                "(SELECT " + row_keys + " FROM '" + table_name + "'" + where_query_text + \
+                " LIMIT " + str(delete_batch_row_count) + ")"
+
+    rows_deleted = 0
+    try:
+        while True:
+            batch_rows_deleted = run_sql_function(
+                database_location, lambda db_connection: db_connection.execute(sql_query, (cutoff,)).rowcount
+            )
+            rows_deleted += batch_rows_deleted
+            if batch_rows_deleted < delete_batch_row_count:
+                break
+            sleep(delete_batch_sleep_seconds)
+    except Exception as error:
+        if str(error)[:13] == "no such table" or str(error)[:14] == "no such column":
+            logger.primary_logger.debug("Database Retention - " + table_name + ": " + str(error))
+        else:
+            logger.primary_logger.warning("Database Retention - " + table_name + ": " + str(error))
+    if rows_deleted:
+        log_msg = "Database Retention - " + str(rows_deleted) + " Rows Deleted from " + table_name + " in "
+        logger.primary_logger.debug(log_msg + database_location)
+    return rows_deleted
+
+
+def reclaim_database_space(database_location):
+    """
+    Returns free database pages to the file system in steps of incremental_vacuum_pages, so writers
+    are only blocked for a short time per step. Used in place of a full VACUUM.
+    Databases not converted to incremental auto vacuum keep their free pages for re-use.
+    Returns the number of pages freed.
+    """
+    auto_vacuum = sql_execute_get_data("PRAGMA auto_vacuum;", database_location)
+    if len(auto_vacuum) == 0:
+        return 0
+    if auto_vacuum[0][0] != 2:
+        logger.primary_logger.debug("Incremental Vacuum skipped, " + database_location + " has not been shrunk " +
+                                    "since Incremental Auto Vacuum was enabled")
+        return 0
+
+    pages_freed = 0
+    last_free_page_count = None
+    try:
+        while True:
+            free_pages = sql_execute_get_data("PRAGMA freelist_count;", database_location)
+            if len(free_pages) == 0 or free_pages[0][0] == 0 or free_pages[0][0] == last_free_page_count:
+                break
+            last_free_page_count = free_pages[0][0]
+            # executescript runs the pragma to completion, execute would only free a single page
+            sql_query = "PRAGMA incremental_vacuum(" + str(incremental_vacuum_pages) + ");"
+            run_sql_function(database_location, lambda db_connection: db_connection.executescript(sql_query))
+            pages_freed += min(free_pages[0][0], incremental_vacuum_pages)
+            sleep(incremental_vacuum_sleep_seconds)
+    except Exception as error:
+        logger.primary_logger.warning("Incremental Vacuum on " + database_location + ": " + str(error))
+    if pages_freed:
+        logger.primary_logger.debug("Incremental Vacuum freed " + str(pages_freed) + " Pages on " + database_location)
+    return pages_freed
+
+
+def _get_cutoff_datetime(days_to_keep):
+    return datetime.utcnow() - timedelta(days=days_to_keep)
@@ -0,0 +1,474 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Interval rollup tables (minute, hour & day min/max/sum/count per sensor).
+Rollups are updated by the Interval recording as readings arrive. Readings recorded before rollups
+were added are back filled in the background, rollups are only used for reads once the back fill is done.
+Buckets can be rebuilt from the raw readings after recorded readings are changed (Derived metrics back fill).
+"""
+from math import ceil
+from time import sleep
+from threading import Lock
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_functions import thread_function, datetime_to_epoch_ms, epoch_ms_to_datetime
+from operations_modules.sqlite_database import sql_execute_get_data, run_sql_function
+from operations_modules.sqlite_database_shards import shard_query_router, get_shard_locations, \
+    get_first_last_shard_locations
+from operations_modules.sqlite_typed_storage import get_typed_reading, get_epoch_ms_date_range
+from operations_modules.sqlite_narrow_storage import get_narrow_metric_id
+from operations_modules.sqlite_write_queue import queue_sql_write, get_write_queue
+
+db_v = app_cached_variables.database_variables
+
+# Insights use hourly highs & lows
+insights_rollup_table = db_v.table_interval_rollup_hour
+backfill_chunk_ms = 21600000
+backfill_chunk_sleep_seconds = 0.2
+
+_backfill_lock = Lock()
+_backfills_running = []
+_backfills_complete = []
+_live_start_recorded = []
+
+
+def get_rollup_upsert_query(table_name):
+    """ Returns a SQL query which adds (MetricID, Bucket, Min, Max, Sum, Count) to the provided rollup table. """
+    return "INSERT INTO " + table_name + " (" + db_v.narrow_metric_id + ", " + db_v.rollup_bucket + ", " + \
+           db_v.rollup_min + ", " + db_v.rollup_max + ", " + db_v.rollup_sum + ", " + db_v.rollup_count + ") " + \
+           "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (" + db_v.narrow_metric_id + ", " + db_v.rollup_bucket + ") " + \
+           "DO UPDATE SET " + \
+           db_v.rollup_min + " = min(" + db_v.rollup_min + ", excluded." + db_v.rollup_min + "), " + \
+           db_v.rollup_max + " = max(" + db_v.rollup_max + ", excluded." + db_v.rollup_max + "), " + \
+           db_v.rollup_sum + " = " + db_v.rollup_sum + " + excluded." + db_v.rollup_sum + ", " + \
+           db_v.rollup_count + " = " + db_v.rollup_count + " + excluded." + db_v.rollup_count
+
+
+def queue_rollup_updates(readings_dictionary, database_location=file_locations.sensor_database):
+    """ Queues rollup table updates for the provided Interval readings. """
+    epoch_ms = datetime_to_epoch_ms(readings_dictionary[db_v.all_tables_datetime])
+    if epoch_ms is None:
+        return
+
+    if database_location not in _live_start_recorded:
+        _live_start_recorded.append(database_location)
+        sql_query = "INSERT OR IGNORE INTO " + db_v.table_interval_rollup_state + \
+                    " (" + db_v.rollup_state_name + ", " + db_v.rollup_state_value + ") VALUES (?, ?)"
+        queue_sql_write(sql_query, [db_v.rollup_state_live_start, epoch_ms], sql_database_location=database_location)
+
+    text_columns = db_v.get_sensor_text_columns_list()
+    for column_name, reading in readings_dictionary.items():
+        if column_name in text_columns:
+            continue
+        reading = get_typed_reading(reading)
+        if reading is not None:
+            metric_id = get_narrow_metric_id(column_name, database_location=database_location, create=True)
+            if metric_id is not None:
+                for table_name, bucket_ms in db_v.get_interval_rollup_tables_list():
+                    bucket_epoch_ms = epoch_ms - (epoch_ms % bucket_ms)
+                    queue_sql_write(get_rollup_upsert_query(table_name),
+                                    [metric_id, bucket_epoch_ms, reading, reading, reading, 1],
+                                    sql_database_location=database_location)
+
+
+def get_rollup_state(database_location=file_locations.sensor_database):
+    """ Returns a dictionary of the rollup state values (Live start & back fill progress). """
+    sql_query = "SELECT " + db_v.rollup_state_name + ", " + db_v.rollup_state_value + \
+                " FROM " + db_v.table_interval_rollup_state
+    return dict(sql_execute_get_data(sql_query, database_location))
+
+
+def rollups_complete(database_location=file_locations.sensor_database):
+    """ Returns True if the rollup tables hold every Interval reading recorded in the database. """
+    rollup_state = get_rollup_state(database_location)
+    if db_v.rollup_state_live_start in rollup_state and db_v.rollup_state_backfill in rollup_state:
+        return rollup_state[db_v.rollup_state_backfill] >= rollup_state[db_v.rollup_state_live_start]
+    return False
+
+
+def get_graph_rollup_table(database_location, start_datetime, end_datetime, max_data_points):
+    """
+    Returns the finest rollup table with buckets large enough for the provided date range to fit in the max data
+    points, or the coarsest table if none are (Its readings are then downsampled).
+    Returns None if raw data is needed (Less than a minute per data point) or the rollups are not complete.
+    """
+    start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+    requested_resolution_ms = (end_epoch_ms - start_epoch_ms) / max(int(max_data_points), 1)
+
+    rollup_tables_list = db_v.get_interval_rollup_tables_list()
+    if requested_resolution_ms < rollup_tables_list[0][1]:
+        return None
+    selected_table = rollup_tables_list[-1][0]
+    for table_name, bucket_ms in rollup_tables_list:
+        if bucket_ms >= requested_resolution_ms:
+            selected_table = table_name
+            break
+    if rollups_complete(database_location):
+        return selected_table
+    return None
+
+
+def get_rollup_graph_data(database_location, rollup_table, column_name, start_datetime, end_datetime,
+                          max_rows=1000000, hour_offset=0):
+    """
+    Returns a list of [average_readings_list, datetime_list, min_readings_list, max_readings_list]
+    from the provided rollup table. DateTimes are the start of each bucket adjusted by the provided hour offset
+    (Newest first). If there are more buckets than max_rows, neighbouring buckets are merged so the whole date
+    range fits, keeping the lowest and highest reading of the merged buckets.
+    """
+    metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+    if metric_id is None:
+        return [[], [], [], []]
+
+    start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+    bucket_ms = dict(db_v.get_interval_rollup_tables_list())[rollup_table]
+    range_buckets = (end_epoch_ms - start_epoch_ms) // bucket_ms + 1
+    group_ms = bucket_ms * ceil(range_buckets / max(int(max_rows), 1))
+    sql_query = "SELECT MIN(" + db_v.rollup_bucket + "), " + \
+                "SUM(" + db_v.rollup_sum + ") / SUM(" + db_v.rollup_count + "), " + \
+                "MIN(" + db_v.rollup_min + "), MAX(" + db_v.rollup_max + ")" + \
+                " FROM " + rollup_table + \
+                " WHERE " + db_v.narrow_metric_id + " = " + str(metric_id) + \
+                " AND " + db_v.rollup_bucket + " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms) + \
+                " GROUP BY " + db_v.rollup_bucket + " / " + str(group_ms) + \
+                " ORDER BY " + db_v.rollup_bucket + " DESC"
+
+    readings_list = []
+    datetime_list = []
+    min_readings_list = []
+    max_readings_list = []
+    for bucket_epoch_ms, reading, min_reading, max_reading in sql_execute_get_data(sql_query, database_location):
+        readings_list.append(reading)
+        datetime_list.append(epoch_ms_to_datetime(bucket_epoch_ms, hour_offset=hour_offset))
+        min_readings_list.append(min_reading)
+        max_readings_list.append(max_reading)
+    return [readings_list, datetime_list, min_readings_list, max_readings_list]
+
+
+def get_rollup_min_max_entries(column_name, order="DESC", return_limit=10, start_datetime=None,
+                               end_datetime=None, ignore_null_types=False,
+                               database_location=file_locations.sensor_database):
+    """
+    Returns a list of (DateTime, Reading) of the highest (DESC) or lowest (ASC) hourly readings.
+    Returns None if the rollups are not complete.
+    """
+    if not rollups_complete(database_location):
+        return None
+    metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+    if metric_id is None:
+        return []
+
+    reading_column = db_v.rollup_max
+    if order == "ASC":
+        reading_column = db_v.rollup_min
+    where_query_text = " WHERE " + db_v.narrow_metric_id + " = " + str(metric_id)
+    if ignore_null_types:
+        where_query_text += " AND " + reading_column + " != 0"
+    if start_datetime is not None and end_datetime is not None:
+        start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+        where_query_text += " AND " + db_v.rollup_bucket + \
+                            " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms)
+
+    sql_query = "SELECT " + db_v.rollup_bucket + ", " + reading_column + \
+                " FROM " + insights_rollup_table + where_query_text + \
+                " ORDER BY " + reading_column + " " + order + \
+                " LIMIT " + str(return_limit) + ";"
+
+    return_entries = []
+    for bucket_epoch_ms, reading in sql_execute_get_data(sql_query, database_location):
+        return_entries.append((epoch_ms_to_datetime(bucket_epoch_ms), reading))
+    return return_entries
+
+
+def start_rollup_backfill(database_location=file_locations.sensor_database):
+    """ Starts adding readings recorded before rollups were enabled to the rollup tables in the background. """
+    with _backfill_lock:
+        if database_location in _backfills_running or database_location in _backfills_complete:
+            return
+        _backfills_running.append(database_location)
+    thread_function(_rollup_backfill, args=database_location)
+
+
+def _rollup_backfill(database_location):
+    try:
+        # Make sure the live start state queued by the Interval recording has been written
+        get_write_queue(database_location).flush()
+        rollup_state = get_rollup_state(database_location)
+        if db_v.rollup_state_live_start not in rollup_state:
+            logger.primary_logger.debug("Interval Rollup Back Fill skipped, no live rollups recorded yet")
+        else:
+            live_start_epoch_ms = rollup_state[db_v.rollup_state_live_start]
+            backfill_epoch_ms = rollup_state.get(db_v.rollup_state_backfill)
+            if backfill_epoch_ms is None:
+                # Only the oldest shard can hold the first reading
+                with shard_query_router(database_location=database_location,
+                                        shard_locations=get_first_last_shard_locations()[:1]):
+                    backfill_epoch_ms = _get_first_raw_epoch_ms(database_location, live_start_epoch_ms)
+                    backfill_epoch_ms -= backfill_epoch_ms % db_v.get_interval_rollup_tables_list()[-1][1]
+            if backfill_epoch_ms < live_start_epoch_ms:
+                logger.primary_logger.info(" -- Interval Rollup Back Fill Started on " + database_location)
+            while backfill_epoch_ms < live_start_epoch_ms:
+                chunk_end_epoch_ms = min(backfill_epoch_ms + backfill_chunk_ms, live_start_epoch_ms)
+                # Shards are attached so Interval data recorded to them is also back filled
+                chunk_start_datetime = epoch_ms_to_datetime(backfill_epoch_ms)
+                chunk_end_datetime = epoch_ms_to_datetime(chunk_end_epoch_ms)
+                with shard_query_router(chunk_start_datetime, chunk_end_datetime, database_location) as shards:
+                    if database_location == file_locations.sensor_database and \
+                            len(shards) < len(get_shard_locations(chunk_start_datetime, chunk_end_datetime)):
+                        raise RuntimeError("Not all Database Shards could be attached for " + chunk_start_datetime)
+                    _backfill_chunk(database_location, backfill_epoch_ms, chunk_end_epoch_ms)
+                backfill_epoch_ms = chunk_end_epoch_ms
+                sleep(backfill_chunk_sleep_seconds)
+            _set_backfill_state(database_location, backfill_epoch_ms)
+            _backfills_complete.append(database_location)
+            logger.primary_logger.debug("Interval Rollups complete on " + database_location)
+    except Exception as error:
+        logger.primary_logger.error("Interval Rollup Back Fill: " + str(error))
+    with _backfill_lock:
+        _backfills_running.remove(database_location)
+
+
+def rebuild_rollup_buckets(database_location, start_epoch_ms, end_epoch_ms, column_names):
+    """
+    Recalculates the rollup buckets of the provided columns from their raw Interval readings, for buckets holding
+    readings between start (inclusive) & end (exclusive). Used after recorded readings are changed.
+    Buckets still waiting on the rollup back fill are left for it.
+    Rollups are kept longer than raw readings, so buckets starting before the first raw reading (Removed by
+    retention or only partly recorded) and days without raw readings of the columns are left as they are.
+    """
+    get_write_queue(database_location).flush()
+    rollup_state = get_rollup_state(database_location)
+    if db_v.rollup_state_live_start not in rollup_state:
+        return
+    # Only the oldest shard can hold the first reading
+    with shard_query_router(database_location=database_location,
+                            shard_locations=get_first_last_shard_locations()[:1]):
+        first_raw_epoch_ms = _get_first_raw_epoch_ms(database_location, end_epoch_ms)
+    # Buckets from the live start on are recorded live, buckets before the back fill state are back filled
+    live_start_epoch_ms = rollup_state[db_v.rollup_state_live_start]
+    backfill_epoch_ms = rollup_state.get(db_v.rollup_state_backfill, 0)
+    if backfill_epoch_ms >= live_start_epoch_ms:
+        live_start_epoch_ms = 0
+
+    metric_ids = []
+    for column_name in column_names:
+        metric_id = get_narrow_metric_id(column_name, database_location=database_location)
+        if metric_id is not None:
+            metric_ids.append(metric_id)
+    if len(metric_ids) == 0:
+        return
+    metric_ids_text = ", ".join([str(metric_id) for metric_id in metric_ids])
+
+    # Day buckets hold whole minute & hour buckets, so each day is rebuilt from one read of its raw readings
+    day_bucket_ms = db_v.get_interval_rollup_tables_list()[-1][1]
+    start_epoch_ms = max(start_epoch_ms, first_raw_epoch_ms)
+    chunk_start_epoch_ms = start_epoch_ms - (start_epoch_ms % day_bucket_ms)
+    while chunk_start_epoch_ms < end_epoch_ms:
+        chunk_end_epoch_ms = chunk_start_epoch_ms + day_bucket_ms
+        raw_readings = []
+        with shard_query_router(epoch_ms_to_datetime(chunk_start_epoch_ms), epoch_ms_to_datetime(chunk_end_epoch_ms),
+                                database_location):
+            for raw_reading in _get_raw_readings(database_location, chunk_start_epoch_ms, chunk_end_epoch_ms):
+                if raw_reading[1] in column_names:
+                    raw_readings.append(raw_reading)
+        rollup_buckets = _get_rollup_buckets(database_location, raw_readings)
+        if len(rollup_buckets) == 0:
+            chunk_start_epoch_ms = chunk_end_epoch_ms
+            continue
+
+        def _write_chunk(db_connection):
+            db_connection.execute("BEGIN IMMEDIATE")
+            try:
+                for table_name, bucket_ms in db_v.get_interval_rollup_tables_list():
+                    # Only buckets fully recorded live or fully back filled hold all of their readings
+                    sql_query = "DELETE FROM " + table_name + \
+                                " WHERE " + db_v.narrow_metric_id + " IN (" + metric_ids_text + ")" + \
+                                " AND " + db_v.rollup_bucket + " >= ? AND " + db_v.rollup_bucket + " < ?" + \
+                                " AND (" + db_v.rollup_bucket + " >= ? OR " + db_v.rollup_bucket + " + ? <= ?)"
+                    db_connection.execute(sql_query, [max(chunk_start_epoch_ms, first_raw_epoch_ms),
+                                                      chunk_end_epoch_ms, live_start_epoch_ms, bucket_ms,
+                                                      backfill_epoch_ms])
+                    sql_rows = []
+                    for bucket_key, bucket in rollup_buckets.items():
+                        bucket_epoch_ms = bucket_key[2]
+                        if bucket_key[0] == table_name and bucket_epoch_ms >= first_raw_epoch_ms and \
+                                (bucket_epoch_ms >= live_start_epoch_ms or
+                                 bucket_epoch_ms + bucket_ms <= backfill_epoch_ms):
+                            sql_rows.append([bucket_key[1], bucket_epoch_ms] + bucket)
+                    db_connection.executemany(get_rollup_upsert_query(table_name), sql_rows)
+                db_connection.execute("COMMIT")
+            except Exception:
+                db_connection.execute("ROLLBACK")
+                raise
+
+        run_sql_function(database_location, _write_chunk)
+        chunk_start_epoch_ms = chunk_end_epoch_ms
+        sleep(backfill_chunk_sleep_seconds)
+
+
+def _get_first_raw_epoch_ms(database_location, default_epoch_ms):
+    """ Returns the first recorded Interval DateTime in epoch milliseconds from all Interval storage formats. """
+    first_epoch_list = [default_epoch_ms]
+    sql_query = "SELECT MIN(" + db_v.all_tables_datetime + ") FROM " + db_v.table_interval
+    for sql_data in sql_execute_get_data(sql_query, database_location):
+        if sql_data[0] is not None and datetime_to_epoch_ms(sql_data[0]) is not None:
+            first_epoch_list.append(datetime_to_epoch_ms(sql_data[0]))
+
+    sql_query_list = [
+        "SELECT MIN(" + db_v.all_tables_datetime_epoch_ms + ") FROM " + db_v.table_interval_typed,
+        "SELECT MIN(" + db_v.all_tables_datetime_epoch_ms + ") FROM " + db_v.table_interval_narrow +
+        " WHERE " + db_v.narrow_metric_id + " = (SELECT " + db_v.narrow_metric_id + " FROM " +
+        db_v.table_interval_narrow_metrics + " WHERE " + db_v.narrow_metric_name + " = '" + db_v.sensor_name + "')"
+    ]
+    for sql_query in sql_query_list:
+        for sql_data in sql_execute_get_data(sql_query, database_location):
+            if sql_data[0] is not None:
+                first_epoch_list.append(sql_data[0])
+    return min(first_epoch_list)
+
+
+def _backfill_chunk(database_location, start_epoch_ms, end_epoch_ms):
+    """ Aggregates raw Interval readings between start (inclusive) & end (exclusive) into the rollup tables. """
+    rollup_buckets = _get_rollup_buckets(
+        database_location, _get_raw_readings(database_location, start_epoch_ms, end_epoch_ms)
+    )
+
+    def _write_chunk(db_connection):
+        db_connection.execute("BEGIN IMMEDIATE")
+        try:
+            for table_name, rollup_table_bucket_ms in db_v.get_interval_rollup_tables_list():
+                sql_rows = []
+                for bucket_key, bucket in rollup_buckets.items():
+                    if bucket_key[0] == table_name:
+                        sql_rows.append([bucket_key[1], bucket_key[2]] + bucket)
+                db_connection.executemany(get_rollup_upsert_query(table_name), sql_rows)
+            _write_backfill_state(db_connection, end_epoch_ms)
+            db_connection.execute("COMMIT")
+        except Exception:
+            db_connection.execute("ROLLBACK")
+            raise
+
+    run_sql_function(database_location, _write_chunk)
+
+
+def _get_rollup_buckets(database_location, raw_readings):
+    """
+    Returns a dictionary of (table_name, metric_id, bucket_epoch_ms): [min, max, sum, count]
+    for the provided raw readings (epoch_ms, column_name, reading).
+    """
+    rollup_buckets = {}
+    for epoch_ms, column_name, reading in raw_readings:
+        metric_id = get_narrow_metric_id(column_name, database_location=database_location, create=True)
+        if metric_id is None:
+            continue
+        for table_name, bucket_ms in db_v.get_interval_rollup_tables_list():
+            bucket_key = (table_name, metric_id, epoch_ms - (epoch_ms % bucket_ms))
+            if bucket_key in rollup_buckets:
+                bucket = rollup_buckets[bucket_key]
+                bucket[0] = min(bucket[0], reading)
+                bucket[1] = max(bucket[1], reading)
+                bucket[2] += reading
+                bucket[3] += 1
+            else:
+                rollup_buckets[bucket_key] = [reading, reading, reading, 1]
+    return rollup_buckets
+
+
+def _set_backfill_state(database_location, backfill_epoch_ms):
+    run_sql_function(database_location, lambda db_connection: _write_backfill_state(db_connection, backfill_epoch_ms))
+
+
+def _write_backfill_state(db_connection, backfill_epoch_ms):
+    sql_query = "INSERT OR REPLACE INTO " + db_v.table_interval_rollup_state + \
+                " (" + db_v.rollup_state_name + ", " + db_v.rollup_state_value + ") VALUES (?, ?)"
+    db_connection.execute(sql_query, [db_v.rollup_state_backfill, backfill_epoch_ms])
+
+
+def _get_raw_readings(database_location, start_epoch_ms, end_epoch_ms):
+    """
+    Returns a list of (epoch_ms, column_name, reading) from all Interval storage formats.
+    All tables are read in one transaction so rows moved by the typed storage migration are only counted once.
+    """
+    return run_sql_function(
+        database_location, lambda db_connection: _read_raw_readings(db_connection, start_epoch_ms, end_epoch_ms)
+    )
+
+
+def _read_raw_readings(db_connection, start_epoch_ms, end_epoch_ms):
+    text_columns = db_v.get_sensor_text_columns_list()
+    numeric_columns = [column for column in db_v.get_sensor_columns_list() if column not in text_columns]
+    raw_readings = []
+
+    db_connection.execute("BEGIN")
+    try:
+        sql_query = "SELECT name FROM sqlite_master WHERE type='table'"
+        database_tables = [sql_row[0] for sql_row in db_connection.execute(sql_query).fetchall()]
+
+        if db_v.table_interval in database_tables:
+            text_table_columns = _get_numeric_table_columns(db_connection, db_v.table_interval, numeric_columns)
+            sql_query = "SELECT " + db_v.all_tables_datetime + ", " + ", ".join(text_table_columns) + \
+                        " FROM " + db_v.table_interval + \
+                        " WHERE " + db_v.all_tables_datetime + " >= ? AND " + db_v.all_tables_datetime + " < ?"
+            sql_data = [epoch_ms_to_datetime(start_epoch_ms, include_milliseconds=True),
+                        epoch_ms_to_datetime(end_epoch_ms, include_milliseconds=True)]
+            for sql_row in db_connection.execute(sql_query, sql_data).fetchall():
+                epoch_ms = datetime_to_epoch_ms(sql_row[0])
+                if epoch_ms is not None:
+                    raw_readings += _get_row_readings(epoch_ms, text_table_columns, sql_row[1:])
+
+        if db_v.table_interval_typed in database_tables:
+            typed_table_columns = _get_numeric_table_columns(db_connection, db_v.table_interval_typed, numeric_columns)
+            sql_query = "SELECT " + db_v.all_tables_datetime_epoch_ms + ", " + ", ".join(typed_table_columns) + \
+                        " FROM " + db_v.table_interval_typed + \
+                        " WHERE " + db_v.all_tables_datetime_epoch_ms + " >= ? AND " + \
+                        db_v.all_tables_datetime_epoch_ms + " < ?"
+            for sql_row in db_connection.execute(sql_query, [start_epoch_ms, end_epoch_ms]).fetchall():
+                raw_readings += _get_row_readings(sql_row[0], typed_table_columns, sql_row[1:])
+
+        if db_v.table_interval_narrow in database_tables:
+            sql_query = "SELECT " + db_v.narrow_metric_id + ", " + db_v.narrow_metric_name + \
+                        " FROM " + db_v.table_interval_narrow_metrics
+            for metric_id, metric_name in db_connection.execute(sql_query).fetchall():
+                if metric_name in numeric_columns:
+                    sql_query = "SELECT " + db_v.all_tables_datetime_epoch_ms + ", " + db_v.narrow_reading + \
+                                " FROM " + db_v.table_interval_narrow + \
+                                " WHERE " + db_v.narrow_metric_id + " = ? AND " + \
+                                db_v.all_tables_datetime_epoch_ms + " >= ? AND " + \
+                                db_v.all_tables_datetime_epoch_ms + " < ?"
+                    sql_data = [metric_id, start_epoch_ms, end_epoch_ms]
+                    for epoch_ms, reading in db_connection.execute(sql_query, sql_data).fetchall():
+                        raw_readings += _get_row_readings(epoch_ms, [metric_name], [reading])
+    finally:
+        db_connection.execute("COMMIT")
+    return raw_readings
+
+
+def _get_numeric_table_columns(db_connection, table_name, numeric_columns):
+    table_info = db_connection.execute("PRAGMA table_info(" + table_name + ")").fetchall()
+    return [column_info[1] for column_info in table_info if column_info[1] in numeric_columns]
+
+
+def _get_row_readings(epoch_ms, column_names, readings):
+    row_readings = []
+    for column_name, reading in zip(column_names, readings):
+        reading = get_typed_reading(reading)
+        if reading is not None:
+            row_readings.append((epoch_ms, column_name, reading))
+    return row_readings
@@ -0,0 +1,201 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Typed Interval storage format.
+Readings are stored in REAL columns with the DateTime as INTEGER milliseconds since the Unix epoch (UTC0).
+Text formatted Interval data is still read from the original table and can be moved to the typed table
+in small chunks by the background migration.
+"""
+from math import isfinite
+from time import sleep
+from threading import Lock
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules import app_cached_variables
+from operations_modules.app_generic_functions import thread_function, datetime_to_epoch_ms, epoch_ms_to_datetime
+from operations_modules.sqlite_database import sql_execute_get_data, run_sql_function
+
+db_v = app_cached_variables.database_variables
+
+migration_chunk_row_count = 500
+migration_chunk_sleep_seconds = 0.5
+
+_migration_lock = Lock()
+_migrations_running = []
+
+
+def get_typed_insert_query(readings_dictionary):
+    """ Returns a SQL insert query and its data list for the typed Interval table based on provided readings. """
+    text_columns = db_v.get_sensor_text_columns_list()
+    sql_column_names = ""
+    sql_value_placeholders = ""
+    sql_data = []
+    for column_name, reading in readings_dictionary.items():
+        if column_name == db_v.all_tables_datetime:
+            column_name = db_v.all_tables_datetime_epoch_ms
+            reading = datetime_to_epoch_ms(reading)
+        elif column_name in text_columns:
+            reading = str(reading)
+        else:
+            reading = get_typed_reading(reading)
+        sql_column_names += column_name + ","
+        sql_value_placeholders += "?,"
+        sql_data.append(reading)
+    sql_query = "INSERT OR IGNORE INTO " + db_v.table_interval_typed + " (" + sql_column_names[:-1] + ") " + \
+                "VALUES (" + sql_value_placeholders[:-1] + ")"
+    return sql_query, sql_data
+
+
+def get_typed_reading(reading):
+    """ Returns the provided reading as a float or None if it's not a number. """
+    if reading is None or type(reading) is bool:
+        return None
+    try:
+        reading = float(reading)
+    except (TypeError, ValueError):
+        return None
+    if isfinite(reading):
+        return reading
+    return None
+
+
+def get_typed_min_max_entries(column_name, order="DESC", return_limit=10, start_datetime=None,
+                              end_datetime=None, ignore_null_types=False,
+                              database_location=file_locations.sensor_database):
+    """
+    Returns a list of (DateTime, Reading) ordered by the reading from the typed Interval table.
+    DateTimes are returned as UTC0 strings to match the text formatted Interval table.
+    """
+    epoch_column = db_v.all_tables_datetime_epoch_ms
+    where_query_text = " WHERE " + column_name + " IS NOT NULL AND " + epoch_column + " IS NOT NULL"
+    if ignore_null_types:
+        where_query_text += " AND " + column_name + " != 0"
+    if start_datetime is not None and end_datetime is not None:
+        start_epoch_ms, end_epoch_ms = get_epoch_ms_date_range(start_datetime, end_datetime)
+        where_query_text += " AND " + epoch_column + " BETWEEN " + str(start_epoch_ms) + " AND " + str(end_epoch_ms)
+
+    sql_query = "SELECT " + epoch_column + ", " + column_name + \
+                " FROM " + db_v.table_interval_typed + where_query_text + \
+                " ORDER BY " + column_name + " " + order + \
+                " LIMIT " + str(return_limit) + ";"
+
+    return_entries = []
+    for epoch_ms, reading in sql_execute_get_data(sql_query, database_location):
+        return_entries.append((epoch_ms_to_datetime(epoch_ms, include_milliseconds=True), reading))
+    return return_entries
+
+
+def get_typed_latest_entry(column_name, database_location=file_locations.sensor_database):
+    """ Returns the newest non blank entry of the provided column from the typed Interval table as a string. """
+    sql_query = "SELECT " + column_name + " FROM " + db_v.table_interval_typed + \
+                " WHERE " + column_name + " IS NOT NULL AND " + column_name + " != ''" + \
+                " ORDER BY " + db_v.all_tables_datetime_epoch_ms + " DESC LIMIT 1;"
+    sql_data = sql_execute_get_data(sql_query, database_location)
+    if len(sql_data) > 0:
+        return str(sql_data[0][0])
+    return ""
+
+
+def get_epoch_ms_date_range(start_datetime, end_datetime):
+    """ Matches the "DateTime BETWEEN date(start) AND date(end)" range used on text formatted tables. """
+    start_epoch_ms = datetime_to_epoch_ms(str(start_datetime).strip()[:10])
+    end_epoch_ms = datetime_to_epoch_ms(str(end_datetime).strip()[:10])
+    if start_epoch_ms is None:
+        start_epoch_ms = 0
+    if end_epoch_ms is None:
+        end_epoch_ms = 0
+    return start_epoch_ms, end_epoch_ms
+
+
+def start_typed_storage_migration(database_location=file_locations.sensor_database):
+    """ Starts moving text formatted Interval data into the typed Interval table in the background. """
+    with _migration_lock:
+        if database_location in _migrations_running:
+            logger.primary_logger.debug("Typed Storage Migration already running on " + database_location)
+            return
+        _migrations_running.append(database_location)
+    thread_function(_typed_storage_migration, args=database_location)
+
+
+def _typed_storage_migration(database_location):
+    logger.primary_logger.info(" -- Typed Storage Migration Started on " + database_location)
+    rows_migrated = 0
+    try:
+        text_columns = _get_text_table_columns(database_location)
+        while True:
+            chunk_rows = run_sql_function(
+                database_location, lambda db_connection: _migrate_chunk(db_connection, text_columns)
+            )
+            if chunk_rows == 0:
+                break
+            rows_migrated += chunk_rows
+            logger.primary_logger.debug("Typed Storage Migration: " + str(rows_migrated) + " Rows Moved")
+            sleep(migration_chunk_sleep_seconds)
+        logger.primary_logger.info(" -- Typed Storage Migration Complete: " + str(rows_migrated) + " Rows Moved")
+    except Exception as error:
+        log_msg = "Typed Storage Migration Stopped after " + str(rows_migrated) + " Rows: "
+        logger.primary_logger.error(log_msg + str(error))
+    with _migration_lock:
+        _migrations_running.remove(database_location)
+
+
+def _get_text_table_columns(database_location):
+    """ Returns the text formatted Interval table columns that also exist in the typed Interval table. """
+    sensor_columns = db_v.get_sensor_columns_list()
+    table_info = sql_execute_get_data("PRAGMA table_info(" + db_v.table_interval + ")", database_location)
+    return [column_info[1] for column_info in table_info if column_info[1] in sensor_columns]
+
+
+def _migrate_chunk(db_connection, text_columns):
+    """ Moves up to migration_chunk_row_count rows into the typed Interval table. Returns rows moved. """
+    text_column_names = db_v.get_sensor_text_columns_list()
+    sql_query = "SELECT ROWID, " + ", ".join(text_columns) + " FROM " + db_v.table_interval + \
+                " ORDER BY ROWID LIMIT " + str(migration_chunk_row_count)
+    chunk_rows = db_connection.execute(sql_query).fetchall()
+    if len(chunk_rows) == 0:
+        return 0
+
+    typed_columns = []
+    for column_name in text_columns:
+        if column_name == db_v.all_tables_datetime:
+            column_name = db_v.all_tables_datetime_epoch_ms
+        typed_columns.append(column_name)
+
+    typed_rows = []
+    for row in chunk_rows:
+        typed_row = []
+        for column_name, reading in zip(text_columns, row[1:]):
+            if column_name == db_v.all_tables_datetime:
+                reading = datetime_to_epoch_ms(reading)
+            elif column_name not in text_column_names:
+                reading = get_typed_reading(reading)
+            typed_row.append(reading)
+        typed_rows.append(typed_row)
+
+    insert_query = "INSERT INTO " + db_v.table_interval_typed + " (" + ", ".join(typed_columns) + ") " + \
+                   "VALUES (" + ", ".join(["?"] * len(typed_columns)) + ")"
+    db_connection.execute("BEGIN IMMEDIATE")
+    try:
+        db_connection.executemany(insert_query, typed_rows)
+        db_connection.execute("DELETE FROM " + db_v.table_interval + " WHERE ROWID <= ?", (chunk_rows[-1][0],))
+        db_connection.execute("COMMIT")
+    except Exception:
+        db_connection.execute("ROLLBACK")
+        raise
+    return len(chunk_rows)
@@ -0,0 +1,199 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Write-behind queues for sensor data inserts.
+Each database gets a single writer thread that drains a bounded queue and writes the queued rows
+in one transaction every flush_row_count rows or flush_interval_ms milliseconds, whichever comes first.
+"""
+import atexit
+from queue import Queue, Empty, Full
+from threading import Thread, Lock, Event
+from itertools import groupby
+from time import sleep, time
+from operations_modules import logger
+from operations_modules import file_locations
+from operations_modules.sqlite_database import run_sql_function, write_to_sql_database
+
+default_max_queue_size = 5000
+default_flush_row_count = 200
+default_flush_interval_ms = 2000
+# Seconds a producer will wait on a full queue before the row is dropped
+queue_full_timeout = 30
+
+_write_queues = {}
+_write_queues_lock = Lock()
+
+
+class CreateDatabaseWriteQueue:
+    """ Creates a object instance holding a bounded write queue and its writer thread for the provided database. """
+
+    def __init__(self, database_location, max_queue_size=default_max_queue_size,
+                 flush_row_count=default_flush_row_count, flush_interval_ms=default_flush_interval_ms):
+        self.database_location = database_location
+        self.flush_row_count = flush_row_count
+        self.flush_interval_seconds = flush_interval_ms / 1000
+        self.write_queue = Queue(maxsize=max_queue_size)
+
+        self.rows_queued = 0
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.flush_count = 0
+        self.last_flush_latency_ms = 0.0
+        self.max_flush_latency_ms = 0.0
+        self.total_flush_latency_ms = 0.0
+
+        self.writer_thread = Thread(target=self._writer_loop)
+        self.writer_thread.daemon = True
+        self.writer_thread.start()
+
+    def add_sql_write(self, sql_query, data_entries):
+        """ Queues the provided SQL query & data. Blocks while the queue is full (back-pressure). """
+        try:
+            self.write_queue.put((sql_query, data_entries), timeout=queue_full_timeout)
+            self.rows_queued += 1
+        except Full:
+            self.rows_dropped += 1
+            log_msg = "SQL Write Queue Full for " + self.database_location + " - Dropped Write: "
+            logger.primary_logger.error(log_msg + str(sql_query))
+
+    def flush(self, timeout=60):
+        """ Writes all rows queued before this call and waits for them to be committed. Returns True on success. """
+        flush_done = Event()
+        try:
+            self.write_queue.put(flush_done, timeout=timeout)
+        except Full:
+            return False
+        return flush_done.wait(timeout)
+
+    def get_queue_depth(self):
+        return self.write_queue.qsize()
+
+    def get_average_flush_latency_ms(self):
+        if self.flush_count:
+            return round(self.total_flush_latency_ms / self.flush_count, 3)
+        return 0.0
+
+    def _writer_loop(self):
+        while True:
+            try:
+                batch = []
+                flush_events = []
+                queue_entry = self.write_queue.get()
+                flush_deadline = time() + self.flush_interval_seconds
+                while True:
+                    if isinstance(queue_entry, Event):
+                        flush_events.append(queue_entry)
+                        break
+                    batch.append(queue_entry)
+                    remaining_seconds = flush_deadline - time()
+                    if len(batch) >= self.flush_row_count or remaining_seconds <= 0:
+                        break
+                    try:
+                        queue_entry = self.write_queue.get(timeout=remaining_seconds)
+                    except Empty:
+                        break
+
+                if len(batch):
+                    self._write_batch(batch)
+                for flush_event in flush_events:
+                    flush_event.set()
+            except Exception as error:
+                logger.primary_logger.error("SQL Write Queue Error for " + self.database_location + ": " + str(error))
+                sleep(1)
+
+    def _write_batch(self, batch):
+        """ Writes the batch in a single transaction, falling back to row by row writes if the transaction fails. """
+        start_time = time()
+        try:
+            run_sql_function(self.database_location, lambda db_connection: _execute_batch(db_connection, batch))
+        except Exception as error:
+            log_msg = "SQL Write Queue Batch Failed for " + self.database_location + ", Writing Rows Individually: "
+            logger.primary_logger.warning(log_msg + str(error))
+            for sql_query, data_entries in batch:
+                write_to_sql_database(sql_query, data_entries, sql_database_location=self.database_location)
+
+        flush_latency_ms = round((time() - start_time) * 1000, 3)
+        self.rows_written += len(batch)
+        self.flush_count += 1
+        self.last_flush_latency_ms = flush_latency_ms
+        self.total_flush_latency_ms += flush_latency_ms
+        if flush_latency_ms > self.max_flush_latency_ms:
+            self.max_flush_latency_ms = flush_latency_ms
+
+
+def _execute_batch(db_connection, batch):
+    db_connection.execute("BEGIN;")
+    try:
+        # Consecutive entries with the same query are written together with executemany
+        for sql_query, entries_group in groupby(batch, key=lambda queue_entry: queue_entry[0]):
+            data_entries_list = []
+            for _, data_entries in entries_group:
+                if data_entries is None:
+                    data_entries = []
+                data_entries_list.append(data_entries)
+            db_connection.executemany(sql_query, data_entries_list)
+        db_connection.execute("COMMIT;")
+    except Exception:
+        db_connection.execute("ROLLBACK;")
+        raise
+
+
+def get_write_queue(database_location):
+    """ Returns the write queue for the provided database, creating it and its writer thread if needed. """
+    with _write_queues_lock:
+        if database_location not in _write_queues:
+            _write_queues[database_location] = CreateDatabaseWriteQueue(database_location)
+        return _write_queues[database_location]
+
+
+def queue_sql_write(sql_query, data_entries, sql_database_location=file_locations.sensor_database):
+    """ Queues the provided SQL query & data to be written to the database by its writer thread. """
+    get_write_queue(sql_database_location).add_sql_write(sql_query, data_entries)
+
+
+def flush_all_write_queues(timeout=60):
+    """ Writes everything currently queued for all databases and waits for it to finish. """
+    with _write_queues_lock:
+        write_queues = list(_write_queues.values())
+    for write_queue in write_queues:
+        if write_queue.get_queue_depth():
+            logger.primary_logger.info("Flushing SQL Write Queue for " + write_queue.database_location)
+        if not write_queue.flush(timeout=timeout):
+            logger.primary_logger.error("SQL Write Queue Flush Timed Out for " + write_queue.database_location)
+
+
+def get_write_queues_statistics_text():
+    """ Returns the queue depth, row counts and flush latency of all write queues as a string. """
+    with _write_queues_lock:
+        write_queues = list(_write_queues.values())
+    return_text = ""
+    for write_queue in write_queues:
+        return_text += write_queue.database_location + \
+                       " - Queue Depth: " + str(write_queue.get_queue_depth()) + \
+                       " | Rows Queued: " + str(write_queue.rows_queued) + \
+                       " | Rows Written: " + str(write_queue.rows_written) + \
+                       " | Rows Dropped: " + str(write_queue.rows_dropped) + \
+                       " | Flushes: " + str(write_queue.flush_count) + \
+                       " | Last Flush: " + str(write_queue.last_flush_latency_ms) + " ms" + \
+                       " | Average Flush: " + str(write_queue.get_average_flush_latency_ms()) + " ms" + \
+                       " | Max Flush: " + str(write_queue.max_flush_latency_ms) + " ms\n"
+    return return_text.strip()
+
+
+atexit.register(flush_all_write_queues)
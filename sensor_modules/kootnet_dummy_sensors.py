@@ -10,9 +10,9 @@ import time
 import datetime
 import random
 from operations_modules import logger
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, dummy_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.005
 
 senor_delay_min = 0.001
 sensor_delay_max = 0.015
@@ -22,7 +22,7 @@ class CreateDummySensors:
     """ Creates Function access to the Kootnet Dummy Sensors. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(dummy_bus)
         self.display_in_use = False
         logger.sensors_logger.debug("Kootnet Dummy Sensors Initialization - OK")
 
@@ -38,83 +38,56 @@ class CreateDummySensors:
 
     def cpu_temperature(self):
         """ Returns System CPU Temperature as a Float in Celsius. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=25, max_number=85)
 
     def temperature(self):
         """ Returns Temperature as a Float in Celsius. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=-20, max_number=65)
 
     def pressure(self):
         """ Returns Pressure as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=650, max_number=1200)
 
     def altitude(self):
         """ Returns Altitude as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=100, max_number=1200)
 
     def humidity(self):
         """ Returns Altitude as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=35, max_number=65)
 
     def distance(self):
         """ Returns Altitude as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=25, max_number=133)
 
     def gas_resistance_index(self):
         """ Returns Gas Resistance Index as a float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=25, max_number=133)
 
     def gas_data(self):
         """ Returns 3 gas readings Oxidised, Reduced and nh3 as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_tri_float(min_number=200, max_number=2200)
 
     def particulate_matter_data(self):
         """ Returns 3 Particulate Matter readings pm1, pm25 and pm10 as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return [self._get_random_float(min_number=10, max_number=135),
                 self._get_random_float(min_number=10, max_number=135),
                 self._get_random_float(min_number=10, max_number=135),
@@ -122,78 +95,54 @@ class CreateDummySensors:
 
     def ultra_violet_index(self):
         """ Returns Ultra Violet (A,B) comparators as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        uv_index = self._get_random_float(min_number=0, max_number=65)
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
+            uv_index = self._get_random_float(min_number=0, max_number=65)
         return uv_index
 
     def ultra_violet(self):
         """ Returns Ultra Violet (A,B) as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         ultra_a = self._get_random_float(min_number=0, max_number=65)
         ultra_b = self._get_random_float(min_number=0, max_number=65)
         return [ultra_a, ultra_b]
 
     def lumen(self):
         """ Returns Lumen as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_float(min_number=5, max_number=1700)
 
     def spectral_six_channel(self):
         """ Returns Red, Orange, Yellow, Green, Blue and Violet as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return_six = self._get_random_tri_float(min_number=10, max_number=135) + \
                      self._get_random_tri_float(min_number=10, max_number=135)
         return return_six
 
     def accelerometer_xyz(self):
         """ Returns Accelerometer X, Y, Z as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_tri_float(min_number=0, max_number=0)
 
     def magnetometer_xyz(self):
         """ Returns Magnetometer X, Y, Z as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_tri_float(min_number=35, max_number=85)
 
     def gyroscope_xyz(self):
         """ Returns Gyroscope X, Y, Z as floats in a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
         return self._get_random_tri_float(min_number=0, max_number=135)
 
     def all_gps_data(self):
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Kootnet Dummy Sensors"):
+            time.sleep(random.uniform(senor_delay_min, sensor_delay_max))
 
         timestamp = datetime.datetime.utcnow().strftime("%H:%M:%S")
         latitude = self._get_random_float(min_number=-89, max_number=89)
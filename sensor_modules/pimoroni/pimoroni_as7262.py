@@ -15,12 +15,11 @@ pip3 install as7262
 
 @author: OO-Dragon
 """
-from time import sleep
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.06
 use_as7262_led = 0  # 0=Disabled, 1=Enabled
 
 
@@ -28,7 +27,7 @@ class CreateAS7262:
     """ Creates Function access to the Pimoroni AS7262. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         try:
             as7262_import = __import__("sensor_modules.drivers.as7262", fromlist=["AS7262"])
@@ -47,21 +46,17 @@ class CreateAS7262:
 
     def spectral_six_channel(self):
         """ Returns Red, Orange, Yellow, Green, Blue and Violet as a list. """
-        while self.sensor_in_use:
-            sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            ems_colors_list = self.as7262_access.get_calibrated_values()
-
-            red_650 = round(ems_colors_list.red, round_decimal_to)
-            orange_600 = round(ems_colors_list.orange, round_decimal_to)
-            yellow_570 = round(ems_colors_list.yellow, round_decimal_to)
-            green_550 = round(ems_colors_list.green, round_decimal_to)
-            blue_500 = round(ems_colors_list.blue, round_decimal_to)
-            violet_450 = round(ems_colors_list.violet, round_decimal_to)
-            self.sensor_in_use = False
-            return [red_650, orange_600, yellow_570, green_550, blue_500, violet_450]
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni AS7262 6 channel spectrum - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni AS7262"):
+            try:
+                ems_colors_list = self.as7262_access.get_calibrated_values()
+
+                red_650 = round(ems_colors_list.red, round_decimal_to)
+                orange_600 = round(ems_colors_list.orange, round_decimal_to)
+                yellow_570 = round(ems_colors_list.yellow, round_decimal_to)
+                green_550 = round(ems_colors_list.green, round_decimal_to)
+                blue_500 = round(ems_colors_list.blue, round_decimal_to)
+                violet_450 = round(ems_colors_list.violet, round_decimal_to)
+                return [red_650, orange_600, yellow_570, green_550, blue_500, violet_450]
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni AS7262 6 channel spectrum - Failed: " + str(error))
         return [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
@@ -13,19 +13,18 @@ Created on Tue July 1 06:40:56 2019
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.02
 
 
 class CreateBME280:
     """ Creates Function access to the Pimoroni BME280. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             bme280_import = __import__("sensor_modules.drivers.bme280", fromlist=["BME280"])
             self.smbus_import = __import__("sensor_modules.drivers.smbus2.smbus2", fromlist=["SMBus"])
@@ -39,42 +38,33 @@ class CreateBME280:
 
     def temperature(self):
         """ Returns Temperature as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            temp_var = self.bme280.get_temperature()
-            temp_var = round(temp_var, round_decimal_to)
-        except Exception as error:
-            temp_var = 0.0
-            logger.sensors_logger.error("Pimoroni BME280 Temperature - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BME280"):
+            try:
+                temp_var = self.bme280.get_temperature()
+                temp_var = round(temp_var, round_decimal_to)
+            except Exception as error:
+                temp_var = 0.0
+                logger.sensors_logger.error("Pimoroni BME280 Temperature - Failed: " + str(error))
         return temp_var
 
     def pressure(self):
         """ Returns Pressure as a Integer. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            pressure_hpa = self.bme280.get_pressure()
-            pressure_hpa = round(float(pressure_hpa), round_decimal_to)
-        except Exception as error:
-            pressure_hpa = 0.0
-            logger.sensors_logger.error("Pimoroni BME280 Pressure - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BME280"):
+            try:
+                pressure_hpa = self.bme280.get_pressure()
+                pressure_hpa = round(float(pressure_hpa), round_decimal_to)
+            except Exception as error:
+                pressure_hpa = 0.0
+                logger.sensors_logger.error("Pimoroni BME280 Pressure - Failed: " + str(error))
         return pressure_hpa
 
     def humidity(self):
         """ Returns Humidity as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            humidity = self.bme280.get_humidity()
-            humidity = round(float(humidity), round_decimal_to)
-        except Exception as error:
-            humidity = 0.0
-            logger.sensors_logger.error("Pimoroni BME280 Humidity - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BME280"):
+            try:
+                humidity = self.bme280.get_humidity()
+                humidity = round(float(humidity), round_decimal_to)
+            except Exception as error:
+                humidity = 0.0
+                logger.sensors_logger.error("Pimoroni BME280 Humidity - Failed: " + str(error))
         return humidity
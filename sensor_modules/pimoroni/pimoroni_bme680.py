@@ -15,9 +15,10 @@ Created on Sat Aug 25 08:53:56 2018
 @author: OO-Dragon
 """
 import time
-from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
 # Update readings in seconds
@@ -33,6 +34,7 @@ class CreateBME680:
         self.humidity_var = 0.0
         self.gas_resistance_var = 0.0
         self.sensor_latency = 0.0
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         try:
             bme680_import = __import__("sensor_modules.drivers.bme680", fromlist=["BME680"])
@@ -46,34 +48,32 @@ class CreateBME680:
 
             self.sensor.get_sensor_data()
 
-            self.thread_readings_updater = Thread(target=self._readings_updater)
-            self.thread_readings_updater.daemon = True
-            self.thread_readings_updater.start()
+            self.sampling_job = sampling_scheduler.add_job("Pimoroni BME680", self._update_readings,
+                                                           sleep_between_readings_seconds)
             logger.sensors_logger.debug("Pimoroni BME680 Initialization - OK")
         except Exception as error:
             logger.sensors_logger.error("Pimoroni BME680 Initialization - Failed: " + str(error))
             app_config_access.installed_sensors.pimoroni_bme680 = 0
             app_config_access.installed_sensors.update_configuration_settings_list()
 
-    def _readings_updater(self):
-        logger.sensors_logger.debug("Pimoroni BME680 readings updater started")
-        while True:
-            try:
+    def _update_readings(self):
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        try:
+            with self.bus_lock.access("Pimoroni BME680"):
                 start_time = time.time()
                 self.sensor.get_sensor_data()
                 end_time = time.time()
-                self.sensor_latency = float(end_time - start_time)
-                self.temperature_var = float(self.sensor.data.temperature)
-                self.pressure_var = float(self.sensor.data.pressure)
-                self.humidity_var = float(self.sensor.data.humidity)
-                self.gas_resistance_var = float(self.sensor.data.gas_resistance) / 1000
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni BME680 Readings Update Failed: " + str(error))
-                self.temperature_var = 0.0
-                self.pressure_var = 0.0
-                self.humidity_var = 0.0
-                self.gas_resistance_var = 0.0
-            time.sleep(sleep_between_readings_seconds)
+            self.sensor_latency = float(end_time - start_time)
+            self.temperature_var = float(self.sensor.data.temperature)
+            self.pressure_var = float(self.sensor.data.pressure)
+            self.humidity_var = float(self.sensor.data.humidity)
+            self.gas_resistance_var = float(self.sensor.data.gas_resistance) / 1000
+        except Exception as error:
+            logger.sensors_logger.error("Pimoroni BME680 Readings Update Failed: " + str(error))
+            self.temperature_var = 0.0
+            self.pressure_var = 0.0
+            self.humidity_var = 0.0
+            self.gas_resistance_var = 0.0
 
     def temperature(self):
         """ Returns Temperature as a Float. """
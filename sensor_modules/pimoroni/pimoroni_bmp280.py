@@ -15,19 +15,18 @@ Created on Tue June 25 10:53:56 2019
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.02
 
 
 class CreateBMP280:
     """ Creates Function access to the Pimoroni BMP280. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             bmp280_import = __import__("sensor_modules.drivers.bmp280", fromlist=["BMP280"])
             smbus2_import = __import__("sensor_modules.drivers.smbus2.smbus2", fromlist=["SMBus"])
@@ -42,40 +41,31 @@ class CreateBMP280:
 
     def temperature(self):
         """ Returns Temperature as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            temp_var = self.bmp280.get_temperature()
-        except Exception as error:
-            temp_var = 0.0
-            logger.sensors_logger.error("Pimoroni BMP280 Temperature - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BMP280"):
+            try:
+                temp_var = self.bmp280.get_temperature()
+            except Exception as error:
+                temp_var = 0.0
+                logger.sensors_logger.error("Pimoroni BMP280 Temperature - Failed: " + str(error))
         return round(temp_var, round_decimal_to)
 
     def pressure(self):
         """ Returns Pressure as a Integer. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            pressure_hpa = self.bmp280.get_pressure()
-        except Exception as error:
-            pressure_hpa = 0.0
-            logger.sensors_logger.error("Pimoroni BMP280 Pressure - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BMP280"):
+            try:
+                pressure_hpa = self.bmp280.get_pressure()
+            except Exception as error:
+                pressure_hpa = 0.0
+                logger.sensors_logger.error("Pimoroni BMP280 Pressure - Failed: " + str(error))
         return round(pressure_hpa, round_decimal_to)
 
     def altitude(self):
         """ Returns Altitude in meters? as a float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            altitude_var = self.bmp280.get_altitude()
-            altitude_var = round(altitude_var, round_decimal_to)
-        except Exception as error:
-            altitude_var = 0.0
-            logger.sensors_logger.error("Pimoroni BMP280 Altitude - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni BMP280"):
+            try:
+                altitude_var = self.bmp280.get_altitude()
+                altitude_var = round(altitude_var, round_decimal_to)
+            except Exception as error:
+                altitude_var = 0.0
+                logger.sensors_logger.error("Pimoroni BMP280 Altitude - Failed: " + str(error))
         return altitude_var
@@ -14,19 +14,18 @@ Created on Sat Aug 25 08:53:56 2018
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.005
 
 
 class CreateEnviro:
     """ Creates Function access to the Pimoroni Enviro pHAT. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             enviro_from_list = ["weather", "light", "motion"]
             self.enviro_import = __import__("sensor_modules.drivers.envirophat", fromlist=enviro_from_list)
@@ -39,91 +38,70 @@ class CreateEnviro:
 
     def temperature(self):
         """ Returns Temperature as a Float in Celsius. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            env_temp = float(self.enviro_import.weather.get_temperature())
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Temperature - Failed: " + str(error))
-            env_temp = 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                env_temp = float(self.enviro_import.weather.get_temperature())
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Temperature - Failed: " + str(error))
+                env_temp = 0.0
         return round(env_temp, round_decimal_to)
 
     def pressure(self):
         """ Returns Pressure as a Integer in hPa. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            pressure_hpa = self.enviro_import.weather.get_pressure()
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Pressure - Failed: " + str(error))
-            pressure_hpa = 0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                pressure_hpa = self.enviro_import.weather.get_pressure()
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Pressure - Failed: " + str(error))
+                pressure_hpa = 0
         return int(pressure_hpa)
 
     def altitude(self):
         """ Returns altitude as a float """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            altitude = float(self.enviro_import.weather.get_altitude())
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Altitude - Failed: " + str(error))
-            altitude = 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                altitude = float(self.enviro_import.weather.get_altitude())
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Altitude - Failed: " + str(error))
+                altitude = 0.0
         return round(altitude, round_decimal_to)
 
     def lumen(self):
         """ Returns Lumen as a Integer in lm. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            var_lumen = self.enviro_import.light.light()
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Lumen - Failed: " + str(error))
-            var_lumen = 0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                var_lumen = self.enviro_import.light.light()
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Lumen - Failed: " + str(error))
+                var_lumen = 0
         return int(var_lumen)
 
     def ems(self):
         """ Returns Electromagnetic Spectrum of Red, Green, Blue as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            rgb_red, rgb_green, rgb_blue = self.enviro_import.light.rgb()
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT RGB - Failed: " + str(error))
-            rgb_red, rgb_green, rgb_blue = 0.0, 0.0, 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                rgb_red, rgb_green, rgb_blue = self.enviro_import.light.rgb()
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT RGB - Failed: " + str(error))
+                rgb_red, rgb_green, rgb_blue = 0.0, 0.0, 0.0
         return [round(rgb_red, round_decimal_to), round(rgb_green, round_decimal_to), round(rgb_blue, round_decimal_to)]
 
     def accelerometer_xyz(self):
         """ Returns Accelerometer X, Y, Z as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            acc_x, acc_y, acc_z = self.enviro_import.motion.accelerometer()
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Accelerometer XYZ - Failed: " + str(error))
-            acc_x, acc_y, acc_z = 0.0, 0.0, 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                acc_x, acc_y, acc_z = self.enviro_import.motion.accelerometer()
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Accelerometer XYZ - Failed: " + str(error))
+                acc_x, acc_y, acc_z = 0.0, 0.0, 0.0
         return [round(acc_x, round_decimal_to), round(acc_y, round_decimal_to), round(acc_z, round_decimal_to)]
 
     def magnetometer_xyz(self):
         """ Returns Magnetometer X, Y, Z as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            mag_x, mag_y, mag_z = self.enviro_import.motion.magnetometer()
-        except Exception as error:
-            mag_x, mag_y, mag_z = 0.0, 0.0, 0.0
-            logger.sensors_logger.error("Pimoroni Enviro pHAT Magnetometer XYZ - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni Enviro pHAT"):
+            try:
+                mag_x, mag_y, mag_z = self.enviro_import.motion.magnetometer()
+            except Exception as error:
+                mag_x, mag_y, mag_z = 0.0, 0.0, 0.0
+                logger.sensors_logger.error("Pimoroni Enviro pHAT Magnetometer XYZ - Failed: " + str(error))
         return [round(mag_x, round_decimal_to), round(mag_y, round_decimal_to), round(mag_z, round_decimal_to)]
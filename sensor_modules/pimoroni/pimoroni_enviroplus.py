@@ -21,11 +21,10 @@ from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
 from operations_modules import file_locations
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
 turn_off_display_seconds = 25
-pause_sensor_during_access_sec = 0.02
-pause_sensor_during_access_sec_gas = 0.095
 
 
 class CreateEnviroPlus:
@@ -44,7 +43,7 @@ class CreateEnviroPlus:
         self.display_off_count = 0
         self.display_is_on = True
         self.display_in_use = False
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         self.font = self.pill_import.ImageFont.truetype(file_locations.display_font, 40)
 
         try:
@@ -136,112 +135,91 @@ class CreateEnviroPlus:
     def temperature(self):
         """ Returns Temperature as a Float. """
         if self.bme280_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                temp_var = float(self.bme280.get_temperature())
-            except Exception as error:
-                temp_var = 0.0
-                logger.sensors_logger.error("Pimoroni Enviro+ Temperature - Failed: " + str(error))
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    temp_var = float(self.bme280.get_temperature())
+                except Exception as error:
+                    temp_var = 0.0
+                    logger.sensors_logger.error("Pimoroni Enviro+ Temperature - Failed: " + str(error))
             return round(temp_var, round_decimal_to)
         return None
 
     def pressure(self):
         """ Returns Pressure as a Integer. """
         if self.bme280_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                pressure_hpa = self.bme280.get_pressure()
-            except Exception as error:
-                pressure_hpa = 0.0
-                logger.sensors_logger.error("Pimoroni Enviro+ Pressure - Failed: " + str(error))
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    pressure_hpa = self.bme280.get_pressure()
+                except Exception as error:
+                    pressure_hpa = 0.0
+                    logger.sensors_logger.error("Pimoroni Enviro+ Pressure - Failed: " + str(error))
             return int(pressure_hpa)
         return None
 
     def altitude(self):
         """ Returns altitude as a float """
         if self.bme280_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                altitude = float(self.bme280.get_altitude())
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni Enviro+ Altitude - Failed: " + str(error))
-                altitude = 0.0
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    altitude = float(self.bme280.get_altitude())
+                except Exception as error:
+                    logger.sensors_logger.error("Pimoroni Enviro+ Altitude - Failed: " + str(error))
+                    altitude = 0.0
             return round(altitude, round_decimal_to)
         return None
 
     def humidity(self):
         """ Returns Humidity as a Float. """
         if self.bme280_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                var_humidity = self.bme280.get_humidity()
-            except Exception as error:
-                var_humidity = 0.0
-                logger.sensors_logger.error("Pimoroni Enviro+ Humidity - Failed: " + str(error))
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    var_humidity = self.bme280.get_humidity()
+                except Exception as error:
+                    var_humidity = 0.0
+                    logger.sensors_logger.error("Pimoroni Enviro+ Humidity - Failed: " + str(error))
             return round(var_humidity, round_decimal_to)
         return None
 
     def lumen(self):
         """ Returns Lumen as a Float. """
         if self.ltr_559_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                lumen = float(self.ltr_559.get_lux())
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni Enviro+ Lumen - Failed: " + str(error))
-                lumen = 0.0
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    lumen = float(self.ltr_559.get_lux())
+                except Exception as error:
+                    logger.sensors_logger.error("Pimoroni Enviro+ Lumen - Failed: " + str(error))
+                    lumen = 0.0
             return round(lumen, round_decimal_to)
         return None
 
     def distance(self):
         """ Returns distance in cm?. """
         if self.ltr_559_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec)
-            self.sensor_in_use = True
-            try:
-                distance = float(self.ltr_559.get_proximity())
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni Enviro+ Proximity - Failed: " + str(error))
-                distance = 0.0
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    distance = float(self.ltr_559.get_proximity())
+                except Exception as error:
+                    logger.sensors_logger.error("Pimoroni Enviro+ Proximity - Failed: " + str(error))
+                    distance = 0.0
             return round(distance, round_decimal_to)
         return None
 
     def gas_data(self):
         """ Returns 3 gas readings Oxidised, Reduced and nh3 as a list. """
         if self.mics6814_ok:
-            while self.sensor_in_use:
-                time.sleep(pause_sensor_during_access_sec_gas)
-            self.sensor_in_use = True
-            try:
-                enviro_plus_gas_data = self.gas_access.read_all()
-                oxidised = enviro_plus_gas_data.oxidising / 1000
-                reduced = enviro_plus_gas_data.reducing / 1000
-                nh3 = enviro_plus_gas_data.nh3 / 1000
-
-                gas_list_oxidised_reduced_nh3 = [round(oxidised, round_decimal_to),
-                                                 round(reduced, round_decimal_to),
-                                                 round(nh3, round_decimal_to)]
-
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni Enviro+ GAS - Failed: " + str(error))
-                gas_list_oxidised_reduced_nh3 = [0.0, 0.0, 0.0]
-            self.sensor_in_use = False
+            with self.bus_lock.access("Pimoroni Enviro+"):
+                try:
+                    enviro_plus_gas_data = self.gas_access.read_all()
+                    oxidised = enviro_plus_gas_data.oxidising / 1000
+                    reduced = enviro_plus_gas_data.reducing / 1000
+                    nh3 = enviro_plus_gas_data.nh3 / 1000
+
+                    gas_list_oxidised_reduced_nh3 = [round(oxidised, round_decimal_to),
+                                                     round(reduced, round_decimal_to),
+                                                     round(nh3, round_decimal_to)]
+
+                except Exception as error:
+                    logger.sensors_logger.error("Pimoroni Enviro+ GAS - Failed: " + str(error))
+                    gas_list_oxidised_reduced_nh3 = [0.0, 0.0, 0.0]
             return gas_list_oxidised_reduced_nh3
         return None
@@ -19,19 +19,18 @@ Created on Mon Jan 20 12:24:56 2020
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.02
 
 
 class CreateMCP9600:
     """ Creates Function access to the Pimoroni MCP9600. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             mcp9600_import = __import__("sensor_modules.drivers.mcp9600", fromlist=["MCP9600"])
             self.sensor = mcp9600_import.MCP9600()
@@ -44,13 +43,10 @@ class CreateMCP9600:
 
     def temperature(self):
         """ Returns Temperature as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            temp_var = self.sensor.get_hot_junction_temperature()
-        except Exception as error:
-            temp_var = 0.0
-            logger.sensors_logger.error("Pimoroni MCP9600 Temperature - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni MCP9600"):
+            try:
+                temp_var = self.sensor.get_hot_junction_temperature()
+            except Exception as error:
+                temp_var = 0.0
+                logger.sensors_logger.error("Pimoroni MCP9600 Temperature - Failed: " + str(error))
         return round(temp_var, round_decimal_to)
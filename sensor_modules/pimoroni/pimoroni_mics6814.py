@@ -18,19 +18,18 @@ Created on Thur Sept 9 12:48:56 2021
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec_gas = 0.095
 
 
 class CreateMICS6814:
     """ Creates Function access to the Pimoroni MICS6814. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         try:
             mics6814_import = __import__("sensor_modules.drivers.mics6814", fromlist=["MICS6814"])
@@ -44,20 +43,17 @@ class CreateMICS6814:
 
     def gas_data(self):
         """ Returns 3 gas readings Oxidised, Reduced and nh3 plus ADC Channel as a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec_gas)
-        self.sensor_in_use = True
-        try:
-            gas_data_variables = self.sensor.read_all()
-
-            oxidised = gas_data_variables.oxidising / 1000
-            reduced = gas_data_variables.reducing / 1000
-            nh3 = gas_data_variables.nh3 / 1000
-            adc = gas_data_variables.adc
-
-            return [round(oxidised, round_decimal_to), round(reduced, round_decimal_to),
-                    round(nh3, round_decimal_to), adc]
-        except Exception as error:
-            logger.sensors_logger.error("Pimoroni MICS6814 GAS - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni MICS6814"):
+            try:
+                gas_data_variables = self.sensor.read_all()
+
+                oxidised = gas_data_variables.oxidising / 1000
+                reduced = gas_data_variables.reducing / 1000
+                nh3 = gas_data_variables.nh3 / 1000
+                adc = gas_data_variables.adc
+
+                return [round(oxidised, round_decimal_to), round(reduced, round_decimal_to),
+                        round(nh3, round_decimal_to), adc]
+            except Exception as error:
+                logger.sensors_logger.error("Pimoroni MICS6814 GAS - Failed: " + str(error))
         return [0.0, 0.0, 0.0, 0.0]
@@ -28,9 +28,10 @@ Created on Sat Sept 11 11:07:56 2021
 @author: OO-Dragon
 """
 import time
-from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 sleep_between_readings_seconds = 30
 
@@ -40,6 +41,7 @@ class CreatePA1010D:
 
     def __init__(self):
         self.sensor_latency = 0.0
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         self.timestamp_var = ""
         self.latitude_var = 0.0
@@ -60,9 +62,11 @@ class CreatePA1010D:
             self.pa1010d_gps = pa1010d_import.PA1010D()
             self.pa1010d_gps.update()
 
-            self.thread_gps_updater = Thread(target=self._gps_updater_thread)
-            self.thread_gps_updater.daemon = True
-            self.thread_gps_updater.start()
+            # Latency is the time from the start of a GPS update to a successful update
+            self._update_start_time = time.time()
+            # Give GPS time to lock on to a few satellites before the first update
+            self.sampling_job = sampling_scheduler.add_job("Pimoroni PA1010D", self._gps_update,
+                                                           sleep_between_readings_seconds, start_delay_seconds=30)
 
             logger.sensors_logger.debug("Pimoroni PA1010D Initialization - OK")
         except Exception as error:
@@ -70,56 +74,46 @@ class CreatePA1010D:
             app_config_access.installed_sensors.pimoroni_pa1010d = 0
             app_config_access.installed_sensors.update_configuration_settings_list()
 
-    def _gps_updater_thread(self):
-        # Give GPS time to lock on to a few satellites
-        time.sleep(30)
-
-        set_new_start_time = False
-        start_time = time.time()
-        while True:
-            if set_new_start_time:
-                set_new_start_time = False
-                start_time = time.time()
-            try:
+    def _gps_update(self):
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        try:
+            with self.bus_lock.access("Pimoroni PA1010D"):
                 result = self.pa1010d_gps.update()
-                if result:
-                    end_time = time.time()
-                    self.sensor_latency = float(end_time - start_time)
-                    set_new_start_time = True
-
-                    self.timestamp_var = str(self.pa1010d_gps.timestamp)
-                    self.latitude_var = self.pa1010d_gps.latitude
-                    self.longitude_var = self.pa1010d_gps.longitude
-                    self.altitude_var = self.pa1010d_gps.altitude
-                    self.number_of_connected_satellites_var = self.pa1010d_gps.num_sats
-                    self.gps_quality_var = self.pa1010d_gps.gps_qual
-
-                    self.pdop_var = self.pa1010d_gps.pdop
-                    self.hdop_var = self.pa1010d_gps.hdop
-                    self.vdop_var = self.pa1010d_gps.vdop
-
-                    self.speed_over_ground_var = self.pa1010d_gps.speed_over_ground
-                    self.mode_fix_type_var = self.pa1010d_gps.mode_fix_type
-
-                    gps_log_str = "GPS Data - TimeStamp: " + str(self.timestamp_var) + \
-                                  " Latitude: " + str(self.latitude_var) + \
-                                  " Longitude: " + str(self.longitude_var) + \
-                                  " Altitude: " + str(self.altitude_var) + \
-                                  " Number of Sats: " + str(self.number_of_connected_satellites_var) + \
-                                  " GPS Quality: " + str(self.gps_quality_var) + \
-                                  " Speed Over Ground: " + str(self.speed_over_ground_var) + \
-                                  " Mode Fix Type: " + str(self.mode_fix_type_var) + \
-                                  " PDOP: " + str(self.pdop_var) + \
-                                  " HDOP: " + str(self.hdop_var) + \
-                                  " VDOP: " + str(self.vdop_var)
-
-                    logger.sensors_logger.debug(gps_log_str)
-                    logger.sensors_logger.debug("Pimoroni PA1010D GPS Update Finished")
-                else:
-                    time.sleep(10)
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni PA1010D GPS Update - Failed: " + str(error))
-            time.sleep(sleep_between_readings_seconds)
+            if result:
+                end_time = time.time()
+                self.sensor_latency = float(end_time - self._update_start_time)
+                self._update_start_time = end_time
+
+                self.timestamp_var = str(self.pa1010d_gps.timestamp)
+                self.latitude_var = self.pa1010d_gps.latitude
+                self.longitude_var = self.pa1010d_gps.longitude
+                self.altitude_var = self.pa1010d_gps.altitude
+                self.number_of_connected_satellites_var = self.pa1010d_gps.num_sats
+                self.gps_quality_var = self.pa1010d_gps.gps_qual
+
+                self.pdop_var = self.pa1010d_gps.pdop
+                self.hdop_var = self.pa1010d_gps.hdop
+                self.vdop_var = self.pa1010d_gps.vdop
+
+                self.speed_over_ground_var = self.pa1010d_gps.speed_over_ground
+                self.mode_fix_type_var = self.pa1010d_gps.mode_fix_type
+
+                gps_log_str = "GPS Data - TimeStamp: " + str(self.timestamp_var) + \
+                              " Latitude: " + str(self.latitude_var) + \
+                              " Longitude: " + str(self.longitude_var) + \
+                              " Altitude: " + str(self.altitude_var) + \
+                              " Number of Sats: " + str(self.number_of_connected_satellites_var) + \
+                              " GPS Quality: " + str(self.gps_quality_var) + \
+                              " Speed Over Ground: " + str(self.speed_over_ground_var) + \
+                              " Mode Fix Type: " + str(self.mode_fix_type_var) + \
+                              " PDOP: " + str(self.pdop_var) + \
+                              " HDOP: " + str(self.hdop_var) + \
+                              " VDOP: " + str(self.vdop_var)
+
+                logger.sensors_logger.debug(gps_log_str)
+                logger.sensors_logger.debug("Pimoroni PA1010D GPS Update Finished")
+        except Exception as error:
+            logger.sensors_logger.error("Pimoroni PA1010D GPS Update - Failed: " + str(error))
 
     def latitude_longitude(self):
         """ Returns latitude & longitude coordinates (floats) in a list """
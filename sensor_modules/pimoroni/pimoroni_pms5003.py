@@ -16,9 +16,9 @@ Created on Tue June 25 10:53:56 2019
 """
 import os
 import time
-from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
 from operations_modules.app_generic_disk import get_file_content, write_file_to_disk
 
 round_decimal_to = 5
@@ -40,32 +40,29 @@ class CreatePimoroniPMS5003:
                 pms5003_import = __import__("sensor_modules.drivers.pms5003", fromlist=["PMS5003"])
                 self._enable_psm5003_serial()
                 self.enviro_plus_pm_access = pms5003_import.PMS5003()
-                self.thread_readings_updater = Thread(target=self._readings_updater)
-                self.thread_readings_updater.daemon = True
-                self.thread_readings_updater.start()
+                self.sampling_job = sampling_scheduler.add_job("Pimoroni PMS5003", self._update_readings,
+                                                               sleep_between_readings_seconds)
                 logger.sensors_logger.debug("Pimoroni PMS5003 Initialization - OK")
             except Exception as error:
                 logger.sensors_logger.error("Pimoroni PMS5003 Initialization - Failed: " + str(error))
                 app_config_access.installed_sensors.pimoroni_pms5003 = 0
                 app_config_access.installed_sensors.update_configuration_settings_list()
 
-    def _readings_updater(self):
-        logger.sensors_logger.debug("Pimoroni PMS5003 readings updater started")
-        while True:
-            try:
-                start_time = time.time()
-                enviro_plus_pm_data = self.enviro_plus_pm_access.read()
-                end_time = time.time()
-                self.sensor_latency = float(end_time - start_time)
-                self.pm1_var = enviro_plus_pm_data.pm_ug_per_m3(1.0)
-                self.pm25_var = enviro_plus_pm_data.pm_ug_per_m3(2.5)
-                self.pm10_var = enviro_plus_pm_data.pm_ug_per_m3(10)
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni PMS5003 Readings Update Failed: " + str(error))
-                self.pm1_var = 0.0
-                self.pm25_var = 0.0
-                self.pm10_var = 0.0
-            time.sleep(sleep_between_readings_seconds)
+    def _update_readings(self):
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        try:
+            start_time = time.time()
+            enviro_plus_pm_data = self.enviro_plus_pm_access.read()
+            end_time = time.time()
+            self.sensor_latency = float(end_time - start_time)
+            self.pm1_var = enviro_plus_pm_data.pm_ug_per_m3(1.0)
+            self.pm25_var = enviro_plus_pm_data.pm_ug_per_m3(2.5)
+            self.pm10_var = enviro_plus_pm_data.pm_ug_per_m3(10)
+        except Exception as error:
+            logger.sensors_logger.error("Pimoroni PMS5003 Readings Update Failed: " + str(error))
+            self.pm1_var = 0.0
+            self.pm25_var = 0.0
+            self.pm10_var = 0.0
 
     def particulate_matter_data(self):
         """ Returns 3 Particulate Matter readings PM1, PM25 and PM10 in a list as floats. """
@@ -28,6 +28,7 @@ import struct
 from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 date_format = "%Y-%m-%d %H:%M:%S"
 sleep_duration_between_datetime_checks = 18000  # Default is 18000 (5 Hours)
@@ -37,6 +38,7 @@ class CreateRV3028:
     """ Creates Function access to the Pimoroni RV3028. """
 
     def __init__(self):
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             rv3028_import = __import__("sensor_modules.drivers.rv3028", fromlist=["RV3028"])
             self.real_time_clock = rv3028_import.RV3028()
@@ -106,7 +108,8 @@ class CreateRV3028:
         Note: date_and_time may also be set as a tuple (hour, minute, second, year, month, date)
         """
         try:
-            self.real_time_clock.set_time_and_date(date_and_time)
+            with self.bus_lock.access("Pimoroni RV3028"):
+                self.real_time_clock.set_time_and_date(date_and_time)
             logger.sensors_logger.debug("Pimoroni RV3028 - Update RTC to System's Date & Time - OK")
         except Exception as error:
             logger.sensors_logger.error("Pimoroni RV3028 - Update RTC to System's Date & Time Failed: " + str(error))
@@ -118,7 +121,8 @@ class CreateRV3028:
         Format "2021-09-22 14:14:28" - Year/Month/Day hour:min:sec
         """
         try:
-            rtc_time = self.real_time_clock.get_time_and_date()
+            with self.bus_lock.access("Pimoroni RV3028"):
+                rtc_time = self.real_time_clock.get_time_and_date()
 
             seconds = self._add_datetime_padding(str(rtc_time.second))
             minutes = self._add_datetime_padding(str(rtc_time.minute))
@@ -141,7 +145,8 @@ class CreateRV3028:
     def update_system_time(self):
         """ Sets the System's Date & Time using the RV3028 Real Time Clock """
         try:
-            rtc_time = self.real_time_clock.get_time_and_date()
+            with self.bus_lock.access("Pimoroni RV3028"):
+                rtc_time = self.real_time_clock.get_time_and_date()
             # Linux date format is 2014-12-25 12:34:56 - Year-Month-Day hour:min:sec
             rtc_datetime = str(rtc_time.year) + "-" + str(rtc_time.month) + "-" + str(rtc_time.day) + " " + \
                            str(rtc_time.hour) + ":" + str(rtc_time.minute) + ":" + str(rtc_time.second)
@@ -18,9 +18,10 @@ Created on Mon Jan 20 11:48:56 2020
 @author: OO-Dragon
 """
 import time
-from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
 # Update readings in seconds
@@ -34,40 +35,37 @@ class CreateSGP30:
         self.gas_resistance_var = 0.0
         self.e_co2_var = 0.0
         self.sensor_latency = 0.0
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         try:
             sgp30_import = __import__("sensor_modules.drivers.sgp30", fromlist=["SGP30"])
             self.sensor = sgp30_import.SGP30()
-            self.thread_readings_updater = Thread(target=self._readings_updater)
-            self.thread_readings_updater.daemon = True
-            self.thread_readings_updater.start()
+            # start_measurement is not used, it holds the bus for the ~15 second warm up
+            with self.bus_lock.access("Pimoroni SGP30"):
+                self.sensor.command("init_air_quality")
+            # Readings during the warm up are eCO2 400 & TVOC 0, give the sensor time before the first reading
+            self.sampling_job = sampling_scheduler.add_job("Pimoroni SGP30", self._update_readings,
+                                                           sleep_between_readings_seconds, start_delay_seconds=5)
             logger.sensors_logger.debug("Pimoroni SGP30 Initialization - OK")
         except Exception as error:
             logger.sensors_logger.error("Pimoroni SGP30 Initialization - Failed: " + str(error))
             app_config_access.installed_sensors.pimoroni_sgp30 = 0
             app_config_access.installed_sensors.update_configuration_settings_list()
 
-    def _readings_updater(self):
-        thread_measurement_updater = Thread(target=self.sensor.start_measurement)
-        thread_measurement_updater.daemon = True
-        thread_measurement_updater.start()
-        logger.sensors_logger.debug("Pimoroni SGP30 readings updater started")
-
-        # Wait for thread_measurement_updater to get started (prevents error in logs)
-        time.sleep(5)
-        while True:
-            try:
+    def _update_readings(self):
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        try:
+            with self.bus_lock.access("Pimoroni SGP30"):
                 start_time = time.time()
                 eco2, tvoc = self.sensor.get_air_quality()
                 end_time = time.time()
-                self.sensor_latency = float(end_time - start_time)
-                self.gas_resistance_var = tvoc
-                self.e_co2_var = eco2
-            except Exception as error:
-                logger.sensors_logger.error("Pimoroni SGP30 Readings Update Failed: " + str(error))
-                self.gas_resistance_var = 0.0
-                self.e_co2_var = 0.0
-            time.sleep(sleep_between_readings_seconds)
+            self.sensor_latency = float(end_time - start_time)
+            self.gas_resistance_var = tvoc
+            self.e_co2_var = eco2
+        except Exception as error:
+            logger.sensors_logger.error("Pimoroni SGP30 Readings Update Failed: " + str(error))
+            self.gas_resistance_var = 0.0
+            self.e_co2_var = 0.0
 
     def gas_resistance_index(self):
         """ Returns Gas Resistance Index as a float in kΩ. """
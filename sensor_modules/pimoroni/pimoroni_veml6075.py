@@ -15,19 +15,18 @@ Created on Tue June 25 10:53:56 2019
 
 @author: OO-Dragon
 """
-import time
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.004
 
 
 class CreateVEML6075:
     """ Creates Function access to the Pimoroni VEML6075. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         try:
             veml6075_import = __import__("sensor_modules.drivers.veml6075", fromlist=["VEML6075"])
             self.smbus_import = __import__("sensor_modules.drivers.smbus2.smbus2", fromlist=["SMBus"])
@@ -44,41 +43,32 @@ class CreateVEML6075:
 
     def ultra_violet_index(self):
         """ Returns Ultra Violet Index. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            uva, uvb = self.uv_sensor.get_measurements()
-            uv_comp1, uv_comp2 = self.uv_sensor.get_comparitor_readings()
-            uv_index = round(self.uv_sensor.convert_to_index(uva, uvb, uv_comp1, uv_comp2)[2], round_decimal_to)
-        except Exception as error:
-            uv_index = 0.0
-            logger.sensors_logger.error("Pimoroni VEML6075 UV Index Reading - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni VEML6075"):
+            try:
+                uva, uvb = self.uv_sensor.get_measurements()
+                uv_comp1, uv_comp2 = self.uv_sensor.get_comparitor_readings()
+                uv_index = round(self.uv_sensor.convert_to_index(uva, uvb, uv_comp1, uv_comp2)[2], round_decimal_to)
+            except Exception as error:
+                uv_index = 0.0
+                logger.sensors_logger.error("Pimoroni VEML6075 UV Index Reading - Failed: " + str(error))
         return uv_index
 
     def ultra_violet(self):
         """ Returns Ultra Violet (A,B) as a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            uva, uvb = self.uv_sensor.get_measurements()
-        except Exception as error:
-            uva, uvb = [0.0, 0.0]
-            logger.sensors_logger.error("Pimoroni VEML6075 UVA & UVB Readings - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni VEML6075"):
+            try:
+                uva, uvb = self.uv_sensor.get_measurements()
+            except Exception as error:
+                uva, uvb = [0.0, 0.0]
+                logger.sensors_logger.error("Pimoroni VEML6075 UVA & UVB Readings - Failed: " + str(error))
         return [round(float(uva), round_decimal_to), round(float(uvb), round_decimal_to)]
 
     def ultra_violet_comparator(self):
         """ Returns 2 Ultra Violet comparator as a list. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            uv_comp1, uv_comp2 = self.uv_sensor.get_comparitor_readings()
-        except Exception as error:
-            uv_comp1, uv_comp2 = [0.0, 0.0]
-            logger.sensors_logger.error("Pimoroni VEML6075 UVA & UVB Readings - Failed: " + str(error))
-        self.sensor_in_use = False
+        with self.bus_lock.access("Pimoroni VEML6075"):
+            try:
+                uv_comp1, uv_comp2 = self.uv_sensor.get_comparitor_readings()
+            except Exception as error:
+                uv_comp1, uv_comp2 = [0.0, 0.0]
+                logger.sensors_logger.error("Pimoroni VEML6075 UVA & UVB Readings - Failed: " + str(error))
         return [round(float(uv_comp1), round_decimal_to), round(float(uv_comp2), round_decimal_to)]
@@ -24,6 +24,7 @@ from configuration_modules import app_config_access
 from sensor_modules.pimoroni.pimoroni_bme280 import CreateBME280
 from sensor_modules.pimoroni.pimoroni_ltr_559 import CreateLTR559
 from sensor_modules.drivers.ioexpander import ioexpander as io
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 
 round_decimal_to = 5
 pause_sensor_during_access_sec = 0.02
@@ -65,6 +66,7 @@ class _WeatherHAT:
 
         self.updated_wind_rain = False
         self._lock = threading.Lock()
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
 
         self._ioe = io.IOE(i2c_addr=0x12, interrupt_pin=4)
 
@@ -104,10 +106,9 @@ class _WeatherHAT:
         self.reset_counts()
 
     def reset_counts(self):
-        self._lock.acquire(blocking=True)
-        self._ioe.clear_switch_counter(PIN_ANE2)
-        self._ioe.clear_switch_counter(PIN_R4)
-        self._lock.release()
+        with self.bus_lock.access("Pimoroni Weather HAT"), self._lock:
+            self._ioe.clear_switch_counter(PIN_ANE2)
+            self._ioe.clear_switch_counter(PIN_R4)
 
         self._wind_counts = 0
         self._rain_counts = 0
@@ -122,9 +123,8 @@ class _WeatherHAT:
         self.updated_wind_rain = False
 
         # Always update TPHL & Wind Direction
-        self._lock.acquire(blocking=True)
-        self.wind_direction_raw = self._ioe.input(PIN_WV)
-        self._lock.release()
+        with self.bus_lock.access("Pimoroni Weather HAT"), self._lock:
+            self.wind_direction_raw = self._ioe.input(PIN_WV)
 
         value, self.wind_direction = min(wind_direction_to_degrees.items(),
                                          key=lambda item: abs(item[0] - self.wind_direction_raw))
@@ -149,35 +149,33 @@ class _WeatherHAT:
         self.rain = rain_hz * RAIN_MM_PER_TICK
 
     def handle_ioe_interrupt(self, pin):
-        self._lock.acquire(blocking=True)
-        self._ioe.clear_interrupt()
-
-        wind_counts, _ = self._ioe.read_switch_counter(PIN_ANE2)
-        rain_counts, _ = self._ioe.read_switch_counter(PIN_R4)
+        with self.bus_lock.access("Pimoroni Weather HAT"), self._lock:
+            self._ioe.clear_interrupt()
 
-        # If the counter value is *less* than the previous value
-        # then we know the 7-bit switch counter overflowed
-        # We bump the count value by the lost counts between last_wind and 128
-        # since at 127 counts, one more count will overflow us back to 0
-        if wind_counts < self._last_wind_counts:
-            self._wind_counts += 128 - self._last_wind_counts
-            self._wind_counts += wind_counts
-        else:
-            self._wind_counts += wind_counts - self._last_wind_counts
+            wind_counts, _ = self._ioe.read_switch_counter(PIN_ANE2)
+            rain_counts, _ = self._ioe.read_switch_counter(PIN_R4)
 
-        self._last_wind_counts = wind_counts
+            # If the counter value is *less* than the previous value
+            # then we know the 7-bit switch counter overflowed
+            # We bump the count value by the lost counts between last_wind and 128
+            # since at 127 counts, one more count will overflow us back to 0
+            if wind_counts < self._last_wind_counts:
+                self._wind_counts += 128 - self._last_wind_counts
+                self._wind_counts += wind_counts
+            else:
+                self._wind_counts += wind_counts - self._last_wind_counts
 
-        if rain_counts < self._last_rain_counts:
-            self._rain_counts += 128 - self._last_rain_counts
-            self._rain_counts += rain_counts
-        else:
-            self._rain_counts += rain_counts - self._last_rain_counts
+            self._last_wind_counts = wind_counts
 
-        self._last_rain_counts = rain_counts
+            if rain_counts < self._last_rain_counts:
+                self._rain_counts += 128 - self._last_rain_counts
+                self._rain_counts += rain_counts
+            else:
+                self._rain_counts += rain_counts - self._last_rain_counts
 
-        # print(wind_counts, rain_counts, self._wind_counts, self._rain_counts)
+            self._last_rain_counts = rain_counts
 
-        self._lock.release()
+            # print(wind_counts, rain_counts, self._wind_counts, self._rain_counts)
 
 
 # ToDo: Create sensor access functions + db columns + add to other parts of program for new sensor types
@@ -185,7 +183,6 @@ class CreateWeatherHAT:
     """ Creates Function access to the Pimoroni Weather HAT. """
 
     def __init__(self):
-        self.sensor_in_use = False
         try:
             self.bme280 = CreateBME280()
             self.ltr559 = CreateLTR559()
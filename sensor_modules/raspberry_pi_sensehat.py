@@ -17,21 +17,20 @@ Created on Sat Aug 25 08:53:56 2018
 
 @author: OO-Dragon
 """
-import time
 from os import system
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, i2c_bus
 from operations_modules import app_cached_variables
 
 round_decimal_to = 5
-pause_sensor_during_access_sec = 0.02
 
 
 class CreateRPSenseHAT:
     """ Creates Function access to the Raspberry Pi Sense HAT. """
 
     def __init__(self):
-        self.sensor_in_use = False
+        self.bus_lock = bus_arbitration.get_bus_lock(i2c_bus)
         self.display_in_use = False
         try:
             sense_hat_import = __import__("sensor_modules.drivers.sense_hat", fromlist=["SenseHat"])
@@ -44,84 +43,66 @@ class CreateRPSenseHAT:
 
     def temperature(self):
         """ Returns Temperature as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            env_temp = float(self.sense_hat_access.get_temperature())
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Temperature - Failed: " + str(error))
-            env_temp = 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                env_temp = float(self.sense_hat_access.get_temperature())
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Temperature - Failed: " + str(error))
+                env_temp = 0.0
         return round(env_temp, round_decimal_to)
 
     def pressure(self):
         """ Returns Pressure as a Integer. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            pressure_hpa = self.sense_hat_access.get_pressure()
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Pressure - Failed: " + str(error))
-            pressure_hpa = 0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                pressure_hpa = self.sense_hat_access.get_pressure()
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Pressure - Failed: " + str(error))
+                pressure_hpa = 0
         return int(pressure_hpa)
 
     def humidity(self):
         """ Returns Humidity as a Float. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            var_humidity = self.sense_hat_access.get_humidity()
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Humidity - Failed: " + str(error))
-            var_humidity = 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                var_humidity = self.sense_hat_access.get_humidity()
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Humidity - Failed: " + str(error))
+                var_humidity = 0.0
         return round(var_humidity, round_decimal_to)
 
     def accelerometer_xyz(self):
         """ Returns Accelerometer X, Y, Z as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            tmp_acc = self.sense_hat_access.get_accelerometer_raw()
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                tmp_acc = self.sense_hat_access.get_accelerometer_raw()
 
-            acc_x, acc_y, acc_z = tmp_acc["x"], tmp_acc["y"], tmp_acc["z"]
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Accelerometer XYZ - Failed: " + str(error))
-            acc_x, acc_y, acc_z = 0.0, 0.0, 0.0
-        self.sensor_in_use = False
+                acc_x, acc_y, acc_z = tmp_acc["x"], tmp_acc["y"], tmp_acc["z"]
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Accelerometer XYZ - Failed: " + str(error))
+                acc_x, acc_y, acc_z = 0.0, 0.0, 0.0
         return [round(acc_x, round_decimal_to), round(acc_y, round_decimal_to), round(acc_z, round_decimal_to)]
 
     def magnetometer_xyz(self):
         """ Returns Magnetometer X, Y, Z as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            tmp_mag = self.sense_hat_access.get_compass_raw()
-            mag_x, mag_y, mag_z = tmp_mag["x"], tmp_mag["y"], tmp_mag["z"]
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Magnetometer XYZ - Failed: " + str(error))
-            mag_x, mag_y, mag_z = 0.0, 0.0, 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                tmp_mag = self.sense_hat_access.get_compass_raw()
+                mag_x, mag_y, mag_z = tmp_mag["x"], tmp_mag["y"], tmp_mag["z"]
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Magnetometer XYZ - Failed: " + str(error))
+                mag_x, mag_y, mag_z = 0.0, 0.0, 0.0
         return [round(mag_x, round_decimal_to), round(mag_y, round_decimal_to), round(mag_z, round_decimal_to)]
 
     def gyroscope_xyz(self):
         """ Returns Gyroscope X, Y, Z as Floats. """
-        while self.sensor_in_use:
-            time.sleep(pause_sensor_during_access_sec)
-        self.sensor_in_use = True
-        try:
-            tmp_gyro = self.sense_hat_access.get_gyroscope_raw()
-            gyro_x, gyro_y, gyro_z = tmp_gyro["x"], tmp_gyro["y"], tmp_gyro["z"]
-        except Exception as error:
-            logger.sensors_logger.error("Raspberry Pi Sense HAT Gyroscope XYZ - Failed: " + str(error))
-            gyro_x, gyro_y, gyro_z = 0.0, 0.0, 0.0
-        self.sensor_in_use = False
+        with self.bus_lock.access("Raspberry Pi Sense HAT"):
+            try:
+                tmp_gyro = self.sense_hat_access.get_gyroscope_raw()
+                gyro_x, gyro_y, gyro_z = tmp_gyro["x"], tmp_gyro["y"], tmp_gyro["z"]
+            except Exception as error:
+                logger.sensors_logger.error("Raspberry Pi Sense HAT Gyroscope XYZ - Failed: " + str(error))
+                gyro_x, gyro_y, gyro_z = 0.0, 0.0, 0.0
         return [round(gyro_x, round_decimal_to), round(gyro_y, round_decimal_to), round(gyro_z, round_decimal_to)]
 
     def start_joy_stick_commands(self):
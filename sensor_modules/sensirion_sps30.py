@@ -36,9 +36,10 @@ Created on Tue May 18th 14:48:56 2020
 @author: OO-Dragon
 """
 import time
-from threading import Thread
 from operations_modules import logger
 from configuration_modules import app_config_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
+from sensor_modules.sensor_bus_arbitration import bus_arbitration, serial_bus
 
 round_decimal_to = 5
 # Update readings in seconds
@@ -61,18 +62,17 @@ class CreateSPS30:
         self.sensor_latency = 0.0
 
         self.readings_missed = 0
+        self.bus_lock = bus_arbitration.get_bus_lock(serial_bus)
 
         try:
             self.sps30_pm_import = __import__("sensor_modules.drivers.SPS30.sps30", fromlist=["SPS30"])
             self.sensirion_sps30_access = self.sps30_pm_import.SPS30(device_port)
             self.sensirion_sps30_access.start()
             time.sleep(2)
-            self.thread_readings_updater = Thread(target=self._readings_updater)
-            self.thread_readings_updater.daemon = True
-            self.thread_readings_updater.start()
-            self.sensor_watchdog = Thread(target=self._sensor_watchdog)
-            self.sensor_watchdog.daemon = True
-            self.sensor_watchdog.start()
+            self.sampling_job = sampling_scheduler.add_job("Sensirion SPS30", self._update_readings,
+                                                           sleep_between_readings_seconds)
+            self.watchdog_job = sampling_scheduler.add_job("Sensirion SPS30 Watchdog", self._sensor_watchdog,
+                                                           sleep_between_readings_seconds)
             logger.sensors_logger.debug("Sensirion SPS30 Initialization - OK")
         except Exception as error:
             logger.sensors_logger.error("Sensirion SPS30 Initialization - Failed: " + str(error))
@@ -83,38 +83,38 @@ class CreateSPS30:
         """ Returns 3 Particulate Matter readings pm1, pm25, pm4 and pm10 as a list. """
         return [self.pm1_var, self.pm25_var, self.pm4_var, self.pm10_var]
 
-    def _readings_updater(self):
-        while True:
-            try:
-                logger.sensors_logger.debug("Sensirion SPS30 - Pre Get Data")
+    def _update_readings(self):
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        try:
+            logger.sensors_logger.debug("Sensirion SPS30 - Pre Get Data")
+            with self.bus_lock.access("Sensirion SPS30"):
                 start_time = time.time()
                 pm_data = self.sensirion_sps30_access.read_values()
                 end_time = time.time()
-                self.sensor_latency = float(end_time - start_time)
-                logger.sensors_logger.debug("Sensirion SPS30 - Post Get Data")
-                self.pm1_var = round(float(pm_data[0]), round_decimal_to)
-                self.pm25_var = round(float(pm_data[1]), round_decimal_to)
-                self.pm4_var = round(float(pm_data[2]), round_decimal_to)
-                self.pm10_var = round(float(pm_data[3]), round_decimal_to)
-                # Reset missed readings after reading update
-                self.readings_missed = 0
-            except Exception as error:
-                logger.sensors_logger.warning("Sensirion SPS30 - Update readings Failed: " + str(error))
-            time.sleep(sleep_between_readings_seconds)
+            self.sensor_latency = float(end_time - start_time)
+            logger.sensors_logger.debug("Sensirion SPS30 - Post Get Data")
+            self.pm1_var = round(float(pm_data[0]), round_decimal_to)
+            self.pm25_var = round(float(pm_data[1]), round_decimal_to)
+            self.pm4_var = round(float(pm_data[2]), round_decimal_to)
+            self.pm10_var = round(float(pm_data[3]), round_decimal_to)
+            # Reset missed readings after reading update
+            self.readings_missed = 0
+        except Exception as error:
+            logger.sensors_logger.warning("Sensirion SPS30 - Update readings Failed: " + str(error))
 
     def _sensor_watchdog(self):
-        while True:
-            if self.readings_missed > max_readings_missed_before_driver_reset:
-                self.pm1_var = 0.0
-                self.pm25_var = 0.0
-                self.pm4_var = 0.0
-                self.pm10_var = 0.0
-
+        """ Run by the sensor sampling scheduler every sleep_between_readings_seconds. """
+        if self.readings_missed > max_readings_missed_before_driver_reset:
+            self.pm1_var = 0.0
+            self.pm25_var = 0.0
+            self.pm4_var = 0.0
+            self.pm10_var = 0.0
+
+            with self.bus_lock.access("Sensirion SPS30"):
                 self.sensirion_sps30_access.stop()
                 self.sensirion_sps30_access.close_port()
                 time.sleep(0.5)
                 self.sensirion_sps30_access.__init__(device_port)
                 time.sleep(1)
                 self.sensirion_sps30_access.start()
-            time.sleep(sleep_between_readings_seconds)
-            self.readings_missed += 1
+        self.readings_missed += 1
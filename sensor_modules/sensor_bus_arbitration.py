@@ -0,0 +1,176 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Sensor bus arbitration.
+Sensor drivers access their hardware through a lock for the physical bus the sensor is on (I2C, SPI, etc.).
+Waiting readers are served in the order they asked (FIFO) instead of polling an "in use" flag, so the
+web portal, recording and triggers queue fairly. Each bus keeps access, wait time and utilization counts.
+"""
+from time import monotonic
+from threading import Lock, Condition, get_ident
+from contextlib import contextmanager
+
+i2c_bus = "I2C"
+spi_bus = "SPI"
+serial_bus = "Serial"
+one_wire_bus = "1-Wire"
+system_bus = "System"
+dummy_bus = "Dummy"
+
+
+class CreateBusLock:
+    """
+    FIFO lock for a sensor bus. The thread holding the lock can take it again (Re-entrant),
+    so driver functions using the bus can call each other.
+    """
+
+    def __init__(self, bus_name):
+        self.bus_name = bus_name
+        self._bus_condition = Condition(Lock())
+        self._next_ticket = 0
+        self._serving_ticket = 0
+        self._owner_thread_id = None
+        self._owner_depth = 0
+
+        self.stats_start_time = monotonic()
+        self.access_count = 0
+        self.contended_access_count = 0
+        self.busy_seconds = 0.0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.device_access_counts = {}
+        self._acquired_time = 0.0
+
+    @contextmanager
+    def access(self, device_name):
+        """ Holds the bus while the with block runs, waiting in line for other devices on the bus. """
+        self.acquire(device_name)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, device_name):
+        thread_id = get_ident()
+        with self._bus_condition:
+            if self._owner_thread_id == thread_id:
+                self._owner_depth += 1
+                return
+            wait_start_time = monotonic()
+            my_ticket = self._next_ticket
+            self._next_ticket += 1
+            if my_ticket != self._serving_ticket:
+                self.contended_access_count += 1
+                while my_ticket != self._serving_ticket:
+                    self._bus_condition.wait()
+            self._owner_thread_id = thread_id
+            self._owner_depth = 1
+            self._acquired_time = monotonic()
+
+            wait_seconds = self._acquired_time - wait_start_time
+            self.access_count += 1
+            self.total_wait_seconds += wait_seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, wait_seconds)
+            self.device_access_counts[device_name] = self.device_access_counts.get(device_name, 0) + 1
+
+    def release(self):
+        with self._bus_condition:
+            if self._owner_thread_id != get_ident():
+                raise RuntimeError("Bus " + self.bus_name + " released by a thread that doesn't hold it")
+            self._owner_depth -= 1
+            if self._owner_depth == 0:
+                self.busy_seconds += monotonic() - self._acquired_time
+                self._owner_thread_id = None
+                self._serving_ticket += 1
+                self._bus_condition.notify_all()
+
+    def get_utilization(self):
+        """ Returns the percent of time the bus has been in use since the stats were reset. """
+        with self._bus_condition:
+            busy_seconds = self.busy_seconds
+            if self._owner_thread_id is not None:
+                busy_seconds += monotonic() - self._acquired_time
+            stats_seconds = monotonic() - self.stats_start_time
+        if stats_seconds <= 0:
+            return 0.0
+        return round(min(busy_seconds / stats_seconds * 100, 100.0), 2)
+
+    def get_average_wait_seconds(self):
+        if self.access_count == 0:
+            return 0.0
+        return self.total_wait_seconds / self.access_count
+
+    def get_waiting_count(self):
+        """ Returns the number of threads waiting in line for the bus. """
+        with self._bus_condition:
+            waiting_count = self._next_ticket - self._serving_ticket
+            if self._owner_thread_id is not None:
+                waiting_count -= 1
+        return waiting_count
+
+    def reset_stats(self):
+        with self._bus_condition:
+            self.stats_start_time = monotonic()
+            self.access_count = 0
+            self.contended_access_count = 0
+            self.busy_seconds = 0.0
+            self.total_wait_seconds = 0.0
+            self.max_wait_seconds = 0.0
+            self.device_access_counts = {}
+            if self._owner_thread_id is not None:
+                self._acquired_time = self.stats_start_time
+
+    def get_status_text(self):
+        device_counts_text = ""
+        for device_name, access_count in sorted(self.device_access_counts.items()):
+            device_counts_text += device_name + ": " + str(access_count) + ", "
+        return self.bus_name + " Bus - Utilization: " + str(self.get_utilization()) + "%" + \
+            " || Accesses: " + str(self.access_count) + \
+            " || Waited: " + str(self.contended_access_count) + \
+            " || Average Wait: " + str(round(self.get_average_wait_seconds() * 1000, 3)) + " ms" + \
+            " || Max Wait: " + str(round(self.max_wait_seconds * 1000, 3)) + " ms" + \
+            " || Waiting Now: " + str(self.get_waiting_count()) + \
+            " || Devices: " + device_counts_text[:-2]
+
+
+class CreateBusArbitration:
+    """ Creates and holds the lock for each sensor bus. """
+
+    def __init__(self):
+        self._bus_locks_lock = Lock()
+        self._bus_locks = {}
+
+    def get_bus_lock(self, bus_name):
+        with self._bus_locks_lock:
+            if bus_name not in self._bus_locks:
+                self._bus_locks[bus_name] = CreateBusLock(bus_name)
+            return self._bus_locks[bus_name]
+
+    def get_bus_locks_list(self):
+        with self._bus_locks_lock:
+            return [self._bus_locks[bus_name] for bus_name in sorted(self._bus_locks)]
+
+    def get_status_text(self):
+        status_text = ""
+        for bus_lock in self.get_bus_locks_list():
+            status_text += bus_lock.get_status_text() + "\n"
+        return status_text.strip()
+
+
+bus_arbitration = CreateBusArbitration()
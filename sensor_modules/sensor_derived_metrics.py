@@ -0,0 +1,232 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Derived metrics engine.
+Metrics calculated from other sensor readings (Corrected Environment Temperature, Dew Point, Altitude) declare
+their inputs and formula here. Formulas use NumPy, so the same formula is used on a single set of readings
+and on NumPy arrays of recorded readings (back filling the database after changing the temperature offset).
+Without NumPy, single sets of readings are calculated with the math module instead.
+"""
+import math
+from operations_modules import logger
+from operations_modules.app_cached_variables import database_variables as db_v
+from configuration_modules import app_config_access
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy Derived Metrics Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+# Input name of the Environment Temperature before the offset & CPU compensation are applied (Not recorded)
+raw_env_temperature = "EnvironmentTempRaw"
+
+
+class CreateDerivedMetric:
+    """
+    Creates a derived metric. The formula is called with the required inputs, then the optional inputs
+    (NaN if missing) as float64 NumPy arrays (Floats without NumPy) and returns the metric's readings.
+    If only_if_missing is set, readings already provided by a sensor are kept.
+    """
+
+    def __init__(self, sql_column, required_inputs, formula, optional_inputs=None, only_if_missing=False):
+        self.sql_column = sql_column
+        self.required_inputs = required_inputs
+        self.optional_inputs = []
+        if optional_inputs is not None:
+            self.optional_inputs = optional_inputs
+        self.formula = formula
+        self.only_if_missing = only_if_missing
+
+    def get_inputs(self):
+        return self.required_inputs + self.optional_inputs
+
+    def get_readings(self, readings_dictionary):
+        """
+        Returns the metric calculated from the provided dictionary of input readings (Numbers or NumPy arrays).
+        Returns None if a required input is missing.
+        """
+        input_arrays = []
+        for input_name in self.required_inputs:
+            if readings_dictionary.get(input_name) is None:
+                return None
+            input_arrays.append(_get_float_array(readings_dictionary[input_name]))
+        for input_name in self.optional_inputs:
+            input_arrays.append(_get_float_array(readings_dictionary.get(input_name)))
+
+        if np is None:
+            try:
+                derived_reading = self.formula(*input_arrays)
+            except (ArithmeticError, ValueError):
+                derived_reading = math.nan
+            if self.only_if_missing and readings_dictionary.get(self.sql_column) is not None:
+                current_reading = _get_float_array(readings_dictionary[self.sql_column])
+                if not math.isnan(current_reading):
+                    derived_reading = current_reading
+            return derived_reading
+
+        with np.errstate(all="ignore"):
+            derived_readings = self.formula(*input_arrays)
+            if self.only_if_missing and readings_dictionary.get(self.sql_column) is not None:
+                current_readings = _get_float_array(readings_dictionary[self.sql_column])
+                derived_readings = np.where(np.isnan(current_readings), derived_readings, current_readings)
+        return derived_readings
+
+
+def _get_float_array(readings):
+    if np is None:
+        if readings is None:
+            return math.nan
+        return float(readings)
+    if readings is None:
+        return np.asarray(np.nan, dtype=np.float64)
+    return np.asarray(readings, dtype=np.float64)
+
+
+def _round(readings, digits):
+    if np is None:
+        return round(readings, digits)
+    return np.round(readings, digits)
+
+
+def _where(condition, readings_if_true, readings_if_false):
+    if np is None:
+        return readings_if_true if condition else readings_if_false
+    return np.where(condition, readings_if_true, readings_if_false)
+
+
+def _isnan(readings):
+    if np is None:
+        return math.isnan(readings)
+    return np.isnan(readings)
+
+
+def _isfinite(readings):
+    if np is None:
+        return math.isfinite(readings)
+    return np.isfinite(readings)
+
+
+def _log(readings):
+    if np is None:
+        if readings == 0:
+            return -math.inf
+        return math.log(readings) if readings > 0 else math.nan
+    return np.log(readings)
+
+
+def _power(readings, exponent):
+    if np is None:
+        return math.pow(readings, exponent) if readings >= 0 else math.nan
+    return np.power(readings, exponent)
+
+
+def _get_corrected_temperature(raw_temperature, cpu_temperature):
+    sensor_offsets = app_config_access.sensor_offsets
+    new_temperature = raw_temperature
+    if sensor_offsets.enable_temp_offset:
+        new_temperature = _round(new_temperature + float(sensor_offsets.temperature_offset), 6)
+
+    temperature_comp_factor = float(sensor_offsets.temperature_comp_factor)
+    if sensor_offsets.enable_temperature_comp_factor and temperature_comp_factor != 0:
+        compensated_temperature = new_temperature - ((cpu_temperature - new_temperature) * temperature_comp_factor)
+        compensated_temperature = _round(compensated_temperature, 6)
+        new_temperature = _where(_isnan(cpu_temperature), new_temperature, compensated_temperature)
+    return new_temperature
+
+
+def _get_temperature_offset(corrected_temperature, raw_temperature):
+    return _round(corrected_temperature - raw_temperature, 5)
+
+
+def _get_dew_point(temperature, humidity):
+    variable_a = 17.27
+    variable_b = 237.7
+    alpha = ((variable_a * temperature) / (variable_b + temperature)) + _log(humidity / 100.0)
+    dew_point = (variable_b * alpha) / (variable_a - alpha)
+    # Readings that can't be calculated (0 %RH) are recorded as 0.0
+    return _where(_isfinite(dew_point), _round(dew_point, 5), 0.0)
+
+
+def _get_altitude(temperature, pressure, qnh=1013.25):
+    altitude = ((_power((qnh / pressure), (1.0 / 5.257)) - 1) * (temperature + 273.15)) / 0.0065
+    return _round(altitude, 5)
+
+
+# Calculated in order, later metrics may use earlier metrics as inputs
+derived_metrics_list = [
+    CreateDerivedMetric(db_v.env_temperature, [raw_env_temperature], _get_corrected_temperature,
+                        optional_inputs=[db_v.system_temperature]),
+    CreateDerivedMetric(db_v.env_temperature_offset, [db_v.env_temperature, raw_env_temperature],
+                        _get_temperature_offset),
+    CreateDerivedMetric(db_v.dew_point, [db_v.env_temperature, db_v.humidity], _get_dew_point),
+    CreateDerivedMetric(db_v.altitude, [db_v.env_temperature, db_v.pressure], _get_altitude, only_if_missing=True)
+]
+
+
+def add_derived_readings(readings_dictionary):
+    """
+    Adds all derived metrics that can be calculated from the provided sensor readings to the dictionary.
+    Environment Temperature must be provided as raw_env_temperature, it's replaced by the corrected temperature.
+    """
+    for derived_metric in derived_metrics_list:
+        try:
+            derived_reading = derived_metric.get_readings(readings_dictionary)
+            if derived_reading is not None:
+                derived_reading = float(derived_reading)
+                if math.isfinite(derived_reading):
+                    readings_dictionary[derived_metric.sql_column] = derived_reading
+        except Exception as error:
+            logger.sensors_logger.warning("Derived Metric " + derived_metric.sql_column + " Failed: " + str(error))
+    readings_dictionary.pop(raw_env_temperature, None)
+    return readings_dictionary
+
+
+def get_metric_inputs(sql_column):
+    """
+    Returns a list of the sensor readings used to calculate the provided derived metric,
+    including the inputs of derived metrics it uses. Returns an empty list if it's not a derived metric.
+    """
+    metric_inputs = []
+    for derived_metric in derived_metrics_list:
+        if derived_metric.sql_column == sql_column:
+            for input_name in derived_metric.get_inputs():
+                input_metric_inputs = get_metric_inputs(input_name)
+                if len(input_metric_inputs) == 0:
+                    input_metric_inputs = [input_name]
+                for metric_input in input_metric_inputs:
+                    if metric_input not in metric_inputs:
+                        metric_inputs.append(metric_input)
+    return metric_inputs
+
+
+def get_derived_arrays(readings_arrays):
+    """
+    Returns a dictionary of derived metric NumPy arrays calculated from the provided dictionary of reading
+    arrays (Database columns, missing readings as NaN). Used to recalculate recorded readings. Requires NumPy.
+    """
+    readings_arrays = dict(readings_arrays)
+    derived_arrays = {}
+    for derived_metric in derived_metrics_list:
+        derived_readings = derived_metric.get_readings(readings_arrays)
+        if derived_readings is not None:
+            readings_arrays[derived_metric.sql_column] = derived_readings
+            derived_arrays[derived_metric.sql_column] = derived_readings
+    return derived_arrays
@@ -0,0 +1,232 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+High rate IMU (Accelerometer, Magnetometer & Gyroscope) capture for vibration monitoring.
+The installed IMU sensors are read directly (No snapshots) at the configured sample rate on their own thread
+and every reading goes into a ring buffer. At the end of each capture window, the mean, RMS, peak and FFT band
+energies of every reading are calculated with NumPy and only those summaries are recorded to the database.
+"""
+from time import time, sleep, perf_counter
+from math import ceil, isfinite
+from operations_modules import logger
+from operations_modules import app_cached_variables
+from operations_modules.app_cached_variables import latency_variables
+from operations_modules.app_generic_classes import CreateMonitoredThread
+from operations_modules.sqlite_write_queue import queue_sql_write
+from configuration_modules import app_config_access
+from sensor_modules import sensor_access
+from sensor_modules.sensor_recent_readings import CreateMetricRingBuffer
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy IMU Capture Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+db_v = app_cached_variables.database_variables
+
+imu_reading_types = [
+    latency_variables.accelerometer_xyz, latency_variables.magnetometer_xyz, latency_variables.gyroscope_xyz
+]
+
+
+def get_vibration_summary(readings, sample_rate_hz, fft_band_count):
+    """
+    Returns a dictionary summary of the provided NumPy array of evenly spaced readings.
+    RMS & Peak are of the readings with the Mean removed (Gravity, Earth's magnetic field, etc.).
+    The FFT is split into fft_band_count equal width bands from 0 Hz to half the sample rate.
+    Band energies are the mean square of the readings in each band, so they add up to RMS squared.
+    """
+    vibration_readings = readings - readings.mean()
+    reading_count = vibration_readings.shape[0]
+
+    band_energies = np.abs(np.fft.rfft(vibration_readings)) ** 2 / reading_count ** 2
+    # One sided spectrum, all bins except 0 Hz and the Nyquist frequency (Even counts only) are mirrored
+    band_energies[1:] *= 2
+    if reading_count % 2 == 0:
+        band_energies[-1] /= 2
+    band_width_hz = sample_rate_hz / 2 / fft_band_count
+    frequencies = np.fft.rfftfreq(reading_count, d=1 / sample_rate_hz)
+    band_indexes = np.minimum((frequencies / band_width_hz).astype(np.int64), fft_band_count - 1)
+
+    return {
+        "Count": reading_count,
+        "SampleRateHz": sample_rate_hz,
+        "Mean": float(readings.mean()),
+        "RMS": float(np.sqrt(np.mean(vibration_readings ** 2))),
+        "Peak": float(np.abs(vibration_readings).max()),
+        "BandWidthHz": band_width_hz,
+        "BandEnergies": np.bincount(band_indexes, weights=band_energies, minlength=fft_band_count)
+    }
+
+
+class CreateIMUCapture:
+    """ Captures IMU readings into ring buffers and records windowed summaries of them. """
+
+    def __init__(self):
+        self.sensor_providers = []
+        self._ring_buffers = {}
+        self.latest_summaries = {}
+        self.samples_captured = 0
+        self.samples_missed = 0
+        self.read_errors = 0
+
+    def setup(self):
+        """ Gets the installed IMU sensors and creates empty ring buffers. Returns False if there are none. """
+        if np is None:
+            logger.primary_logger.warning("IMU Capture Disabled - NumPy Missing")
+            return False
+
+        self.sensor_providers = []
+        for reading_type in imu_reading_types:
+            sensor_provider = sensor_access.sensors_direct.sensor_providers.get(reading_type)
+            if sensor_provider is not None:
+                self.sensor_providers.append(sensor_provider)
+        if len(self.sensor_providers) == 0:
+            logger.primary_logger.warning("IMU Capture Disabled - No Accelerometer, Magnetometer or Gyroscope")
+            return False
+
+        imu_capture_config = app_config_access.imu_capture_config
+        buffer_seconds = max(imu_capture_config.ring_buffer_seconds, imu_capture_config.summary_window_seconds)
+        max_samples = ceil(imu_capture_config.sample_rate_hz * buffer_seconds) + 1
+        self._ring_buffers = {}
+        for sensor_provider in self.sensor_providers:
+            for sql_column in sensor_provider.sql_columns:
+                self._ring_buffers[sql_column] = CreateMetricRingBuffer(sql_column, max_samples)
+        self.latest_summaries = {}
+        return True
+
+    def run_capture(self):
+        """ Captures samples & records window summaries until the IMU Capture thread is restarted. """
+        imu_capture_config = app_config_access.imu_capture_config
+        sample_seconds = 1 / imu_capture_config.sample_rate_hz
+        log_msg = " -- IMU Capture Started at " + str(imu_capture_config.sample_rate_hz) + " Hz for "
+        logger.primary_logger.info(log_msg + ", ".join(self._ring_buffers))
+
+        next_sample_time = perf_counter()
+        window_start_epoch = time()
+        while not app_cached_variables.restart_imu_capture_thread:
+            self.capture_sample()
+            now_epoch = time()
+            if now_epoch - window_start_epoch >= imu_capture_config.summary_window_seconds:
+                self.record_summaries(window_start_epoch, now_epoch)
+                window_start_epoch = now_epoch
+
+            next_sample_time += sample_seconds
+            sleep_seconds = next_sample_time - perf_counter()
+            if sleep_seconds > 0:
+                sleep(sleep_seconds)
+            else:
+                # Sensors are slower than the sample rate, missed samples are skipped instead of read in a burst
+                missed_samples = int(-sleep_seconds / sample_seconds)
+                self.samples_missed += missed_samples
+                next_sample_time += missed_samples * sample_seconds
+
+    def capture_sample(self):
+        """ Reads the IMU sensors once and adds their readings to the ring buffers. """
+        epoch_seconds = time()
+        for sensor_provider in self.sensor_providers:
+            try:
+                for sql_column, reading in sensor_provider.get_readings().items():
+                    reading = float(reading)
+                    if isfinite(reading):
+                        self._ring_buffers[sql_column].add_reading(epoch_seconds, reading)
+            except Exception as error:
+                self.read_errors += 1
+                logger.sensors_logger.debug("IMU Capture " + sensor_provider.reading_type + " Read: " + str(error))
+        self.samples_captured += 1
+
+    def record_summaries(self, start_epoch, end_epoch):
+        """ Queues a database write of the summary of every IMU reading captured in the provided window. """
+        fft_band_count = app_config_access.imu_capture_config.fft_band_count
+        end_epoch_ms = int(end_epoch * 1000)
+        sql_query = "INSERT INTO " + db_v.table_imu_summaries + " (" + ", ".join([
+            db_v.all_tables_datetime_epoch_ms, db_v.narrow_metric_name, db_v.imu_sample_count, db_v.imu_sample_rate,
+            db_v.imu_mean, db_v.imu_rms, db_v.imu_peak, db_v.imu_fft_band_width, db_v.imu_fft_band_energies
+        ]) + ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+        for metric_name, ring_buffer in self._ring_buffers.items():
+            epochs, readings = ring_buffer.get_readings(start_epoch=start_epoch, end_epoch=end_epoch)
+            if readings.shape[0] < 2 or epochs[-1] <= epochs[0]:
+                continue
+            # Measured sample rate, slow sensor reads lower it below the configured rate
+            sample_rate_hz = (readings.shape[0] - 1) / (epochs[-1] - epochs[0])
+            try:
+                summary = get_vibration_summary(readings, sample_rate_hz, fft_band_count)
+            except Exception as error:
+                logger.sensors_logger.warning("IMU Capture " + metric_name + " Summary Failed: " + str(error))
+                continue
+            summary["EpochMS"] = end_epoch_ms
+            self.latest_summaries[metric_name] = summary
+
+            band_energies_text = ",".join([str(round(float(energy), 9)) for energy in summary["BandEnergies"]])
+            sql_data = [end_epoch_ms, metric_name, summary["Count"], round(sample_rate_hz, 3),
+                        round(summary["Mean"], 6), round(summary["RMS"], 6), round(summary["Peak"], 6),
+                        round(summary["BandWidthHz"], 3), band_energies_text]
+            queue_sql_write(sql_query, sql_data)
+
+        if self.read_errors:
+            logger.sensors_logger.warning("IMU Capture - " + str(self.read_errors) + " Sensor Read Errors")
+            self.read_errors = 0
+
+    def get_metric_samples(self, metric_name, seconds=None):
+        """ Returns (epochs, readings) NumPy arrays of the newest captured samples or None if not captured. """
+        ring_buffer = self._ring_buffers.get(metric_name)
+        if ring_buffer is None:
+            return None
+        start_epoch = None
+        if seconds is not None:
+            start_epoch = time() - seconds
+        return ring_buffer.get_readings(start_epoch=start_epoch)
+
+    def get_summary_text(self):
+        """ Returns the latest window summary of every captured IMU reading as text. """
+        summary_text = "Samples Captured: " + str(self.samples_captured) + \
+                       " || Samples Missed: " + str(self.samples_missed) + "\n"
+        for metric_name, summary in self.latest_summaries.items():
+            band_energies = [str(round(float(energy), 6)) for energy in summary["BandEnergies"]]
+            summary_text += metric_name + " - Samples: " + str(summary["Count"]) + \
+                " @ " + str(round(summary["SampleRateHz"], 1)) + " Hz" + \
+                " || Mean: " + str(round(summary["Mean"], 6)) + \
+                " || RMS: " + str(round(summary["RMS"], 6)) + \
+                " || Peak: " + str(round(summary["Peak"], 6)) + \
+                " || FFT Bands (" + str(round(summary["BandWidthHz"], 2)) + " Hz): " + ", ".join(band_energies) + "\n"
+        return summary_text.strip()
+
+
+imu_capture = CreateIMUCapture()
+
+
+def start_imu_capture_server():
+    text_name = "IMU Capture"
+    function = _imu_capture_server
+    app_cached_variables.imu_capture_thread = CreateMonitoredThread(function, thread_name=text_name)
+
+
+def _imu_capture_server():
+    """ Captures IMU readings at a high rate while enabled, restarted to apply configuration changes. """
+    app_cached_variables.restart_imu_capture_thread = False
+    if app_config_access.imu_capture_config.enable_imu_capture and imu_capture.setup():
+        app_cached_variables.imu_capture_thread.current_state = "Running"
+        imu_capture.run_capture()
+    else:
+        app_cached_variables.imu_capture_thread.current_state = "Disabled"
+        while not app_cached_variables.restart_imu_capture_thread:
+            sleep(5)
@@ -0,0 +1,185 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Sensor latency histograms.
+sensor_access records how long every real sensor read takes (snapshot hits are not reads) into a histogram
+per sensor, so latency statistics are available without reading the sensors again to measure them.
+Each histogram keeps two windows that are rotated every latency_window_seconds, statistics cover the reads of
+the last one to two windows, so old reads stop counting.
+"""
+from time import monotonic
+from bisect import bisect_left
+from threading import Lock
+
+# Bucket upper bounds in seconds, 4 per decade from 10 microseconds to 100 seconds, plus one overflow bucket
+latency_bucket_bounds = [round(10 ** (exponent / 4), 9) for exponent in range(-20, 9)]
+latency_window_seconds = 3600
+
+
+class CreateLatencyWindow:
+    """ Creates the bucket counts and totals of the reads in one latency histogram window. """
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(latency_bucket_bounds) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+
+class CreateLatencyHistogram:
+    """
+    Creates a latency histogram for one sensor.
+    The same sensor can be read at the same time by different services (Snapshots disabled) while its statistics
+    are read, so window rotation and updates are done under the histogram's lock.
+    """
+
+    def __init__(self, sensor_name):
+        self.sensor_name = sensor_name
+        self.latest_seconds = 0.0
+        self._histogram_lock = Lock()
+        self._current_window = CreateLatencyWindow()
+        self._previous_window = CreateLatencyWindow()
+        self._window_start_time = monotonic()
+
+    def add_latency(self, latency_seconds):
+        """ Adds a read duration in seconds to the histogram. """
+        with self._histogram_lock:
+            self._rotate_windows()
+            window = self._current_window
+            window.bucket_counts[bisect_left(latency_bucket_bounds, latency_seconds)] += 1
+            window.count += 1
+            window.total_seconds += latency_seconds
+            if latency_seconds > window.max_seconds:
+                window.max_seconds = latency_seconds
+            self.latest_seconds = latency_seconds
+
+    def get_count(self):
+        """ Returns the number of reads in the current and previous windows. """
+        with self._histogram_lock:
+            self._rotate_windows()
+            return self._current_window.count + self._previous_window.count
+
+    def get_max(self):
+        """ Returns the slowest read in the current and previous windows in seconds. """
+        with self._histogram_lock:
+            self._rotate_windows()
+            return max(self._current_window.max_seconds, self._previous_window.max_seconds)
+
+    def get_average(self):
+        """ Returns the average latency in seconds or None if there are no reads. """
+        with self._histogram_lock:
+            self._rotate_windows()
+            count = self._current_window.count + self._previous_window.count
+            if count == 0:
+                return None
+            return (self._current_window.total_seconds + self._previous_window.total_seconds) / count
+
+    def get_percentile(self, percentile):
+        """
+        Returns the latency in seconds that the provided percentile (0 to 100) of reads finished within.
+        The value is the upper bound of the matching bucket, limited to the slowest read. None if there are no reads.
+        """
+        with self._histogram_lock:
+            self._rotate_windows()
+            bucket_counts = [current_count + previous_count for current_count, previous_count in
+                             zip(self._current_window.bucket_counts, self._previous_window.bucket_counts)]
+            max_seconds = max(self._current_window.max_seconds, self._previous_window.max_seconds)
+        total_count = sum(bucket_counts)
+        if total_count == 0:
+            return None
+
+        needed_count = total_count * percentile / 100
+        running_count = 0
+        for index, bucket_count in enumerate(bucket_counts):
+            running_count += bucket_count
+            if running_count >= needed_count and bucket_count > 0:
+                if index < len(latency_bucket_bounds):
+                    return min(latency_bucket_bounds[index], max_seconds)
+                break
+        return max_seconds
+
+    def get_summary_text(self):
+        """ Returns the histogram's average, 99th percentile and maximum latency as text. """
+        count = self.get_count()
+        average_seconds = self.get_average()
+        p99_seconds = self.get_percentile(99)
+        # Windows may have been rotated between getting each statistic
+        if count == 0 or average_seconds is None or p99_seconds is None:
+            return "No Reads"
+        return "Avg " + str(round(average_seconds, 6)) + " / P99 " + str(round(p99_seconds, 6)) + \
+               " / Max " + str(round(self.get_max(), 6)) + " Sec (" + str(count) + " Reads)"
+
+    def reset(self):
+        with self._histogram_lock:
+            self.latest_seconds = 0.0
+            self._current_window = CreateLatencyWindow()
+            self._previous_window = CreateLatencyWindow()
+            self._window_start_time = monotonic()
+
+    def _rotate_windows(self):
+        """
+        Starts a new window once the current one is latency_window_seconds old, dropping the previous one.
+        Only call while holding the histogram's lock.
+        """
+        window_age_seconds = monotonic() - self._window_start_time
+        if window_age_seconds >= latency_window_seconds:
+            if window_age_seconds >= latency_window_seconds * 2:
+                # No reads for over a window, both windows are out of date
+                self._previous_window = CreateLatencyWindow()
+            else:
+                self._previous_window = self._current_window
+            self._current_window = CreateLatencyWindow()
+            self._window_start_time = monotonic()
+
+
+class CreateLatencyHistograms:
+    """ Creates a latency histogram per sensor, added as sensors are read. """
+
+    def __init__(self):
+        self._histograms = {}
+
+    def add_latency(self, sensor_name, latency_seconds):
+        """ Adds a read duration in seconds to the sensor's histogram. """
+        if latency_seconds is None:
+            return
+        histogram = self._histograms.get(sensor_name)
+        if histogram is None:
+            histogram = self._histograms.setdefault(sensor_name, CreateLatencyHistogram(sensor_name))
+        histogram.add_latency(float(latency_seconds))
+
+    def get_histogram(self, sensor_name):
+        """ Returns the sensor's latency histogram or None if the sensor hasn't been read. """
+        return self._histograms.get(sensor_name)
+
+    def get_latency_seconds(self, sensor_name, percentile=None):
+        """ Returns the sensor's average latency, or the provided percentile, in seconds. None if not read. """
+        histogram = self._histograms.get(sensor_name)
+        if histogram is None:
+            return None
+        if percentile is None:
+            return histogram.get_average()
+        return histogram.get_percentile(percentile)
+
+    def reset(self):
+        """ Clears all sensor latency histograms. """
+        for histogram in list(self._histograms.values()):
+            histogram.reset()
+
+
+sensor_latency_histograms = CreateLatencyHistograms()
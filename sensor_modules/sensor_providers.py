@@ -0,0 +1,226 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Sensor provider registry.
+For each reading type, the first installed sensor in sensor_provider_precedence provides the readings.
+Providers are built once when sensors are (re)initialized, so reading a sensor is a single dictionary lookup.
+"""
+from operations_modules import logger
+from operations_modules.app_cached_variables import database_variables as db_v, latency_variables
+from configuration_modules import app_config_access
+
+reading_units = {
+    db_v.env_temperature: "°C", db_v.system_temperature: "°C", db_v.dew_point: "°C",
+    db_v.env_temperature_offset: "°C", "Seconds": "Sec", db_v.pressure: "hPa", db_v.altitude: "Meters",
+    db_v.humidity: "%RH", db_v.distance: "?",
+    db_v.gas_resistance_index: "kΩ", db_v.gas_oxidising: "kΩ", db_v.gas_reducing: "kΩ", db_v.gas_nh3: "kΩ",
+    db_v.particulate_matter_1: "µg/m³", db_v.particulate_matter_2_5: "µg/m³", db_v.particulate_matter_4: "µg/m³",
+    db_v.particulate_matter_10: "µg/m³",
+    db_v.lumen: "lm", db_v.red: "lm", db_v.orange: "lm", db_v.yellow: "lm", db_v.green: "lm", db_v.blue: "lm",
+    db_v.violet: "lm", db_v.ultra_violet_a: "lm", db_v.ultra_violet_b: "lm", db_v.ultra_violet_index: "lm",
+    db_v.acc_x: "g", db_v.acc_y: "g", db_v.acc_z: "g",
+    db_v.mag_x: "μT", db_v.mag_y: "μT", db_v.mag_z: "μT",
+    db_v.gyro_x: "°/s", db_v.gyro_y: "°/s", db_v.gyro_z: "°/s",
+    db_v.sensor_uptime: "Minutes", db_v.gps_speed_over_ground: "km/hr?", db_v.gps_timestamp: "UTC0"
+}
+
+_gas_columns = [db_v.gas_oxidising, db_v.gas_reducing, db_v.gas_nh3]
+_rgb_columns = [db_v.red, db_v.green, db_v.blue]
+_six_colour_columns = [db_v.red, db_v.orange, db_v.yellow, db_v.green, db_v.blue, db_v.violet]
+_uv_columns = [db_v.ultra_violet_index, db_v.ultra_violet_a, db_v.ultra_violet_b]
+_acc_columns = [db_v.acc_x, db_v.acc_y, db_v.acc_z]
+_mag_columns = [db_v.mag_x, db_v.mag_y, db_v.mag_z]
+_gyro_columns = [db_v.gyro_x, db_v.gyro_y, db_v.gyro_z]
+_gps_columns = [db_v.latitude, db_v.longitude, db_v.altitude, db_v.gps_timestamp, db_v.gps_num_satellites,
+                db_v.gps_quality, db_v.gps_mode_fix_type, db_v.gps_speed_over_ground, db_v.gps_pdop,
+                db_v.gps_hdop, db_v.gps_vdop]
+
+# Reading Type: [[Installed Sensor, Sensor Access Variable, Driver Methods, SQL Columns, Uses Driver Latency], ...]
+# Listed in order of precedence, the first installed sensor is used
+sensor_provider_precedence = {
+    latency_variables.cpu_temperature: [
+        ["raspberry_pi", "raspberry_pi_a", ["cpu_temperature"], [db_v.system_temperature], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["cpu_temperature"], [db_v.system_temperature], False]
+    ],
+    latency_variables.environment_temperature: [
+        ["pimoroni_bme680", "pimoroni_bme680_a", ["temperature"], [db_v.env_temperature], True],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_enviro2", "pimoroni_enviro2_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_mcp9600", "pimoroni_mcp9600_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_bme280", "pimoroni_bme280_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_bmp280", "pimoroni_bmp280_a", ["temperature"], [db_v.env_temperature], False],
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["temperature"], [db_v.env_temperature], False],
+        ["w1_therm_sensor", "w1_therm_sensor_a", ["temperature"], [db_v.env_temperature], False],
+        ["pimoroni_weather_hat", "pimoroni_weather_hat_a", ["temperature"], [db_v.env_temperature], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["temperature"], [db_v.env_temperature], False]
+    ],
+    latency_variables.pressure: [
+        ["pimoroni_bme680", "pimoroni_bme680_a", ["pressure"], [db_v.pressure], True],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["pressure"], [db_v.pressure], False],
+        ["pimoroni_enviro2", "pimoroni_enviro2_a", ["pressure"], [db_v.pressure], False],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["pressure"], [db_v.pressure], False],
+        ["pimoroni_bme280", "pimoroni_bme280_a", ["pressure"], [db_v.pressure], False],
+        ["pimoroni_bmp280", "pimoroni_bmp280_a", ["pressure"], [db_v.pressure], False],
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["pressure"], [db_v.pressure], False],
+        ["pimoroni_weather_hat", "pimoroni_weather_hat_a", ["pressure"], [db_v.pressure], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["pressure"], [db_v.pressure], False]
+    ],
+    latency_variables.altitude: [
+        ["pimoroni_pa1010d", "pimoroni_pa1010d_a", ["altitude"], [db_v.altitude], True],
+        ["pimoroni_bmp280", "pimoroni_bmp280_a", ["altitude"], [db_v.altitude], False],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["altitude"], [db_v.altitude], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["altitude"], [db_v.altitude], False]
+    ],
+    latency_variables.humidity: [
+        ["pimoroni_bme680", "pimoroni_bme680_a", ["humidity"], [db_v.humidity], True],
+        ["pimoroni_bme280", "pimoroni_bme280_a", ["humidity"], [db_v.humidity], False],
+        ["pimoroni_enviro2", "pimoroni_enviro2_a", ["humidity"], [db_v.humidity], False],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["humidity"], [db_v.humidity], False],
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["humidity"], [db_v.humidity], False],
+        ["pimoroni_weather_hat", "pimoroni_weather_hat_a", ["humidity"], [db_v.humidity], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["humidity"], [db_v.humidity], False]
+    ],
+    latency_variables.distance: [
+        ["pimoroni_enviro2", "pimoroni_enviro2_a", ["distance"], [db_v.distance], False],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["distance"], [db_v.distance], False],
+        ["pimoroni_vl53l1x", "pimoroni_vl53l1x_a", ["distance"], [db_v.distance], False],
+        ["pimoroni_ltr_559", "pimoroni_ltr_559_a", ["distance"], [db_v.distance], False],
+        ["pimoroni_weather_hat", "pimoroni_weather_hat_a", ["distance"], [db_v.distance], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["distance"], [db_v.distance], False]
+    ],
+    latency_variables.gas: [
+        ["pimoroni_bme680", "pimoroni_bme680_a", ["gas_resistance_index"], [db_v.gas_resistance_index], True],
+        ["pimoroni_sgp30", "pimoroni_sgp30_a", ["gas_resistance_index"], [db_v.gas_resistance_index], True],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["gas_data"], _gas_columns, False],
+        ["pimoroni_mics6814", "pimoroni_mics6814_a", ["gas_data"], _gas_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["gas_resistance_index", "gas_data"],
+         [db_v.gas_resistance_index] + _gas_columns, False]
+    ],
+    latency_variables.particulate_matter: [
+        ["pimoroni_pms5003", "pimoroni_pms5003_a", ["particulate_matter_data"],
+         [db_v.particulate_matter_1, db_v.particulate_matter_2_5, db_v.particulate_matter_10], True],
+        ["sensirion_sps30", "sensirion_sps30_a", ["particulate_matter_data"],
+         [db_v.particulate_matter_1, db_v.particulate_matter_2_5, db_v.particulate_matter_4,
+          db_v.particulate_matter_10], True],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["particulate_matter_data"],
+         [db_v.particulate_matter_1, db_v.particulate_matter_2_5, db_v.particulate_matter_4,
+          db_v.particulate_matter_10], False]
+    ],
+    latency_variables.lumen: [
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["lumen"], [db_v.lumen], False],
+        ["pimoroni_enviro2", "pimoroni_enviro2_a", ["lumen"], [db_v.lumen], False],
+        ["pimoroni_enviroplus", "pimoroni_enviroplus_a", ["lumen"], [db_v.lumen], False],
+        ["pimoroni_bh1745", "pimoroni_bh1745_a", ["lumen"], [db_v.lumen], False],
+        ["pimoroni_ltr_559", "pimoroni_ltr_559_a", ["lumen"], [db_v.lumen], False],
+        ["pimoroni_weather_hat", "pimoroni_weather_hat_a", ["lumen"], [db_v.lumen], False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["lumen"], [db_v.lumen], False]
+    ],
+    latency_variables.colours: [
+        ["pimoroni_as7262", "pimoroni_as7262_a", ["spectral_six_channel"], _six_colour_columns, False],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["ems"], _rgb_columns, False],
+        ["pimoroni_bh1745", "pimoroni_bh1745_a", ["ems"], _rgb_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["spectral_six_channel"], _six_colour_columns, False]
+    ],
+    latency_variables.ultra_violet: [
+        ["pimoroni_veml6075", "pimoroni_veml6075_a", ["ultra_violet_index", "ultra_violet"], _uv_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["ultra_violet_index", "ultra_violet"], _uv_columns, False]
+    ],
+    latency_variables.accelerometer_xyz: [
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["accelerometer_xyz"], _acc_columns, False],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["accelerometer_xyz"], _acc_columns, False],
+        ["pimoroni_msa301", "pimoroni_msa301_a", ["accelerometer_xyz"], _acc_columns, False],
+        ["pimoroni_lsm303d", "pimoroni_lsm303d_a", ["accelerometer_xyz"], _acc_columns, False],
+        ["pimoroni_icm20948", "pimoroni_icm20948_a", ["accelerometer_xyz"], _acc_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["accelerometer_xyz"], _acc_columns, False]
+    ],
+    latency_variables.magnetometer_xyz: [
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["magnetometer_xyz"], _mag_columns, False],
+        ["pimoroni_enviro", "pimoroni_enviro_a", ["magnetometer_xyz"], _mag_columns, False],
+        ["pimoroni_lsm303d", "pimoroni_lsm303d_a", ["magnetometer_xyz"], _mag_columns, False],
+        ["pimoroni_icm20948", "pimoroni_icm20948_a", ["magnetometer_xyz"], _mag_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["magnetometer_xyz"], _mag_columns, False]
+    ],
+    latency_variables.gyroscope_xyz: [
+        ["raspberry_pi_sense_hat", "rp_sense_hat_a", ["gyroscope_xyz"], _gyro_columns, False],
+        ["pimoroni_icm20948", "pimoroni_icm20948_a", ["gyroscope_xyz"], _gyro_columns, False],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["gyroscope_xyz"], _gyro_columns, False]
+    ],
+    latency_variables.gps: [
+        ["pimoroni_pa1010d", "pimoroni_pa1010d_a", ["all_gps_data"], _gps_columns, True],
+        ["kootnet_dummy_sensor", "dummy_sensors", ["all_gps_data"], _gps_columns, False]
+    ]
+}
+
+
+class CreateSensorProvider:
+    """ Creates a sensor provider holding the bound driver methods used for a reading type. """
+
+    def __init__(self, reading_type, installed_sensor, driver, method_names, sql_columns, driver_latency=False):
+        self.reading_type = reading_type
+        self.installed_sensor = installed_sensor
+        self.driver = driver
+        self.driver_methods = [getattr(driver, method_name) for method_name in method_names]
+        self.sql_columns = sql_columns
+        self.reading_units = [reading_units.get(column_name, "") for column_name in sql_columns]
+
+        # Sensors with their own update loops time themselves, others are timed by the caller
+        self.driver_latency = driver_latency
+
+    def get_readings(self):
+        """ Returns the driver's readings in a dictionary keyed by SQL column. """
+        readings_list = []
+        for driver_method in self.driver_methods:
+            reading = driver_method()
+            if type(reading) is list or type(reading) is tuple:
+                readings_list += list(reading)
+            else:
+                readings_list.append(reading)
+        return dict(zip(self.sql_columns, readings_list))
+
+    def get_driver_latency(self):
+        """ Returns the driver's own latency or None if the driver doesn't track it. """
+        if self.driver_latency:
+            return self.driver.sensor_latency
+        return None
+
+
+def get_sensor_providers(sensor_access):
+    """ Returns a dictionary of reading type to sensor provider based on installed sensors. """
+    installed_sensors = app_config_access.installed_sensors
+    sensor_providers = {}
+    for reading_type, provider_definitions in sensor_provider_precedence.items():
+        for installed_sensor, variable_name, method_names, sql_columns, driver_latency in provider_definitions:
+            driver = getattr(sensor_access, variable_name, None)
+            if not getattr(installed_sensors, installed_sensor) or driver is None:
+                continue
+            try:
+                sensor_providers[reading_type] = CreateSensorProvider(
+                    reading_type, installed_sensor, driver, method_names, sql_columns, driver_latency=driver_latency
+                )
+                break
+            except Exception as error:
+                log_msg = "Sensor Provider " + installed_sensor + " for " + reading_type + " skipped: "
+                logger.sensors_logger.error(log_msg + str(error))
+
+    providers_text = ""
+    for reading_type, sensor_provider in sensor_providers.items():
+        providers_text += reading_type + ": " + sensor_provider.installed_sensor + ", "
+    logger.sensors_logger.debug("Sensor Providers - " + providers_text[:-2])
+    return sensor_providers
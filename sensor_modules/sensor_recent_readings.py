@@ -0,0 +1,216 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Recent sensor readings kept in memory.
+Each sensor reading type (Database column name) has a fixed size ring buffer of the newest readings,
+filled with the readings of every sensor read done through sensor snapshots (No extra sensor reads are done).
+Recent readings for a time window
+and simple aggregates (Count, Min, Max, Average, etc.) are available without reading the database.
+"""
+from time import time
+from math import isfinite
+from threading import Lock
+from operations_modules import logger
+from configuration_modules import app_config_access
+from sensor_modules.sensor_snapshots import sensor_snapshots
+
+try:
+    import numpy as np
+except ImportError as import_error:
+    np = None
+    log_message = "**** Missing NumPy Recent Readings Dependency - There may be unintended side effects as a result: "
+    logger.primary_logger.error(log_message + str(import_error))
+
+
+class CreateMetricRingBuffer:
+    """ Fixed size ring buffer of (UTC0 epoch seconds, reading) for one sensor reading type. """
+
+    def __init__(self, metric_name, max_readings):
+        self.metric_name = metric_name
+        self.max_readings = max(int(max_readings), 1)
+        self._buffer_lock = Lock()
+        self._epochs = np.zeros(self.max_readings, dtype=np.float64)
+        self._readings = np.zeros(self.max_readings, dtype=np.float64)
+        self._oldest_index = 0
+        self._count = 0
+
+    def add_reading(self, epoch_seconds, reading, keep_after_epoch=None):
+        """ Adds a reading, replacing the oldest if full. Readings older than keep_after_epoch are removed. """
+        with self._buffer_lock:
+            if self._count == self.max_readings:
+                write_index = self._oldest_index
+                self._oldest_index = (self._oldest_index + 1) % self.max_readings
+            else:
+                write_index = (self._oldest_index + self._count) % self.max_readings
+                self._count += 1
+            self._epochs[write_index] = epoch_seconds
+            self._readings[write_index] = reading
+
+            if keep_after_epoch is not None:
+                while self._count > 0 and self._epochs[self._oldest_index] < keep_after_epoch:
+                    self._oldest_index = (self._oldest_index + 1) % self.max_readings
+                    self._count -= 1
+
+    def get_count(self):
+        return self._count
+
+    def get_readings(self, start_epoch=None, end_epoch=None):
+        """ Returns copies of (epochs, readings) numpy arrays in the provided epoch range (Oldest first). """
+        with self._buffer_lock:
+            end_index = self._oldest_index + self._count
+            if end_index <= self.max_readings:
+                epochs = self._epochs[self._oldest_index:end_index].copy()
+                readings = self._readings[self._oldest_index:end_index].copy()
+            else:
+                end_index -= self.max_readings
+                epochs = np.concatenate((self._epochs[self._oldest_index:], self._epochs[:end_index]))
+                readings = np.concatenate((self._readings[self._oldest_index:], self._readings[:end_index]))
+
+        if start_epoch is not None or end_epoch is not None:
+            # A mask is used instead of a search, epochs may go backwards if the system clock is changed
+            in_range = np.ones(epochs.shape[0], dtype=bool)
+            if start_epoch is not None:
+                in_range &= epochs >= start_epoch
+            if end_epoch is not None:
+                in_range &= epochs <= end_epoch
+            epochs = epochs[in_range]
+            readings = readings[in_range]
+        return epochs, readings
+
+    def get_resized(self, max_readings):
+        """ Returns a new ring buffer with the provided size and the newest readings of this one. """
+        new_ring_buffer = CreateMetricRingBuffer(self.metric_name, max_readings)
+        epochs, readings = self.get_readings()
+        for epoch_seconds, reading in zip(epochs[-new_ring_buffer.max_readings:],
+                                          readings[-new_ring_buffer.max_readings:]):
+            new_ring_buffer.add_reading(epoch_seconds, reading)
+        return new_ring_buffer
+
+
+class CreateRecentReadings:
+    """ Holds a ring buffer of recent readings for each sensor reading type. """
+
+    def __init__(self):
+        self._ring_buffers_lock = Lock()
+        self._ring_buffers = {}
+
+    def add_readings(self, readings_dictionary, epoch_seconds=None):
+        """ Adds the numeric readings of a sensor_access readings dictionary. """
+        if np is None or not app_config_access.recent_readings_config.enable_recent_readings:
+            return
+        if epoch_seconds is None:
+            epoch_seconds = time()
+        keep_after_epoch = epoch_seconds - app_config_access.recent_readings_config.recent_readings_hours * 3600
+        for metric_name, reading in readings_dictionary.items():
+            reading = _get_number(reading)
+            if reading is not None:
+                self._get_ring_buffer(metric_name).add_reading(epoch_seconds, reading,
+                                                               keep_after_epoch=keep_after_epoch)
+
+    def get_metric_names(self):
+        with self._ring_buffers_lock:
+            return sorted(self._ring_buffers)
+
+    def get_metric_readings(self, metric_name, seconds=None, start_epoch=None, end_epoch=None):
+        """
+        Returns (epochs, readings) numpy arrays of the provided sensor reading type (Database column name).
+        Use seconds for the newest readings or start/end UTC0 epoch seconds. Returns None if there are none.
+        """
+        with self._ring_buffers_lock:
+            ring_buffer = self._ring_buffers.get(metric_name)
+        if ring_buffer is None:
+            return None
+        if seconds is not None:
+            start_epoch = time() - seconds
+        return ring_buffer.get_readings(start_epoch=start_epoch, end_epoch=end_epoch)
+
+    def get_metric_aggregates(self, metric_name, seconds=None, start_epoch=None, end_epoch=None):
+        """ Returns a dictionary of aggregates for the provided sensor reading type and window or None. """
+        metric_readings = self.get_metric_readings(metric_name, seconds=seconds, start_epoch=start_epoch,
+                                                   end_epoch=end_epoch)
+        if metric_readings is None or metric_readings[0].shape[0] == 0:
+            return None
+        epochs, readings = metric_readings
+        return {
+            "Count": int(readings.shape[0]),
+            "Min": float(readings.min()),
+            "Max": float(readings.max()),
+            "Average": float(readings.mean()),
+            "StandardDeviation": float(readings.std()),
+            "First": float(readings[0]),
+            "Latest": float(readings[-1]),
+            "FirstEpoch": float(epochs[0]),
+            "LatestEpoch": float(epochs[-1])
+        }
+
+    def get_summary_text(self, seconds=None):
+        """ Returns a text summary of the aggregates of every sensor reading type over the provided seconds. """
+        summary_text = ""
+        for metric_name in self.get_metric_names():
+            aggregates = self.get_metric_aggregates(metric_name, seconds=seconds)
+            if aggregates is not None:
+                summary_text += metric_name + " - Readings: " + str(aggregates["Count"]) + \
+                    " || Min: " + str(round(aggregates["Min"], 3)) + \
+                    " || Max: " + str(round(aggregates["Max"], 3)) + \
+                    " || Average: " + str(round(aggregates["Average"], 3)) + \
+                    " || Latest: " + str(round(aggregates["Latest"], 3)) + "\n"
+        return summary_text.strip()
+
+    def clear(self):
+        with self._ring_buffers_lock:
+            self._ring_buffers = {}
+
+    def _get_ring_buffer(self, metric_name):
+        max_readings = app_config_access.recent_readings_config.max_readings_per_metric
+        with self._ring_buffers_lock:
+            ring_buffer = self._ring_buffers.get(metric_name)
+            if ring_buffer is None:
+                ring_buffer = CreateMetricRingBuffer(metric_name, max_readings)
+                self._ring_buffers[metric_name] = ring_buffer
+            elif ring_buffer.max_readings != max(max_readings, 1):
+                ring_buffer = ring_buffer.get_resized(max_readings)
+                self._ring_buffers[metric_name] = ring_buffer
+            return ring_buffer
+
+
+def _get_number(reading):
+    if reading is None or type(reading) is bool:
+        return None
+    try:
+        reading = float(reading)
+    except (TypeError, ValueError):
+        return None
+    if isfinite(reading):
+        return reading
+    return None
+
+
+recent_readings = CreateRecentReadings()
+
+
+def start_recent_readings():
+    """ Adds the readings of every sensor read done through sensor snapshots to recent readings. """
+    if np is None:
+        logger.primary_logger.warning("Recent Readings Disabled - NumPy Missing")
+        return
+    if not app_config_access.recent_readings_config.enable_recent_readings:
+        logger.primary_logger.debug("Recent Readings Disabled in Configuration")
+        return
+    sensor_snapshots.add_readings_listener(recent_readings.add_readings)
+    logger.primary_logger.info(" -- Recent Readings Started")
@@ -0,0 +1,201 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Sensor sampling scheduler.
+One scheduler thread keeps the cadence of every sensor sampling job (Sensor driver updates and trigger checks)
+instead of one sleeping thread per sensor. Due jobs are run in deadline order on a small worker pool, so a slow
+sensor doesn't hold up the others, and a job never runs more than once at a time. Optional jitter keeps jobs
+with the same rate from all using the sensor buses at once. Late starts are counted as missed deadlines
+and samples that can't be taken on time are skipped, keeping each job on its cadence.
+"""
+import heapq
+from time import monotonic
+from random import uniform
+from threading import Thread, Condition
+from queue import Queue
+from operations_modules import logger
+
+# Number of sampling jobs that can run at the same time
+sampling_worker_count = 4
+# A job starting later than this after its deadline counts as a missed deadline
+missed_deadline_seconds = 0.1
+# Jitter used for jobs that don't set it, as a fraction of the job's interval
+default_jitter_interval_fraction = 0.05
+max_default_jitter_seconds = 0.5
+
+
+class CreateSamplingJob:
+    """ A sensor sampling job run by the sampling scheduler every interval_seconds. """
+
+    def __init__(self, job_name, sample_function, interval_seconds, jitter_seconds=None, start_delay_seconds=0.0):
+        self.job_name = job_name
+        self.sample_function = sample_function
+        self.interval_seconds = max(float(interval_seconds), 0.01)
+        self.jitter_seconds = jitter_seconds
+        if self.jitter_seconds is None:
+            self.jitter_seconds = min(self.interval_seconds * default_jitter_interval_fraction,
+                                      max_default_jitter_seconds)
+        self.current_state = "Starting"
+        self.cancelled = False
+
+        # The cadence deadline doesn't include jitter, so jitter doesn't add up over time
+        self.cadence_deadline = monotonic() + start_delay_seconds
+        self.next_deadline = self.cadence_deadline + uniform(0, self.jitter_seconds)
+
+        self.samples_taken = 0
+        self.sample_errors = 0
+        self.missed_deadlines = 0
+        self.skipped_samples = 0
+        self.last_late_seconds = 0.0
+        self.max_late_seconds = 0.0
+        self.last_sample_seconds = 0.0
+
+    def schedule_next_sample(self):
+        """ Sets the next deadline. Samples that would already be late are skipped instead of run back to back. """
+        self.cadence_deadline += self.interval_seconds
+        time_now = monotonic()
+        if self.cadence_deadline < time_now:
+            samples_behind = int((time_now - self.cadence_deadline) // self.interval_seconds) + 1
+            self.skipped_samples += samples_behind
+            self.cadence_deadline += samples_behind * self.interval_seconds
+        self.next_deadline = self.cadence_deadline + uniform(0, self.jitter_seconds)
+
+    def get_status_text(self):
+        return self.job_name + " - Every " + str(round(self.interval_seconds, 3)) + " Seconds" + \
+            " || Samples: " + str(self.samples_taken) + \
+            " || Errors: " + str(self.sample_errors) + \
+            " || Missed Deadlines: " + str(self.missed_deadlines) + \
+            " || Skipped Samples: " + str(self.skipped_samples) + \
+            " || Max Late: " + str(round(self.max_late_seconds, 3)) + " Seconds" + \
+            " || Last Sample Took: " + str(round(self.last_sample_seconds, 3)) + " Seconds"
+
+
+class CreateSamplingScheduler:
+    """ Runs sensor sampling jobs in deadline order on the sampling workers, started when the first job is added. """
+
+    def __init__(self):
+        self._jobs_condition = Condition()
+        # Heap of [next_deadline, job_number, job]
+        self._jobs_heap = []
+        self._jobs_list = []
+        self._jobs_added = 0
+        self._scheduler_thread = None
+        self._due_jobs_queue = Queue()
+
+    def add_job(self, job_name, sample_function, interval_seconds, jitter_seconds=None, start_delay_seconds=0.0):
+        """
+        Runs sample_function every interval_seconds, starting after start_delay_seconds.
+        Jitter defaults to a small fraction of the interval. Returns the job (CreateSamplingJob).
+        """
+        sampling_job = CreateSamplingJob(job_name, sample_function, interval_seconds, jitter_seconds=jitter_seconds,
+                                         start_delay_seconds=start_delay_seconds)
+        with self._jobs_condition:
+            self._jobs_list.append(sampling_job)
+            self._add_to_heap(sampling_job)
+            if self._scheduler_thread is None:
+                for worker_number in range(sampling_worker_count):
+                    worker_name = "Sensor Sampling Worker " + str(worker_number + 1)
+                    sampling_worker = Thread(target=self._sampling_worker_loop, name=worker_name)
+                    sampling_worker.daemon = True
+                    sampling_worker.start()
+                self._scheduler_thread = Thread(target=self._scheduler_loop, name="Sensor Sampling Scheduler")
+                self._scheduler_thread.daemon = True
+                self._scheduler_thread.start()
+            self._jobs_condition.notify()
+        logger.primary_logger.debug("Sampling Scheduler - Added " + sampling_job.get_status_text())
+        return sampling_job
+
+    def remove_job(self, sampling_job):
+        """ Stops the provided job. A sample already running is finished. """
+        with self._jobs_condition:
+            sampling_job.cancelled = True
+            sampling_job.current_state = "Disabled"
+            if sampling_job in self._jobs_list:
+                self._jobs_list.remove(sampling_job)
+            self._jobs_condition.notify()
+
+    def get_jobs_list(self):
+        with self._jobs_condition:
+            return [sampling_job for sampling_job in self._jobs_list if not sampling_job.cancelled]
+
+    def get_missed_deadlines_count(self):
+        missed_deadlines = 0
+        for sampling_job in self.get_jobs_list():
+            missed_deadlines += sampling_job.missed_deadlines
+        return missed_deadlines
+
+    def get_status_text(self):
+        jobs_list = self.get_jobs_list()
+        if len(jobs_list) == 0:
+            return "No Jobs"
+        return str(len(jobs_list)) + " Jobs / " + str(self.get_missed_deadlines_count()) + " Missed Deadlines"
+
+    def _add_to_heap(self, sampling_job):
+        self._jobs_added += 1
+        heapq.heappush(self._jobs_heap, [sampling_job.next_deadline, self._jobs_added, sampling_job])
+
+    def _scheduler_loop(self):
+        logger.primary_logger.debug(" -- Sensor Sampling Scheduler Started")
+        while True:
+            with self._jobs_condition:
+                if len(self._jobs_heap) == 0:
+                    self._jobs_condition.wait()
+                    continue
+                next_deadline, _, sampling_job = self._jobs_heap[0]
+                if sampling_job.cancelled:
+                    heapq.heappop(self._jobs_heap)
+                    continue
+                wait_seconds = next_deadline - monotonic()
+                if wait_seconds > 0:
+                    # Woken early if a job is added or removed
+                    self._jobs_condition.wait(wait_seconds)
+                    continue
+                heapq.heappop(self._jobs_heap)
+            # The job is added back to the heap once it's done, so it's never run twice at the same time
+            self._due_jobs_queue.put(sampling_job)
+
+    def _sampling_worker_loop(self):
+        while True:
+            self._run_job(self._due_jobs_queue.get())
+
+    def _run_job(self, sampling_job):
+        start_time = monotonic()
+        sampling_job.last_late_seconds = start_time - sampling_job.next_deadline
+        sampling_job.max_late_seconds = max(sampling_job.max_late_seconds, sampling_job.last_late_seconds)
+        if sampling_job.last_late_seconds > missed_deadline_seconds:
+            sampling_job.missed_deadlines += 1
+
+        try:
+            sampling_job.sample_function()
+            sampling_job.samples_taken += 1
+            sampling_job.current_state = "Running"
+        except Exception as error:
+            sampling_job.sample_errors += 1
+            sampling_job.current_state = "Error"
+            logger.primary_logger.warning("Sampling Scheduler - " + sampling_job.job_name + " Failed: " + str(error))
+        sampling_job.last_sample_seconds = monotonic() - start_time
+
+        with self._jobs_condition:
+            if not sampling_job.cancelled:
+                sampling_job.schedule_next_sample()
+                self._add_to_heap(sampling_job)
+                self._jobs_condition.notify()
+
+
+sampling_scheduler = CreateSamplingScheduler()
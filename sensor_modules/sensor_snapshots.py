@@ -0,0 +1,94 @@
+"""
+    KootNet Sensors is a collection of programs and scripts to deploy,
+    interact with, and collect readings from various Sensors.
+    Copyright (C) 2018  Chad Ermacora  chad.ermacora@gmail.com
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+--------------------------------------------------------------------------
+Sensor reading snapshots.
+Readings from sensor_access functions are kept for a configurable number of seconds per sensor, so the
+Interval recorder, MQTT, displays, triggers, online services and the Web Portal asking for the same
+sensor within that time share one hardware read.
+Readings listeners are called with every hardware read, so other modules can use the readings without
+reading the sensor again.
+"""
+from time import monotonic
+from threading import Lock
+from functools import wraps
+from configuration_modules import app_config_access
+
+
+class CreateSensorSnapshots:
+    """ Keeps the newest reading of each sensor and reads the sensor again once it's too old. """
+
+    def __init__(self):
+        self._snapshots_lock = Lock()
+        # {sensor_name: [Lock, reading_time, readings]}
+        self._snapshots = {}
+        self._readings_listeners = []
+
+    def add_readings_listener(self, readings_listener):
+        """ Adds a function called with the readings of every sensor read (Not called for snapshot readings). """
+        self._readings_listeners.append(readings_listener)
+
+    def get_readings(self, sensor_name, sensor_function):
+        """ Returns the snapshot readings of sensor_name, reading the sensor with sensor_function if needed. """
+        snapshot_seconds = app_config_access.sensor_snapshots_config.get_snapshot_seconds(sensor_name)
+        if snapshot_seconds <= 0:
+            return self._read_sensor(sensor_function)
+
+        with self._snapshots_lock:
+            if sensor_name not in self._snapshots:
+                self._snapshots[sensor_name] = [Lock(), None, None]
+            sensor_snapshot = self._snapshots[sensor_name]
+
+        # Callers asking while the sensor is being read wait for that reading instead of reading it again
+        with sensor_snapshot[0]:
+            if sensor_snapshot[1] is None or monotonic() - sensor_snapshot[1] > snapshot_seconds:
+                sensor_snapshot[2] = self._read_sensor(sensor_function)
+                sensor_snapshot[1] = monotonic()
+            readings = sensor_snapshot[2]
+        if type(readings) is dict:
+            return dict(readings)
+        return readings
+
+    def _read_sensor(self, sensor_function):
+        readings = sensor_function()
+        if readings is not None:
+            for readings_listener in self._readings_listeners:
+                readings_listener(readings)
+        return readings
+
+    def clear_snapshots(self):
+        """ Removes all snapshots, the next request of each sensor reads the sensor. """
+        with self._snapshots_lock:
+            for sensor_snapshot in self._snapshots.values():
+                sensor_snapshot[1] = None
+
+
+sensor_snapshots = CreateSensorSnapshots()
+
+
+def sensor_snapshot(sensor_name):
+    """
+    Decorator for sensor_access functions. Readings are shared through sensor_snapshots,
+    the undecorated function (function.__wrapped__) always uses the sensor.
+    """
+    def snapshot_decorator(sensor_function):
+        @wraps(sensor_function)
+        def get_snapshot_readings():
+            return sensor_snapshots.get_readings(sensor_name, sensor_function)
+        return get_snapshot_readings
+    return snapshot_decorator
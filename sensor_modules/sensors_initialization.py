@@ -16,44 +16,88 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+from time import perf_counter
+from threading import Thread, Lock
 from operations_modules import logger
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
-from sensor_modules import kootnet_dummy_sensors as _kootnet_dummy_sensors
-from sensor_modules import raspberry_pi_system as _raspberry_pi_system
-from sensor_modules.pimoroni import pimoroni_enviroplus as _pimoroni_enviroplus
-from sensor_modules.pimoroni import pimoroni_pms5003 as _pimoroni_pms5003
-from sensor_modules.pimoroni import pimoroni_vl53l1x as _pimoroni_vl53l1x
-from sensor_modules.pimoroni import pimoroni_enviro as _pimoroni_enviro
-from sensor_modules.pimoroni import pimoroni_lsm303d as _pimoroni_lsm303d
-from sensor_modules.pimoroni import pimoroni_bmp280 as _pimoroni_bmp280
-from sensor_modules.pimoroni import pimoroni_bh1745 as _pimoroni_bh1745
-from sensor_modules.pimoroni import pimoroni_msa301 as _pimoroni_msa301
-from sensor_modules.pimoroni import pimoroni_1_12_mono_oled as _pimoroni_1_12_mono_oled
-from sensor_modules.pimoroni import pimoroni_icm20948 as _pimoroni_icm20948
-from sensor_modules.pimoroni import pimoroni_0_96_spi_colour_lcd as _pimoroni_0_96_spi_colour_lcd
-from sensor_modules.pimoroni import pimoroni_11x7_led_matrix as _pimoroni_11x7_led_matrix
-from sensor_modules.pimoroni import pimoroni_bme680 as _pimoroni_bme680
-from sensor_modules.pimoroni import pimoroni_bme280 as _pimoroni_bme280
-from sensor_modules.pimoroni import pimoroni_mcp9600 as _pimoroni_mcp9600
-from sensor_modules.pimoroni import pimoroni_as7262 as _pimoroni_as7262
-from sensor_modules.pimoroni import pimoroni_sgp30 as _pimoroni_sgp30
-from sensor_modules.pimoroni import pimoroni_veml6075 as _pimoroni_veml6075
-from sensor_modules.pimoroni import pimoroni_mics6814 as _pimoroni_mics6814
-from sensor_modules.pimoroni import pimoroni_ltr_559 as _pimoroni_ltr_559
-from sensor_modules.pimoroni import pimoroni_rv3028 as _pimoroni_rv3028
-from sensor_modules.pimoroni import pimoroni_pa1010d as _pimoroni_pa1010d
-from sensor_modules.pimoroni import pimoroni_weather_hat as _pimoroni_weather_hat
-from sensor_modules import raspberry_pi_sensehat as _raspberry_pi_sense_hat
-from sensor_modules import sensirion_sps30 as _sensirion_sps30
-from sensor_modules import maxim_dallas_1_wire_multi as _maxim_dallas_1_wire_multi
 from sensor_modules.no_sensors_dummy_sensors import CreateNoSensorsDummySensor
+from sensor_modules.sensor_providers import get_sensor_providers
 from sensor_modules.sensor_compatibility_checks import check_installed_sensors_compatibility
 from http_server.flask_blueprints.atpro.atpro_notifications import atpro_notifications
 
+# Seconds to wait for a sensor driver to initialize before starting without it
+# Drivers that finish after their timeout are used as soon as they are ready
+driver_init_timeout_seconds = 30
+slow_driver_init_timeout_seconds = 90
+
+# Installed sensor, sensor access variable, driver module, driver class, driver keyword arguments & init timeout
+# Driver modules are only imported if the sensor is installed
+raspberry_pi_system_definition = [
+    "raspberry_pi", "raspberry_pi_a", "sensor_modules.raspberry_pi_system", "CreateRPSystem", {},
+    driver_init_timeout_seconds
+]
+sensor_driver_definitions = [
+    ["raspberry_pi_sense_hat", "rp_sense_hat_a", "sensor_modules.raspberry_pi_sensehat", "CreateRPSenseHAT", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_bh1745", "pimoroni_bh1745_a", "sensor_modules.pimoroni.pimoroni_bh1745", "CreateBH1745", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_as7262", "pimoroni_as7262_a", "sensor_modules.pimoroni.pimoroni_as7262", "CreateAS7262", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_bme680", "pimoroni_bme680_a", "sensor_modules.pimoroni.pimoroni_bme680", "CreateBME680", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_bme280", "pimoroni_bme280_a", "sensor_modules.pimoroni.pimoroni_bme280", "CreateBME280", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_mcp9600", "pimoroni_mcp9600_a", "sensor_modules.pimoroni.pimoroni_mcp9600", "CreateMCP9600", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_bmp280", "pimoroni_bmp280_a", "sensor_modules.pimoroni.pimoroni_bmp280", "CreateBMP280", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_enviro", "pimoroni_enviro_a", "sensor_modules.pimoroni.pimoroni_enviro", "CreateEnviro", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_enviro2", "pimoroni_enviro2_a", "sensor_modules.pimoroni.pimoroni_enviroplus", "CreateEnviroPlus",
+     {"enviro_hw_ver_2_w_screen": True}, driver_init_timeout_seconds],
+    ["pimoroni_enviroplus", "pimoroni_enviroplus_a", "sensor_modules.pimoroni.pimoroni_enviroplus",
+     "CreateEnviroPlus", {}, driver_init_timeout_seconds],
+    ["pimoroni_pms5003", "pimoroni_pms5003_a", "sensor_modules.pimoroni.pimoroni_pms5003", "CreatePimoroniPMS5003",
+     {}, slow_driver_init_timeout_seconds],
+    ["pimoroni_sgp30", "pimoroni_sgp30_a", "sensor_modules.pimoroni.pimoroni_sgp30", "CreateSGP30", {},
+     slow_driver_init_timeout_seconds],
+    ["pimoroni_msa301", "pimoroni_msa301_a", "sensor_modules.pimoroni.pimoroni_msa301", "CreateMSA301", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_lsm303d", "pimoroni_lsm303d_a", "sensor_modules.pimoroni.pimoroni_lsm303d", "CreateLSM303D", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_icm20948", "pimoroni_icm20948_a", "sensor_modules.pimoroni.pimoroni_icm20948", "CreateICM20948", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_ltr_559", "pimoroni_ltr_559_a", "sensor_modules.pimoroni.pimoroni_ltr_559", "CreateLTR559", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_vl53l1x", "pimoroni_vl53l1x_a", "sensor_modules.pimoroni.pimoroni_vl53l1x", "CreateVL53L1X", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_veml6075", "pimoroni_veml6075_a", "sensor_modules.pimoroni.pimoroni_veml6075", "CreateVEML6075", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_mics6814", "pimoroni_mics6814_a", "sensor_modules.pimoroni.pimoroni_mics6814", "CreateMICS6814", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_rv3028", "pimoroni_rv3028_a", "sensor_modules.pimoroni.pimoroni_rv3028", "CreateRV3028", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_pa1010d", "pimoroni_pa1010d_a", "sensor_modules.pimoroni.pimoroni_pa1010d", "CreatePA1010D", {},
+     slow_driver_init_timeout_seconds],
+    ["pimoroni_matrix_11x7", "pimoroni_matrix_11x7_a", "sensor_modules.pimoroni.pimoroni_11x7_led_matrix",
+     "CreateMatrix11x7", {}, driver_init_timeout_seconds],
+    ["pimoroni_st7735", "pimoroni_st7735_a", "sensor_modules.pimoroni.pimoroni_0_96_spi_colour_lcd", "CreateST7735",
+     {}, driver_init_timeout_seconds],
+    ["pimoroni_mono_oled_luma", "pimoroni_mono_oled_luma_a", "sensor_modules.pimoroni.pimoroni_1_12_mono_oled",
+     "CreateLumaOLED", {}, driver_init_timeout_seconds],
+    ["sensirion_sps30", "sensirion_sps30_a", "sensor_modules.sensirion_sps30", "CreateSPS30", {},
+     slow_driver_init_timeout_seconds],
+    ["w1_therm_sensor", "w1_therm_sensor_a", "sensor_modules.maxim_dallas_1_wire_multi", "CreateW1ThermSenor", {},
+     driver_init_timeout_seconds],
+    ["pimoroni_weather_hat", "pimoroni_weather_hat_a", "sensor_modules.pimoroni.pimoroni_weather_hat",
+     "CreateWeatherHAT", {}, driver_init_timeout_seconds]
+]
+
 
 class CreateSensorAccess:
     def __init__(self, first_start=False):
+        start_time = perf_counter()
         if first_start:
             logger.primary_logger.info(" -- Initializing Sensors")
             # Create "dummy" sensor class placeholders. Helps prevent errors under unusual circumstances
@@ -85,6 +129,10 @@ class CreateSensorAccess:
             self.pimoroni_weather_hat_a = CreateNoSensorsDummySensor()
             self.sensirion_sps30_a = CreateNoSensorsDummySensor()
             self.w1_therm_sensor_a = CreateNoSensorsDummySensor()
+            self.sensor_providers = {}
+            self.initialization_seconds = {}
+            self._initialization_lock = Lock()
+            self._timed_out_drivers = []
         else:
             logger.primary_logger.info(" -- Re-initializing Sensors")
 
@@ -92,101 +140,22 @@ class CreateSensorAccess:
             check_installed_sensors_compatibility()
             installed_sensors = app_config_access.installed_sensors
             try:
-                # Initialize sensor access, based on installed sensors file
                 # Raspberry Pi System is created first to enable I2C, SPI & Wifi
                 # This is to ensure they are enabled for the other hardware Sensors
-                if installed_sensors.raspberry_pi and not self.raspberry_pi_a.initialized_sensor:
-                    self.raspberry_pi_a = _raspberry_pi_system.CreateRPSystem()
-                    self.raspberry_pi_a.initialized_sensor = True
-                if installed_sensors.raspberry_pi_sense_hat and not self.rp_sense_hat_a.initialized_sensor:
-                    self.rp_sense_hat_a = _raspberry_pi_sense_hat.CreateRPSenseHAT()
-                    self.rp_sense_hat_a.initialized_sensor = True
-                if installed_sensors.pimoroni_bh1745 and not self.pimoroni_bh1745_a.initialized_sensor:
-                    self.pimoroni_bh1745_a = _pimoroni_bh1745.CreateBH1745()
-                    self.pimoroni_bh1745_a.initialized_sensor = True
-                if installed_sensors.pimoroni_as7262 and not self.pimoroni_as7262_a.initialized_sensor:
-                    self.pimoroni_as7262_a = _pimoroni_as7262.CreateAS7262()
-                    self.pimoroni_as7262_a.initialized_sensor = True
-                if installed_sensors.pimoroni_bme680 and not self.pimoroni_bme680_a.initialized_sensor:
-                    self.pimoroni_bme680_a = _pimoroni_bme680.CreateBME680()
-                    self.pimoroni_bme680_a.initialized_sensor = True
-                if installed_sensors.pimoroni_bme280 and not self.pimoroni_bme280_a.initialized_sensor:
-                    self.pimoroni_bme280_a = _pimoroni_bme280.CreateBME280()
-                    self.pimoroni_bme280_a.initialized_sensor = True
-                if installed_sensors.pimoroni_mcp9600 and not self.pimoroni_mcp9600_a.initialized_sensor:
-                    self.pimoroni_mcp9600_a = _pimoroni_mcp9600.CreateMCP9600()
-                    self.pimoroni_mcp9600_a.initialized_sensor = True
-                if installed_sensors.pimoroni_bmp280 and not self.pimoroni_bmp280_a.initialized_sensor:
-                    self.pimoroni_bmp280_a = _pimoroni_bmp280.CreateBMP280()
-                    self.pimoroni_bmp280_a.initialized_sensor = True
-                if installed_sensors.pimoroni_enviro and not self.pimoroni_enviro_a.initialized_sensor:
-                    self.pimoroni_enviro_a = _pimoroni_enviro.CreateEnviro()
-                    self.pimoroni_enviro_a.initialized_sensor = True
-                if installed_sensors.pimoroni_enviro2 and not self.pimoroni_enviro2_a.initialized_sensor:
-                    self.pimoroni_enviro2_a = _pimoroni_enviroplus.CreateEnviroPlus(enviro_hw_ver_2_w_screen=True)
-                    self.pimoroni_enviro2_a.initialized_sensor = True
-                if installed_sensors.pimoroni_enviroplus and not self.pimoroni_enviroplus_a.initialized_sensor:
-                    self.pimoroni_enviroplus_a = _pimoroni_enviroplus.CreateEnviroPlus()
-                    self.pimoroni_enviroplus_a.initialized_sensor = True
-                if installed_sensors.pimoroni_pms5003 and not self.pimoroni_pms5003_a.initialized_sensor:
-                    self.pimoroni_pms5003_a = _pimoroni_pms5003.CreatePimoroniPMS5003()
-                    self.pimoroni_pms5003_a.initialized_sensor = True
-                if installed_sensors.pimoroni_sgp30 and not self.pimoroni_sgp30_a.initialized_sensor:
-                    self.pimoroni_sgp30_a = _pimoroni_sgp30.CreateSGP30()
-                    self.pimoroni_sgp30_a.initialized_sensor = True
-                if installed_sensors.pimoroni_msa301 and not self.pimoroni_msa301_a.initialized_sensor:
-                    self.pimoroni_msa301_a = _pimoroni_msa301.CreateMSA301()
-                    self.pimoroni_msa301_a.initialized_sensor = True
-                if installed_sensors.pimoroni_lsm303d and not self.pimoroni_lsm303d_a.initialized_sensor:
-                    self.pimoroni_lsm303d_a = _pimoroni_lsm303d.CreateLSM303D()
-                    self.pimoroni_lsm303d_a.initialized_sensor = True
-                if installed_sensors.pimoroni_icm20948 and not self.pimoroni_icm20948_a.initialized_sensor:
-                    self.pimoroni_icm20948_a = _pimoroni_icm20948.CreateICM20948()
-                    self.pimoroni_icm20948_a.initialized_sensor = True
-                if installed_sensors.pimoroni_ltr_559 and not self.pimoroni_ltr_559_a.initialized_sensor:
-                    self.pimoroni_ltr_559_a = _pimoroni_ltr_559.CreateLTR559()
-                    self.pimoroni_ltr_559_a.initialized_sensor = True
-                if installed_sensors.pimoroni_vl53l1x and not self.pimoroni_vl53l1x_a.initialized_sensor:
-                    self.pimoroni_vl53l1x_a = _pimoroni_vl53l1x.CreateVL53L1X()
-                    self.pimoroni_vl53l1x_a.initialized_sensor = True
-                if installed_sensors.pimoroni_veml6075 and not self.pimoroni_veml6075_a.initialized_sensor:
-                    self.pimoroni_veml6075_a = _pimoroni_veml6075.CreateVEML6075()
-                    self.pimoroni_veml6075_a.initialized_sensor = True
-                if installed_sensors.pimoroni_mics6814 and not self.pimoroni_mics6814_a.initialized_sensor:
-                    self.pimoroni_mics6814_a = _pimoroni_mics6814.CreateMICS6814()
-                    self.pimoroni_mics6814_a.initialized_sensor = True
-                if installed_sensors.pimoroni_rv3028 and not self.pimoroni_rv3028_a.initialized_sensor:
-                    self.pimoroni_rv3028_a = _pimoroni_rv3028.CreateRV3028()
-                    self.pimoroni_rv3028_a.initialized_sensor = True
-                if installed_sensors.pimoroni_pa1010d and not self.pimoroni_pa1010d_a.initialized_sensor:
-                    self.pimoroni_pa1010d_a = _pimoroni_pa1010d.CreatePA1010D()
-                    self.pimoroni_pa1010d_a.initialized_sensor = True
-                if installed_sensors.pimoroni_matrix_11x7 and not self.pimoroni_matrix_11x7_a.initialized_sensor:
-                    self.pimoroni_matrix_11x7_a = _pimoroni_11x7_led_matrix.CreateMatrix11x7()
-                    self.pimoroni_matrix_11x7_a.initialized_sensor = True
-                if installed_sensors.pimoroni_st7735 and not self.pimoroni_st7735_a.initialized_sensor:
-                    self.pimoroni_st7735_a = _pimoroni_0_96_spi_colour_lcd.CreateST7735()
-                    self.pimoroni_st7735_a.initialized_sensor = True
-                if installed_sensors.pimoroni_mono_oled_luma and not self.pimoroni_mono_oled_luma_a.initialized_sensor:
-                    self.pimoroni_mono_oled_luma_a = _pimoroni_1_12_mono_oled.CreateLumaOLED()
-                    self.pimoroni_mono_oled_luma_a.initialized_sensor = True
-                if installed_sensors.sensirion_sps30 and not self.sensirion_sps30_a.initialized_sensor:
-                    self.sensirion_sps30_a = _sensirion_sps30.CreateSPS30()
-                    self.sensirion_sps30_a.initialized_sensor = True
-                if installed_sensors.w1_therm_sensor and not self.w1_therm_sensor_a.initialized_sensor:
-                    self.w1_therm_sensor_a = _maxim_dallas_1_wire_multi.CreateW1ThermSenor()
-                    self.w1_therm_sensor_a.initialized_sensor = True
-                if installed_sensors.pimoroni_weather_hat and not self.pimoroni_weather_hat_a.initialized_sensor:
-                    self.pimoroni_weather_hat_a = _pimoroni_weather_hat.CreateWeatherHAT()
-                    self.pimoroni_weather_hat_a.initialized_sensor = True
+                driver_definitions = []
+                for driver_definition in [raspberry_pi_system_definition] + sensor_driver_definitions:
+                    installed_sensor, variable_name = driver_definition[0], driver_definition[1]
+                    if getattr(installed_sensors, installed_sensor) and \
+                            not getattr(self, variable_name).initialized_sensor:
+                        driver_definitions.append(driver_definition)
+                if len(driver_definitions) and driver_definitions[0] is raspberry_pi_system_definition:
+                    self._initialize_drivers(driver_definitions[:1])
+                    driver_definitions = driver_definitions[1:]
+                self._initialize_drivers(driver_definitions)
+                # Drivers turn off their installed sensor setting if they fail, done from multiple threads
+                installed_sensors.update_configuration_settings_list()
                 if not first_start:
-                    app_cached_variables.restart_interval_recording_thread = True
-                    app_cached_variables.restart_all_trigger_threads = True
-                    app_cached_variables.restart_mini_display_thread = True
-                    app_cached_variables.restart_mqtt_publisher_thread = True
-                    app_cached_variables.restart_weather_underground_thread = True
-                    app_cached_variables.restart_luftdaten_thread = True
-                    app_cached_variables.restart_open_sense_map_thread = True
+                    self._restart_sensor_services()
                     atpro_notifications.manage_service_restart()
             except Exception as error:
                 logger.sensors_logger.critical(" -- Hardware Sensor Initializations: " + str(error))
@@ -197,7 +166,85 @@ class CreateSensorAccess:
             app_config_access.installed_sensors.kootnet_dummy_sensor = dummy_sensor
 
         if app_config_access.installed_sensors.kootnet_dummy_sensor:
-            self.dummy_sensors = _kootnet_dummy_sensors.CreateDummySensors()
+            dummy_sensors_import = __import__("sensor_modules.kootnet_dummy_sensors", fromlist=["CreateDummySensors"])
+            self.dummy_sensors = dummy_sensors_import.CreateDummySensors()
             log_msg2 = "Readings will be randomly generated for any missing sensor types"
             logger.sensors_logger.warning(" - Dummy Sensors Enabled, " + log_msg2)
-        logger.primary_logger.info(" -- Sensors Initialized")
+
+        # Sensor reads look up their provider instead of checking every installed sensor
+        self.sensor_providers = get_sensor_providers(self)
+        init_seconds = str(round(perf_counter() - start_time, 3))
+        logger.primary_logger.info(" -- Sensors Initialized in " + init_seconds + " Seconds")
+        logger.primary_logger.info(" -- Sensor Initialization Times: " + self.get_initialization_report_text())
+
+    def _initialize_drivers(self, driver_definitions):
+        """
+        Initializes the provided sensor drivers concurrently, each on its own thread.
+        Waits for each driver up to its timeout (counted from the start), slower drivers are used when ready.
+        Sensors on the same bus are at different addresses & each I2C transfer is atomic in the kernel.
+        """
+        start_time = perf_counter()
+        init_threads = []
+        for driver_definition in driver_definitions:
+            with self._initialization_lock:
+                self.initialization_seconds.pop(driver_definition[0], None)
+            init_thread = Thread(target=self._initialize_driver, args=[[driver_definition, start_time]])
+            init_thread.daemon = True
+            init_thread.start()
+            init_threads.append([driver_definition, init_thread])
+
+        for driver_definition, init_thread in init_threads:
+            installed_sensor, timeout_seconds = driver_definition[0], driver_definition[5]
+            init_thread.join(max(timeout_seconds - (perf_counter() - start_time), 0))
+            with self._initialization_lock:
+                if installed_sensor not in self.initialization_seconds:
+                    self._timed_out_drivers.append(installed_sensor)
+                    log_msg = " -- " + driver_definition[3] + " Initialization Timed Out after "
+                    logger.sensors_logger.error(log_msg + str(timeout_seconds) + " Seconds, Started without it")
+
+    def _initialize_driver(self, driver_settings):
+        driver_definition, start_time = driver_settings
+        installed_sensor, variable_name, module_name, class_name, class_kwargs, timeout_seconds = driver_definition
+
+        sensor_driver = None
+        try:
+            driver_import = __import__(module_name, fromlist=[class_name])
+            sensor_driver = getattr(driver_import, class_name)(**class_kwargs)
+            sensor_driver.initialized_sensor = True
+        except Exception as error:
+            logger.sensors_logger.critical(" -- " + class_name + " Initialization: " + str(error))
+
+        with self._initialization_lock:
+            self.initialization_seconds[installed_sensor] = round(perf_counter() - start_time, 3)
+            if sensor_driver is not None:
+                setattr(self, variable_name, sensor_driver)
+            driver_timed_out = installed_sensor in self._timed_out_drivers
+            if driver_timed_out:
+                self._timed_out_drivers.remove(installed_sensor)
+
+        if driver_timed_out and sensor_driver is not None:
+            log_msg = " -- " + class_name + " Initialized after " + str(self.initialization_seconds[installed_sensor])
+            logger.sensors_logger.warning(log_msg + " Seconds, Restarting Sensor Recording Services to use it")
+            self.sensor_providers = get_sensor_providers(self)
+            self._restart_sensor_services()
+
+    def get_initialization_report_text(self):
+        """ Returns the seconds each sensor driver took to initialize, slowest first, as text. """
+        with self._initialization_lock:
+            initialization_seconds = sorted(self.initialization_seconds.items(), key=lambda item: -item[1])
+        if len(initialization_seconds) == 0:
+            return "No Hardware Sensors Initialized"
+        report_text = ""
+        for installed_sensor, init_seconds in initialization_seconds:
+            report_text += installed_sensor + " " + str(init_seconds) + " Sec, "
+        return report_text[:-2]
+
+    @staticmethod
+    def _restart_sensor_services():
+        app_cached_variables.restart_interval_recording_thread = True
+        app_cached_variables.restart_mini_display_thread = True
+        app_cached_variables.restart_mqtt_publisher_thread = True
+        app_cached_variables.restart_weather_underground_thread = True
+        app_cached_variables.restart_luftdaten_thread = True
+        app_cached_variables.restart_open_sense_map_thread = True
+        app_cached_variables.restart_imu_capture_thread = True
@@ -16,16 +16,18 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from time import sleep
+from abc import ABC, abstractmethod
 from datetime import datetime
 from operations_modules import logger
-from operations_modules.app_generic_classes import CreateMonitoredThread
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
-from operations_modules import sqlite_database
+from operations_modules.sqlite_write_queue import queue_sql_write
 from sensor_modules import sensor_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
 
 database_variables = app_cached_variables.database_variables
+# Delay to allow cached variables like sensor IP & hostname to populate
+trigger_start_delay_seconds = 10
 
 
 class _CreateHighLowTriggerThreadData:
@@ -194,130 +196,38 @@ class _CreateHighLowTriggerThreadData:
         }
 
 
-class _SingleTriggerThread:
-    def __init__(self, custom_trigger_variables):
-        self.current_state = "Disabled"
+class _CreateHighLowTrigger(ABC):
+    """
+    High/Low trigger check run by the sensor sampling scheduler every sleep_duration seconds.
+    Subclasses provide _check_readings for single or multiple reading triggers.
+    """
 
+    def __init__(self, custom_trigger_variables):
         self.custom_trigger_variables = custom_trigger_variables
-        if self.custom_trigger_variables["enabled"]:
-            self.current_state = "Starting"
-            if self.custom_trigger_variables["get_reading_func"]() is not None:
-                self.low_trigger = self.custom_trigger_variables["low_trigger"]
-                self.high_trigger = self.custom_trigger_variables["high_trigger"]
-
-                while not app_cached_variables.restart_all_trigger_threads:
-                    try:
-                        sensor_reading = self.custom_trigger_variables["get_reading_func"]()
-                        sensor_reading = sensor_reading[self.custom_trigger_variables["database_column"]]
-                        reading_taken_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                        if self.high_trigger > sensor_reading > self.low_trigger:
-                            if self.current_state != "Normal":
-                                self.current_state = "Normal"
-                                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state)
-                        elif sensor_reading < self.low_trigger:
-                            if self.current_state != "Low":
-                                self.current_state = "Low"
-                                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state)
-                        elif sensor_reading > self.high_trigger:
-                            if self.current_state != "High":
-                                self.current_state = "High"
-                                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state)
-                    except Exception as error:
-                        log_msg = "Trigger problem in '" + str(self.custom_trigger_variables["database_column"])
-                        logger.primary_logger.error(log_msg + "' Trigger Thread: " + str(error))
-
-                    sleep_fraction_interval = 5
-                    if self.custom_trigger_variables["sleep_duration"] < 5:
-                        sleep_fraction_interval = self.custom_trigger_variables["sleep_duration"]
-                    sleep_total = 0
-                    while sleep_total < self.custom_trigger_variables["sleep_duration"] \
-                            and not app_cached_variables.restart_all_trigger_threads:
-                        sleep(sleep_fraction_interval)
-                        sleep_total += sleep_fraction_interval
-            else:
-                log_msg = "High/Low Triggers: " + str(custom_trigger_variables["database_column"])
-                logger.primary_logger.info(log_msg + ": Sensor Missing")
-                self.current_state = "Sensor Missing"
-                while not app_cached_variables.restart_all_trigger_threads:
-                    sleep(10)
+        self.current_state = "Starting"
+        self.sampling_job = sampling_scheduler.add_job(
+            "High/Low Trigger " + str(custom_trigger_variables["database_column"]), self.check_trigger,
+            custom_trigger_variables["sleep_duration"], start_delay_seconds=trigger_start_delay_seconds
+        )
 
-    def _write_readings_to_sql(self, reading_datetime, reading, trigger_state):
+    def check_trigger(self):
         try:
-            sql_data = [str(reading_datetime), app_cached_variables.hostname, str(reading), trigger_state]
-            sql_string = "INSERT OR IGNORE INTO TriggerData (" + \
-                         database_variables.all_tables_datetime + "," + \
-                         database_variables.sensor_name + "," + \
-                         self.custom_trigger_variables["database_column"] + "," + \
-                         database_variables.trigger_state + \
-                         ") VALUES (?,?,?,?)"
-            sqlite_database.write_to_sql_database(sql_string, sql_data)
+            sensor_readings = self.custom_trigger_variables["get_reading_func"]()
+            if sensor_readings is None:
+                if self.current_state != "Sensor Missing":
+                    log_msg = "High/Low Triggers: " + str(self.custom_trigger_variables["database_column"])
+                    logger.primary_logger.info(log_msg + ": Sensor Missing")
+                    self.current_state = "Sensor Missing"
+                return
+            reading_taken_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+            self._check_readings(sensor_readings, reading_taken_at)
         except Exception as error:
-            log_msg = "Trigger '" + str(self.custom_trigger_variables["database_column"])
-            logger.primary_logger.error(log_msg + "' Recording Failure: " + str(error))
-
-
-class _MultiTriggerThread:
-    def __init__(self, custom_trigger_variables):
-        self.current_state = []
-        for _ in custom_trigger_variables["database_column"]:
-            self.current_state.append("Disabled")
-        if custom_trigger_variables["enabled"]:
-            for index, _ in enumerate(custom_trigger_variables["database_column"]):
-                self.current_state[index] = "Starting"
-            if custom_trigger_variables["get_reading_func"]() is not None:
-                while not app_cached_variables.restart_all_trigger_threads:
-                    try:
-                        sensor_readings = custom_trigger_variables["get_reading_func"]()
-                        reading_taken_at = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-                        db_col_list = custom_trigger_variables["database_column"]
-                        trig_low_list = custom_trigger_variables["low_trigger"]
-                        trig_high_list = custom_trigger_variables["high_trigger"]
-                        if sensor_readings is not None:
-                            for reading_db_name, reading in sensor_readings.items():
-                                index = 0
-                                db_col = reading_db_name
-                                column_found = False
-                                for i, column in enumerate(db_col_list):
-                                    if column == reading_db_name:
-                                        column_found = True
-                                        index = i
-                                        db_col = column
-                                if column_found:
-                                    trig_low = trig_low_list[index]
-                                    trig_high = trig_high_list[index]
-                                    if trig_low < reading < trig_high:
-                                        if self.current_state[index] != "Normal":
-                                            self.current_state[index] = "Normal"
-                                            self._write_readings_to_sql(reading_taken_at, reading,
-                                                                        self.current_state[index], db_col)
-                                    elif trig_low > reading:
-                                        if self.current_state[index] != "Low":
-                                            self.current_state[index] = "Low"
-                                            self._write_readings_to_sql(reading_taken_at, reading,
-                                                                        self.current_state[index], db_col)
-                                    elif trig_high < reading:
-                                        if self.current_state[index] != "High":
-                                            self.current_state[index] = "High"
-                                            self._write_readings_to_sql(reading_taken_at, reading,
-                                                                        self.current_state[index], db_col)
-                    except Exception as error:
-                        log_msg = "Trigger problem in '" + str(custom_trigger_variables["database_column"])
-                        logger.primary_logger.error(log_msg + "' Trigger Thread: " + str(error))
+            log_msg = "Trigger problem in '" + str(self.custom_trigger_variables["database_column"])
+            logger.primary_logger.error(log_msg + "' Trigger Thread: " + str(error))
 
-                    sleep_fraction_interval = 5
-                    if custom_trigger_variables["sleep_duration"] < 5:
-                        sleep_fraction_interval = custom_trigger_variables["sleep_duration"]
-                    sleep_total = 0
-                    while sleep_total < custom_trigger_variables["sleep_duration"] \
-                            and not app_cached_variables.restart_all_trigger_threads:
-                        sleep(sleep_fraction_interval)
-                        sleep_total += sleep_fraction_interval
-            else:
-                log_msg = "High/Low Triggers: " + str(custom_trigger_variables["database_column"])
-                logger.primary_logger.info(log_msg + ": Sensor Missing")
-                self.current_state = "Sensor Missing"
-                while not app_cached_variables.restart_all_trigger_threads:
-                    sleep(10)
+    @abstractmethod
+    def _check_readings(self, sensor_readings, reading_taken_at):
+        """ Records the readings if they changed the trigger state (Low, Normal or High). """
 
     @staticmethod
     def _write_readings_to_sql(reading_datetime, reading, trigger_state, database_column):
@@ -329,115 +239,97 @@ class _MultiTriggerThread:
                          database_column + "," + \
                          database_variables.trigger_state + \
                          ") VALUES (?,?,?,?)"
-            sqlite_database.write_to_sql_database(sql_string, sql_data)
+            queue_sql_write(sql_string, sql_data)
         except Exception as error:
             log_msg = "Trigger '" + str(database_column) + "' Recording Failure: " + str(error)
             logger.primary_logger.error(log_msg)
 
 
+class _SingleTrigger(_CreateHighLowTrigger):
+    def _check_readings(self, sensor_readings, reading_taken_at):
+        database_column = self.custom_trigger_variables["database_column"]
+        low_trigger = self.custom_trigger_variables["low_trigger"]
+        high_trigger = self.custom_trigger_variables["high_trigger"]
+
+        sensor_reading = sensor_readings[database_column]
+        if high_trigger > sensor_reading > low_trigger:
+            if self.current_state != "Normal":
+                self.current_state = "Normal"
+                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state, database_column)
+        elif sensor_reading < low_trigger:
+            if self.current_state != "Low":
+                self.current_state = "Low"
+                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state, database_column)
+        elif sensor_reading > high_trigger:
+            if self.current_state != "High":
+                self.current_state = "High"
+                self._write_readings_to_sql(reading_taken_at, sensor_reading, self.current_state, database_column)
+
+
+class _MultiTrigger(_CreateHighLowTrigger):
+    def __init__(self, custom_trigger_variables):
+        # Current state of each database column
+        self.column_states = []
+        for _ in custom_trigger_variables["database_column"]:
+            self.column_states.append("Starting")
+        _CreateHighLowTrigger.__init__(self, custom_trigger_variables)
+
+    def _check_readings(self, sensor_readings, reading_taken_at):
+        self.current_state = "Running"
+        db_col_list = self.custom_trigger_variables["database_column"]
+        trig_low_list = self.custom_trigger_variables["low_trigger"]
+        trig_high_list = self.custom_trigger_variables["high_trigger"]
+        for reading_db_name, reading in sensor_readings.items():
+            if reading_db_name in db_col_list:
+                index = db_col_list.index(reading_db_name)
+                trig_low = trig_low_list[index]
+                trig_high = trig_high_list[index]
+                if trig_low < reading < trig_high:
+                    if self.column_states[index] != "Normal":
+                        self.column_states[index] = "Normal"
+                        self._write_readings_to_sql(reading_taken_at, reading, "Normal", reading_db_name)
+                elif trig_low > reading:
+                    if self.column_states[index] != "Low":
+                        self.column_states[index] = "Low"
+                        self._write_readings_to_sql(reading_taken_at, reading, "Low", reading_db_name)
+                elif trig_high < reading:
+                    if self.column_states[index] != "High":
+                        self.column_states[index] = "High"
+                        self._write_readings_to_sql(reading_taken_at, reading, "High", reading_db_name)
+
+
 def start_trigger_high_low_recording_server():
     if app_config_access.trigger_high_low.enable_high_low_trigger_recording:
-        # Sleep to allow cached variables like sensor IP & hostname to populate
-        sleep(10)
         logger.primary_logger.info(" -- High/Low Trigger Recording Started")
 
         tmp_tv = _CreateHighLowTriggerThreadData()
         if app_config_access.trigger_high_low.cpu_temperature_enabled:
-            app_cached_variables.trigger_high_low_cpu_temp = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.system_temperature],
-                thread_name="High/Low Trigger CPU Temperature"
-            )
-
+            app_cached_variables.trigger_high_low_cpu_temp = _SingleTrigger(tmp_tv.system_temperature)
         if app_config_access.trigger_high_low.env_temperature_enabled:
-            app_cached_variables.trigger_high_low_env_temp = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.env_temperature],
-                thread_name="High/Low Trigger Env Temperature"
-            )
-
+            app_cached_variables.trigger_high_low_env_temp = _SingleTrigger(tmp_tv.env_temperature)
         if app_config_access.trigger_high_low.pressure_enabled:
-            app_cached_variables.trigger_high_low_pressure = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.pressure],
-                thread_name="High/Low Trigger Pressure"
-            )
-
+            app_cached_variables.trigger_high_low_pressure = _SingleTrigger(tmp_tv.pressure)
         if app_config_access.trigger_high_low.humidity_enabled:
-            app_cached_variables.trigger_high_low_humidity = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.humidity],
-                thread_name="High/Low Trigger Humidity"
-            )
-
+            app_cached_variables.trigger_high_low_humidity = _SingleTrigger(tmp_tv.humidity)
         if app_config_access.trigger_high_low.altitude_enabled:
-            app_cached_variables.trigger_high_low_altitude = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.altitude],
-                thread_name="High/Low Trigger Altitude"
-            )
-
+            app_cached_variables.trigger_high_low_altitude = _SingleTrigger(tmp_tv.altitude)
         if app_config_access.trigger_high_low.distance_enabled:
-            app_cached_variables.trigger_high_low_distance = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.distance],
-                thread_name="High/Low Trigger Distance"
-            )
-
+            app_cached_variables.trigger_high_low_distance = _SingleTrigger(tmp_tv.distance)
         if app_config_access.trigger_high_low.lumen_enabled:
-            app_cached_variables.trigger_high_low_lumen = CreateMonitoredThread(
-                _SingleTriggerThread,
-                args=[tmp_tv.lumen],
-                thread_name="High/Low Trigger Lumen"
-            )
-
+            app_cached_variables.trigger_high_low_lumen = _SingleTrigger(tmp_tv.lumen)
         if app_config_access.trigger_high_low.colour_enabled:
-            app_cached_variables.trigger_high_low_visible_colours = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.colours],
-                thread_name="High/Low Trigger Colours"
-            )
-
+            app_cached_variables.trigger_high_low_visible_colours = _MultiTrigger(tmp_tv.colours)
         if app_config_access.trigger_high_low.ultra_violet_enabled:
-            app_cached_variables.trigger_high_low_ultra_violet = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.ultra_violet],
-                thread_name="High/Low Trigger Ultra Violet"
-            )
-
+            app_cached_variables.trigger_high_low_ultra_violet = _MultiTrigger(tmp_tv.ultra_violet)
         if app_config_access.trigger_high_low.gas_enabled:
-            app_cached_variables.trigger_high_low_gas = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.gas_resistance],
-                thread_name="High/Low Trigger Gas"
-            )
-
+            app_cached_variables.trigger_high_low_gas = _MultiTrigger(tmp_tv.gas_resistance)
         if app_config_access.trigger_high_low.particulate_matter_enabled:
-            app_cached_variables.trigger_high_low_particulate_matter = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.particulate_matter],
-                thread_name="High/Low Trigger Particulate Matter"
-            )
-
+            app_cached_variables.trigger_high_low_particulate_matter = _MultiTrigger(tmp_tv.particulate_matter)
         if app_config_access.trigger_high_low.accelerometer_enabled:
-            app_cached_variables.trigger_high_low_accelerometer = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.accelerometer],
-                thread_name="High/Low Trigger Accelerometer"
-            )
-
+            app_cached_variables.trigger_high_low_accelerometer = _MultiTrigger(tmp_tv.accelerometer)
         if app_config_access.trigger_high_low.magnetometer_enabled:
-            app_cached_variables.trigger_high_low_magnetometer = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.magnetometer],
-                thread_name="High/Low Trigger Magnetometer"
-            )
-
+            app_cached_variables.trigger_high_low_magnetometer = _MultiTrigger(tmp_tv.magnetometer)
         if app_config_access.trigger_high_low.gyroscope_enabled:
-            app_cached_variables.trigger_high_low_gyroscope = CreateMonitoredThread(
-                _MultiTriggerThread,
-                args=[tmp_tv.gyroscope],
-                thread_name="High/Low Trigger Gyroscope"
-            )
+            app_cached_variables.trigger_high_low_gyroscope = _MultiTrigger(tmp_tv.gyroscope)
     else:
         logger.primary_logger.debug("High/Low Trigger Recording Disabled in Configuration")
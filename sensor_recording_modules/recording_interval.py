@@ -19,10 +19,15 @@
 import datetime
 from time import sleep
 from operations_modules import logger
+from operations_modules import file_locations
 from operations_modules.app_generic_classes import CreateMonitoredThread
 from operations_modules import app_cached_variables
 from configuration_modules import app_config_access
-from operations_modules import sqlite_database
+from operations_modules.sqlite_write_queue import queue_sql_write
+from operations_modules.sqlite_typed_storage import get_typed_insert_query, start_typed_storage_migration
+from operations_modules.sqlite_narrow_storage import get_narrow_insert_rows
+from operations_modules.sqlite_rollups import queue_rollup_updates, start_rollup_backfill
+from operations_modules.sqlite_database_shards import get_write_shard_location
 from sensor_modules.system_access import get_uptime_minutes
 from sensor_modules import sensor_access as sa
 
@@ -47,23 +52,45 @@ def _interval_recording():
     app_cached_variables.interval_recording_thread.current_state = "Running"
     logger.primary_logger.info(" -- Interval Recording Started")
     app_cached_variables.restart_interval_recording_thread = False
+    interval_recording_config = app_config_access.interval_recording_config
+    typed_storage = interval_recording_config.storage_format == interval_recording_config.storage_format_typed
+    narrow_storage = interval_recording_config.storage_format == interval_recording_config.storage_format_narrow
+    if typed_storage:
+        start_typed_storage_migration()
+    rollup_backfill_started = False
     while not app_cached_variables.restart_interval_recording_thread:
         try:
             new_sensor_data = _get_interval_sensor_readings()
-            sql_column_names = ""
-            sql_value_placeholders = ""
-            sql_data = []
-            for index, data in new_sensor_data.items():
-                sql_column_names += index + ","
-                sql_value_placeholders += "?,"
-                sql_data.append(str(data))
-            sql_column_names = sql_column_names[:-1]
-            sql_value_placeholders = sql_value_placeholders[:-1]
-
-            sql_string = "INSERT OR IGNORE INTO " + db_v.table_interval + " (" + sql_column_names + ") " + \
-                         "VALUES (" + sql_value_placeholders + ")"
-
-            sqlite_database.write_to_sql_database(sql_string, sql_data)
+            database_location = file_locations.sensor_database
+            if interval_recording_config.enable_database_shards:
+                database_location = get_write_shard_location(new_sensor_data[db_v.all_tables_datetime])
+            if narrow_storage:
+                # Metric IDs are always kept in the main database, so they stay the same across shards
+                sql_string, sql_rows = get_narrow_insert_rows(new_sensor_data)
+                for sql_data in sql_rows:
+                    queue_sql_write(sql_string, sql_data, sql_database_location=database_location)
+            elif typed_storage:
+                sql_string, sql_data = get_typed_insert_query(new_sensor_data)
+                queue_sql_write(sql_string, sql_data, sql_database_location=database_location)
+            else:
+                sql_column_names = ""
+                sql_value_placeholders = ""
+                sql_data = []
+                for index, data in new_sensor_data.items():
+                    sql_column_names += index + ","
+                    sql_value_placeholders += "?,"
+                    sql_data.append(str(data))
+                sql_column_names = sql_column_names[:-1]
+                sql_value_placeholders = sql_value_placeholders[:-1]
+
+                sql_string = "INSERT OR IGNORE INTO " + db_v.table_interval + " (" + sql_column_names + ") " + \
+                             "VALUES (" + sql_value_placeholders + ")"
+                queue_sql_write(sql_string, sql_data, sql_database_location=database_location)
+            queue_rollup_updates(new_sensor_data)
+            if not rollup_backfill_started:
+                # Started once the first recording has queued the live rollups start
+                start_rollup_backfill()
+                rollup_backfill_started = True
         except Exception as error:
             logger.primary_logger.error("Interval Recording Failure: " + str(error))
 
@@ -88,12 +115,19 @@ def _get_interval_sensor_readings():
                          db_v.sensor_name: app_cached_variables.hostname,
                          db_v.ip: app_cached_variables.ip}
 
+    # Derived metrics (Corrected Temperature, Dew Point, etc.) are calculated once per recording
+    derived_readings = {}
+    if interval_recording_config.env_temperature_enabled or interval_recording_config.dew_point_enabled:
+        derived_readings = _get_derived_readings()
+
     if interval_recording_config.sensor_uptime_enabled:
         return_dictionary = _update_dic_with_sensor_reading(get_uptime_minutes, return_dictionary)
     if interval_recording_config.cpu_temperature_enabled:
         return_dictionary = _update_dic_with_sensor_reading(sa.get_cpu_temperature, return_dictionary)
     if interval_recording_config.env_temperature_enabled:
-        return_dictionary = _add_env_temp_and_offset(return_dictionary)
+        return_dictionary = _add_derived_readings(
+            derived_readings, [db_v.env_temperature, db_v.env_temperature_offset], return_dictionary
+        )
     if interval_recording_config.pressure_enabled:
         return_dictionary = _update_dic_with_sensor_reading(sa.get_pressure, return_dictionary)
     if interval_recording_config.altitude_enabled:
@@ -101,7 +135,7 @@ def _get_interval_sensor_readings():
     if interval_recording_config.humidity_enabled:
         return_dictionary = _update_dic_with_sensor_reading(sa.get_humidity, return_dictionary)
     if interval_recording_config.dew_point_enabled:
-        return_dictionary = _update_dic_with_sensor_reading(sa.get_dew_point, return_dictionary)
+        return_dictionary = _add_derived_readings(derived_readings, [db_v.dew_point], return_dictionary)
     if interval_recording_config.distance_enabled:
         return_dictionary = _update_dic_with_sensor_reading(sa.get_distance, return_dictionary)
     if interval_recording_config.gas_enabled:
@@ -135,15 +169,16 @@ def _update_dic_with_sensor_reading(sensor_function, sensor_dic):
     return sensor_dic
 
 
-def _add_env_temp_and_offset(sensor_dic):
+def _get_derived_readings():
     try:
-        reading = sa.get_environment_temperature()
-        if reading is not None:
-            sensor_dic.update(reading)
-            reading2 = sa.get_environment_temperature(temperature_correction=False)
-            final_reading = round(reading[db_v.env_temperature] - reading2[db_v.env_temperature], 5)
-            sensor_dic.update({db_v.env_temperature_offset: final_reading})
+        return sa.get_derived_readings()
     except Exception as error:
-        log_msg = "Interval Recording - Adding Env Temp & Offset Sensor Data to Dictionary: "
-        logger.primary_logger.warning(log_msg + str(error))
+        logger.primary_logger.warning("Interval Recording - Getting Derived Sensor Readings: " + str(error))
+    return {}
+
+
+def _add_derived_readings(derived_readings, column_names, sensor_dic):
+    for column_name in column_names:
+        if column_name in derived_readings:
+            sensor_dic[column_name] = derived_readings[column_name]
     return sensor_dic
@@ -16,69 +16,71 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
-from time import sleep
 from datetime import datetime
 from operations_modules import logger
-from operations_modules.app_generic_classes import CreateMonitoredThread
-from operations_modules.app_generic_functions import thread_function
 from configuration_modules import app_config_access
 from operations_modules.app_cached_variables import database_variables
 from operations_modules import app_cached_variables
-from operations_modules.sqlite_database import write_to_sql_database
+from operations_modules.sqlite_write_queue import queue_sql_write
 from sensor_modules import sensor_access
+from sensor_modules.sensor_sampling_scheduler import sampling_scheduler
 
 installed_sensors = app_config_access.installed_sensors
 trigger_variances = app_config_access.trigger_variances
+# Delay to allow cached variables like sensor IP & hostname to populate
+trigger_start_delay_seconds = 10
 
 
-class StartTriggerVariance:
+class CreateTriggerVariance:
+    """
+    Variance trigger check run by the sensor sampling scheduler every sleep_time seconds.
+    Each sample is compared to the previous one, both are recorded if they differ by more than the variance.
+    """
+
     def __init__(self, get_sensor_readings, sql_column_name_list, sleep_time, variances_list):
-        self.readings_per_sensor_get = len(sql_column_name_list)
-        sleep_fraction_interval = 1
-        if sleep_fraction_interval > sleep_time:
-            sleep_fraction_interval = sleep_time
-        if get_sensor_readings() is not None:
-            while not app_cached_variables.restart_all_trigger_threads:
-                try:
-                    readings1 = get_sensor_readings()
-                    datetime_stamp1 = get_datetime_stamp()
-                    sleep_total = 0
-                    while sleep_total < sleep_time and not app_cached_variables.restart_all_trigger_threads:
-                        sleep(sleep_fraction_interval)
-                        sleep_total += sleep_fraction_interval
-                    readings2 = get_sensor_readings()
-                    datetime_stamp2 = get_datetime_stamp()
-                    if self.readings_per_sensor_get == 1:
-                        readings1 = readings1[sql_column_name_list[0]]
-                        readings2 = readings2[sql_column_name_list[0]]
-                        if abs(readings2 - readings1) > variances_list[0]:
-                            self.record_trigger(readings1, sql_column_name_list[0], datetime_stamp1)
-                            self.record_trigger(readings2, sql_column_name_list[0], datetime_stamp2)
-                    else:
-                        for reading_db_name, reading in readings1.items():
-                            index = 0
-                            db_col = reading_db_name
-                            column_found = False
-                            for i, column in enumerate(sql_column_name_list):
-                                if column == reading_db_name:
-                                    column_found = True
-                                    index = i
-                                    db_col = column
-                            if column_found:
-                                readings_cur_1 = readings1[db_col]
-                                readings_cur_2 = readings2[db_col]
-                                variance = variances_list[index]
-                                if abs(readings_cur_1 - readings_cur_2) > variance:
-                                    self.record_trigger(readings_cur_1, db_col, datetime_stamp1)
-                                    self.record_trigger(readings_cur_2, db_col, datetime_stamp2)
-                except Exception as error:
-                    log_msg = "Trigger Variance Recording Error in " + str(sql_column_name_list)
-                    logger.primary_logger.error(log_msg + ": " + str(error))
-                    sleep(60)
-        else:
-            logger.primary_logger.warning("Triggers: " + str(sql_column_name_list) + ": Sensor Missing")
-            while not app_cached_variables.restart_all_trigger_threads:
-                sleep(10)
+        self.get_sensor_readings = get_sensor_readings
+        self.sql_column_name_list = sql_column_name_list
+        self.variances_list = variances_list
+        self.current_state = "Starting"
+
+        self.previous_readings = None
+        self.previous_datetime_stamp = None
+        # Prevents a sample from being recorded twice when it's different from both its neighbours
+        self.last_recorded_datetime_stamps = {}
+
+        self.sampling_job = sampling_scheduler.add_job(
+            "Trigger Variance " + str(sql_column_name_list), self.check_variance, sleep_time,
+            start_delay_seconds=trigger_start_delay_seconds
+        )
+
+    def check_variance(self):
+        try:
+            readings = self.get_sensor_readings()
+            datetime_stamp = get_datetime_stamp()
+            if readings is None:
+                if self.current_state != "Sensor Missing":
+                    logger.primary_logger.warning("Triggers: " + str(self.sql_column_name_list) + ": Sensor Missing")
+                    self.current_state = "Sensor Missing"
+                self.previous_readings = None
+                return
+            self.current_state = "Running"
+
+            if self.previous_readings is not None:
+                for index, sql_column_name in enumerate(self.sql_column_name_list):
+                    if sql_column_name in readings and sql_column_name in self.previous_readings:
+                        reading1 = self.previous_readings[sql_column_name]
+                        reading2 = readings[sql_column_name]
+                        if abs(reading2 - reading1) > self.variances_list[index]:
+                            if self.last_recorded_datetime_stamps.get(sql_column_name) != self.previous_datetime_stamp:
+                                self.record_trigger(reading1, sql_column_name, self.previous_datetime_stamp)
+                            self.record_trigger(reading2, sql_column_name, datetime_stamp)
+                            self.last_recorded_datetime_stamps[sql_column_name] = datetime_stamp
+            self.previous_readings = readings
+            self.previous_datetime_stamp = datetime_stamp
+        except Exception as error:
+            log_msg = "Trigger Variance Recording Error in " + str(self.sql_column_name_list)
+            logger.primary_logger.error(log_msg + ": " + str(error))
+            self.previous_readings = None
 
     @staticmethod
     def record_trigger(reading, sql_column_name, datetime_stamp):
@@ -95,74 +97,66 @@ class StartTriggerVariance:
             sql_query += "?,"
         sql_query = sql_query[:-1] + ");"
 
-        write_to_sql_database(sql_query, sql_data_list)
+        queue_sql_write(sql_query, sql_data_list)
 
 
 def start_trigger_variance_recording_server():
     if trigger_variances.enable_trigger_variance:
-        thread_function(_trigger_variance_recording)
+        _trigger_variance_recording()
     else:
         logger.primary_logger.debug("Trigger Variance Recording Disabled in Configuration")
 
 
 def _trigger_variance_recording():
     """ Starts recording all enabled sensors to the SQL database based on set trigger variances (set in config). """
-    # Sleep to allow cached variables like sensor IP & hostname to populate
-    sleep(10)
     logger.primary_logger.info(" -- Trigger Variance Recording Started")
     if trigger_variances.cpu_temperature_enabled:
         sensor_get_function = sensor_access.get_cpu_temperature
         sql_column_name_list = [database_variables.system_temperature]
         sleep_time = trigger_variances.cpu_temperature_wait_seconds
         variances_list = [trigger_variances.cpu_temperature_variance]
-        app_cached_variables.trigger_variance_thread_cpu_temp = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="CPU Temperature Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_cpu_temp = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.env_temperature_enabled:
         sensor_get_function = sensor_access.get_environment_temperature
         sql_column_name_list = [database_variables.env_temperature]
         sleep_time = trigger_variances.env_temperature_wait_seconds
         variances_list = [trigger_variances.env_temperature_variance]
-        app_cached_variables.trigger_variance_thread_env_temp = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Environmental Temperature Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_env_temp = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.pressure_enabled:
         sensor_get_function = sensor_access.get_pressure
         sql_column_name_list = [database_variables.pressure]
         sleep_time = trigger_variances.pressure_wait_seconds
         variances_list = [trigger_variances.pressure_variance]
-        app_cached_variables.trigger_variance_thread_pressure = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Pressure Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_pressure = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.altitude_enabled:
         sensor_get_function = sensor_access.get_altitude
         sql_column_name_list = [database_variables.altitude]
         sleep_time = trigger_variances.altitude_wait_seconds
         variances_list = [trigger_variances.altitude_variance]
-        app_cached_variables.trigger_variance_thread_altitude = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Altitude Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_altitude = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.humidity_enabled:
         sensor_get_function = sensor_access.get_humidity
         sql_column_name_list = [database_variables.humidity]
         sleep_time = trigger_variances.humidity_wait_seconds
         variances_list = [trigger_variances.humidity_variance]
-        app_cached_variables.trigger_variance_thread_humidity = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Humidity Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_humidity = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.distance_enabled:
         sensor_get_function = sensor_access.get_distance
         sql_column_name_list = [database_variables.distance]
         sleep_time = trigger_variances.distance_wait_seconds
         variances_list = [trigger_variances.distance_variance]
-        app_cached_variables.trigger_variance_thread_distance = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Distance Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_distance = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.gas_enabled:
         sensor_get_function = sensor_access.get_gas
@@ -171,9 +165,8 @@ def _trigger_variance_recording():
         variances_list = [trigger_variances.gas_resistance_index_variance, trigger_variances.gas_oxidising_variance,
                           trigger_variances.gas_reducing_variance, trigger_variances.gas_nh3_variance]
         sleep_time = trigger_variances.gas_wait_seconds
-        app_cached_variables.trigger_variance_thread_gas = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="GAS Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_gas = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.particulate_matter_enabled:
         sensor_get_function = sensor_access.get_particulate_matter
@@ -185,18 +178,16 @@ def _trigger_variance_recording():
                           trigger_variances.particulate_matter_10_variance]
 
         sleep_time = trigger_variances.particulate_matter_wait_seconds
-        app_cached_variables.trigger_variance_thread_particulate_matter = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Particulate Matter Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_particulate_matter = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.lumen_enabled:
         sensor_get_function = sensor_access.get_lumen
         sql_column_name_list = [database_variables.lumen]
         sleep_time = trigger_variances.lumen_wait_seconds
         variances_list = [trigger_variances.lumen_variance]
-        app_cached_variables.trigger_variance_thread_lumen = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Lumen Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_lumen = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.colour_enabled:
         sensor_get_function = sensor_access.get_ems_colors
@@ -208,18 +199,16 @@ def _trigger_variance_recording():
                           trigger_variances.yellow_variance, trigger_variances.green_variance,
                           trigger_variances.blue_variance, trigger_variances.violet_variance]
 
-        app_cached_variables.trigger_variance_thread_visible_ems = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="EMS Colours Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_visible_ems = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.ultra_violet_enabled:
         sensor_get_function = sensor_access.get_ultra_violet
         sql_column_name_list = [database_variables.ultra_violet_a, database_variables.ultra_violet_b]
         sleep_time = trigger_variances.ultra_violet_wait_seconds
         variances_list = [trigger_variances.ultra_violet_a_variance, trigger_variances.ultra_violet_b_variance]
-        app_cached_variables.trigger_variance_thread_ultra_violet = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Ultra Violet Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_ultra_violet = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.accelerometer_enabled:
         sensor_get_function = sensor_access.get_accelerometer_xyz
@@ -228,9 +217,8 @@ def _trigger_variance_recording():
         variances_list = [trigger_variances.accelerometer_x_variance,
                           trigger_variances.accelerometer_y_variance,
                           trigger_variances.accelerometer_z_variance]
-        app_cached_variables.trigger_variance_thread_accelerometer = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Accelerometer Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_accelerometer = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.magnetometer_enabled:
         sensor_get_function = sensor_access.get_magnetometer_xyz
@@ -239,9 +227,8 @@ def _trigger_variance_recording():
         variances_list = [trigger_variances.magnetometer_x_variance,
                           trigger_variances.magnetometer_y_variance,
                           trigger_variances.magnetometer_z_variance]
-        app_cached_variables.trigger_variance_thread_magnetometer = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Magnetometer Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_magnetometer = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
     if trigger_variances.gyroscope_enabled:
         sensor_get_function = sensor_access.get_gyroscope_xyz
@@ -250,9 +237,8 @@ def _trigger_variance_recording():
         variances_list = [trigger_variances.gyroscope_x_variance,
                           trigger_variances.gyroscope_y_variance,
                           trigger_variances.gyroscope_z_variance]
-        app_cached_variables.trigger_variance_thread_gyroscope = CreateMonitoredThread(
-            StartTriggerVariance, thread_name="Gyroscope Trigger Variance",
-            args=(sensor_get_function, sql_column_name_list, sleep_time, variances_list)
+        app_cached_variables.trigger_variance_thread_gyroscope = CreateTriggerVariance(
+            sensor_get_function, sql_column_name_list, sleep_time, variances_list
         )
 
 
@@ -32,24 +32,14 @@ def auto_set_triggers_wait_time(config, multiplier=10.0, set_lowest=False):
         latency_variables.gyroscope_xyz: 0
     }
 
-    multi_latency_sets = [
-        sensor_access.get_sensors_latency(), sensor_access.get_sensors_latency(),
-        sensor_access.get_sensors_latency(), sensor_access.get_sensors_latency(),
-        sensor_access.get_sensors_latency(), sensor_access.get_sensors_latency()
-    ]
-
+    # Latency is recorded on every sensor read, the 99th percentile covers the slower reads
+    sensor_latency_pull = sensor_access.get_sensors_latency(percentile=99)
     for sensor_name in sensor_names_list:
-        for sensor_latency_pull in multi_latency_sets:
-            try:
-                if sensor_name in sensor_latency_pull:
-                    if sensor_latency_pull[sensor_name] is not None:
-                        new_latency_with_multiplier = sensor_latency_pull[sensor_name] * multiplier
-                        if new_latency_with_multiplier > sensor_latencies[sensor_name]:
-                            sensor_latencies[sensor_name] = new_latency_with_multiplier
-                    else:
-                        sensor_latencies[sensor_name] = 999.999
-            except Exception as error:
-                logger.primary_logger.error("Unable to set " + sensor_name + " wait time: " + str(error))
+        try:
+            if sensor_name in sensor_latency_pull:
+                sensor_latencies[sensor_name] = sensor_latency_pull[sensor_name] * multiplier
+        except Exception as error:
+            logger.primary_logger.error("Unable to set " + sensor_name + " wait time: " + str(error))
     sensor_latencies = _update_zero_entries(sensor_latencies)
     _set_trigger_config_seconds(config, sensor_latencies, set_lowest)
 
@@ -18,150 +18,103 @@
 """
 from datetime import datetime
 program_initialization_start_time = datetime.utcnow()
+import signal
+from sys import exit as sys_exit
 from time import sleep
 from operations_modules import logger
 from operations_modules.initialization_checks import run_program_start_checks
 
-# Ensure files, database & configurations are OK
-run_program_start_checks()
 
-from operations_modules.app_cached_variables import running_with_root, running_as_service
-
-try:
-    from sensor_modules import sensor_access
-except Exception as import_error_raw:
-    import_error_msg = str(import_error_raw)
-    log_message = "-- Failed to Start Kootnet Sensors - Problem Loading Sensor Access: "
-    logger.primary_logger.critical(log_message + import_error_msg)
-    while True:
-        sleep(3600)
-from operations_modules.app_cached_variables_update import start_cached_variables_refresh
-from sensor_recording_modules.recording_interval import start_interval_recording_server
-from sensor_recording_modules.recording_high_low_triggers import start_trigger_high_low_recording_server
-from sensor_recording_modules.recording_triggers import start_trigger_variance_recording_server
-from operations_modules.software_checkin import start_sensor_checkins
-from operations_modules.software_automatic_upgrades import start_automatic_upgrades_server
-from operations_modules.server_hardware_interactive import start_hardware_interactive_server
-from operations_modules.server_display import start_display_server
-from operations_modules.email_server import start_report_email_server
-from operations_modules.email_server import start_graph_email_server
-from mqtt.server_mqtt_publisher import start_mqtt_publisher_server
-from mqtt.server_mqtt_subscriber import start_mqtt_subscriber_server
-from online_services_modules.luftdaten import start_luftdaten_server
-from online_services_modules.weather_underground import start_weather_underground_server
-from online_services_modules.open_sense_map import start_open_sense_map_server
-from mqtt.server_mqtt_broker import start_mqtt_broker_server
-from http_server.server_http import start_https_server
-
-logger.primary_logger.debug(" -- Starting Kootnet Sensor Threads")
-
-try:
-    # Start HTTPS Web Portal Server
-    start_https_server()
-except Exception as error:
-    logger.primary_logger.critical("-- HTTPS Web Portal Server Error: " + str(error))
-
-try:
-    # Start Interval SQL Recording
-    start_interval_recording_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Interval SQL Recording Server Error: " + str(error))
-
-try:
-    # Start High/Low Trigger SQL Recording
-    start_trigger_high_low_recording_server()
-except Exception as error:
-    logger.primary_logger.critical("-- High/Low Trigger SQL Recording Server Error: " + str(error))
-
-try:
-    # Start Variance Trigger SQL Recording
-    start_trigger_variance_recording_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Variance Trigger SQL Recording Server Error: " + str(error))
-
-try:
-    # Start Hardware Interactions Server
-    start_hardware_interactive_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Hardware Interactions Server Error: " + str(error))
-
-try:
-    # Start Display Server
-    start_display_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Display Server Error: " + str(error))
-
-try:
-    # Start the "Call Home" Check-in server.
-    start_sensor_checkins()
-except Exception as error:
-    logger.primary_logger.critical("-- Checkins (Sending) Server Error: " + str(error))
-
-try:
-    # Start Automatic Upgrades Server
-    if running_as_service and running_with_root:
-        start_automatic_upgrades_server()
-    else:
+def _shutdown_signal_received(signal_number, frame):
+    """ Exits normally on SIGTERM (systemctl stop/restart), so queued SQL writes are flushed on exit. """
+    logger.primary_logger.info(" -- Kootnet Sensors Stopping - Received Signal " + str(signal_number))
+    sys_exit(0)
+
+
+# Graph worker processes are started with a clean interpreter that imports this file as __mp_main__
+# Kootnet Sensors is only started when this file is run
+if __name__ == "__main__":
+    # Ensure files, database & configurations are OK
+    run_program_start_checks()
+
+    from operations_modules.app_cached_variables import running_with_root, running_as_service
+
+    try:
+        from sensor_modules import sensor_access
+    except Exception as import_error_raw:
+        import_error_msg = str(import_error_raw)
+        log_message = "-- Failed to Start Kootnet Sensors - Problem Loading Sensor Access: "
+        logger.primary_logger.critical(log_message + import_error_msg)
+        while True:
+            sleep(3600)
+    from configuration_modules import app_config_access
+
+    mqtt_broker_enabled = app_config_access.mqtt_broker_config.enable_mqtt_broker
+    mqtt_subscriber_enabled = app_config_access.mqtt_subscriber_config.enable_mqtt_subscriber
+    luftdaten_enabled = app_config_access.luftdaten_config.luftdaten_enabled
+    weather_underground_enabled = app_config_access.weather_underground_config.weather_underground_enabled
+    open_sense_map_enabled = app_config_access.open_sense_map_config.open_sense_map_enabled
+    automatic_upgrades_enabled = running_as_service and running_with_root
+
+    # Service name, module, start function & if it's started. Modules are only imported for started services
+    # Sensor recording services are started first, so readings are recorded as soon as possible after a cold boot
+    services_start_list = [
+        ["Recent Readings", "sensor_modules.sensor_recent_readings", "start_recent_readings", True],
+        ["Interval SQL Recording Server", "sensor_recording_modules.recording_interval",
+         "start_interval_recording_server", True],
+        ["High/Low Trigger SQL Recording Server", "sensor_recording_modules.recording_high_low_triggers",
+         "start_trigger_high_low_recording_server", True],
+        ["Variance Trigger SQL Recording Server", "sensor_recording_modules.recording_triggers",
+         "start_trigger_variance_recording_server", True],
+        ["IMU Capture Server", "sensor_modules.sensor_imu_capture", "start_imu_capture_server", True],
+        ["HTTPS Web Portal Server", "http_server.server_http", "start_https_server", True],
+        ["Database Retention Server", "operations_modules.sqlite_retention", "start_database_retention_server", True],
+        ["Database Backup Server", "operations_modules.sqlite_backup", "start_database_backup_server", True],
+        ["Hardware Interactions Server", "operations_modules.server_hardware_interactive",
+         "start_hardware_interactive_server", True],
+        ["Display Server", "operations_modules.server_display", "start_display_server", True],
+        ["Checkins (Sending) Server", "operations_modules.software_checkin", "start_sensor_checkins", True],
+        ["Automatic Upgrades Server", "operations_modules.software_automatic_upgrades",
+         "start_automatic_upgrades_server", automatic_upgrades_enabled],
+        ["Reports Email Server", "operations_modules.email_server", "start_report_email_server", True],
+        ["Graph Email Server", "operations_modules.email_server", "start_graph_email_server", True],
+        ["MQTT Broker Server", "mqtt.server_mqtt_broker", "start_mqtt_broker_server", mqtt_broker_enabled],
+        ["MQTT Publisher Server", "mqtt.server_mqtt_publisher", "start_mqtt_publisher_server", True],
+        ["MQTT Subscriber Server", "mqtt.server_mqtt_subscriber", "start_mqtt_subscriber_server",
+         mqtt_subscriber_enabled],
+        ["Luftdaten Server", "online_services_modules.luftdaten", "start_luftdaten_server", luftdaten_enabled],
+        ["Weather Underground Server", "online_services_modules.weather_underground",
+         "start_weather_underground_server", weather_underground_enabled],
+        ["Open Sense Map Server", "online_services_modules.open_sense_map", "start_open_sense_map_server",
+         open_sense_map_enabled],
+        # Updates cached variables that may change like IP and hostname every hour
+        ["Cached Variables Update Server", "operations_modules.app_cached_variables_update",
+         "start_cached_variables_refresh", True]
+    ]
+
+    logger.primary_logger.debug(" -- Starting Kootnet Sensor Threads")
+    if not automatic_upgrades_enabled:
         log_msg = "Kootnet Sensors must be running as a service with root privileges"
         logger.primary_logger.info(" -- Automatic Upgrades Server Disabled - " + log_msg)
-except Exception as error:
-    logger.primary_logger.critical("-- Automatic Upgrades Server Error: " + str(error))
 
-try:
-    # Start Reports Email Server
-    start_report_email_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Reports Email Server Error: " + str(error))
-
-try:
-    # Start Graph Email Server
-    start_graph_email_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Graph Email Server Error: " + str(error))
-
-try:
-    # Start MQTT Broker Server
-    start_mqtt_broker_server()
-except Exception as error:
-    logger.primary_logger.critical("-- MQTT Broker Server Error: " + str(error))
-
-try:
-    # Start MQTT Publisher Server
-    start_mqtt_publisher_server()
-except Exception as error:
-    logger.primary_logger.critical("-- MQTT Publisher Server Error: " + str(error))
-
-try:
-    # Start MQTT Subscriber Server
-    start_mqtt_subscriber_server()
-except Exception as error:
-    logger.primary_logger.critical("-- MQTT Subscriber Server Error: " + str(error))
-
-try:
-    # Start Luftdaten Online Service Server
-    start_luftdaten_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Luftdaten Server Error: " + str(error))
-
-try:
-    # Start Weather Underground Online Service Server
-    start_weather_underground_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Weather Underground Server Error: " + str(error))
-
-try:
-    # Start Open Sense Map Online Service Server
-    start_open_sense_map_server()
-except Exception as error:
-    logger.primary_logger.critical("-- Open Sense Map Server Error: " + str(error))
-
-try:
-    # Updates cached variables that may change like IP and hostname every hour
-    start_cached_variables_refresh()
-except Exception as error:
-    logger.primary_logger.critical("-- Cached Variables Update Server Error: " + str(error))
-
-init_time_seconds = round((datetime.utcnow() - program_initialization_start_time).total_seconds(), 3)
-logger.primary_logger.debug(" -- Thread Initializations Complete: " + str(init_time_seconds) + " Seconds")
-while True:
-    sleep(3600)
+    # Seconds after program start that each service was started
+    services_started_text = ""
+    for service_name, service_module, start_function_name, start_service in services_start_list:
+        if not start_service:
+            logger.primary_logger.debug(service_name + " Not Started - Disabled")
+            continue
+        try:
+            service_import = __import__(service_module, fromlist=[start_function_name])
+            getattr(service_import, start_function_name)()
+        except Exception as error:
+            logger.primary_logger.critical("-- " + service_name + " Error: " + str(error))
+        started_seconds = round((datetime.utcnow() - program_initialization_start_time).total_seconds(), 3)
+        services_started_text += service_name + " " + str(started_seconds) + " Sec, "
+    logger.primary_logger.info(" -- Services Started after: " + services_started_text[:-2])
+
+    signal.signal(signal.SIGTERM, _shutdown_signal_received)
+
+    init_time_seconds = round((datetime.utcnow() - program_initialization_start_time).total_seconds(), 3)
+    logger.primary_logger.debug(" -- Thread Initializations Complete: " + str(init_time_seconds) + " Seconds")
+    while True:
+        sleep(3600)
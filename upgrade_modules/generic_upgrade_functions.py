@@ -47,6 +47,12 @@ from configuration_modules.config_luftdaten import CreateLuftdatenConfiguration
 from configuration_modules.config_open_sense_map import CreateOpenSenseMapConfiguration
 from configuration_modules.config_sensor_control import CreateSensorControlConfiguration
 from configuration_modules.config_sensor_insights import CreateSensorInsightsConfiguration
+from configuration_modules.config_database_retention import CreateDatabaseRetentionConfiguration
+from configuration_modules.config_database_backup import CreateDatabaseBackupConfiguration
+from configuration_modules.config_graph_workers import CreateGraphWorkersConfiguration
+from configuration_modules.config_sensor_snapshots import CreateSensorSnapshotsConfiguration
+from configuration_modules.config_recent_readings import CreateRecentReadingsConfiguration
+from configuration_modules.config_imu_capture import CreateIMUCaptureConfiguration
 from operations_modules.initialization_python_modules import running_on_pi
 
 
@@ -225,6 +231,48 @@ def reset_sensor_insights_config(log_reset=True):
     CreateSensorInsightsConfiguration(load_from_file=False).save_config_to_file()
 
 
+def reset_database_retention_config(log_reset=True):
+    """ Writes a default Database Retention configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** Database Retention Configuration Reset ****")
+    CreateDatabaseRetentionConfiguration(load_from_file=False).save_config_to_file()
+
+
+def reset_database_backup_config(log_reset=True):
+    """ Writes a default Database Backup configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** Database Backup Configuration Reset ****")
+    CreateDatabaseBackupConfiguration(load_from_file=False).save_config_to_file()
+
+
+def reset_graph_workers_config(log_reset=True):
+    """ Writes a default Graph Workers configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** Graph Workers Configuration Reset ****")
+    CreateGraphWorkersConfiguration(load_from_file=False).save_config_to_file()
+
+
+def reset_sensor_snapshots_config(log_reset=True):
+    """ Writes a default Sensor Snapshots configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** Sensor Snapshots Configuration Reset ****")
+    CreateSensorSnapshotsConfiguration(load_from_file=False).save_config_to_file()
+
+
+def reset_recent_readings_config(log_reset=True):
+    """ Writes a default Recent Readings configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** Recent Readings Configuration Reset ****")
+    CreateRecentReadingsConfiguration(load_from_file=False).save_config_to_file()
+
+
+def reset_imu_capture_config(log_reset=True):
+    """ Writes a default IMU Capture configuration file. """
+    if log_reset:
+        logger.primary_logger.warning(" **** IMU Capture Configuration Reset ****")
+    CreateIMUCaptureConfiguration(load_from_file=False).save_config_to_file()
+
+
 def reset_all_configurations(log_reset=True):
     """
     Resets all configuration files to Default settings.
@@ -253,6 +301,12 @@ def reset_all_configurations(log_reset=True):
     reset_open_sense_map_config(log_reset=log_reset)
     reset_sensor_control_config(log_reset=log_reset)
     reset_sensor_insights_config(log_reset=log_reset)
+    reset_database_retention_config(log_reset=log_reset)
+    reset_database_backup_config(log_reset=log_reset)
+    reset_graph_workers_config(log_reset=log_reset)
+    reset_sensor_snapshots_config(log_reset=log_reset)
+    reset_recent_readings_config(log_reset=log_reset)
+    reset_imu_capture_config(log_reset=log_reset)
 
 
 def upgrade_config_load_and_save(configuration_creation_class, upgrade_msg=True, new_location=None):